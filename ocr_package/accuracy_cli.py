@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+"""
+Command line interface for the accuracy-vs-speed harness.
+"""
+
+import os
+import sys
+import json
+import argparse
+from ocr.benchmarks.accuracy import (
+    GOLDEN_SCHEDULE, GOLDEN_BOM, Fixture, load_fixtures, load_settings, render_golden_fixture,
+    run_harness, format_frontier
+)
+
+def main():
+    parser = argparse.ArgumentParser(description="Score pipeline settings against golden CSVs on a speed/accuracy frontier")
+    parser.add_argument("pdf_paths", nargs='*', help="Plans PDFs the golden CSVs were extracted from")
+    parser.add_argument("--schedule", default=GOLDEN_SCHEDULE, help="Golden sign schedule CSV")
+    parser.add_argument("--bom", default=GOLDEN_BOM, help="Golden general sign BOM CSV")
+    parser.add_argument("--fixtures", help="JSON list of fixtures (name, pdf_path, schedule_csv, bom_csv, schedule_pages, bom_pages)")
+    parser.add_argument("--synthetic", metavar="DIR",
+                        help="Render text-layer and scanned fixtures from the golden CSVs into DIR")
+    parser.add_argument("--settings", help="JSON list of settings (name, method, options, fixture_pages_only)")
+    parser.add_argument("--output", "-o", default="accuracy_results.json", help="JSON file to save the results to")
+    
+    args = parser.parse_args()
+    
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else []
+    for pdf_path in args.pdf_paths:
+        if not os.path.exists(pdf_path):
+            print(f"Error: File not found - {pdf_path}")
+            return 1
+        name = os.path.splitext(os.path.basename(pdf_path))[0]
+        fixtures.append(Fixture(name, pdf_path, args.schedule, args.bom))
+    if args.synthetic:
+        for scanned in (False, True):
+            path = os.path.join(args.synthetic, f"golden_{'scanned' if scanned else 'text'}.pdf")
+            fixtures.append(render_golden_fixture(path, args.schedule, args.bom, scanned=scanned))
+    
+    if not fixtures:
+        print("Error: No fixtures given (PDF paths, --fixtures or --synthetic)")
+        return 1
+    
+    settings = load_settings(args.settings) if args.settings else None
+    print(f"Scoring against {len(fixtures)} fixtures: {', '.join(f.name for f in fixtures)}\n")
+    results = run_harness(fixtures, settings)
+    
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    
+    print(f"\nSpeed/accuracy frontier (* = not beaten on both speed and score):")
+    print(format_frontier(results))
+    print(f"\nResults saved to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
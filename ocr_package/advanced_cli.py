@@ -6,14 +6,34 @@ Command line interface for advanced document processing.
 import os
 import sys
 import argparse
+from contextlib import nullcontext
 from ocr.advanced.document_processor import process_document
+from ocr.core.profiles import load_profile
+from ocr.core.progress import ProgressTracker
+from ocr.core.metrics import MetricsExporter
 
 def main():
     parser = argparse.ArgumentParser(description="Process PDF documents with advanced OCR")
     parser.add_argument("pdf_path", help="Path to the PDF file")
     parser.add_argument("--output", "-o", help="Output JSON file path")
-    parser.add_argument("--dpi", "-d", type=int, default=200, help="DPI for rendering (higher = better quality, lower = faster)")
-    parser.add_argument("--workers", "-w", type=int, help="Number of worker processes (default: CPU count - 1)")
+    parser.add_argument("--dpi", "-d", type=int, help="DPI for rendering (higher = better quality, lower = faster; default: 200 or the profile's)")
+    parser.add_argument("--auto-dpi", action="store_true", help="Choose each page's DPI from its text height (--dpi is the baseline)")
+    parser.add_argument("--workers", "-w", type=int, help="Number of worker processes (default: sized from the CPU and memory limits)")
+    parser.add_argument("--two-pass", action="store_true", help="OCR only the regions with BOM keywords or tables at full DPI")
+    parser.add_argument("--refine-dpi", type=int, help="Re-read low-confidence words at this DPI")
+    parser.add_argument("--orientation", choices=["auto", "sample"],
+                        help="Turn rotated sheets upright: detect on every page, or on a few sample pages")
+    parser.add_argument("--staged", action="store_true", help="Render and OCR pages in separate worker pools with a bounded queue between them")
+    parser.add_argument("--transport", choices=["pickle", "shared"], default="pickle",
+                        help="How page results come back from the workers (shared: columnar shared memory buffers)")
+    parser.add_argument("--coarse-dpi", type=int, default=72, help="DPI of the locating pass in two-pass mode")
+    parser.add_argument("--profile", help="Named OCR profile from ocr-autotune (or a profile JSON file)")
+    parser.add_argument("--profiles-file", help="Profiles file to look the profile up in")
+    parser.add_argument("--progress", action="store_true", help="Show pages done, pages/s, ETA and the slowest pages while running")
+    parser.add_argument("--status-file", help="Keep a JSON progress status in this file (replaced atomically)")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port at /metrics")
+    parser.add_argument("--metrics-host", default="127.0.0.1", help="Address the metrics endpoint listens on (default: 127.0.0.1)")
+    parser.add_argument("--metrics-file", help="Write Prometheus metrics to this .prom file for node_exporter's textfile collector")
     
     args = parser.parse_args()
     
@@ -21,6 +41,15 @@ def main():
         print(f"Error: File not found - {args.pdf_path}")
         return
     
+    profile = None
+    if args.profile:
+        try:
+            profile = load_profile(args.profile, args.profiles_file)
+        except KeyError as e:
+            print(f"Error: {e.args[0]}")
+            return
+    dpi = args.dpi or (profile.dpi if profile else 200)
+    
     # Set output path
     if not args.output:
         base_name = os.path.basename(args.pdf_path)
@@ -28,15 +57,36 @@ def main():
     else:
         output_path = args.output
     
+    progress = None
+    if args.progress or args.status_file:
+        progress = ProgressTracker(os.path.basename(args.pdf_path), args.status_file,
+                                   sys.stderr if args.progress else None)
+    
     print(f"Starting advanced document processing on {args.pdf_path}")
-    print(f"DPI: {args.dpi}, Workers: {args.workers or 'Auto'}")
+    print(f"DPI: {dpi}, Workers: {args.workers or 'Auto'}")
+    if profile:
+        print(f"OCR profile: {profile.name}")
+    
+    exporter = None
+    if args.metrics_port is not None or args.metrics_file:
+        exporter = MetricsExporter(args.metrics_port, args.metrics_host, args.metrics_file)
     
-    document = process_document(
-        args.pdf_path,
-        output_path=output_path,
-        dpi=args.dpi,
-        num_workers=args.workers
-    )
+    with exporter if exporter is not None else nullcontext():
+        document = process_document(
+            args.pdf_path,
+            output_path=output_path,
+            dpi=dpi,
+            num_workers=args.workers,
+            two_pass=args.two_pass,
+            coarse_dpi=args.coarse_dpi,
+            refine_dpi=args.refine_dpi,
+            orientation=args.orientation,
+            auto_dpi=args.auto_dpi,
+            profile=profile,
+            staged=args.staged,
+            transport=args.transport,
+            progress=progress
+        )
     
     if document:
         print(f"Document processing completed successfully. Results saved to {output_path}")
@@ -47,6 +97,9 @@ def main():
         print(f"- Elements: {len(document.elements)}")
         print(f"- Title: {document.metadata.get('title', 'Unknown')}")
         print(f"- Author: {document.metadata.get('author', 'Unknown')}")
+        if 'ocr_pixels' in document.metadata:
+            pixels = document.metadata['ocr_pixels']
+            print(f"- OCR pixels: {pixels['coarse'] + pixels['fine']:,} of {pixels['full_pass']:,} for a full pass")
     else:
         print("Document processing failed.")
 
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+"""
+Command line interface for the Tesseract configuration autotuner.
+"""
+
+import os
+import sys
+import argparse
+import pytesseract
+from ocr.benchmarks.autotune import autotune, SEARCH_SPACE, DEFAULT_FLOOR, DEFAULT_SAMPLE, ETA
+from ocr.core.profiles import save_profile, DEFAULT_PROFILES_FILE
+
+def _oem(value):
+    return None if value == "default" else int(value)
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the fastest Tesseract configuration that meets a quality floor")
+    parser.add_argument("pdf_paths", nargs='+', help="PDF files representative of the documents to process")
+    parser.add_argument("--name", "-n", required=True, help="Name of the profile to save")
+    parser.add_argument("--floor", "-f", type=float, default=DEFAULT_FLOOR,
+                        help="Minimum word F1 against the text layer or reference OCR (0-1)")
+    parser.add_argument("--sample", "-s", type=int, default=DEFAULT_SAMPLE, help="Number of sample pages")
+    parser.add_argument("--dpi", type=int, nargs='+', default=SEARCH_SPACE['dpi'], help="DPIs to try")
+    parser.add_argument("--psm", type=int, nargs='+', default=SEARCH_SPACE['psm'], help="Page segmentation modes to try")
+    parser.add_argument("--oem", type=_oem, nargs='+', default=SEARCH_SPACE['oem'],
+                        help="Engine modes to try ('default' for Tesseract's own)")
+    parser.add_argument("--threshold", nargs='+', choices=["global", "otsu", "sauvola", "none"],
+                        default=SEARCH_SPACE['threshold'], help="Threshold methods to try")
+    parser.add_argument("--lang", nargs='+', default=SEARCH_SPACE['lang'], help="Tesseract languages to try, e.g. eng eng+equ")
+    parser.add_argument("--eta", type=int, default=ETA, help="Keep 1/eta of the candidates at each round")
+    parser.add_argument("--profiles-file", default=DEFAULT_PROFILES_FILE, help="JSON file the profile is saved to")
+    
+    args = parser.parse_args()
+    
+    for pdf_path in args.pdf_paths:
+        if not os.path.exists(pdf_path):
+            print(f"Error: File not found - {pdf_path}")
+            return 1
+    
+    space = {'dpi': args.dpi, 'psm': args.psm, 'oem': args.oem, 'threshold': args.threshold, 'lang': args.lang}
+    try:
+        profile = autotune(args.pdf_paths, args.name, args.floor, args.sample, space, args.eta)
+    except pytesseract.TesseractNotFoundError:
+        print("Error: tesseract is not installed or not in PATH")
+        return 1
+    save_profile(profile, args.profiles_file)
+    
+    print(f"\nProfile '{profile.name}' saved to {args.profiles_file}")
+    print(f"- DPI: {profile.dpi}, threshold: {profile.preprocessing.threshold}, language: {profile.lang}")
+    print(f"- Tesseract options: {profile.tesseract_config or 'defaults'}")
+    print(f"- Quality: {profile.notes['quality']:.3f} (floor {args.floor}), {profile.notes['seconds_per_page']:.2f}s per page")
+    print(f"\nUse it with: ocr <pdf> --profile {profile.name}")
+    return 0 if profile.notes['floor_met'] else 2
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,21 +7,123 @@ import os
 import sys
 import argparse
 import glob
-from ocr.batch.processors import batch_process, process_directory
+from contextlib import nullcontext
+from ocr.batch.processors import batch_process, process_directory, parse_page_range
+from ocr.batch.watch import watch_directory, SETTLE_SECONDS, POLL_SECONDS
+from ocr.batch.work_queue import WorkQueue, run_worker, DEFAULT_UNIT_PAGES, LEASE_SECONDS
+from ocr.core.page_dedup import PageHashIndex
+from ocr.core.profiles import load_profile
+from ocr.core.progress import ProgressTracker
+from ocr.core.metrics import MetricsExporter
+
+def expand_files(paths):
+    """Expand wildcards and keep only existing PDF files"""
+    file_list = []
+    for path in paths:
+        if '*' in path:
+            file_list.extend(glob.glob(path))
+        else:
+            file_list.append(path)
+    return [f for f in file_list if f.lower().endswith('.pdf') and os.path.isfile(f)]
+
+def run_queue(args, dpi, profile, dedup):
+    """Submit files to the shared work queue and/or work on it"""
+    queue = WorkQueue(args.queue, lease_seconds=args.lease)
+    if args.files:
+        file_list = expand_files(args.files)
+        if not file_list:
+            print("No PDF files found")
+            return
+        start_page, end_page = parse_page_range(args.page_range)
+        added = queue.submit(file_list, output_dir=args.output_dir, unit_pages=args.unit_pages,
+                             page_range=(start_page, end_page), dpi=dpi, auto_dpi=args.auto_dpi, profile=profile)
+        print(f"Queued {added} work units from {len(file_list)} files in {args.queue}")
+    if args.worker:
+        run_worker(queue, worker_id=args.worker_id, exit_when_done=not args.keep_polling, dedup=dedup)
+    if args.queue_status:
+        status = queue.status()
+        for item in status['progress']:
+            print(f"{item['status']:>10}  {item['units_done']}/{item['units']} units  {item['pdf_path']}")
+        print(f"Units: {status['units']}, files: {status['files']}, workers: {len(status['workers'])}")
+    queue.close()
 
 def main():
     parser = argparse.ArgumentParser(description="Batch process multiple PDF files with OCR")
-    parser.add_argument("files", nargs='+', help="PDF files to process (wildcards supported)")
+    parser.add_argument("files", nargs='*', help="PDF files to process (wildcards supported)")
     parser.add_argument("--output-dir", "-o", help="Directory to save extracted text files")
-    parser.add_argument("--dpi", "-d", type=int, default=200, help="DPI for rendering (lower = faster)")
+    parser.add_argument("--dpi", "-d", type=int, help="DPI for rendering (lower = faster; default: 200 or the profile's)")
+    parser.add_argument("--auto-dpi", action="store_true", help="Choose each page's DPI from its text height (--dpi is the baseline)")
     parser.add_argument("--save-images", "-i", action="store_true", help="Save processed images")
     parser.add_argument("--workers", "-w", type=int, help="Number of worker processes")
     parser.add_argument("--page-range", "-p", help="Page range to process (e.g., '0-5' or '10')")
-    parser.add_argument("--process-dir", action="store_true", help="Process directories instead of files")
+    parser.add_argument("--process-dir", action="store_true", help="Process directories (and their subdirectories) instead of files")
+    parser.add_argument("--no-recursive", action="store_true", help="Do not descend into subdirectories with --process-dir or --watch")
+    parser.add_argument("--watch", metavar="DIR", help="Keep running and process PDFs as they land in DIR")
+    parser.add_argument("--settle", type=float, default=SETTLE_SECONDS, help=f"Seconds a watched file must stay unchanged before it is processed (default: {SETTLE_SECONDS:g})")
+    parser.add_argument("--poll", type=float, default=POLL_SECONDS, help=f"Scan interval of --watch when inotify is unavailable (default: {POLL_SECONDS:g})")
+    parser.add_argument("--force-polling", action="store_true", help="Poll instead of using inotify (e.g. for files written by other NFS clients)")
+    parser.add_argument("--dedup-db", help="SQLite index of OCRed sheets; repeated standard sheets reuse their text")
+    parser.add_argument("--verify-dedup", action="store_true", help="Before reusing a sheet, OCR the regions holding its numbers to confirm they match")
+    parser.add_argument("--profile", help="Named OCR profile from ocr-autotune (or a profile JSON file)")
+    parser.add_argument("--profiles-file", help="Profiles file to look the profile up in")
+    parser.add_argument("--progress", action="store_true", help="Show pages done, pages/s, ETA and the slowest pages while running")
+    parser.add_argument("--status-file", help="Keep a JSON progress status in this file (replaced atomically)")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port at /metrics")
+    parser.add_argument("--metrics-host", default="127.0.0.1", help="Address the metrics endpoint listens on (default: 127.0.0.1)")
+    parser.add_argument("--metrics-file", help="Write Prometheus metrics to this .prom file for node_exporter's textfile collector")
+    parser.add_argument("--queue", help="Shared SQLite work queue; the files are submitted to it as page-range units "
+                                        "for --worker processes on any host instead of being processed here")
+    parser.add_argument("--worker", action="store_true", help="Process units from --queue until it is drained")
+    parser.add_argument("--worker-id", help="Name of this worker in the queue (default: host:pid)")
+    parser.add_argument("--keep-polling", action="store_true", help="Keep waiting for new submissions once the queue is drained")
+    parser.add_argument("--unit-pages", type=int, default=DEFAULT_UNIT_PAGES, help=f"Pages per work unit (default: {DEFAULT_UNIT_PAGES})")
+    parser.add_argument("--lease", type=float, default=LEASE_SECONDS, help=f"Seconds before an unrenewed unit lease is reclaimed (default: {LEASE_SECONDS})")
+    parser.add_argument("--queue-status", action="store_true", help="Print the progress of --queue")
     
     args = parser.parse_args()
+    if (args.worker or args.queue_status) and not args.queue:
+        parser.error("--worker and --queue-status need --queue")
+    if not args.files and not args.queue and not args.watch:
+        parser.error("no files given")
+    dedup = PageHashIndex(args.dedup_db, verify=args.verify_dedup) if args.dedup_db else None
+    profile = None
+    if args.profile:
+        try:
+            profile = load_profile(args.profile, args.profiles_file)
+        except KeyError as e:
+            print(f"Error: {e.args[0]}")
+            return
+    dpi = args.dpi or (profile.dpi if profile else 200)
+    progress = None
+    if args.progress or args.status_file:
+        progress = ProgressTracker("batch", args.status_file, sys.stderr if args.progress else None)
+    
+    exporter = None
+    if args.metrics_port is not None or args.metrics_file:
+        exporter = MetricsExporter(args.metrics_port, args.metrics_host, args.metrics_file)
     
-    if args.process_dir:
+    with exporter if exporter is not None else nullcontext():
+        run(args, dpi, profile, dedup, progress)
+
+def run(args, dpi, profile, dedup, progress):
+    """Run the mode selected on the command line"""
+    if args.watch:
+        watch_directory(
+            args.watch,
+            output_dir=args.output_dir,
+            dpi=dpi,
+            max_workers=args.workers,
+            dedup=dedup,
+            auto_dpi=args.auto_dpi,
+            profile=profile,
+            recursive=not args.no_recursive,
+            settle_seconds=args.settle,
+            poll_seconds=args.poll,
+            use_inotify=False if args.force_polling else None
+        )
+    elif args.queue:
+        run_queue(args, dpi, profile, dedup)
+    elif args.process_dir:
         # Process directories
         for directory in args.files:
             if os.path.isdir(directory):
@@ -29,24 +131,20 @@ def main():
                 process_directory(
                     directory,
                     output_dir=args.output_dir,
-                    dpi=args.dpi,
+                    dpi=dpi,
                     save_images=args.save_images,
                     max_workers=args.workers,
-                    page_range=args.page_range
+                    page_range=args.page_range,
+                    dedup=dedup,
+                    auto_dpi=args.auto_dpi,
+                    profile=profile,
+                    recursive=not args.no_recursive,
+                    progress=progress
                 )
             else:
                 print(f"Skipping {directory} - not a directory")
     else:
-        # Expand any wildcards in file paths
-        file_list = []
-        for path in args.files:
-            if '*' in path:
-                file_list.extend(glob.glob(path))
-            else:
-                file_list.append(path)
-        
-        # Filter to only include PDF files
-        file_list = [f for f in file_list if f.lower().endswith('.pdf') and os.path.isfile(f)]
+        file_list = expand_files(args.files)
         
         if not file_list:
             print("No PDF files found")
@@ -56,10 +154,14 @@ def main():
         batch_process(
             file_list,
             output_dir=args.output_dir,
-            dpi=args.dpi,
+            dpi=dpi,
             save_images=args.save_images,
             max_workers=args.workers,
-            page_range=args.page_range
+            page_range=args.page_range,
+            dedup=dedup,
+            auto_dpi=args.auto_dpi,
+            profile=profile,
+            progress=progress
         )
 
 if __name__ == "__main__":
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+"""
+Command line interface for the performance benchmarks.
+"""
+
+import os
+import sys
+import argparse
+from ocr.benchmarks import PAGE_KINDS, TARGETS, run_benchmarks, save_results, load_results, compare_results
+from ocr.benchmarks.runner import DEFAULT_TOLERANCE, settings_mismatch
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OCR throughput on synthetic plan sheets")
+    parser.add_argument("--output", "-o", default="benchmark_results.json", help="JSON file to save the results to")
+    parser.add_argument("--compare", "-c", help="Baseline results JSON; regressions are reported and exit with status 1")
+    parser.add_argument("--results", help="Compare these saved results instead of running the benchmarks")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Fraction a metric may get worse before it counts as a regression")
+    parser.add_argument("--kinds", nargs='+', choices=PAGE_KINDS, default=list(PAGE_KINDS), help="Page kinds to benchmark")
+    parser.add_argument("--targets", nargs='+', choices=TARGETS, default=list(TARGETS), help="Entry points to benchmark")
+    parser.add_argument("--pages", "-p", type=int, default=4, help="Pages per synthetic PDF")
+    parser.add_argument("--dpi", "-d", type=int, default=200, help="DPI for rendering")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic content")
+    parser.add_argument("--repeat", "-r", type=int, default=3, help="Repetitions per measurement")
+    parser.add_argument("--workers", "-w", type=int, help="Worker processes for process_document and batch_process")
+    parser.add_argument("--work-dir", help="Directory for the synthetic PDFs")
+    
+    args = parser.parse_args()
+    
+    if args.results:
+        results = load_results(args.results)
+    else:
+        results = run_benchmarks(args.work_dir, args.kinds, args.targets, args.pages, args.dpi,
+                                 args.seed, args.repeat, args.workers)
+        save_results(results, args.output)
+        print(f"\nResults saved to {args.output}")
+    
+    if not args.compare:
+        return
+    
+    if not os.path.exists(args.compare):
+        print(f"Error: Baseline not found - {args.compare}")
+        sys.exit(2)
+    
+    baseline = load_results(args.compare)
+    mismatch = settings_mismatch(baseline, results)
+    if mismatch:
+        print(f"Warning: settings differ from the baseline ({', '.join(mismatch)})")
+    
+    regressions = compare_results(baseline, results, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regressions against {args.compare} (tolerance {args.tolerance:.0%}):")
+        for regression in regressions:
+            print(f"- {regression}")
+        sys.exit(1)
+    print(f"\nNo regressions against {args.compare} (tolerance {args.tolerance:.0%})")
+
+if __name__ == "__main__":
+    main()
@@ -7,58 +7,47 @@ import os
 import sys
 import time
 from ocr.core.processor import extract_text_from_pdf, save_text_to_file
-from ocr.advanced.document_processor import process_document
+from ocr.advanced.document_processor import process_document, save_page_positions
 from ocr.advanced.table_extractor import PlanSpecificationsExtractor
+from ocr.advanced.sheet_index import build_sheet_index, SHEET_INDEX_FILE
 
 def extract_table_example(pdf_path):
     """Demonstrate how to extract tables from a PDF document."""
     print("\n=== Table Extraction Example ===")
     start_time = time.time()
     
+    # Create output directories
+    extracted_data_dir = "extracted_table_data"
+    os.makedirs(os.path.join(extracted_data_dir, "texts"), exist_ok=True)
+    
+    # Classify the sheets from their title blocks so only schedule sheets get full OCR
+    sheet_index = build_sheet_index(pdf_path, os.path.join(extracted_data_dir, SHEET_INDEX_FILE))
+    pages = sheet_index.pages_for() or None
+    
     # Process the PDF using the advanced document processor first
     print(f"Processing: {pdf_path}")
     json_output_path = "document_structure.json"
-    document = process_document(pdf_path, output_path=json_output_path)
+    document = process_document(pdf_path, output_path=json_output_path, pages=pages)
     
     if not document:
         print("Failed to process document.")
         return
     
-    # Create output directories
-    extracted_data_dir = "extracted_table_data"
-    os.makedirs(os.path.join(extracted_data_dir, "texts"), exist_ok=True)
+    # Save word positions in the binary positions format
+    texts_dir = os.path.join(extracted_data_dir, "texts")
+    save_page_positions(document, texts_dir)
     
-    # Extract text with positions
-    for i, element in enumerate(document.elements):
+    # Also save the raw text of each page
+    for element in document.elements:
         if element.element_type == "page":
-            # Save the page text with position information
-            text_with_positions = []
-            
-            # Assuming the text has position information in the metadata
-            if "text_positions" in element.metadata:
-                for pos in element.metadata["text_positions"]:
-                    text_with_positions.append(
-                        f"Text: {pos['text']}, Position: ({pos['x']}, {pos['y']}), "
-                        f"Size: {pos['width']}x{pos['height']}, Confidence: {pos['confidence']}"
-                    )
-            else:
-                # If no positions in metadata, create a simplified format for demonstration
-                text_with_positions.append(
-                    f"Text: {element.text}, Position: (0, {i*100}), Size: 500x50, Confidence: 90"
-                )
-            
-            # Save position information to file
-            position_file = os.path.join(extracted_data_dir, "texts", f"page_{i+1}_text_positions.txt")
-            with open(position_file, "w", encoding="utf-8") as f:
-                f.write("\n".join(text_with_positions))
-                
-            # Also save the raw text
-            text_file = os.path.join(extracted_data_dir, "texts", f"page_{i+1}_text.txt")
+            page_number = element.metadata.get("page_number", 0) + 1
+            text_file = os.path.join(texts_dir, f"page_{page_number}_text.txt")
             with open(text_file, "w", encoding="utf-8") as f:
                 f.write(element.text)
     
-    # Use the table extractor to generate a BOM
-    extractor = PlanSpecificationsExtractor(extracted_data_dir)
+    # Use the table extractor to generate a BOM, sharing the document already in memory
+    extractor = PlanSpecificationsExtractor(extracted_data_dir, document=document,
+                                            sheet_index=sheet_index)
     
     # Extract and print ATM specifications if available
     atm_specs = extractor.extract_atm_specifications()
@@ -9,15 +9,16 @@ import time
 from ocr.core.processor import extract_text_from_pdf, save_text_to_file
 from ocr.advanced.document_processor import process_document
 from ocr.batch.processors import batch_process
+from ocr.core.raster_cache import PageRasterCache
 
-def basic_ocr_example(pdf_path):
+def basic_ocr_example(pdf_path, cache=None):
     """Demonstrate basic OCR processing"""
     print("\n=== Basic OCR Example ===")
     start_time = time.time()
     
     # Process the PDF
     print(f"Processing: {pdf_path}")
-    text = extract_text_from_pdf(pdf_path)
+    text = extract_text_from_pdf(pdf_path, cache=cache)
     
     if text:
         # Save the extracted text
@@ -35,7 +36,7 @@ def basic_ocr_example(pdf_path):
     else:
         print("OCR processing failed")
 
-def advanced_ocr_example(pdf_path):
+def advanced_ocr_example(pdf_path, cache=None):
     """Demonstrate advanced document processing"""
     print("\n=== Advanced Document Processing Example ===")
     start_time = time.time()
@@ -43,7 +44,7 @@ def advanced_ocr_example(pdf_path):
     # Process the PDF
     print(f"Processing: {pdf_path}")
     output_path = "example_advanced.json"
-    document = process_document(pdf_path, output_path=output_path)
+    document = process_document(pdf_path, output_path=output_path, cache=cache)
     
     if document:
         # Print stats
@@ -60,7 +61,7 @@ def advanced_ocr_example(pdf_path):
     else:
         print("Advanced processing failed")
 
-def batch_processing_example(pdf_directory):
+def batch_processing_example(pdf_directory, cache=None):
     """Demonstrate batch processing"""
     print("\n=== Batch Processing Example ===")
     
@@ -73,7 +74,8 @@ def batch_processing_example(pdf_directory):
         pdf_directory,
         output_dir=output_dir,
         dpi=150,
-        save_images=False
+        save_images=False,
+        cache=cache
     )
 
 def main():
@@ -84,13 +86,16 @@ def main():
             print(f"Error: File not found - {pdf_path}")
             return
             
+        # Pages are rendered once and shared by all examples
+        cache = PageRasterCache()
+        
         # Run examples
-        basic_ocr_example(pdf_path)
-        advanced_ocr_example(pdf_path)
+        basic_ocr_example(pdf_path, cache)
+        advanced_ocr_example(pdf_path, cache)
         
         # For batch processing, use the directory of the PDF
         pdf_dir = os.path.dirname(pdf_path) or "."
-        batch_processing_example(pdf_dir)
+        batch_processing_example(pdf_dir, cache)
     else:
         print("Please provide a PDF file path as argument")
         print("Example: python process_example.py sample.pdf")
@@ -18,6 +18,8 @@ def main():
                         help="Directory containing extracted text data (default: extracted_data)")
     parser.add_argument("--output", "-o", default="bom.csv",
                         help="Output CSV file for Bill of Materials (default: bom.csv)")
+    parser.add_argument("--fuzzy", "-f", action="store_true",
+                        help="Also count item names garbled by OCR errors")
     
     args = parser.parse_args()
     
@@ -28,7 +30,7 @@ def main():
         
     # Extract Bill of Materials
     print(f"Extracting Bill of Materials from documents in {args.data_dir}...")
-    bom = extract_sign_specs_from_plans(args.data_dir, args.output)
+    bom = extract_sign_specs_from_plans(args.data_dir, args.output, fuzzy=args.fuzzy)
     
     if bom is None or len(bom) == 0:
         print("No specifications could be extracted from the documents")
@@ -4,7 +4,8 @@ Advanced OCR functionality for more sophisticated document processing.
 
 from .document_processor import (
     BoundingBox, TableCell, Table, DocumentElement, StructuredDocument,
-    preprocess_image_for_ocr, process_document, process_page, extract_elements_from_page
+    preprocess_image_for_ocr, process_document, process_page, extract_elements_from_page,
+    save_page_positions
 )
 
 __all__ = [
@@ -17,4 +18,5 @@ __all__ = [
     'process_document',
     'process_page',
     'extract_elements_from_page',
+    'save_page_positions',
 ] 
\ No newline at end of file
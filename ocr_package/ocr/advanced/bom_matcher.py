@@ -0,0 +1,379 @@
+"""
+Catalog-driven Bill of Materials matching.
+
+All catalog items are compiled into one combined regular expression so that
+counting every item takes a single pass over the text, no matter how many
+items the catalog holds.
+"""
+
+import os
+import re
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Iterator, Iterable, Tuple
+
+@dataclass
+class BomItem:
+    item: str
+    pattern: str
+    description: str = ""
+    group: str = "equipment"
+    regex: bool = False
+    section: Optional[str] = None  # Only count matches inside this section
+    fuzzy_text: Optional[str] = None  # Literal used for approximate matching of regex items
+
+    @property
+    def probe(self) -> Optional[str]:
+        """Literal text used for approximate matching, if any."""
+        if self.fuzzy_text:
+            return self.fuzzy_text
+        return None if self.regex else self.pattern
+
+@dataclass
+class BomSection:
+    name: str
+    start: str
+    end: str
+    # Count only the first section that is closed, like re.search(start(.*?)end)
+    first_only: bool = False
+
+@dataclass
+class BomHit:
+    item: str
+    start: int
+    end: int
+    text: str = ""
+    distance: int = 0
+    sheet: Optional[Tuple[str, int]] = None  # (source, page) of a hit held back until its section ends
+
+@dataclass
+class PageChunk:
+    source: str
+    page: int
+    text: str
+
+@dataclass
+class BomTally:
+    counts: Counter = field(default_factory=Counter)
+    # item -> Counter of (source, page) -> hits on that sheet
+    sheets: Dict[str, Counter] = field(default_factory=dict)
+    # item -> number of hits that were approximate (edit distance > 0)
+    approximate: Counter = field(default_factory=Counter)
+
+    def add(self, item: str, source: str, page: int, distance: int = 0):
+        self.counts[item] += 1
+        self.sheets.setdefault(item, Counter())[(source, page)] += 1
+        if distance:
+            self.approximate[item] += 1
+
+    def cite(self, item: str) -> str:
+        """Format the source sheets of an item, e.g. 'plans.txt p1, p4; other.txt p2'"""
+        by_source: Dict[str, List[int]] = {}
+        for source, page in sorted(self.sheets.get(item, {})):
+            by_source.setdefault(source, []).append(page)
+        return '; '.join(
+            f"{source} " + ', '.join(f"p{page}" for page in pages)
+            for source, pages in by_source.items()
+        )
+
+# Longest match (in characters) that may straddle a chunk boundary
+DEFAULT_OVERLAP = 256
+
+# Page separator written by extract_text_from_pdf
+PAGE_MARKER = re.compile(r'^\s*--- PAGE (\d+) ---\s*$')
+
+# Default catalog used by the BOM extraction scripts and PlanSpecificationsExtractor
+DEFAULT_BOM_SECTIONS = [
+    BomSection('panel_schedule', r'PROJECT\s+ATCMTD\s+PANEL\s+SCHEDULE', r'PROJECT', first_only=True),
+]
+
+DEFAULT_BOM_CATALOG = [
+    BomItem('ATM Sign Type 1', r'ATM\s+TYPE\s+1\s+SIGN',
+            'Active Traffic Management Sign (Type 1)', group='atm_sign', regex=True,
+            fuzzy_text='ATM TYPE 1 SIGN'),
+    BomItem('ATM Sign Type 2', r'ATM\s+TYPE\s+2\s+SIGN',
+            'Active Traffic Management Sign (Type 2)', group='atm_sign', regex=True,
+            fuzzy_text='ATM TYPE 2 SIGN'),
+    BomItem('ATM Sign Type 3', r'ATM\s+TYPE\s+3',
+            'Active Traffic Management Sign (Type 3)', group='atm_sign', regex=True,
+            fuzzy_text='ATM TYPE 3'),
+    BomItem('ITS Pole', 'ITS POLE (80 FEET)', 'ITS Pole (80 Feet)'),
+    BomItem('CCTV Camera (PTZ)', 'CCTV CAMERA (PTZ)', 'CCTV Camera with Pan/Tilt/Zoom Capability'),
+    BomItem('CCTV Camera (Fixed)', 'CCTV CAMERA (FIXED)', 'Fixed CCTV Camera'),
+    BomItem('Radar Detector System', 'RADAR DETECTOR SYSTEM', 'Radar Detector System'),
+    BomItem('Communication Cabinet', 'COMMUNICATION CABINET', 'Communication Cabinet for ITS Equipment'),
+    BomItem('Panel Board', r'PNL-\d+', 'Electrical Panel Board for ATM Signs',
+            group='panel', regex=True, section='panel_schedule'),
+]
+
+# Only PlanSpecificationsExtractor.generate_bom counts sign controllers; the
+# BOM extraction scripts never listed them
+ATM_SIGN_CONTROLLER = BomItem('ATM Sign Controller', 'ACTIVE TRAFFIC MANAGEMENT SIGN CONTROLLER',
+                              'Controller for Active Traffic Management Signs')
+
+def load_catalog(path):
+    """
+    Load a BOM catalog from a JSON file.
+
+    The file holds an object with an "items" list (BomItem fields) and an
+    optional "sections" list (BomSection fields).
+
+    Returns:
+        tuple: (items, sections)
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    items = [BomItem(**entry) for entry in data.get('items', [])]
+    sections = [BomSection(**entry) for entry in data.get('sections', [])]
+    return items, sections
+
+class BomMatcher:
+    """Count every catalog item in a single pass using one combined regex."""
+
+    def __init__(self, catalog: Optional[List[BomItem]] = None,
+                 sections: Optional[List[BomSection]] = None):
+        self.catalog = list(DEFAULT_BOM_CATALOG if catalog is None else catalog)
+        self.sections = list(DEFAULT_BOM_SECTIONS if sections is None else sections)
+
+        self._section_ends = {section.name: re.compile(section.end) for section in self.sections}
+        self._first_only = {section.name: section.first_only for section in self.sections}
+        for entry in self.catalog:
+            if entry.section and entry.section not in self._section_ends:
+                raise ValueError(f"Unknown section '{entry.section}' for item '{entry.item}'")
+
+        # Alternation order matters: section starts win over items, which win over
+        # section ends, when several alternatives match at the same position.
+        self._groups: Dict[str, Any] = {}
+        parts = []
+        for i, section in enumerate(self.sections):
+            parts.append(f'(?P<s{i}>{section.start})')
+            self._groups[f's{i}'] = ('start', section.name)
+        for i, entry in enumerate(self.catalog):
+            pattern = entry.pattern if entry.regex else re.escape(entry.pattern)
+            parts.append(f'(?P<i{i}>{pattern})')
+            self._groups[f'i{i}'] = ('item', entry)
+        for i, section in enumerate(self.sections):
+            parts.append(f'(?P<e{i}>{section.end})')
+            self._groups[f'e{i}'] = ('end', section.name)
+
+        self.regex = re.compile('|'.join(parts)) if parts else None
+
+    def scan(self, text: str, state: Dict[str, Any], limit: Optional[int] = None) -> Iterator[Tuple[int, int, Optional[BomHit]]]:
+        """
+        Scan the text and yield (start, end, hit) for every regex match.
+
+        Section markers yield a hit of None. Matches starting at or after
+        limit are left for the next chunk and stop the scan.
+        """
+        if self.regex is None:
+            return
+
+        for match in self.regex.finditer(text):
+            if limit is not None and match.start() >= limit:
+                return
+
+            kind, value = self._groups[match.lastgroup]
+            yield from self._track(state, kind, value, match.start(), match.end(), match.group())
+
+    def _track(self, state: Dict[str, Any], kind: str, value, start: int, end: int, text: str,
+               distance: int = 0) -> Iterator[Tuple[int, int, Optional[BomHit]]]:
+        """
+        Apply one match to the open section and yield (start, end, hit) for it.
+
+        Hits inside a first_only section are held back in the state until the
+        section ends, and are yielded at its end marker; an unterminated
+        section counts nothing. A section start that also matches the end of
+        the open section closes it first.
+        """
+        section = state.get('section')
+        hit = None
+        if kind == 'start':
+            if section is not None and self._section_ends[section].match(text):
+                yield from self._close_section(state, start, end)
+            if value not in state.get('finished', ()):
+                state['section'] = value
+        elif kind == 'end':
+            if section == value:
+                yield from self._close_section(state, start, end)
+        elif value.section is None:
+            hit = BomHit(value.item, start, end, text, distance)
+        elif value.section == section:
+            hit = BomHit(value.item, start, end, text, distance)
+            if self._first_only[section]:
+                hit.sheet = state.get('sheet')
+                state.setdefault('pending', []).append(hit)
+                hit = None
+        yield start, end, hit
+
+    def _close_section(self, state: Dict[str, Any], start: int, end: int) -> Iterator[Tuple[int, int, BomHit]]:
+        """Close the open section and release the hits held back for it."""
+        section = state['section']
+        state['section'] = None
+        if self._first_only[section]:
+            state.setdefault('finished', set()).add(section)
+            for hit in state.pop('pending', []):
+                yield start, end, hit
+
+    def finditer(self, text: str, state: Optional[Dict[str, Any]] = None) -> Iterator[BomHit]:
+        """
+        Yield a BomHit for every catalog match in the text.
+
+        Args:
+            text: Text to scan
+            state: Optional dict carrying the open section between calls, so
+                that consecutive chunks of one document can be scanned in turn
+        """
+        if state is None:
+            state = {}
+
+        for _, _, hit in self.scan(text, state):
+            if hit is not None:
+                yield hit
+
+    def count(self, text: str) -> Counter:
+        """Count matches per catalog item in one pass over the text."""
+        return Counter(hit.item for hit in self.finditer(text))
+
+    def count_stream(self, chunks: Iterable[PageChunk], overlap: int = DEFAULT_OVERLAP) -> BomTally:
+        """
+        Count catalog items over a stream of page chunks.
+
+        Only the last `overlap` characters of a chunk are carried into the next
+        chunk of the same page, so a match may straddle a chunk boundary as long
+        as it is no longer than `overlap`. Every hit is attributed to its page.
+        """
+        tally = BomTally()
+        state: Dict[str, Any] = {}
+        carry = ""
+        current = None
+
+        for chunk in chunks:
+            key = (chunk.source, chunk.page)
+            if key != current:
+                # Finish the previous page before starting a new one
+                if carry:
+                    state['sheet'] = current
+                    self._scan_chunk(carry, state, None, tally, current)
+                carry = ""
+                current = key
+
+            buffer = carry + chunk.text
+            state['sheet'] = current
+            limit = max(0, len(buffer) - overlap)
+            resume = self._scan_chunk(buffer, state, limit, tally, current)
+            carry = buffer[max(limit, resume):]
+
+        if carry:
+            state['sheet'] = current
+            self._scan_chunk(carry, state, None, tally, current)
+
+        return tally
+
+    def _scan_chunk(self, text, state, limit, tally, key) -> int:
+        """Scan one buffer into the tally and return the end of the last match."""
+        resume = 0
+        for _, end, hit in self.scan(text, state, limit):
+            resume = end
+            if hit is not None:
+                source, page = hit.sheet or key
+                tally.add(hit.item, source, page, hit.distance)
+        return resume
+
+    def to_rows(self, counts: Dict[str, int], groups: Optional[Iterable[str]] = None,
+                tally: Optional[BomTally] = None) -> List[Dict[str, Any]]:
+        """
+        Convert item counts into BOM rows in catalog order, skipping zero counts.
+
+        When a tally is given, each row also cites its source sheets.
+        """
+        groups = set(groups) if groups is not None else None
+        rows = []
+        for entry in self.catalog:
+            if groups is not None and entry.group not in groups:
+                continue
+            quantity = counts.get(entry.item, 0)
+            if quantity > 0:
+                row = {
+                    'Item': entry.item,
+                    'Quantity': quantity,
+                    'Description': entry.description
+                }
+                if tally is not None:
+                    row['Sheets'] = tally.cite(entry.item)
+                rows.append(row)
+        return rows
+
+_default_matcher = None
+
+def get_default_matcher() -> BomMatcher:
+    """Return a shared matcher compiled from the default catalog."""
+    global _default_matcher
+    if _default_matcher is None:
+        _default_matcher = BomMatcher()
+    return _default_matcher
+
+def count_bom_items(text: str, matcher: Optional[BomMatcher] = None) -> List[Dict[str, Any]]:
+    """
+    Count all catalog items in the text and return BOM rows.
+
+    Args:
+        text: Plans text to scan
+        matcher: Optional matcher; defaults to the default catalog
+
+    Returns:
+        list: Dictionaries with Item, Quantity and Description keys
+    """
+    matcher = matcher or get_default_matcher()
+    return matcher.to_rows(matcher.count(text))
+
+def iter_page_chunks(paths: Iterable[str], max_chunk_chars: int = 1 << 20) -> Iterator[PageChunk]:
+    """
+    Stream text files as page chunks without reading whole files into memory.
+
+    Pages are split on the "--- PAGE N ---" markers written by
+    extract_text_from_pdf; text before the first marker belongs to page 1.
+    Chunks are cut at line boundaries once they exceed max_chunk_chars.
+    """
+    for path in paths:
+        source = os.path.basename(path)
+        page = 1
+        lines: List[str] = []
+        size = 0
+
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                marker = PAGE_MARKER.match(line)
+                if marker:
+                    if lines:
+                        yield PageChunk(source, page, ''.join(lines))
+                    page = int(marker.group(1))
+                    lines, size = [], 0
+                    continue
+
+                lines.append(line)
+                size += len(line)
+                if size >= max_chunk_chars:
+                    yield PageChunk(source, page, ''.join(lines))
+                    lines, size = [], 0
+
+        if lines:
+            yield PageChunk(source, page, ''.join(lines))
+
+def count_bom_items_in_files(paths: Iterable[str], matcher: Optional[BomMatcher] = None,
+                             overlap: int = DEFAULT_OVERLAP) -> List[Dict[str, Any]]:
+    """
+    Stream text files page by page and return BOM rows citing their source sheets.
+
+    Args:
+        paths: Text files produced by the OCR tools
+        matcher: Optional matcher; defaults to the default catalog
+        overlap: Longest match allowed to straddle a chunk boundary
+
+    Returns:
+        list: Dictionaries with Item, Quantity, Description and Sheets keys
+    """
+    matcher = matcher or get_default_matcher()
+    tally = matcher.count_stream(iter_page_chunks(paths), overlap=overlap)
+    return matcher.to_rows(tally.counts, tally=tally)
@@ -8,11 +8,25 @@ import cv2
 from PIL import Image
 import pytesseract
 import fitz  # PyMuPDF
-import multiprocessing
 from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from contextlib import nullcontext
+import re
 import requests
 from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional, Tuple
+from .positions_format import write_positions_file, encode_positions, decode_positions
+from .bom_matcher import get_default_matcher
+from ..core.preprocessing import get_pipeline, PreprocessConfig
+from ..core.orientation import resolve_orientation, apply_page_rotation, upright_words
+from ..core.auto_dpi import choose_page_dpi, report_dpi_choice, MAX_DPI
+from ..core.profiles import tesseract_kwargs
+from ..core.resources import plan_resources, run_planned, ConcurrencyController, page_pixels
+from ..core.pipeline import PagePipeline, split_workers
+from ..core.transport import ColumnarHandle, write_columns, read_columns, encode_strings, decode_strings
+from ..core.progress import report, page_key, page_weight
+from ..core.events import pool_kwargs
+from ..core import metrics
 
 # Check if transformers is available, otherwise we'll use a simpler approach
 try:
@@ -148,26 +162,17 @@ class StructuredDocument:
         """Convert to JSON string"""
         return json.dumps(self.to_dict(), indent=indent)
 
-def preprocess_image_for_ocr(img_np):
-    """Optimize image for OCR text extraction"""
-    # Convert to grayscale if not already
-    if len(img_np.shape) == 3:
-        gray = cv2.cvtColor(img_np, cv2.COLOR_BGR2GRAY)
-    else:
-        gray = img_np
-    
-    # Apply threshold to get binary image
-    _, binary = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY)
-    
-    # Noise removal
-    denoised = cv2.medianBlur(binary, 3)
-    
-    return denoised
+def preprocess_image_for_ocr(img_np, config=None):
+    """Optimize image for OCR text extraction (see ocr.core.preprocessing)"""
+    return get_pipeline(config)(img_np)
 
-def extract_text_with_positions(img_np):
+def extract_text_with_positions(img_np, profile=None):
     """
     Extract text from image with position information using Tesseract.
     
+    Args:
+        profile: Optional OcrProfile with the Tesseract settings
+    
     Returns:
         tuple: (text, text_positions)
             text: Full extracted text
@@ -177,10 +182,11 @@ def extract_text_with_positions(img_np):
     pil_img = Image.fromarray(img_np)
     
     # Get word boxes using tesseract
-    boxes = pytesseract.image_to_data(pil_img, output_type=pytesseract.Output.DICT)
+    ocr_kwargs = tesseract_kwargs(profile)
+    boxes = pytesseract.image_to_data(pil_img, output_type=pytesseract.Output.DICT, **ocr_kwargs)
     
     # Extract full text
-    text = pytesseract.image_to_string(pil_img)
+    text = pytesseract.image_to_string(pil_img, **ocr_kwargs)
     
     # Create position information for each word
     text_positions = []
@@ -202,15 +208,61 @@ def extract_text_with_positions(img_np):
     
     return text, text_positions
 
-def process_document(pdf_path, output_path=None, dpi=200, num_workers=None):
-    """Process a PDF document with advanced OCR and structure extraction"""
+# Lines that announce a schedule or quantity table
+TABLE_SIGNATURES = re.compile(
+    r'SCHEDULE|SUMMARY\s+OF\s+QUANTITIES|\bQTY\b|\bQUANTITY\b|ATM\s+SITE', re.IGNORECASE
+)
+
+# Padding around a matched line, and the extent assumed below a table heading, in PDF points
+REGION_MARGIN = 18
+TABLE_EXTENT = (432, 288)
+
+# Words below this Tesseract confidence are re-read by refine_low_confidence_words
+LOW_CONFIDENCE = 60
+
+# Preprocessing of re-read word crops: Otsu adapts to the local contrast of the crop
+REFINE_PREPROCESSING = PreprocessConfig(threshold="otsu", median_blur=0)
+
+def process_document(pdf_path, output_path=None, dpi=200, num_workers=None, pages=None,
+                     two_pass=False, coarse_dpi=72, refine_dpi=None, cache=None, dedup=None,
+                     preprocessing=None, orientation=None, auto_dpi=False, profile=None, staged=False,
+                     transport="pickle", progress=None):
+    """
+    Process a PDF document with advanced OCR and structure extraction.
+    
+    Args:
+        pages: Optional 1-based page numbers to process, e.g. from
+            SheetIndex.pages_for(); all pages are processed by default
+        two_pass: Locate BOM keywords and table headings with a coarse pass
+            (text layer or OCR at coarse_dpi) and OCR only those regions at dpi.
+            The profile, preprocessing, orientation and refine_dpi apply to
+            the regions; cache, dedup, auto_dpi and staged work on whole page
+            rasters and are ignored, with a warning
+        coarse_dpi: Resolution of the coarse pass
+        refine_dpi: Re-read low-confidence words at this resolution, so the
+            bulk pass can run at a lower dpi
+        cache: Optional PageRasterCache holding the preprocessed page rasters
+        dedup: Optional PageHashIndex; pages matching a previously OCRed
+            sheet reuse its text and word positions
+        preprocessing: Optional PreprocessConfig for the page images
+        orientation: None, "auto" (detect on every page), "sample" (detect on
+            a few pages and apply to all when they agree) or a fixed clockwise
+            rotation; pages are turned upright before OCR
+        auto_dpi: Choose each page's DPI from its dominant text height; dpi
+            is then the baseline the time saved is reported against
+        profile: Optional OcrProfile giving the Tesseract settings and, unless
+            preprocessing is passed, the preprocessing; its DPI is applied by
+            the caller
+        staged: Render and OCR pages in separate process pools with a bounded
+            queue of rendered pages between them (ignored in two-pass mode)
+        transport: How page results come back from the workers: "pickle"
+            (DocumentElement lists through the pool's pipe) or "shared"
+            (texts and word positions in columnar shared memory buffers)
+        progress: Optional ProgressTracker; the pages are added to it and
+            it is kept running while they are processed
+    """
     try:
-        # Determine the number of workers based on CPU cores
-        if num_workers is None:
-            num_workers = max(1, multiprocessing.cpu_count() - 1)
-        
         print(f"Processing document: {pdf_path}")
-        print(f"Using {num_workers} worker processes, DPI: {dpi}")
         
         # Open the PDF
         doc = fitz.open(pdf_path)
@@ -229,15 +281,103 @@ def process_document(pdf_path, output_path=None, dpi=200, num_workers=None):
             "creator": doc.metadata.get("creator", "")
         }
         
+        if pages is not None:
+            page_indexes = sorted({p - 1 for p in pages if 1 <= p <= num_pages})
+            metadata["processed_pages"] = [i + 1 for i in page_indexes]
+            print(f"Processing {len(page_indexes)} selected pages")
+        else:
+            page_indexes = range(num_pages)
+        
         # Create structured document
         document = StructuredDocument(metadata=metadata)
         
+        orientation = resolve_orientation(pdf_path, orientation)
+        if profile is not None:
+            metadata["ocr_profile"] = profile.name
+            if preprocessing is None:
+                preprocessing = profile.preprocessing
+        
         # Process pages in parallel
-        task_args = [(pdf_path, i, dpi) for i in range(num_pages)]
+        if two_pass:
+            ignored = [name for name, value in (("cache", cache), ("dedup", dedup), ("auto_dpi", auto_dpi),
+                                                ("staged", staged)) if value]
+            if ignored:
+                print(f"Warning: two-pass mode ignores {', '.join(ignored)}")
+            task_args = [(pdf_path, i, coarse_dpi, dpi, orientation, preprocessing, profile, refine_dpi)
+                         for i in page_indexes]
+            worker = process_page_two_pass
+        else:
+            if cache is not None:
+                # Hash once here; the digest is pickled to the workers with the cache
+                cache.digest(pdf_path)
+            task_args = [(pdf_path, i, dpi, refine_dpi, cache, dedup, preprocessing, orientation, auto_dpi,
+                          profile) for i in page_indexes]
+            worker = process_page
+        
+        # Size the pool from the CPU and memory limits and the largest page
+        # raster (num_workers overrides the worker count)
+        page_sizes = [(doc[i].rect.width, doc[i].rect.height) for i in page_indexes]
+        raster_dpi = max(dpi, MAX_DPI) if auto_dpi else dpi
+        plan = plan_resources(page_sizes, raster_dpi, num_workers, preprocessing)
+        print(f"Using {plan.describe()}, DPI: {dpi}")
+        
+        if transport not in ("pickle", "shared"):
+            raise ValueError(f"Unknown transport: {transport}")
+        shared = transport == "shared"
+        
+        if progress is not None:
+            progress.add_pages({page_key(pdf_path, i + 1): page_weight(w, h, raster_dpi)
+                                for i, (w, h) in zip(page_indexes, page_sizes)})
         
-        # Process using multiple workers
-        with ProcessPoolExecutor(max_workers=num_workers) as executor:
-            results = list(executor.map(process_page, task_args))
+        with progress if progress is not None else nullcontext():
+            if staged and not two_pass:
+                # Renderers and OCR workers share the planned processes; the pages
+                # buffered between them stay within the planned pages in flight,
+                # each in a slab slot sized for the largest page
+                render_workers, ocr_workers = split_workers(plan.workers)
+                slot_bytes = max((page_pixels(w, h, raster_dpi) for w, h in page_sizes), default=1)
+                pipeline = PagePipeline(render_page_staged,
+                                        partial(packed_call, ocr_page_staged) if shared else ocr_page_staged,
+                                        render_workers, ocr_workers, max(1, plan.in_flight - ocr_workers),
+                                        slot_bytes, unpack_page_elements if shared else None)
+                print(f"Staged pipeline: {render_workers} render and {ocr_workers} OCR workers, "
+                      f"at most {pipeline.max_buffered} pages buffered")
+                results = pipeline.run(task_args)
+                metadata["resources"] = dict(plan.to_dict(), pipeline=pipeline.stats)
+            else:
+                # Process using multiple workers, adjusting the pages in flight to the measured RSS
+                controller = ConcurrencyController(plan)
+                with ProcessPoolExecutor(max_workers=plan.workers, **pool_kwargs()) as executor:
+                    results = run_planned(executor, partial(packed_call, worker) if shared else worker,
+                                          task_args, plan, controller)
+                if shared:
+                    results = [unpack_page_elements(packed) for packed in results]
+                metadata["resources"] = dict(plan.to_dict(), measured_worker_rss=controller.peak_rss,
+                                             adjustments=controller.adjustments)
+        
+        if two_pass:
+            # Report the pixels OCRed against a full pass at the same DPI
+            pixels = {"coarse": 0, "fine": 0, "full_pass": 0}
+            for i in page_indexes:
+                width, height = doc[i].rect.width * dpi / 72, doc[i].rect.height * dpi / 72
+                pixels["full_pass"] += int(width) * int(height)
+            for page_elements in results:
+                for element in page_elements:
+                    pixels["coarse"] += element.metadata.get("coarse_pixels", 0)
+                    pixels["fine"] += element.metadata.get("fine_pixels", 0)
+            metadata["ocr_pixels"] = pixels
+            ocr_total = pixels["coarse"] + pixels["fine"]
+            share = ocr_total / pixels["full_pass"] * 100 if pixels["full_pass"] else 0
+            print(f"Two-pass OCR: {ocr_total:,} pixels "
+                  f"({pixels['coarse']:,} coarse + {pixels['fine']:,} fine), "
+                  f"{share:.1f}% of a full pass ({pixels['full_pass']:,})")
+        
+        if auto_dpi and not two_pass:
+            choices = [element.metadata["auto_dpi"] for page_elements in results
+                       for element in page_elements if "auto_dpi" in element.metadata]
+            saved = sum(choice["saved_seconds"] for choice in choices)
+            metadata["auto_dpi"] = {"baseline_dpi": dpi, "saved_seconds": round(saved, 2)}
+            print(f"Auto DPI: ~{saved:.2f}s saved against {dpi} DPI over {len(choices)} pages")
         
         # Add pages to document in correct order
         for page_elements in results:
@@ -254,41 +394,463 @@ def process_document(pdf_path, output_path=None, dpi=200, num_workers=None):
         
     except Exception as e:
         print(f"Error processing document: {e}")
+        if progress is not None:
+            progress.discard(pdf_path)
         return None
 
+def save_page_positions(document, output_dir):
+    """
+    Write each page's word positions to a binary page_N_text_positions.bin file.
+    
+    Pages are numbered from 1, as in the other extracted text files.
+    
+    Returns:
+        list: Paths of the written files
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    
+    for element in document.elements:
+        if element.element_type != "page":
+            continue
+        page_number = element.metadata.get("page_number", len(paths)) + 1
+        path = os.path.join(output_dir, f"page_{page_number}_text_positions.bin")
+        write_positions_file(path, element.metadata.get("text_positions", []))
+        paths.append(path)
+    
+    return paths
+
+@dataclass
+class PackedElements:
+    """
+    Page elements with their texts and word positions moved to a columnar
+    shared memory buffer; only this handle and the small per-element fields
+    are pickled back from the worker.
+    """
+    columns: ColumnarHandle
+    elements: List[DocumentElement]  # Without text and text_positions
+
+def pack_page_elements(elements: List[DocumentElement]) -> PackedElements:
+    """Move the texts and word positions of page elements into shared memory."""
+    positions = []
+    position_spans = np.zeros((len(elements), 2), dtype=np.int64)  # (first record, count)
+    skeletons = []
+    for i, element in enumerate(elements):
+        page_positions = element.metadata.get("text_positions") or []
+        position_spans[i] = (len(positions), len(page_positions))
+        positions.extend(page_positions)
+        # The key stays in place so the metadata keeps its order
+        metadata = {key: None if key == "text_positions" else value for key, value in element.metadata.items()}
+        skeletons.append(DocumentElement(element.element_type, "", element.bounding_box, element.confidence,
+                                         metadata, element.table))
+    records, strings = encode_positions(positions)
+    texts, text_spans = encode_strings([element.text for element in elements])
+    handle = write_columns({
+        "records": records,
+        "strings": np.frombuffer(strings, dtype=np.uint8),
+        "position_spans": position_spans,
+        "texts": texts,
+        "text_spans": text_spans,
+    })
+    return PackedElements(handle, skeletons)
+
+def unpack_page_elements(packed: PackedElements) -> List[DocumentElement]:
+    """Rebuild page elements from a PackedElements handle and free its buffer."""
+    columns = read_columns(packed.columns)
+    texts = decode_strings(columns["texts"], columns["text_spans"])
+    strings = columns["strings"].tobytes()
+    elements = []
+    for element, text, (first, count) in zip(packed.elements, texts, columns["position_spans"].tolist()):
+        element.text = text
+        if "text_positions" in element.metadata:
+            element.metadata["text_positions"] = decode_positions(columns["records"][first:first + count], strings)
+        elements.append(element)
+    return elements
+
+def packed_call(function, *args) -> PackedElements:
+    """Worker wrapper: run function(*args) and return its page elements packed."""
+    return pack_page_elements(function(*args))
+
+def _page_args(args):
+    pdf_path, page_num, dpi = args[:3]
+    optional = list(args[3:10]) + [None] * (10 - len(args))
+    refine_dpi, cache, dedup, preprocessing, orientation, auto_dpi, profile = optional[:7]
+    return pdf_path, page_num, dpi, refine_dpi, cache, dedup, preprocessing, orientation, bool(auto_dpi), profile
+
 def process_page(args):
     """Process a single page of a PDF document"""
-    pdf_path, page_num, dpi = args
-    
+    key = page_key(args[0], args[1] + 1)
+    report("start", key)
     try:
-        # Open the document and get the specific page
-        doc = fitz.open(pdf_path)
+        processed_img, meta = render_page_for_ocr(args)
+        elements = ocr_rendered_page(processed_img, meta, args)
+    except Exception as e:
+        print(f"Error processing page {args[1]}: {e}")
+        report("failed", key)
+        return []
+    report("done", key)
+    return elements
+
+def render_page_staged(args):
+    """Render stage of the staged pipeline; a failed page yields an empty raster and no meta."""
+    report("start", page_key(args[0], args[1] + 1))
+    try:
+        return render_page_for_ocr(args)
+    except Exception as e:
+        print(f"Error processing page {args[1]}: {e}")
+        report("failed", page_key(args[0], args[1] + 1))
+        return np.zeros((0, 0), dtype=np.uint8), None
+
+def ocr_page_staged(processed_img, meta, args):
+    """OCR stage of the staged pipeline, failing like process_page."""
+    if meta is None:
+        return []
+    key = page_key(args[0], args[1] + 1)
+    try:
+        elements = ocr_rendered_page(processed_img, meta, args)
+    except Exception as e:
+        print(f"Error processing page {args[1]}: {e}")
+        report("failed", key)
+        return []
+    report("done", key)
+    return elements
+
+def render_page_for_ocr(args):
+    """
+    Render and preprocess a page for process_page's OCR stage.
+    
+    Returns:
+        tuple: (preprocessed image, meta) where meta holds the rotation, the
+            DPI rendered at, the DpiChoice under auto_dpi and the start time
+    """
+    pdf_path, page_num, dpi, _, cache, _, preprocessing, orientation, auto_dpi, _ = _page_args(args)
+    start_time = time.time()
+    
+    # Open the document and get the specific page
+    with fitz.open(pdf_path) as doc:
         page = doc[page_num]
         
-        # Render page to an image at specified DPI
-        matrix = fitz.Matrix(dpi/72, dpi/72)
-        pix = page.get_pixmap(matrix=matrix)
+        # Turn the page upright before the single full-resolution render
+        rotation = apply_page_rotation(page, orientation)
         
-        # Convert to numpy array
-        img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.h, pix.w, pix.n)
+        dpi_choice = None
+        if auto_dpi:
+            dpi_choice = choose_page_dpi(page, dpi)
+            dpi = dpi_choice.dpi
         
-        # Process the image
-        processed_img = preprocess_image_for_ocr(img)
+        if cache is not None:
+            # Rendered and preprocessed once, then memory-mapped from the cache
+            processed_img = cache.get_or_render(pdf_path, page_num, dpi, get_pipeline(preprocessing),
+                                                page=page, rotation=rotation)
+        else:
+            # Render page to an image at specified DPI
+            matrix = fitz.Matrix(dpi/72, dpi/72)
+            pix = page.get_pixmap(matrix=matrix)
+            
+            # Convert to numpy array
+            img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.h, pix.w, pix.n)
+            
+            # Process the image
+            processed_img = preprocess_image_for_ocr(img, preprocessing)
+    
+    metrics.observe("ocr_render_seconds", time.time() - start_time)
+    return processed_img, {"rotation": rotation, "dpi": dpi, "dpi_choice": dpi_choice, "start_time": start_time}
+
+def ocr_rendered_page(processed_img, meta, args):
+    """OCR a page rendered by render_page_for_ocr and return its elements."""
+    pdf_path, page_num, _, refine_dpi, _, dedup, _, _, _, profile = _page_args(args)
+    rotation, dpi, dpi_choice = meta["rotation"], meta["dpi"], meta["dpi_choice"]
+    ocr_start = time.time()
+    
+    signature = None
+    if dedup is not None:
+        signature, entry = dedup.find(processed_img, dpi, profile)
+        if entry is not None:
+            metrics.inc("ocr_pages_skipped_total", reason="duplicate")
+            return [
+                DocumentElement(
+                    element_type="page",
+                    text=entry.text,
+                    metadata={
+                        "page_number": page_num,
+                        "rotation": rotation,
+                        "text_positions": entry.scaled_positions(dpi),
+                        "duplicate_of": {"source": entry.source, "page": entry.page,
+                                         "distance": entry.distance}
+                    }
+                )
+            ]
+    
+    # Extract elements
+    page_elements = extract_elements_from_page(processed_img, page_num, profile)
+    for element in page_elements:
+        if element.element_type == "page":
+            element.metadata["rotation"] = rotation
+    
+    if refine_dpi:
+        with fitz.open(pdf_path) as doc:
+            page = doc[page_num]
+            if rotation:
+                page.set_rotation((page.rotation + rotation) % 360)
+            for element in page_elements:
+                if element.element_type == "page":
+                    refine_low_confidence_words(page, element, dpi, refine_dpi)
+    
+    metrics.observe("ocr_ocr_seconds", time.time() - ocr_start)
+    
+    if signature is not None:
+        for element in page_elements:
+            if element.element_type == "page":
+                dedup.add(signature, element.text, element.metadata["text_positions"],
+                          dpi, os.path.basename(pdf_path), page_num + 1)
+    
+    if dpi_choice is not None:
+        elapsed = time.time() - meta["start_time"]
+        report_dpi_choice(page_num + 1, dpi_choice, elapsed)
+        for element in page_elements:
+            if element.element_type == "page":
+                element.metadata["dpi"] = dpi
+                element.metadata["auto_dpi"] = dict(
+                    dpi_choice.to_dict(), seconds=round(elapsed, 3),
+                    saved_seconds=round(dpi_choice.estimated_time_saved(elapsed), 3)
+                )
+    
+    return page_elements
+
+def refine_low_confidence_words(page, element, dpi, refine_dpi=300, threshold=LOW_CONFIDENCE,
+                                max_words=200, padding=4):
+    """
+    Re-read the low-confidence words of a page element at a higher DPI.
+    
+    Each word's bounding box is rendered on its own at refine_dpi, binarized
+    with Otsu's threshold instead of the fixed one and read as a single word.
+    The new reading replaces the old one when Tesseract is more confident.
+    
+    Args:
+        page: PyMuPDF page the element was extracted from, with the rotation it
+            was rendered at; word boxes come from that render, so they are in
+            the rotated space get_pixmap clips use
+        element: Page DocumentElement with text_positions at dpi
+        dpi: Resolution the text positions were extracted at
+        refine_dpi: Resolution for the re-read
+        threshold: Words below this confidence are re-read
+        max_words: Upper bound on words re-read per page, lowest confidence first
+        padding: Padding around each word box, in pixels at dpi
+    
+    Returns:
+        int: Number of words replaced
+    """
+    positions = element.metadata.get("text_positions", [])
+    candidates = sorted(
+        (i for i, pos in enumerate(positions) if 0 <= pos['confidence'] < threshold),
+        key=lambda i: positions[i]['confidence']
+    )[:max_words]
+    
+    to_points = 72 / dpi
+    matrix = fitz.Matrix(refine_dpi/72, refine_dpi/72)
+    replaced = {}
+    for i in candidates:
+        pos = positions[i]
+        clip = fitz.Rect((pos['x'] - padding) * to_points, (pos['y'] - padding) * to_points,
+                         (pos['x'] + pos['width'] + padding) * to_points,
+                         (pos['y'] + pos['height'] + padding) * to_points) & page.rect
+        if clip.is_empty:
+            continue
+        pix = page.get_pixmap(matrix=matrix, clip=clip, colorspace=fitz.csGRAY)
+        img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.h, pix.w)
         
-        # Extract elements
-        page_elements = extract_elements_from_page(processed_img, page_num)
+        text, confidence = _read_single_word(img)
+        if text and confidence > pos['confidence']:
+            replaced[i] = pos['text']
+            pos['text'] = text
+            pos['confidence'] = confidence
+    
+    if replaced:
+        element.text = _swap_words(element.text, [(replaced[i], positions[i]['text']) for i in sorted(replaced)])
+    element.metadata["refined_words"] = len(replaced)
+    return len(replaced)
+
+def _read_single_word(gray):
+    """OCR a single-word crop with Otsu binarization; returns (text, confidence)."""
+    binary = get_pipeline(REFINE_PREPROCESSING)(gray)
+    data = pytesseract.image_to_data(Image.fromarray(binary), config='--psm 8',
+                                     output_type=pytesseract.Output.DICT)
+    words = [(word, float(conf)) for word, conf in zip(data['text'], data['conf'])
+             if word.strip() and float(conf) >= 0]
+    if not words:
+        return "", 0
+    return ' '.join(word for word, _ in words), int(min(conf for _, conf in words))
+
+def _swap_words(text, swaps):
+    """Replace words in reading order, each after the previous replacement."""
+    parts = []
+    cursor = 0
+    for old, new in swaps:
+        index = text.find(old, cursor)
+        if index < 0:
+            continue
+        parts.append(text[cursor:index])
+        parts.append(new)
+        cursor = index + len(old)
+    parts.append(text[cursor:])
+    return ''.join(parts)
+
+def locate_candidate_regions(page, dpi=72, matcher=None):
+    """
+    Find the regions of a page worth OCRing at full resolution.
+    
+    Lines are read from the PDF text layer when there is one, otherwise by
+    OCR of the page at a low DPI. Lines with a BOM catalog match become a
+    padded line region, table headings a region of TABLE_EXTENT below them.
+    Overlapping regions are merged.
+    
+    Returns:
+        tuple: (regions, coarse_pixels) with regions as fitz.Rect in PDF points
+            of the rotated page, ready for get_pixmap clips
+    """
+    matcher = matcher or get_default_matcher()
+    lines, coarse_pixels = _coarse_lines(page, dpi)
+    
+    regions = []
+    state = {}
+    for text, rect in lines:
+        if TABLE_SIGNATURES.search(text):
+            regions.append(fitz.Rect(rect.x0 - REGION_MARGIN, rect.y0 - REGION_MARGIN,
+                                     rect.x0 + TABLE_EXTENT[0], rect.y0 + TABLE_EXTENT[1]))
+        elif any(True for _ in matcher.finditer(text, state)):
+            regions.append(fitz.Rect(rect.x0 - REGION_MARGIN, rect.y0 - REGION_MARGIN,
+                                     rect.x1 + REGION_MARGIN, rect.y1 + REGION_MARGIN))
+    
+    regions = _merge_rects([region & page.rect for region in regions])
+    return sorted(regions, key=lambda r: (r.y0, r.x0)), coarse_pixels
+
+def _coarse_lines(page, dpi):
+    """
+    Return ([(line_text, rect)], pixels_ocred) from the text layer or a low-DPI OCR.
+    
+    Rects are in the rotated page space of page.rect and get_pixmap clips.
+    """
+    grouped = {}
+    words = upright_words(page)
+    if words:
+        for rect, word, block, line in words:
+            grouped.setdefault((block, line), []).append((word, rect))
+        pixels = 0
+    else:
+        matrix = fitz.Matrix(dpi/72, dpi/72)
+        pix = page.get_pixmap(matrix=matrix, colorspace=fitz.csGRAY)
+        img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.h, pix.w)
+        boxes = pytesseract.image_to_data(Image.fromarray(img), output_type=pytesseract.Output.DICT)
+        scale = 72 / dpi
+        for i, word in enumerate(boxes['text']):
+            if not word.strip():
+                continue
+            x, y = boxes['left'][i] * scale, boxes['top'][i] * scale
+            rect = fitz.Rect(x, y, x + boxes['width'][i] * scale, y + boxes['height'][i] * scale)
+            key = (boxes['block_num'][i], boxes['par_num'][i], boxes['line_num'][i])
+            grouped.setdefault(key, []).append((word, rect))
+        pixels = pix.w * pix.h
+    
+    lines = []
+    for line_words in grouped.values():
+        rect = fitz.Rect(line_words[0][1])
+        for _, word_rect in line_words[1:]:
+            rect |= word_rect
+        lines.append((' '.join(word for word, _ in line_words), rect))
+    return lines, pixels
+
+def _merge_rects(rects):
+    """Merge overlapping rectangles until none overlap."""
+    merged = []
+    for rect in rects:
+        if rect.is_empty:
+            continue
+        rect = fitz.Rect(rect)
+        changed = True
+        while changed:
+            changed = False
+            for other in merged:
+                if rect.intersects(other):
+                    merged.remove(other)
+                    rect |= other
+                    changed = True
+                    break
+        merged.append(rect)
+    return merged
+
+def process_page_two_pass(args):
+    """
+    Process a single page in two passes: locate candidate regions cheaply,
+    then OCR only those regions at the fine DPI.
+    
+    Word positions are in full-page pixel coordinates at the fine DPI, as
+    if the whole page had been processed by process_page.
+    
+    args is (pdf_path, page_num, coarse_dpi, fine_dpi) optionally followed
+    by orientation, preprocessing, profile and refine_dpi.
+    """
+    pdf_path, page_num, coarse_dpi, fine_dpi = args[:4]
+    orientation, preprocessing, profile, refine_dpi = (tuple(args[4:]) + (None,) * 4)[:4]
+    key = page_key(pdf_path, page_num + 1)
+    report("start", key)
+    
+    try:
+        with fitz.open(pdf_path) as doc:
+            page = doc[page_num]
+            rotation = apply_page_rotation(page, orientation)
+            regions, coarse_pixels = locate_candidate_regions(page, coarse_dpi)
+            
+            scale = fine_dpi / 72
+            matrix = fitz.Matrix(scale, scale)
+            texts = []
+            text_positions = []
+            fine_pixels = 0
+            ocr_seconds = 0.0
+            for region in regions:
+                pix = page.get_pixmap(matrix=matrix, clip=region)
+                img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.h, pix.w, pix.n)
+                fine_pixels += pix.w * pix.h
+                
+                ocr_start = time.time()
+                text, positions = extract_text_with_positions(preprocess_image_for_ocr(img, preprocessing), profile)
+                ocr_seconds += time.time() - ocr_start
+                texts.append(text.strip())
+                offset_x, offset_y = int(region.x0 * scale), int(region.y0 * scale)
+                for pos in positions:
+                    pos['x'] += offset_x
+                    pos['y'] += offset_y
+                text_positions.extend(positions)
+            
+            element = DocumentElement(
+                element_type="page",
+                text='\n\n'.join(text for text in texts if text),
+                metadata={
+                    "page_number": page_num,
+                    "rotation": rotation,
+                    "text_positions": text_positions,
+                    "regions": [[round(v, 1) for v in region] for region in regions],
+                    "coarse_pixels": coarse_pixels,
+                    "fine_pixels": fine_pixels
+                }
+            )
+            if refine_dpi:
+                ocr_start = time.time()
+                refine_low_confidence_words(page, element, fine_dpi, refine_dpi)
+                ocr_seconds += time.time() - ocr_start
         
-        doc.close()
-        return page_elements
+        metrics.observe("ocr_ocr_seconds", ocr_seconds)
+        report("done", key)
+        return [element]
         
     except Exception as e:
         print(f"Error processing page {page_num}: {e}")
+        report("failed", key)
         return []
 
-def extract_elements_from_page(img_np, page_num):
+def extract_elements_from_page(img_np, page_num, profile=None):
     """Extract structured elements from a page image"""
     # Extract text with position information
-    text, text_positions = extract_text_with_positions(img_np)
+    text, text_positions = extract_text_with_positions(img_np, profile)
     
     # Create a document element with the page text and position metadata
     elements = [
@@ -0,0 +1,337 @@
+"""
+OCR-error-tolerant approximate matching for the BOM catalog.
+
+Candidates are located with a pigeonhole prefilter: a probe matched with at
+most k errors must contain one of its k + 1 disjoint pieces exactly, so all
+pieces are searched with one combined regex. Only the small windows around
+piece hits are verified with a bounded edit distance.
+"""
+
+import re
+import bisect
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+from .bom_matcher import BomMatcher, BomItem, BomSection, BomHit
+
+# Upper bound on the edit distance accepted for any item
+DEFAULT_MAX_ERRORS = 2
+
+# One error is allowed per this many characters of the probe
+CHARS_PER_ERROR = 6
+
+# Letters OCR confuses with each digit, in both directions (upper case)
+DIGIT_LOOKALIKES = {
+    '0': 'O',
+    '1': 'TIL',
+    '2': 'Z',
+    '5': 'S',
+    '8': 'B',
+}
+
+def _substitution_cost(pattern_char: str, text_char: str, max_errors: int, identifying: bool = True) -> int:
+    """
+    Substitution cost between a probe character and a text character.
+
+    A digit and a letter may only be swapped when they are DIGIT_LOOKALIKES
+    (PTZ read as P1Z, TYPE 1 read as TYPE l); a digit for any other letter or
+    a space is never accepted. Digits that identify an item (TYPE 1 vs
+    TYPE 2) are never swapped for another digit; other digits may be.
+    """
+    if pattern_char == text_char or (pattern_char.isspace() and text_char.isspace()):
+        return 0
+    if pattern_char.isdigit() and text_char.isdigit():
+        return max_errors + 1 if identifying else 1
+    if pattern_char.isdigit() or text_char.isdigit():
+        digit, other = (pattern_char, text_char) if pattern_char.isdigit() else (text_char, pattern_char)
+        return 1 if other in DIGIT_LOOKALIKES.get(digit, '') else max_errors + 1
+    return 1
+
+def identifying_digits(probes: List[str]) -> List[List[bool]]:
+    """
+    For each probe, which of its characters are digits that identify it.
+
+    A run of digits identifies its probe when another probe reads the same
+    up to that run apart from the digits (ATM TYPE 1 SIGN, ATM TYPE 3); the
+    digits of a probe without such siblings, such as the 80 of ITS POLE
+    (80 FEET), do not.
+    """
+    shapes = [re.sub(r'\d', '#', probe) for probe in probes]
+    flags = []
+    for index, (probe, shape) in enumerate(zip(probes, shapes)):
+        probe_flags = [False] * len(probe)
+        for run in re.finditer(r'\d+', probe):
+            context = shape[:run.end()]
+            if any(other.startswith(context) for i, other in enumerate(shapes) if i != index):
+                probe_flags[run.start():run.end()] = [True] * (run.end() - run.start())
+        flags.append(probe_flags)
+    return flags
+
+def bounded_edit_distance(pattern: str, text: str, max_errors: int,
+                          substitution_rows: Optional[Dict[str, List[int]]] = None,
+                          identifying: Optional[List[bool]] = None) -> Optional[Tuple[int, int]]:
+    """
+    Find the best approximate occurrence of pattern anywhere in text.
+
+    Uses Sellers' dynamic programming over the (short) text window. Inserting
+    or deleting a digit costs more than max_errors, for the reason given in
+    _substitution_cost. The pattern is expected in upper case.
+
+    substitution_rows caches the per-character cost rows of the pattern and
+    may be shared between calls with the same pattern and max_errors.
+    identifying flags the pattern's digits that identify it (see
+    identifying_digits); by default every digit does.
+
+    Returns:
+        tuple: (end, distance) of the closest occurrence within max_errors, or None
+    """
+    forbidden = max_errors + 1
+    if identifying is None:
+        identifying = [c.isdigit() for c in pattern]
+    delete_costs = [forbidden if c.isdigit() else 1 for c in pattern]
+    m = len(pattern)
+
+    column = [0] * (m + 1)
+    for i in range(1, m + 1):
+        column[i] = column[i - 1] + delete_costs[i - 1]
+
+    best = None
+    if substitution_rows is None:
+        substitution_rows = {}
+    for j, text_char in enumerate(text, 1):
+        costs = substitution_rows.get(text_char)
+        if costs is None:
+            upper = text_char.upper()
+            costs = [_substitution_cost(char, upper, max_errors, flag) for char, flag in zip(pattern, identifying)]
+            substitution_rows[text_char] = costs
+
+        insert_cost = forbidden if text_char.isdigit() else 1
+        diagonal = column[0]
+        column[0] = 0  # An occurrence may start anywhere in the text
+        for i in range(m):
+            above = column[i + 1]
+            value = diagonal + costs[i]
+            if above + insert_cost < value:
+                value = above + insert_cost
+            if column[i] + delete_costs[i] < value:
+                value = column[i] + delete_costs[i]
+            column[i + 1] = value
+            diagonal = above
+
+        if column[m] <= max_errors and (best is None or column[m] < best[1]):
+            best = (j, column[m])
+
+    return best
+
+_WHITESPACE = ' \t\n\r\x0b\x0c'
+
+def _match_masks(pattern: str) -> Dict[str, int]:
+    """Bit mask of pattern positions for every text character that matches there."""
+    masks: Dict[str, int] = {}
+    for i, char in enumerate(pattern):
+        variants = _WHITESPACE if char.isspace() else {char, char.lower()}
+        for variant in variants:
+            masks[variant] = masks.get(variant, 0) | (1 << i)
+    return masks
+
+def myers_distance(masks: Dict[str, int], length: int, text: str) -> int:
+    """
+    Lowest unit-cost edit distance of the pattern against any substring of text.
+
+    Myers' bit-parallel algorithm: one pass over the text with a handful of
+    integer operations per character. It lower-bounds bounded_edit_distance,
+    which only adds costs, so it is used to reject windows cheaply.
+    """
+    full = (1 << length) - 1
+    top = 1 << (length - 1)
+    positive, negative = full, 0
+    score = best = length
+
+    for char in text:
+        eq = masks.get(char, 0)
+        xv = eq | negative
+        xh = (((eq & positive) + positive) ^ positive) | eq
+        horizontal_positive = negative | (~(xh | positive) & full)
+        horizontal_negative = positive & xh
+
+        if horizontal_positive & top:
+            score += 1
+        elif horizontal_negative & top:
+            score -= 1
+            if score < best:
+                best = score
+
+        horizontal_positive = (horizontal_positive << 1) & full
+        horizontal_negative = (horizontal_negative << 1) & full
+        positive = horizontal_negative | (~(xv | horizontal_positive) & full)
+        negative = horizontal_positive & xv
+
+    return best
+
+def _split_pieces(probe: str, count: int) -> List[Tuple[int, str]]:
+    """Split the probe into `count` disjoint pieces of nearly equal length."""
+    pieces = []
+    size, extra = divmod(len(probe), count)
+    offset = 0
+    for i in range(count):
+        length = size + (1 if i < extra else 0)
+        pieces.append((offset, probe[offset:offset + length]))
+        offset += length
+    return pieces
+
+class FuzzyBomMatcher(BomMatcher):
+    """
+    BOM matcher that also accepts OCR-garbled occurrences of catalog items.
+
+    Every hit reports its edit distance; exact hits have a distance of 0.
+    Items without a literal probe (regex items without fuzzy_text) are only
+    matched exactly.
+    """
+
+    def __init__(self, catalog: Optional[List[BomItem]] = None,
+                 sections: Optional[List[BomSection]] = None,
+                 max_errors: int = DEFAULT_MAX_ERRORS):
+        super().__init__(catalog, sections)
+        self.max_errors = max_errors
+
+        # Probe for each fuzzy item: (entry, normalized probe, allowed errors, match masks)
+        self._probes: List[Tuple[BomItem, str, int, Dict[str, int]]] = []
+        # Identifying digit flags of each probe, forwards and reversed
+        self._identifying: List[Tuple[List[bool], List[bool]]] = []
+        # Substitution cost rows cached per probe, forwards and reversed
+        self._cost_rows: List[Tuple[Dict[str, List[int]], Dict[str, List[int]]]] = []
+        piece_targets: Dict[str, List[Tuple[int, int]]] = {}
+
+        entries = [entry for entry in self.catalog if entry.probe is not None]
+        probes = [' '.join(entry.probe.upper().split()) for entry in entries]
+        for entry, probe, identifying in zip(entries, probes, identifying_digits(probes)):
+            errors = min(max_errors, len(probe) // CHARS_PER_ERROR)
+            if errors == 0:
+                continue
+
+            index = len(self._probes)
+            self._probes.append((entry, probe, errors, _match_masks(probe)))
+            self._identifying.append((identifying, identifying[::-1]))
+            self._cost_rows.append(({}, {}))
+            for offset, piece in _split_pieces(probe, errors + 1):
+                pattern = re.escape(piece).replace('\\ ', r'\s')
+                piece_targets.setdefault(pattern, []).append((index, offset))
+
+        self._pieces = [(re.compile(pattern, re.IGNORECASE), targets)
+                        for pattern, targets in piece_targets.items()]
+        if self._pieces:
+            alternatives = '|'.join(f'(?:{pattern})' for pattern in piece_targets)
+            self._prefilter = re.compile(f'(?=(?:{alternatives}))', re.IGNORECASE)
+        else:
+            self._prefilter = None
+
+    def _fuzzy_candidates(self, text: str, exact_starts: List[int], exact_ends: List[int]) -> Iterator[Tuple[int, int, BomItem, int]]:
+        """
+        Yield (start, end, entry, distance) for verified approximate occurrences.
+
+        Piece hits inside an exact match are skipped: any occurrence around
+        them would overlap the exact match and lose to it anyway.
+        """
+        if self._prefilter is None:
+            return
+
+        seen = set()
+        verified = set()
+        for match in self._prefilter.finditer(text):
+            position = match.start()
+            slot = bisect.bisect_right(exact_starts, position)
+            if slot > 0 and exact_ends[slot - 1] > position:
+                continue
+
+            # Several pieces may start at the same position
+            for piece_regex, targets in self._pieces:
+                if not piece_regex.match(text, position):
+                    continue
+
+                for index, offset in targets:
+                    # Pieces of one undistorted occurrence share the same anchor
+                    anchor = (index, position - offset)
+                    if anchor in verified:
+                        continue
+                    verified.add(anchor)
+
+                    entry, probe, errors, masks = self._probes[index]
+                    window_start = max(0, position - offset - errors)
+                    window_end = position - offset + len(probe) + errors
+                    window = text[window_start:window_end]
+
+                    if myers_distance(masks, len(probe), window) > errors:
+                        continue
+                    forward_rows, reverse_rows = self._cost_rows[index]
+                    forward_flags, reverse_flags = self._identifying[index]
+                    found = bounded_edit_distance(probe, window, errors, forward_rows, forward_flags)
+                    if found is None:
+                        continue
+                    end, distance = found
+
+                    # Scan backwards from the end to find the start of the occurrence
+                    reverse = bounded_edit_distance(probe[::-1], window[:end][::-1], errors, reverse_rows,
+                                                    reverse_flags)
+                    start = end - reverse[0] if reverse else 0
+
+                    key = (index, window_start + start, window_start + end)
+                    if key not in seen:
+                        seen.add(key)
+                        yield window_start + start, window_start + end, entry, distance
+
+    def scan(self, text: str, state: Dict[str, Any], limit: Optional[int] = None) -> Iterator[Tuple[int, int, Optional[BomHit]]]:
+        """
+        Scan the text and yield (start, end, hit) for exact and approximate matches.
+
+        Overlapping candidates are resolved in favour of the lowest edit
+        distance, then the earliest and longest match.
+        """
+        exact = []
+        if self.regex is not None:
+            for match in self.regex.finditer(text):
+                kind, value = self._groups[match.lastgroup]
+                exact.append((match.start(), match.end(), 0, kind, value))
+
+        # Exact matches never overlap each other
+        exact_starts = [candidate[0] for candidate in exact]
+        exact_ends = [candidate[1] for candidate in exact]
+
+        candidates = exact
+        for start, end, entry, distance in self._fuzzy_candidates(text, exact_starts, exact_ends):
+            candidates.append((start, end, distance, 'item', entry))
+
+        for start, end, distance, kind, value in _resolve_overlaps(candidates):
+            if limit is not None and start >= limit:
+                return
+
+            yield from self._track(state, kind, value, start, end, text[start:end], distance)
+
+def _resolve_overlaps(candidates: List[Tuple[int, int, int, str, Any]]) -> List[Tuple[int, int, int, str, Any]]:
+    """
+    Drop overlapping candidates, keeping the lowest distance first, then the
+    earliest and longest one. Returns the survivors ordered by start.
+    """
+    candidates = sorted(candidates, key=lambda c: (c[0], -c[1]))
+    resolved = []
+
+    # Resolve each cluster of transitively overlapping candidates on its own
+    cluster: List[Tuple[int, int, int, str, Any]] = []
+    cluster_end = -1
+    for candidate in candidates + [None]:
+        if candidate is not None and candidate[0] < cluster_end:
+            cluster.append(candidate)
+            cluster_end = max(cluster_end, candidate[1])
+            continue
+
+        if len(cluster) == 1:
+            resolved.append(cluster[0])
+        elif cluster:
+            kept: List[Tuple[int, int, int, str, Any]] = []
+            for option in sorted(cluster, key=lambda c: (c[2], c[0], c[0] - c[1])):
+                if all(option[1] <= other[0] or option[0] >= other[1] for other in kept):
+                    kept.append(option)
+            resolved.extend(sorted(kept, key=lambda c: c[0]))
+
+        if candidate is not None:
+            cluster = [candidate]
+            cluster_end = candidate[1]
+
+    return resolved
@@ -0,0 +1,152 @@
+"""
+Compact binary format for per-page word positions.
+
+Layout (little endian):
+    header   magic b"OCRPOS", version u16, record count u32, string table size u32
+    records  fixed-width rows of RECORD_DTYPE
+    strings  UTF-8 word text, addressed by (text_offset, text_length)
+
+Records are memory-mapped and read without any text parsing.
+"""
+
+import os
+import struct
+import numpy as np
+from typing import List, Dict, Any, Tuple
+
+MAGIC = b"OCRPOS"
+VERSION = 1
+HEADER = struct.Struct('<6sHII')
+
+RECORD_DTYPE = np.dtype([
+    ('x', '<i4'),
+    ('y', '<i4'),
+    ('width', '<i4'),
+    ('height', '<i4'),
+    ('confidence', '<f4'),
+    ('text_offset', '<u4'),
+    ('text_length', '<u4'),
+])
+
+def encode_positions(text_positions: List[Dict[str, Any]]) -> Tuple[np.ndarray, bytes]:
+    """Records (RECORD_DTYPE) and UTF-8 string table of a list of text_positions."""
+    count = len(text_positions)
+    records = np.zeros(count, dtype=RECORD_DTYPE)
+    if not count:
+        return records, b""
+
+    encoded = [str(pos['text']).encode('utf-8') for pos in text_positions]
+    lengths = np.fromiter(map(len, encoded), dtype=np.uint32, count=count)
+    records['text_length'] = lengths
+    np.cumsum(lengths[:-1], out=records['text_offset'][1:])
+    boxes = np.array([(pos['x'], pos['y'], pos['width'], pos['height']) for pos in text_positions],
+                     dtype=np.int64).reshape(count, 4)
+    for column, field in enumerate(('x', 'y', 'width', 'height')):
+        records[field] = boxes[:, column]
+    records['confidence'] = [pos.get('confidence', 0) for pos in text_positions]
+    return records, b"".join(encoded)
+
+def decode_positions(records: np.ndarray, strings: bytes) -> List[Dict[str, Any]]:
+    """
+    text_positions dictionaries of encoded records.
+
+    Confidences come back as ints, as Tesseract reports them.
+    """
+    offsets = records['text_offset'].tolist()
+    lengths = records['text_length'].tolist()
+    return [
+        {'text': strings[start:start + length].decode('utf-8'), 'x': x, 'y': y, 'width': width,
+         'height': height, 'confidence': int(confidence)}
+        for start, length, x, y, width, height, confidence in zip(
+            offsets, lengths, records['x'].tolist(), records['y'].tolist(), records['width'].tolist(),
+            records['height'].tolist(), records['confidence'].tolist())
+    ]
+
+def write_positions_file(path: str, text_positions: List[Dict[str, Any]]):
+    """
+    Write the text_positions of a page element to a binary positions file.
+
+    The file is written to a temporary name and renamed into place, so
+    readers never see a partial file.
+    """
+    records, strings = encode_positions(text_positions)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(records), len(strings)))
+        f.write(records.tobytes())
+        f.write(strings)
+    os.replace(tmp_path, path)
+
+def is_positions_file(path: str) -> bool:
+    """Check whether a file starts with the binary positions magic."""
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+class PositionsFile:
+    """Memory-mapped view of a binary positions file."""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ValueError(f"Truncated positions file: {path}")
+
+        magic, version, count, strings_size = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError(f"Not a positions file: {path}")
+        if version != VERSION:
+            raise ValueError(f"Unsupported positions file version {version}: {path}")
+
+        self.path = path
+        self.version = version
+        records_size = count * RECORD_DTYPE.itemsize
+
+        if count:
+            self.records = np.memmap(path, dtype=RECORD_DTYPE, mode='r',
+                                     offset=HEADER.size, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=RECORD_DTYPE)
+
+        if strings_size:
+            self.strings = np.memmap(path, dtype=np.uint8, mode='r',
+                                     offset=HEADER.size + records_size, shape=(strings_size,))
+        else:
+            self.strings = np.zeros(0, dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.records)
+
+    def text(self, index: int) -> str:
+        record = self.records[index]
+        start = int(record['text_offset'])
+        return self.strings[start:start + int(record['text_length'])].tobytes().decode('utf-8')
+
+    def texts(self) -> List[str]:
+        """Decode every word in one sweep over the string table."""
+        blob = self.strings.tobytes()
+        offsets = self.records['text_offset'].tolist()
+        lengths = self.records['text_length'].tolist()
+        return [blob[start:start + length].decode('utf-8') for start, length in zip(offsets, lengths)]
+
+    def columns(self):
+        """
+        Return (texts, x, y, width, height, confidence) as Python lists.
+
+        Confidences are ints, as in decode_positions and the text format.
+        """
+        return (
+            self.texts(),
+            self.records['x'].tolist(),
+            self.records['y'].tolist(),
+            self.records['width'].tolist(),
+            self.records['height'].tolist(),
+            self.records['confidence'].astype(np.int32).tolist()
+        )
+
+    def to_text_positions(self) -> List[Dict[str, Any]]:
+        """Return the records as text_positions dictionaries."""
+        return [
+            {'text': text, 'x': x, 'y': y, 'width': width, 'height': height, 'confidence': confidence}
+            for text, x, y, width, height, confidence in zip(*self.columns())
+        ]
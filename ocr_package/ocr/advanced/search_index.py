@@ -0,0 +1,283 @@
+"""
+Full-text search over extracted plan text using a local SQLite FTS5 index.
+
+Pages are loaded from the text files written by extract_text_from_pdf
+("--- PAGE N ---" markers) and from the JSON written by process_document.
+Word bounding boxes are stored when the source has text positions.
+"""
+
+import os
+import re
+import json
+import sqlite3
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+
+# Sign codes (R2-1, MS1-8u) and stations (123+45) stay single tokens
+FTS_TOKENIZER = "unicode61 tokenchars '-+'"
+
+# Word position files written next to the page text
+POSITIONS_DUMP = re.compile(r'_text_positions\.', re.IGNORECASE)
+
+PAGE_MARKER = re.compile(r'^\s*--- PAGE (\d+) ---\s*$', re.MULTILINE)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    project TEXT NOT NULL,
+    path TEXT NOT NULL UNIQUE,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL REFERENCES files(id),
+    page INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_file ON pages(file_id);
+CREATE TABLE IF NOT EXISTS words (
+    page_id INTEGER NOT NULL,
+    word TEXT NOT NULL,
+    x INTEGER, y INTEGER, width INTEGER, height INTEGER,
+    confidence REAL
+);
+CREATE INDEX IF NOT EXISTS words_page ON words(page_id, word);
+CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(text, tokenize="{FTS_TOKENIZER}");
+"""
+
+@dataclass
+class SearchHit:
+    project: str
+    file: str
+    page: int
+    offset: int  # Character offset of the first matching term in the page text
+    snippet: str
+    bbox: Optional[Tuple[int, int, int, int]] = None  # x, y, width, height of the first matching word
+
+def iter_text_file_pages(path: str) -> Iterator[Tuple[int, str]]:
+    """Yield (page, text) for each page of a text file written by extract_text_from_pdf."""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+
+    markers = list(PAGE_MARKER.finditer(text))
+    if not markers:
+        yield 1, text
+        return
+
+    for i, marker in enumerate(markers):
+        end = markers[i + 1].start() if i + 1 < len(markers) else len(text)
+        yield int(marker.group(1)), text[marker.end():end].strip('\n')
+
+def iter_document_pages(document: Dict[str, Any]) -> Iterator[Tuple[int, str, List[Dict[str, Any]]]]:
+    """
+    Yield (page, text, text_positions) for the page elements of a document dict.
+
+    process_document numbers pages from 0; pages are reported from 1 to match
+    the text files.
+    """
+    for element in document.get('elements', []):
+        if element.get('type') != 'page':
+            continue
+        metadata = element.get('metadata', {})
+        page = metadata.get('page_number', 0) + 1
+        yield page, element.get('text', ''), metadata.get('text_positions', [])
+
+def build_match_query(query: str) -> str:
+    """
+    Quote every whitespace-separated term so FTS5 operators in sign codes are
+    taken literally. A trailing * keeps prefix matching.
+    """
+    terms = []
+    for term in query.split():
+        prefix = term.endswith('*')
+        term = term.rstrip('*').replace('"', '""')
+        if term:
+            terms.append(f'"{term}"' + ('*' if prefix else ''))
+    return ' '.join(terms)
+
+class PlanSearchIndex:
+    """SQLite FTS5 index of extracted plan pages across projects."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def index_file(self, path: str, project: Optional[str] = None, force: bool = False) -> bool:
+        """
+        Index a .txt or .json extraction output.
+
+        Files whose size and modification time are unchanged since the last
+        run are skipped, so re-indexing a corpus only loads what changed.
+
+        Returns:
+            bool: True if the file was (re)indexed
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        project = project or os.path.basename(os.path.dirname(path))
+
+        row = self.conn.execute('SELECT id, mtime, size FROM files WHERE path = ?', (path,)).fetchone()
+        if row and not force and row[1] == stat.st_mtime and row[2] == stat.st_size:
+            return False
+
+        if path.lower().endswith('.json'):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if not isinstance(data, dict) or 'elements' not in data:
+                raise ValueError("not a process_document output")
+            pages = list(iter_document_pages(data))
+        else:
+            pages = [(page, text, []) for page, text in iter_text_file_pages(path)]
+
+        with self.conn:
+            if row:
+                self._delete_file(row[0])
+            cursor = self.conn.execute(
+                'INSERT INTO files (project, path, mtime, size) VALUES (?, ?, ?, ?)',
+                (project, path, stat.st_mtime, stat.st_size)
+            )
+            self._insert_pages(cursor.lastrowid, pages)
+
+        return True
+
+    def index_document(self, document, name: str, project: str):
+        """
+        Index a StructuredDocument (or its dict form) directly.
+
+        The document is stored under the given name and replaces any earlier
+        version with the same project and name.
+        """
+        data = document.to_dict() if hasattr(document, 'to_dict') else document
+        path = f'{project}/{name}'
+
+        with self.conn:
+            row = self.conn.execute('SELECT id FROM files WHERE path = ?', (path,)).fetchone()
+            if row:
+                self._delete_file(row[0])
+            cursor = self.conn.execute(
+                'INSERT INTO files (project, path, mtime, size) VALUES (?, ?, 0, 0)', (project, path)
+            )
+            self._insert_pages(cursor.lastrowid, list(iter_document_pages(data)))
+
+    def index_directory(self, root: str, project: Optional[str] = None, force: bool = False) -> Tuple[int, int]:
+        """
+        Index every .txt and .json file under root.
+
+        Without a project name, the first directory level below root is used
+        as the project. Word position dumps (page_N_text_positions.*) are not
+        page text and are skipped; force re-indexes unchanged files.
+
+        Returns:
+            tuple: (indexed, skipped) file counts
+        """
+        indexed = skipped = 0
+        for dirpath, _, filenames in os.walk(root):
+            for filename in sorted(filenames):
+                if not filename.lower().endswith(('.txt', '.json')) or POSITIONS_DUMP.search(filename):
+                    continue
+                path = os.path.join(dirpath, filename)
+                file_project = project
+                if file_project is None:
+                    relative = os.path.relpath(path, root).split(os.sep)
+                    file_project = relative[0] if len(relative) > 1 else os.path.basename(os.path.abspath(root))
+                try:
+                    if self.index_file(path, file_project, force=force):
+                        indexed += 1
+                    else:
+                        skipped += 1
+                except (ValueError, OSError) as e:
+                    print(f"Error indexing {path}: {e}")
+        return indexed, skipped
+
+    def search(self, query: str, project: Optional[str] = None, limit: int = 50,
+               raw: bool = False) -> List[SearchHit]:
+        """
+        Search the index and return hits with page, offset and word position.
+
+        Args:
+            query: Terms to find; sign codes such as R2-1 are matched literally
+            project: Optional project to restrict the search to
+            limit: Maximum number of hits
+            raw: Pass the query to FTS5 unchanged (FTS5 query syntax)
+        """
+        match_query = query if raw else build_match_query(query)
+        if not match_query:
+            return []
+
+        sql = ('SELECT pages.id, files.project, files.path, pages.page, pages_fts.text, '
+               "snippet(pages_fts, 0, '[', ']', '...', 12) "
+               'FROM pages_fts JOIN pages ON pages.id = pages_fts.rowid '
+               'JOIN files ON files.id = pages.file_id '
+               'WHERE pages_fts MATCH ?')
+        params: List[Any] = [match_query]
+        if project:
+            sql += ' AND files.project = ?'
+            params.append(project)
+        sql += ' ORDER BY rank LIMIT ?'
+        params.append(limit)
+
+        first_term = query.split()[0] if query.split() else ''
+        prefix = first_term.endswith('*')
+        first_term = first_term.rstrip('*')
+        term_regex = None
+        if first_term and not raw:
+            # Whole tokens only, as in the index: R2-1 is not found inside R2-10
+            pattern = r'(?<![\w+-])' + re.escape(first_term) + ('' if prefix else r'(?![\w+-])')
+            term_regex = re.compile(pattern, re.IGNORECASE)
+
+        hits = []
+        for page_id, hit_project, path, page, text, snippet in self.conn.execute(sql, params):
+            offset = -1
+            bbox = None
+            if term_regex:
+                match = term_regex.search(text)
+                if match:
+                    offset = match.start()
+                bbox = self._find_word(page_id, first_term, prefix)
+            hits.append(SearchHit(hit_project, os.path.basename(path), page, offset, snippet, bbox))
+        return hits
+
+    def _find_word(self, page_id: int, term: str, prefix: bool = False) -> Optional[Tuple[int, int, int, int]]:
+        """Return the bounding box of the first indexed word equal to the term (or starting with it)."""
+        word = term.upper().strip('.,;:()')
+        if prefix:
+            row = self.conn.execute(
+                'SELECT x, y, width, height FROM words WHERE page_id = ? AND substr(word, 1, ?) = ? LIMIT 1',
+                (page_id, len(word), word)
+            ).fetchone()
+        else:
+            row = self.conn.execute(
+                'SELECT x, y, width, height FROM words WHERE page_id = ? AND word = ? LIMIT 1',
+                (page_id, word)
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def _insert_pages(self, file_id: int, pages):
+        for page, text, positions in pages:
+            cursor = self.conn.execute('INSERT INTO pages (file_id, page) VALUES (?, ?)', (file_id, page))
+            page_id = cursor.lastrowid
+            self.conn.execute('INSERT INTO pages_fts (rowid, text) VALUES (?, ?)', (page_id, text))
+            if positions:
+                self.conn.executemany(
+                    'INSERT INTO words VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    [(page_id, pos['text'].upper().strip('.,;:()'), pos['x'], pos['y'],
+                      pos['width'], pos['height'], pos.get('confidence', 0))
+                     for pos in positions]
+                )
+
+    def _delete_file(self, file_id: int):
+        page_ids = [row[0] for row in self.conn.execute('SELECT id FROM pages WHERE file_id = ?', (file_id,))]
+        self.conn.executemany('DELETE FROM pages_fts WHERE rowid = ?', [(i,) for i in page_ids])
+        self.conn.executemany('DELETE FROM words WHERE page_id = ?', [(i,) for i in page_ids])
+        self.conn.execute('DELETE FROM pages WHERE file_id = ?', (file_id,))
+        self.conn.execute('DELETE FROM files WHERE id = ?', (file_id,))
@@ -0,0 +1,182 @@
+"""
+Cheap sheet classification from the title block of each page.
+
+Only the title-block region is read: from the PDF text layer when there is
+one, otherwise by OCR of a low-DPI clip. The result is a per-document sheet
+index that lets extractors run full-resolution OCR and table detection only
+on the sheets that matter.
+"""
+
+import os
+import re
+import json
+import numpy as np
+import pytesseract
+import fitz  # PyMuPDF
+from PIL import Image
+from dataclasses import dataclass, asdict, field
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+from ..core.orientation import unrotated_rect
+
+# Title block as fractions of the page (x0, y0, x1, y1): the lower-right
+# corner, where plan sheets carry their number and title
+DEFAULT_TITLE_BLOCK = (0.55, 0.75, 1.0, 1.0)
+
+# File name of a saved sheet index inside an extracted data directory
+SHEET_INDEX_FILE = 'sheet_index.json'
+
+# DPI used to OCR title blocks that have no text layer
+TITLE_BLOCK_DPI = 100
+
+# Sheet types in priority order, matched against the title-block text
+SHEET_TYPES = [
+    ('title_sheet', r'TITLE\s+SHEET'),
+    ('sign_schedule', r'SIGN\s+SCHEDULE'),
+    ('panel_schedule', r'PANEL\s+SCHEDULE'),
+    ('its_details', r'ITS\s+DETAILS?'),
+    ('atm_details', r'ATM\s+(?:SIGN\s+)?(?:DETAILS?|SITES?)'),
+    ('signing_striping', r'SIGNING\s*(?:&|AND)\s*STRI?PING'),
+    ('sign_details', r'SIGN\s+DETAILS?'),
+    ('quantities', r'SUMMARY\s+OF\s+QUANTITIES|QUANTITIES'),
+    ('standard_details', r'STANDARD\s+(?:\w+\s+){0,3}DETAILS?'),
+]
+
+# Sheet types whose pages hold the schedules and tables used for the BOM
+BOM_SHEET_TYPES = ('sign_schedule', 'panel_schedule', 'its_details', 'atm_details', 'quantities')
+
+SHEET_OF_PATTERN = re.compile(r'\bSHEET\s+(\d+)\s+OF\s+\d+', re.IGNORECASE)
+SHEET_CODE_PATTERN = re.compile(r'\b(([A-Z]{2,5})-?\d{2,3}[A-Z]?)\b')
+
+# Route designations (SR-81, US-27) look like sheet codes but name the project road
+ROUTE_PREFIXES = ('SR', 'US', 'IH', 'CR')
+
+_SHEET_TYPE_REGEXES = [(name, re.compile(pattern, re.IGNORECASE)) for name, pattern in SHEET_TYPES]
+
+@dataclass
+class SheetInfo:
+    page: int  # 1-based page number
+    sheet_number: str = ""
+    title: str = ""
+    sheet_type: str = "unknown"
+    source: str = "text"  # text layer or ocr
+
+@dataclass
+class SheetIndex:
+    pdf_path: str
+    sheets: List[SheetInfo] = field(default_factory=list)
+
+    def pages_for(self, sheet_types: Iterable[str] = BOM_SHEET_TYPES) -> List[int]:
+        """Return the 1-based pages whose sheet type is one of sheet_types."""
+        wanted = set(sheet_types)
+        return [sheet.page for sheet in self.sheets if sheet.sheet_type in wanted]
+
+    def get(self, page: int) -> Optional[SheetInfo]:
+        for sheet in self.sheets:
+            if sheet.page == page:
+                return sheet
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'pdf_path': self.pdf_path, 'sheets': [asdict(sheet) for sheet in self.sheets]}
+
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> 'SheetIndex':
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['pdf_path'], [SheetInfo(**sheet) for sheet in data['sheets']])
+
+def classify_title_block(text: str) -> Tuple[str, str, str]:
+    """
+    Extract the sheet number, title and sheet type from title-block text.
+
+    Returns:
+        tuple: (sheet_number, title, sheet_type)
+    """
+    sheet_type, title = 'unknown', ''
+    for name, regex in _SHEET_TYPE_REGEXES:
+        match = regex.search(text)
+        if match:
+            sheet_type = name
+            title = ' '.join(match.group(0).upper().split())
+            break
+
+    if not title:
+        # Fall back to the longest line of the title block
+        lines = [line.strip() for line in text.splitlines() if line.strip()]
+        title = max(lines, key=len) if lines else ''
+
+    sheet_number = ''
+    match = SHEET_OF_PATTERN.search(text)
+    if match:
+        sheet_number = match.group(1)
+    else:
+        codes = [code for code, prefix in SHEET_CODE_PATTERN.findall(text.upper()) if prefix not in ROUTE_PREFIXES]
+        if codes:
+            # The sheet number is usually the last code in the title block
+            sheet_number = codes[-1]
+
+    return sheet_number, title, sheet_type
+
+def title_block_rect(page, title_block=DEFAULT_TITLE_BLOCK):
+    """Return the title-block clip rectangle of a page in PDF points, in the rotated space of page.rect."""
+    rect = page.rect
+    x0, y0, x1, y1 = title_block
+    return fitz.Rect(rect.x0 + rect.width * x0, rect.y0 + rect.height * y0,
+                     rect.x0 + rect.width * x1, rect.y0 + rect.height * y1)
+
+def read_title_block(page, title_block=DEFAULT_TITLE_BLOCK, dpi=TITLE_BLOCK_DPI) -> Tuple[str, str]:
+    """
+    Read the title-block text of a page.
+
+    The title block is placed on the page as displayed, so on a page with a
+    /Rotate entry the text-layer clip is mapped back to unrotated coordinates.
+
+    Returns:
+        tuple: (text, source) where source is "text" or "ocr"
+    """
+    clip = title_block_rect(page, title_block)
+    text = page.get_text('text', clip=unrotated_rect(page, clip))
+    if text.strip():
+        return text, 'text'
+
+    # No text layer: OCR only the clipped region at low resolution
+    matrix = fitz.Matrix(dpi / 72, dpi / 72)
+    pix = page.get_pixmap(matrix=matrix, clip=clip, colorspace=fitz.csGRAY)
+    img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.h, pix.w)
+    return pytesseract.image_to_string(Image.fromarray(img), config='--psm 6'), 'ocr'
+
+def build_sheet_index(pdf_path, output_path=None, title_block=DEFAULT_TITLE_BLOCK,
+                      dpi=TITLE_BLOCK_DPI) -> SheetIndex:
+    """
+    Classify every page of a PDF by its title block.
+
+    Args:
+        pdf_path: Path to the PDF file
+        output_path: Optional path to save the sheet index as JSON
+        title_block: Title-block region as page fractions (x0, y0, x1, y1)
+        dpi: Resolution used when the title block has to be OCRed
+
+    Returns:
+        SheetIndex: One SheetInfo per page
+    """
+    index = SheetIndex(os.path.abspath(pdf_path))
+
+    with fitz.open(pdf_path) as doc:
+        for page_num in range(len(doc)):
+            try:
+                text, source = read_title_block(doc[page_num], title_block, dpi)
+            except Exception as e:
+                print(f"Error reading title block of page {page_num + 1}: {e}")
+                text, source = '', 'error'
+            sheet_number, title, sheet_type = classify_title_block(text)
+            index.sheets.append(SheetInfo(page_num + 1, sheet_number, title, sheet_type, source))
+
+    if output_path:
+        index.save(output_path)
+        print(f"Sheet index saved to {output_path}")
+
+    return index
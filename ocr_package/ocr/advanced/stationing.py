@@ -0,0 +1,232 @@
+"""
+Station and milepost parsing with a sorted range index over extracted records.
+
+Stations ("STA 123+45") are normalized to feet along the alignment and
+mileposts ("MP 0.024") to miles, so sign schedules, ATM specs, panel rows
+and the per-site sign rows of a generated BOM can be queried by location and
+joined with each other. BOM rows totalled over the whole plan set (Location
+"Various") have no station and are not indexed.
+"""
+
+import re
+import bisect
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Iterable, Tuple, Union
+
+STATION_PATTERN = re.compile(
+    r'(?:\bSTA\.?\s*)?(?<![\d.])(\d+)\s*\+\s*(\d{2}(?:\.\d+)?)(?![\d+])', re.IGNORECASE
+)
+MILEPOST_PATTERN = re.compile(
+    r'(?:\bM\.?P\.?\s*|\bMILEPOST\s*)(\d+(?:\.\d+)?)', re.IGNORECASE
+)
+
+# Columns checked, in order, when a record does not name its location field
+STATION_FIELDS = ('Station', 'STA', 'Location')
+MILEPOST_FIELDS = ('Milepost', 'MP', 'Mile Post')
+
+def parse_station(value: Any) -> Optional[float]:
+    """
+    Parse a station such as "STA 123+45" or "12+34.5" into feet.
+
+    Returns:
+        float: Distance in feet (123+45 -> 12345.0), or None if no station is found
+    """
+    if value is None:
+        return None
+    match = STATION_PATTERN.search(str(value))
+    if not match:
+        return None
+    return int(match.group(1)) * 100 + float(match.group(2))
+
+def parse_milepost(value: Any) -> Optional[float]:
+    """
+    Parse a milepost such as "MP 12.5" or a bare number (0.024) into miles.
+
+    Returns:
+        float: Milepost in miles, or None if no milepost is found
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) if value == value else None  # NaN check
+    text = str(value).strip()
+    match = MILEPOST_PATTERN.search(text)
+    if match:
+        return float(match.group(1))
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+@dataclass
+class LocatedRecord:
+    project: str
+    source: str  # e.g. sign_schedule, panel_schedule, bom
+    kind: str    # station (feet) or milepost (miles)
+    start: float
+    end: float
+    data: Dict[str, Any] = field(default_factory=dict)
+
+def locate_record(record: Dict[str, Any], location_field: Optional[str] = None) -> Optional[Tuple[str, float, float]]:
+    """
+    Find and normalize the location of an extracted record.
+
+    Ranges such as "STA 100+00 TO 150+00" yield their start and end.
+
+    Returns:
+        tuple: (kind, start, end), or None if the record has no location
+    """
+    if location_field is not None:
+        candidates = [location_field]
+    else:
+        candidates = [f for f in STATION_FIELDS + MILEPOST_FIELDS if f in record]
+
+    for name in candidates:
+        value = record.get(name)
+        if value is None:
+            continue
+
+        stations = [int(m.group(1)) * 100 + float(m.group(2))
+                    for m in STATION_PATTERN.finditer(str(value))]
+        if stations:
+            return 'station', min(stations), max(stations)
+
+        if name in MILEPOST_FIELDS or location_field is not None:
+            milepost = parse_milepost(value)
+            if milepost is not None:
+                return 'milepost', milepost, milepost
+
+    return None
+
+class LocationIndex:
+    """
+    Sorted interval index of located records.
+
+    Records are kept per (project, kind) sorted by start, so a range query is
+    a bisect plus a scan bounded by the longest interval in the group.
+    """
+
+    def __init__(self):
+        self._groups: Dict[Tuple[str, str], List[LocatedRecord]] = {}
+        self._starts: Dict[Tuple[str, str], List[float]] = {}
+        self._max_length: Dict[Tuple[str, str], float] = {}
+        self._dirty = set()
+
+    def __len__(self):
+        return sum(len(records) for records in self._groups.values())
+
+    def add(self, record: LocatedRecord):
+        key = (record.project, record.kind)
+        self._groups.setdefault(key, []).append(record)
+        self._max_length[key] = max(self._max_length.get(key, 0.0), record.end - record.start)
+        self._dirty.add(key)
+
+    def add_records(self, records: Iterable[Dict[str, Any]], project: str, source: str,
+                    location_field: Optional[str] = None) -> int:
+        """
+        Normalize and add extracted records (e.g. DataFrame.to_dict('records')).
+
+        Returns:
+            int: Number of records that had a location
+        """
+        added = 0
+        for record in records:
+            located = locate_record(record, location_field)
+            if located:
+                kind, start, end = located
+                self.add(LocatedRecord(project, source, kind, start, end, dict(record)))
+                added += 1
+        return added
+
+    def add_dataframe(self, df, project: str, source: str, location_field: Optional[str] = None) -> int:
+        """Add the rows of a DataFrame, returning the number of located rows."""
+        if df is None:
+            return 0
+        return self.add_records(df.to_dict('records'), project, source, location_field)
+
+    def query(self, low: Union[str, float], high: Union[str, float], kind: Optional[str] = None,
+              project: Optional[str] = None, source: Optional[str] = None) -> List[LocatedRecord]:
+        """
+        Return records overlapping [low, high], ordered by project and start.
+
+        Bounds may be location strings ("STA 100+00", "MP 1.5"), which select
+        their kind of record, or bare numbers ("100", 1.5), which are read in
+        the units of kind: feet for stations, miles for mileposts.
+
+        Raises:
+            ValueError: A bound is not a location, or is of another kind
+        """
+        low_kind, low = self._bound(low)
+        high_kind, high = self._bound(high)
+        kind = kind or low_kind or high_kind or 'station'
+        for bound_kind in (low_kind, high_kind):
+            if bound_kind is not None and bound_kind != kind:
+                raise ValueError(f"A {bound_kind} bound cannot query {kind} records")
+        if low > high:
+            low, high = high, low
+
+        results = []
+        for key in sorted(self._groups):
+            group_project, group_kind = key
+            if group_kind != kind or (project is not None and group_project != project):
+                continue
+            records, starts = self._sorted(key)
+
+            # Intervals starting before low - longest interval cannot reach low
+            first = bisect.bisect_left(starts, low - self._max_length[key])
+            last = bisect.bisect_right(starts, high)
+            for record in records[first:last]:
+                if record.end >= low and (source is None or record.source == source):
+                    results.append(record)
+        return results
+
+    def join(self, left_source: str, right_source: str, kind: str = 'station',
+             tolerance: float = 0.0, cross_project: bool = False) -> List[Tuple[LocatedRecord, LocatedRecord]]:
+        """
+        Pair records of two sources whose locations are within tolerance.
+
+        Args:
+            left_source: Source of the left-hand records, e.g. "bom" for the
+                per-site sign rows of generate_bom
+            right_source: Source of the right-hand records, e.g. "panel_schedule"
+            kind: Location kind to join on
+            tolerance: Allowed gap, in feet for stations or miles for mileposts
+            cross_project: Also pair records from different projects
+        """
+        pairs = []
+        for key in sorted(self._groups):
+            group_project, group_kind = key
+            if group_kind != kind:
+                continue
+            records, _ = self._sorted(key)
+            for left in records:
+                if left.source != left_source:
+                    continue
+                matches = self.query(left.start - tolerance, left.end + tolerance, kind=kind,
+                                     project=None if cross_project else group_project,
+                                     source=right_source)
+                pairs.extend((left, right) for right in matches)
+        return pairs
+
+    def _sorted(self, key):
+        if key in self._dirty:
+            self._groups[key].sort(key=lambda record: (record.start, record.end))
+            self._starts[key] = [record.start for record in self._groups[key]]
+            self._dirty.discard(key)
+        return self._groups[key], self._starts[key]
+
+    @staticmethod
+    def _bound(value) -> Tuple[Optional[str], float]:
+        """Return (kind, value) of a query bound; kind is None for bare numbers."""
+        if isinstance(value, (int, float)):
+            return None, float(value)
+        station = parse_station(value)
+        if station is not None:
+            return 'station', station
+        match = MILEPOST_PATTERN.search(str(value))
+        if match:
+            return 'milepost', float(match.group(1))
+        try:
+            return None, float(str(value).strip())
+        except ValueError:
+            raise ValueError(f"Not a station or milepost: {value!r}") from None
@@ -1,8 +1,15 @@
 import os
 import re
+from collections import Counter
+from dataclasses import dataclass, field
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Tuple, Optional
+from .bom_matcher import BomMatcher, DEFAULT_BOM_CATALOG, ATM_SIGN_CONTROLLER
+from .fuzzy_matcher import FuzzyBomMatcher
+from .stationing import parse_station
+from .positions_format import PositionsFile, is_positions_file
+from .sheet_index import SheetIndex, BOM_SHEET_TYPES, SHEET_INDEX_FILE
 
 class TextElement:
     """A text element with its position and confidence."""
@@ -50,7 +57,15 @@ class TableDetector:
         self.col_threshold = col_threshold
         
     def parse_text_positions_file(self, file_path: str) -> List[TextElement]:
-        """Parse a text positions file and return a list of TextElement objects."""
+        """
+        Parse a text positions file and return a list of TextElement objects.
+        
+        Binary positions files are read directly from their memory-mapped
+        records; the older text format is parsed line by line.
+        """
+        if is_positions_file(file_path):
+            return self.read_binary_positions_file(file_path)
+        
         elements = []
         
         with open(file_path, 'r', encoding='utf-8') as f:
@@ -68,6 +83,14 @@ class TableDetector:
         
         return elements
     
+    def read_binary_positions_file(self, file_path: str) -> List[TextElement]:
+        """Read a binary positions file written by write_positions_file."""
+        positions = PositionsFile(file_path)
+        return [
+            TextElement(text, (x, y), (width, height), confidence)
+            for text, x, y, width, height, confidence in zip(*positions.columns())
+        ]
+    
     def find_tables(self, elements: List[TextElement]) -> List[List[TextElement]]:
         """Find tables in a list of text elements."""
         # Sort elements by y-position
@@ -161,36 +184,163 @@ class TableDetector:
         
         return dataframes
 
+@dataclass
+class PlanPage:
+    """One page of a plans document: its text and positioned words."""
+    number: int
+    text: str = ""
+    elements: List[TextElement] = field(default_factory=list)
+
+class PlanDocument:
+    """
+    In-memory model of a plans document shared by all extraction methods.
+
+    Pages, words and positions are loaded once, either from an extracted data
+    directory or directly from a StructuredDocument.
+    """
+    
+    POSITIONS_FILE = re.compile(r'^page_(\d+)_text_positions\.(txt|bin)$')
+    TEXT_FILE = re.compile(r'^page_(\d+)_text\.txt$')
+    FULL_TEXT_FILE = 'plans_text_optimized.txt'
+    
+    def __init__(self, pages: Optional[List[PlanPage]] = None, full_text: Optional[str] = None):
+        self.pages = sorted(pages or [], key=lambda page: page.number)
+        self._full_text = full_text
+    
+    @classmethod
+    def from_directory(cls, extracted_data_dir: str, table_detector: Optional['TableDetector'] = None) -> 'PlanDocument':
+        """Load every page found in the texts directory of an extracted data directory."""
+        table_detector = table_detector or TableDetector()
+        text_files_dir = os.path.join(extracted_data_dir, 'texts')
+        pages: Dict[int, PlanPage] = {}
+        full_text = None
+        
+        if os.path.isdir(text_files_dir):
+            for name in sorted(os.listdir(text_files_dir)):
+                path = os.path.join(text_files_dir, name)
+                positions_match = cls.POSITIONS_FILE.match(name)
+                text_match = cls.TEXT_FILE.match(name)
+                
+                if positions_match:
+                    page = pages.setdefault(int(positions_match.group(1)), PlanPage(int(positions_match.group(1))))
+                    # Prefer the binary file when both formats are present
+                    if positions_match.group(2) == 'bin' or not page.elements:
+                        page.elements = table_detector.parse_text_positions_file(path)
+                elif text_match:
+                    page = pages.setdefault(int(text_match.group(1)), PlanPage(int(text_match.group(1))))
+                    page.text = _read_text(path)
+                elif name == cls.FULL_TEXT_FILE:
+                    full_text = _read_text(path)
+        
+        return cls(list(pages.values()), full_text)
+    
+    @classmethod
+    def from_structured_document(cls, document) -> 'PlanDocument':
+        """Build the model from a StructuredDocument without any text-file round trip."""
+        pages = []
+        for element in document.elements:
+            if element.element_type != 'page':
+                continue
+            number = element.metadata.get('page_number', len(pages)) + 1
+            elements = [
+                TextElement(pos['text'], (pos['x'], pos['y']), (pos['width'], pos['height']), pos['confidence'])
+                for pos in element.metadata.get('text_positions', [])
+            ]
+            pages.append(PlanPage(number, element.text, elements))
+        return cls(pages)
+    
+    @property
+    def full_text(self) -> Optional[str]:
+        """Full plans text, with page markers when built from the pages."""
+        if self._full_text is None and any(page.text for page in self.pages):
+            self._full_text = ''.join(
+                f"\n\n--- PAGE {page.number} ---\n\n{page.text}" for page in self.pages
+            )
+        return self._full_text
+    
+    def get_page(self, number: int) -> Optional[PlanPage]:
+        for page in self.pages:
+            if page.number == number:
+                return page
+        return None
+
+def _read_text(path: str) -> str:
+    """Read a UTF-8 text file whole; the extractors run their regexes over the complete text."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
 class PlanSpecificationsExtractor:
     """Extract sign specifications from plans document."""
     
-    def __init__(self, extracted_data_dir: str):
+    def __init__(self, extracted_data_dir: Optional[str] = None, fuzzy: bool = False,
+                 document=None, sheet_index: Optional[SheetIndex] = None):
+        """
+        Args:
+            extracted_data_dir: Directory containing extracted text data
+            fuzzy: Also count OCR-garbled item names in the BOM
+            document: Optional PlanDocument or StructuredDocument to use instead
+                of loading the extracted data directory
+            sheet_index: Optional SheetIndex limiting table detection to the
+                schedule sheets; sheet_index.json in the data directory is
+                used when present
+        """
+        if extracted_data_dir is None and document is None:
+            raise ValueError("Either extracted_data_dir or document is required")
+        
         self.extracted_data_dir = extracted_data_dir
-        self.text_files_dir = os.path.join(extracted_data_dir, 'texts')
+        self.text_files_dir = os.path.join(extracted_data_dir, 'texts') if extracted_data_dir else None
         self.table_detector = TableDetector()
+        # The fuzzy matcher also counts OCR-garbled item names
+        catalog = DEFAULT_BOM_CATALOG + [ATM_SIGN_CONTROLLER]
+        self.bom_matcher = FuzzyBomMatcher(catalog) if fuzzy else BomMatcher(catalog)
+        
+        if document is not None and not isinstance(document, PlanDocument):
+            document = PlanDocument.from_structured_document(document)
+        self._document = document
+        
+        if sheet_index is None and extracted_data_dir:
+            index_path = os.path.join(extracted_data_dir, SHEET_INDEX_FILE)
+            if os.path.exists(index_path):
+                sheet_index = SheetIndex.load(index_path)
+        self.sheet_index = sheet_index
+    
+    @property
+    def document(self) -> PlanDocument:
+        """Shared document model, loaded on first use."""
+        if self._document is None:
+            self._document = PlanDocument.from_directory(self.extracted_data_dir, self.table_detector)
+        return self._document
+    
+    def _table_pages(self) -> List[PlanPage]:
+        """Pages worth running table detection on, according to the sheet index."""
+        if self.sheet_index is not None:
+            relevant = set(self.sheet_index.pages_for(BOM_SHEET_TYPES))
+            pages = [page for page in self.document.pages if page.number in relevant]
+            if pages:
+                return pages
+        return self.document.pages
         
     def extract_atm_specifications(self) -> pd.DataFrame:
         """Extract ATM (Active Traffic Management) sign specifications."""
-        # Combine relevant position data from text positions files
-        elements = []
-        for page_num in range(1, 5):  # Assuming relevant pages are 1-4
-            position_file = os.path.join(self.text_files_dir, f'page_{page_num}_text_positions.txt')
-            if os.path.exists(position_file):
-                elements.extend(self.table_detector.parse_text_positions_file(position_file))
-        
-        # Extract tables from text elements
-        tables = self.table_detector.find_tables(elements)
-        dataframes = self.table_detector.extract_tables_as_dataframes(tables)
-        
-        # Look for ATM-related tables
         atm_specs = None
-        for df in dataframes:
-            # Check if dataframe appears to contain ATM specifications
-            if df.shape[1] >= 3 and any('ATM' in str(col) for col in df.columns):
-                atm_specs = df
+        
+        # Detect tables page by page so rows of different sheets are never mixed
+        for page in self._table_pages():
+            if not page.elements:
+                continue
+            tables = self.table_detector.find_tables(page.elements)
+            dataframes = self.table_detector.extract_tables_as_dataframes(tables)
+            
+            # Look for ATM-related tables
+            for df in dataframes:
+                # Check if dataframe appears to contain ATM specifications
+                if df.shape[1] >= 3 and any('ATM' in str(col) for col in df.columns):
+                    atm_specs = df
+                    break
+            if atm_specs is not None:
                 break
         
-        # If we haven't found ATM specs in position files, try looking in plans_text_optimized.txt
+        # If we haven't found ATM specs in position data, try looking in the full text
         if atm_specs is None:
             atm_specs = self._extract_atm_specs_from_full_text()
         
@@ -198,13 +348,10 @@ class PlanSpecificationsExtractor:
     
     def _extract_atm_specs_from_full_text(self) -> Optional[pd.DataFrame]:
         """Fallback method to extract ATM specs from full text using pattern matching."""
-        plans_text_file = os.path.join(self.text_files_dir, 'plans_text_optimized.txt')
-        if not os.path.exists(plans_text_file):
+        text = self.document.full_text
+        if text is None:
             return None
         
-        with open(plans_text_file, 'r', encoding='utf-8') as f:
-            text = f.read()
-        
         # Look for sections related to ATM signs
         atm_sections = re.findall(r'(ATM\s+SITE\s+\d+[\s\S]+?(?=ATM\s+SITE\s+\d+|---\s+PAGE))', text)
         
@@ -228,9 +375,12 @@ class PlanSpecificationsExtractor:
                 
                 # Create a row for this site
                 if dims and sign_types:
+                    location_match = re.search(r'"L"\s+([\d+]+)', section)
+                    location = location_match.group(1) if location_match else ''
                     specs.append({
                         'Site': f'Site {site_num}',
-                        'Location': re.search(r'"L"\s+([\d+]+)', section).group(1) if re.search(r'"L"\s+([\d+]+)', section) else '',
+                        'Location': location,
+                        'Station Value': parse_station(location),  # Feet along the alignment
                         'Sign Types': ', '.join(sign_types),
                         'Dimensions': ', '.join(dims[:5])  # Take first 5 dimensions
                     })
@@ -242,13 +392,10 @@ class PlanSpecificationsExtractor:
     
     def extract_panel_schedule(self) -> pd.DataFrame:
         """Extract panel schedule information."""
-        plans_text_file = os.path.join(self.text_files_dir, 'plans_text_optimized.txt')
-        if not os.path.exists(plans_text_file):
+        text = self.document.full_text
+        if text is None:
             return None
         
-        with open(plans_text_file, 'r', encoding='utf-8') as f:
-            text = f.read()
-        
         # Look for panel schedule section
         panel_section = re.search(r'(PROJECT\s+ATCMTD\s+PANEL\s+SCHEDULE[\s\S]+?(?=PROJECT\s+ATCMTD\s+METER))', text)
         
@@ -265,6 +412,7 @@ class PlanSpecificationsExtractor:
                 rows.append({
                     'Panel': match.group(1),
                     'Station': match.group(2),
+                    'Station Value': parse_station(match.group(2)),  # Feet along the alignment
                     'Offset': match.group(3),
                     'Direction': match.group(4),
                     'Sheet': match.group(5)
@@ -291,30 +439,23 @@ class PlanSpecificationsExtractor:
             for _, row in atm_specs.iterrows():
                 site = row.get('Site', '')
                 sign_types = row.get('Sign Types', '')
+                # Station of the site, so sign rows can be joined by location
+                station = row.get('Location', '')
+                station = station if parse_station(station) is not None else None
                 
-                if 'TYPE 1' in sign_types:
-                    bom_items.append({
-                        'Item': 'ATM Sign Type 1',
-                        'Location': site,
-                        'Quantity': sign_types.count('TYPE 1'),
-                        'Description': 'Active Traffic Management Sign (Type 1)'
-                    })
-                
-                if 'TYPE 2' in sign_types:
-                    bom_items.append({
-                        'Item': 'ATM Sign Type 2',
-                        'Location': site,
-                        'Quantity': sign_types.count('TYPE 2'),
-                        'Description': 'Active Traffic Management Sign (Type 2)'
-                    })
-                
-                if 'TYPE 3' in sign_types:
-                    bom_items.append({
-                        'Item': 'ATM Sign Type 3',
-                        'Location': site,
-                        'Quantity': sign_types.count('TYPE 3'),
-                        'Description': 'Active Traffic Management Sign (Type 3)'
-                    })
+                # Count every sign type of the site in one pass
+                type_counts = Counter(re.findall(r'TYPE\s+(\d+)', sign_types))
+                for sign_type in ('1', '2', '3'):
+                    if type_counts[sign_type]:
+                        item = {
+                            'Item': f'ATM Sign Type {sign_type}',
+                            'Location': site,
+                            'Quantity': type_counts[sign_type],
+                            'Description': f'Active Traffic Management Sign (Type {sign_type})'
+                        }
+                        if station is not None:
+                            item['Station'] = station
+                        bom_items.append(item)
         
         # Add panel items if available
         if panel_schedule is not None:
@@ -326,74 +467,34 @@ class PlanSpecificationsExtractor:
             })
         
         # Look for additional items in plans text
-        plans_text_file = os.path.join(self.text_files_dir, 'plans_text_optimized.txt')
-        if os.path.exists(plans_text_file):
-            with open(plans_text_file, 'r', encoding='utf-8') as f:
-                text = f.read()
-            
-            # Find mentions of equipment that should be in the BOM
-            if 'ITS POLE (80 FEET)' in text:
-                bom_items.append({
-                    'Item': 'ITS Pole',
-                    'Location': 'Various',
-                    'Quantity': text.count('ITS POLE (80 FEET)'),
-                    'Description': 'ITS Pole (80 Feet)'
-                })
-            
-            if 'CCTV CAMERA (PTZ)' in text:
-                bom_items.append({
-                    'Item': 'CCTV Camera (PTZ)',
-                    'Location': 'Various',
-                    'Quantity': text.count('CCTV CAMERA (PTZ)'),
-                    'Description': 'CCTV Camera with Pan/Tilt/Zoom Capability'
-                })
-            
-            if 'CCTV CAMERA (FIXED)' in text:
-                bom_items.append({
-                    'Item': 'CCTV Camera (Fixed)',
-                    'Location': 'Various',
-                    'Quantity': text.count('CCTV CAMERA (FIXED)'),
-                    'Description': 'Fixed CCTV Camera'
-                })
-            
-            if 'RADAR DETECTOR SYSTEM' in text:
-                bom_items.append({
-                    'Item': 'Radar Detector System',
-                    'Location': 'Various',
-                    'Quantity': text.count('RADAR DETECTOR SYSTEM'),
-                    'Description': 'Radar Detector System'
-                })
-                
-            if 'COMMUNICATION CABINET' in text:
-                bom_items.append({
-                    'Item': 'Communication Cabinet',
-                    'Location': 'Various',
-                    'Quantity': text.count('COMMUNICATION CABINET'),
-                    'Description': 'Communication Cabinet for ITS Equipment'
-                })
-                
-            if 'ACTIVE TRAFFIC MANAGEMENT SIGN CONTROLLER' in text:
+        text = self.document.full_text
+        if text is not None:
+            # Count all equipment in the catalog with a single pass over the text
+            counts = self.bom_matcher.count(text)
+            for row in self.bom_matcher.to_rows(counts, groups=['equipment']):
                 bom_items.append({
-                    'Item': 'ATM Sign Controller',
+                    'Item': row['Item'],
                     'Location': 'Various',
-                    'Quantity': text.count('ACTIVE TRAFFIC MANAGEMENT SIGN CONTROLLER'),
-                    'Description': 'Controller for Active Traffic Management Signs'
+                    'Quantity': row['Quantity'],
+                    'Description': row['Description']
                 })
         
         return pd.DataFrame(bom_items)
 
-def extract_sign_specs_from_plans(extracted_data_dir: str, output_file: str = None) -> pd.DataFrame:
+def extract_sign_specs_from_plans(extracted_data_dir: str, output_file: str = None,
+                                  fuzzy: bool = False) -> pd.DataFrame:
     """
     Extract sign specifications from plans document and optionally save to CSV.
     
     Args:
         extracted_data_dir: Directory containing extracted text data
         output_file: Optional path to save the Bill of Materials as CSV
+        fuzzy: Also count item names with OCR errors (bounded edit distance)
         
     Returns:
         DataFrame containing the Bill of Materials
     """
-    extractor = PlanSpecificationsExtractor(extracted_data_dir)
+    extractor = PlanSpecificationsExtractor(extracted_data_dir, fuzzy=fuzzy)
     bom = extractor.generate_bom()
     
     if output_file and bom is not None:
@@ -3,9 +3,15 @@ Batch processing functionality for processing multiple PDF documents.
 """
 
 from .processors import process_pdf_with_progress, batch_process, process_directory
+from .watch import FolderWatcher, watch_directory
+from .work_queue import WorkQueue, run_worker
 
 __all__ = [
     'process_pdf_with_progress',
     'batch_process',
     'process_directory',
+    'FolderWatcher',
+    'watch_directory',
+    'WorkQueue',
+    'run_worker',
 ] 
\ No newline at end of file
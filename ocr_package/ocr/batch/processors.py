@@ -1,12 +1,15 @@
 import os
 import sys
 import time
-import glob
+import fnmatch
 from ..core.processor import extract_text_from_pdf, save_text_to_file
 from ..core.utils import ensure_dir, get_output_path
+from ..core.progress import ProgressTracker, report_unfinished
+from ..core import metrics
 
 def process_pdf_with_progress(pdf_path, output_path=None, start_page=0, end_page=None, 
-                            dpi=200, save_images=False, workers=None):
+                            dpi=200, save_images=False, workers=None, cache=None, dedup=None,
+                            auto_dpi=False, profile=None):
     """Process a PDF with progress tracking"""
     print(f"\n{'='*80}")
     print(f"Processing: {os.path.basename(pdf_path)}")
@@ -27,7 +30,12 @@ def process_pdf_with_progress(pdf_path, output_path=None, start_page=0, end_page
     text = extract_text_from_pdf(
         pdf_path, 
         start_page=start_page, 
-        end_page=end_page
+        end_page=end_page,
+        dpi=dpi,
+        cache=cache,
+        dedup=dedup,
+        auto_dpi=auto_dpi,
+        profile=profile
     )
     processing_time = time.time() - start_time
     
@@ -47,9 +55,36 @@ def process_pdf_with_progress(pdf_path, output_path=None, start_page=0, end_page
         print(f"\nFailed to process {os.path.basename(pdf_path)}")
         return False
 
+def parse_page_range(page_range):
+    """(start_page, end_page) of a range like '0-5', '10-' or '10'; (0, None) for all pages"""
+    start_page, end_page = 0, None
+    if page_range:
+        parts = page_range.split('-')
+        if len(parts) == 2:
+            start_page = int(parts[0]) if parts[0] else 0
+            end_page = int(parts[1]) if parts[1] else None
+        elif len(parts) == 1:
+            start_page = int(parts[0])
+            end_page = start_page
+    return start_page, end_page
+
 def batch_process(file_list, output_dir=None, dpi=200, save_images=False, 
-                max_workers=None, page_range=None):
-    """Process multiple PDF files in batch"""
+                max_workers=None, page_range=None, cache=None, dedup=None,
+                auto_dpi=False, profile=None, progress=None):
+    """
+    Process multiple PDF files in batch.
+    
+    Args:
+        cache: Optional PageRasterCache so re-runs reuse the rendered pages
+        dedup: Optional PageHashIndex so standard sheets repeated across
+            files are OCRed only once
+        auto_dpi: Choose each page's DPI from its text height, with dpi as
+            the baseline
+        profile: Optional OcrProfile with the Tesseract and preprocessing
+            settings to use
+        progress: Optional ProgressTracker; every file's pages are added to
+            it up front, so its ETA covers the whole batch
+    """
     if not file_list:
         print("No files to process")
         return
@@ -59,15 +94,7 @@ def batch_process(file_list, output_dir=None, dpi=200, save_images=False,
         ensure_dir(output_dir)
     
     # Parse page range if provided
-    start_page, end_page = 0, None
-    if page_range:
-        parts = page_range.split('-')
-        if len(parts) == 2:
-            start_page = int(parts[0]) if parts[0] else 0
-            end_page = int(parts[1]) if parts[1] else None
-        elif len(parts) == 1:
-            start_page = int(parts[0])
-            end_page = start_page
+    start_page, end_page = parse_page_range(page_range)
     
     # Process each file
     successful = 0
@@ -75,39 +102,60 @@ def batch_process(file_list, output_dir=None, dpi=200, save_images=False,
     total_time = 0
     
     print(f"\nBatch processing {len(file_list)} files")
-    print(f"DPI: {dpi}, Workers: {max_workers or 'Auto'}, Save images: {save_images}")
+    print(f"DPI: {'auto, baseline ' if auto_dpi else ''}{dpi}, Workers: {max_workers or 'Auto'}, Save images: {save_images}")
+    if profile is not None:
+        print(f"OCR profile: {profile.name} ({profile.lang}, {profile.tesseract_config or 'Tesseract defaults'})")
     if page_range:
         print(f"Page range: {page_range}")
     
     start_batch_time = time.time()
     
-    for i, pdf_path in enumerate(file_list, 1):
-        print(f"\nFile {i} of {len(file_list)}")
+    if progress is not None:
+        for pdf_path in file_list:
+            try:
+                progress.add_document(pdf_path, dpi, start_page, end_page)
+            except Exception as e:
+                print(f"Cannot count the pages of {pdf_path}: {e}")
+        progress.start()
+    
+    try:
+        for i, pdf_path in enumerate(file_list, 1):
+            print(f"\nFile {i} of {len(file_list)}")
         
-        # Set output path
-        if output_dir:
-            output_path = get_output_path(pdf_path, output_dir=output_dir)
-        else:
-            output_path = None
+            # Set output path
+            if output_dir:
+                output_path = get_output_path(pdf_path, output_dir=output_dir)
+            else:
+                output_path = None
         
-        # Process file
-        file_start_time = time.time()
-        result = process_pdf_with_progress(
-            pdf_path, 
-            output_path, 
-            start_page, 
-            end_page, 
-            dpi, 
-            save_images, 
-            max_workers
-        )
-        file_time = time.time() - file_start_time
-        total_time += file_time
+            # Process file
+            file_start_time = time.time()
+            result = process_pdf_with_progress(
+                pdf_path, 
+                output_path, 
+                start_page, 
+                end_page, 
+                dpi, 
+                save_images, 
+                max_workers,
+                cache,
+                dedup,
+                auto_dpi,
+                profile
+            )
+            file_time = time.time() - file_start_time
+            total_time += file_time
         
-        if result:
-            successful += 1
-        else:
-            failed += 1
+            metrics.inc("ocr_files_total", status="done" if result else "failed")
+            if result:
+                successful += 1
+            else:
+                failed += 1
+                report_unfinished(pdf_path, start_page, end_page)
+    
+    finally:
+        if progress is not None:
+            progress.stop()
     
     # Summary
     batch_time = time.time() - start_batch_time
@@ -120,11 +168,32 @@ def batch_process(file_list, output_dir=None, dpi=200, save_images=False,
     print(f"Total processing time: {total_time:.2f} seconds")
     print(f"Total time including overhead: {batch_time:.2f} seconds")
 
-def process_directory(directory_path, output_dir=None, pattern="*.pdf", **kwargs):
-    """Process all PDF files in a directory"""
+def scan_pdfs(directory_path, pattern="*.pdf", recursive=True):
+    """
+    Yield the files matching pattern under a directory, in sorted order.
+
+    Subdirectories are walked with os.scandir, which reads each entry's type
+    with the listing; hidden entries (like the work queue's .parts) are skipped.
+    """
+    try:
+        with os.scandir(directory_path) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+    except OSError as e:
+        print(f"Cannot read {directory_path}: {e}")
+        return
+    for entry in entries:
+        if entry.name.startswith('.'):
+            continue
+        if entry.is_dir(follow_symlinks=False):
+            if recursive:
+                yield from scan_pdfs(entry.path, pattern, recursive)
+        elif entry.is_file() and fnmatch.fnmatch(entry.name.lower(), pattern.lower()):
+            yield entry.path
+
+def process_directory(directory_path, output_dir=None, pattern="*.pdf", recursive=True, **kwargs):
+    """Process all PDF files in a directory and, by default, its subdirectories"""
     # Find all PDF files in the directory
-    search_path = os.path.join(directory_path, pattern)
-    file_list = glob.glob(search_path)
+    file_list = list(scan_pdfs(directory_path, pattern, recursive))
     
     if not file_list:
         print(f"No files matching {pattern} found in {directory_path}")
@@ -134,4 +203,4 @@ def process_directory(directory_path, output_dir=None, pattern="*.pdf", **kwargs
     
     # Process the files
     batch_process(file_list, output_dir=output_dir, **kwargs)
-    return True 
\ No newline at end of file
+    return True
@@ -0,0 +1,364 @@
+"""
+Watch-folder ingestion: OCR PDFs as they land in a directory.
+
+A FolderWatcher follows a directory tree with inotify on Linux (through
+libc, no extra dependency) and falls back to polling elsewhere, or when
+inotify is unavailable. inotify only sees changes made through the local
+kernel, so files written by other hosts to an NFS mount are picked up by a
+periodic rescan (or use polling outright). A file is handed out once its size
+and modification time have been stable for settle_seconds and it ends with
+a PDF trailer, so half-copied uploads are never OCRed.
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import fnmatch
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+from .processors import process_pdf_with_progress, scan_pdfs
+from ..core import metrics
+from ..core.events import pool_kwargs
+
+# Seconds a file's size and mtime must stay unchanged before it is processed
+SETTLE_SECONDS = 2.0
+
+# Seconds between directory scans when polling
+POLL_SECONDS = 5.0
+
+# Seconds between safety-net rescans when following inotify events
+RESCAN_SECONDS = 60.0
+
+# A complete PDF ends with this marker (followed at most by whitespace)
+PDF_TRAILER = b'%%EOF'
+TRAILER_WINDOW = 1024
+
+Signature = Tuple[int, int]  # (size, mtime in ns)
+
+def file_signature(path: str) -> Optional[Signature]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+def is_complete_pdf(path: str) -> bool:
+    """True if the file ends with a PDF trailer, i.e. it is not still being written."""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(0, size - TRAILER_WINDOW))
+            return PDF_TRAILER in f.read()
+    except OSError:
+        return False
+
+class Inotify:
+    """Minimal inotify binding over libc (Linux only)."""
+
+    IN_MODIFY = 0x2
+    IN_CLOSE_WRITE = 0x8
+    IN_MOVED_TO = 0x80
+    IN_CREATE = 0x100
+    IN_Q_OVERFLOW = 0x4000
+    IN_IGNORED = 0x8000
+    IN_ISDIR = 0x40000000
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+    EVENT = struct.Struct('iIII')  # wd, mask, cookie, name length
+
+    def __init__(self):
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._libc = libc
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self.directories: Dict[int, str] = {}  # watch descriptor -> directory
+
+    def add(self, directory: str):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), self.MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), directory)
+        self.directories[wd] = directory
+
+    def read(self, timeout: float) -> List[Tuple[Optional[str], int]]:
+        """
+        Wait up to timeout seconds for events.
+
+        Returns:
+            list: (path, mask) of each event; path is None when the kernel
+                queue overflowed and events were lost
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + self.EVENT.size <= len(data):
+            wd, mask, _, length = self.EVENT.unpack_from(data, offset)
+            name = data[offset + self.EVENT.size:offset + self.EVENT.size + length].rstrip(b'\0')
+            offset += self.EVENT.size + length
+            if mask & self.IN_Q_OVERFLOW:
+                events.append((None, mask))
+            elif mask & self.IN_IGNORED:
+                # The directory was removed
+                self.directories.pop(wd, None)
+            elif wd in self.directories:
+                events.append((os.path.join(self.directories[wd], os.fsdecode(name)), mask))
+        return events
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+class FolderWatcher:
+    """
+    Reports new and changed PDFs under a directory once they are completely written.
+
+    Files already present when the watcher starts are reported too; callers
+    skip the ones they have already processed.
+    """
+
+    def __init__(self, directory: str, pattern: str = "*.pdf", recursive: bool = True,
+                 settle_seconds: float = SETTLE_SECONDS, poll_seconds: float = POLL_SECONDS,
+                 rescan_seconds: float = RESCAN_SECONDS, use_inotify: Optional[bool] = None):
+        """
+        Args:
+            directory: Directory to watch
+            pattern: File name pattern, matched case-insensitively
+            recursive: Also watch subdirectories, including ones created later
+            settle_seconds: Time a file must stay unchanged before it is reported
+            poll_seconds: Scan interval when polling
+            rescan_seconds: Full rescan interval when following inotify events
+            use_inotify: True to require inotify, False to poll; by default
+                inotify is used where available
+        """
+        self.directory = directory
+        self.pattern = pattern
+        self.recursive = recursive
+        self.settle_seconds = settle_seconds
+        self.poll_seconds = poll_seconds
+        self.rescan_seconds = rescan_seconds
+        self.reported: Dict[str, Signature] = {}  # Signature of each file when it was reported
+        self.candidates: Dict[str, Tuple[Signature, float]] = {}  # path -> (signature, unchanged since)
+        self.inotify = None
+        if use_inotify is not False:
+            try:
+                self.inotify = Inotify()
+            except (OSError, AttributeError) as e:
+                if use_inotify:
+                    raise
+                print(f"inotify unavailable ({e}); polling every {poll_seconds:g}s")
+        self._last_scan = 0.0
+        self._watch_tree(directory)
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self.inotify is not None else "polling"
+
+    def _matches(self, path: str) -> bool:
+        name = os.path.basename(path)
+        return not name.startswith('.') and fnmatch.fnmatch(name.lower(), self.pattern.lower())
+
+    def _watch_tree(self, directory: str):
+        """Watch a directory (and its subdirectories) and pick up the files already in it."""
+        if self.inotify is not None:
+            for path in [directory] + (self._subdirectories(directory) if self.recursive else []):
+                try:
+                    self.inotify.add(path)
+                except OSError as e:
+                    # Usually the max_user_watches limit; the rescans still cover it
+                    print(f"Cannot watch {path}: {e}")
+        for path in scan_pdfs(directory, self.pattern, self.recursive):
+            self._observe(path)
+        if directory == self.directory:
+            self._last_scan = time.monotonic()
+
+    def _subdirectories(self, directory: str) -> List[str]:
+        found = []
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if not entry.name.startswith('.') and entry.is_dir(follow_symlinks=False):
+                        found.append(entry.path)
+                        found.extend(self._subdirectories(entry.path))
+        except OSError:
+            pass
+        return found
+
+    def _observe(self, path: str):
+        signature = file_signature(path)
+        if signature is None or signature == self.reported.get(path):
+            self.candidates.pop(path, None)
+            return
+        current = self.candidates.get(path)
+        if current is None or current[0] != signature:
+            self.candidates[path] = (signature, time.monotonic())
+
+    def _rescan(self):
+        for path in scan_pdfs(self.directory, self.pattern, self.recursive):
+            self._observe(path)
+        self._last_scan = time.monotonic()
+
+    def _wait(self, timeout: float):
+        if self.inotify is None:
+            time.sleep(timeout)
+            if time.monotonic() - self._last_scan >= self.poll_seconds:
+                self._rescan()
+            return
+        for path, mask in self.inotify.read(timeout):
+            if path is None:
+                print("inotify queue overflowed; rescanning")
+                self._rescan()
+            elif mask & Inotify.IN_ISDIR:
+                if self.recursive and mask & (Inotify.IN_CREATE | Inotify.IN_MOVED_TO):
+                    # Files may have landed before the watch was added
+                    self._watch_tree(path)
+            elif self._matches(path):
+                self._observe(path)
+        if time.monotonic() - self._last_scan >= self.rescan_seconds:
+            self._rescan()
+
+    def poll(self, timeout: Optional[float] = None) -> List[str]:
+        """
+        Wait for changes and return the files that are ready to process.
+
+        Args:
+            timeout: Most seconds to wait (default: the poll interval);
+                shortened while files are settling
+        """
+        timeout = self.poll_seconds if timeout is None else timeout
+        if self.candidates:
+            timeout = min(timeout, self.settle_seconds / 2)
+        self._wait(max(0.0, timeout))
+
+        ready = []
+        now = time.monotonic()
+        for path, (signature, since) in list(self.candidates.items()):
+            current = file_signature(path)
+            if current is None:
+                del self.candidates[path]
+            elif current != signature:
+                self.candidates[path] = (current, now)
+            elif now - since >= self.settle_seconds:
+                del self.candidates[path]
+                self.reported[path] = signature
+                if is_complete_pdf(path):
+                    ready.append(path)
+                else:
+                    print(f"Skipping {path}: not a complete PDF (waiting for it to change)")
+        return sorted(ready)
+
+    def close(self):
+        if self.inotify is not None:
+            self.inotify.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def watch_output_path(pdf_path: str, directory: str, output_dir: Optional[str] = None) -> str:
+    """
+    Text output of a watched PDF.
+
+    Subdirectories of the watched directory are mirrored under output_dir, so
+    equally named PDFs in different folders do not overwrite each other; with
+    no output_dir the text goes next to the PDF.
+    """
+    stem = os.path.splitext(pdf_path)[0] + ".txt"
+    if not output_dir:
+        return stem
+    return os.path.join(output_dir, os.path.relpath(stem, directory))
+
+def is_up_to_date(pdf_path: str, output_path: str) -> bool:
+    """True if the output exists and is newer than the PDF."""
+    try:
+        return os.stat(output_path).st_mtime_ns >= os.stat(pdf_path).st_mtime_ns
+    except OSError:
+        return False
+
+def watch_directory(directory, output_dir=None, dpi=200, max_workers=None, cache=None, dedup=None,
+                    auto_dpi=False, profile=None, recursive=True, settle_seconds=SETTLE_SECONDS,
+                    poll_seconds=POLL_SECONDS, use_inotify=None, stop=None):
+    """
+    Process PDFs as they appear in a directory, until interrupted.
+
+    Each ready file is sent to a pool of worker processes (one file per
+    worker) as soon as it lands. Files whose text output is newer than the
+    PDF are skipped, so a restarted watch does not redo finished work, and
+    files changed after processing are processed again.
+
+    Args:
+        directory: Directory to watch
+        output_dir: Directory to save text files (default: next to each PDF)
+        max_workers: Files processed at once (default: one per CPU)
+        stop: Optional threading.Event that ends the watch when set
+        Other arguments are passed to process_pdf_with_progress, or as in
+        FolderWatcher.
+
+    Returns:
+        dict: Counts of successful and failed files
+    """
+    process = partial(process_pdf_with_progress, dpi=dpi, cache=cache, dedup=dedup,
+                      auto_dpi=auto_dpi, profile=profile)
+    running = {}  # future -> path
+    waiting = []  # Ready files still being processed from an earlier version
+    counts = {'successful': 0, 'failed': 0}
+
+    with FolderWatcher(directory, recursive=recursive, settle_seconds=settle_seconds,
+                       poll_seconds=poll_seconds, use_inotify=use_inotify) as watcher, \
+            ProcessPoolExecutor(max_workers=max_workers, **pool_kwargs()) as executor:
+        print(f"Watching {directory} ({watcher.mode}{', recursive' if recursive else ''}); Ctrl+C to stop")
+        try:
+            while stop is None or not stop.is_set():
+                busy = set(running.values())
+                ready = [path for path in waiting if path not in busy]
+                waiting = [path for path in waiting if path in busy]
+                for path in watcher.poll(timeout=min(poll_seconds, 1.0) if running else None):
+                    (waiting if path in busy else ready).append(path)
+
+                for path in ready:
+                    output_path = watch_output_path(path, directory, output_dir)
+                    if is_up_to_date(path, output_path):
+                        continue
+                    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+                    print(f"New file: {path}")
+                    running[executor.submit(process, path, output_path)] = path
+
+                for future in [future for future in running if future.done()]:
+                    path = running.pop(future)
+                    try:
+                        ok = future.result()
+                    except Exception as e:
+                        print(f"Error processing {path}: {e}")
+                        ok = False
+                    counts['successful' if ok else 'failed'] += 1
+                    metrics.inc("ocr_files_total", status="done" if ok else "failed")
+        except KeyboardInterrupt:
+            print(f"\nStopping watch of {directory}")
+
+    for future, path in running.items():
+        if not future.cancelled() and future.exception() is None and future.result():
+            counts['successful'] += 1
+        else:
+            counts['failed'] += 1
+    print(f"Watch stopped: {counts['successful']} files processed, {counts['failed']} failed")
+    return counts
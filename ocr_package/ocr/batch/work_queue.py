@@ -0,0 +1,496 @@
+"""
+Distributed batch processing through a shared SQLite work queue.
+
+Render nodes that share a file system (e.g. an NFS mount) but no message
+broker cooperate through a queue database on that file system. Each PDF is
+split into page-range work units; any number of workers on any host claim
+units under a lease, extend the lease with heartbeats while they OCR, and
+write the unit's text to a part file next to the file's output. A unit whose
+lease expires (its worker died or lost the mount) is claimed again by the
+next worker. Once every unit of a file is done, one worker assembles the
+parts into the file's output.
+
+Claims and completions are single IMMEDIATE transactions, so two workers
+never hold the same live lease. Leases are compared against each host's
+clock: keep the hosts NTP-synchronized well within LEASE_SECONDS. SQLite's
+WAL mode does not work on network file systems, so the queue keeps the
+default rollback journal.
+"""
+
+import os
+import json
+import time
+import socket
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Sequence
+import fitz  # PyMuPDF
+from ..core.utils import ensure_dir, get_output_path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    pdf_path TEXT NOT NULL UNIQUE,
+    output_path TEXT NOT NULL,
+    pages INTEGER NOT NULL,
+    options TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    submitted REAL NOT NULL,
+    finished REAL
+);
+CREATE TABLE IF NOT EXISTS units (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL,
+    start_page INTEGER NOT NULL,
+    end_page INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    seconds REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS units_status ON units(status, lease_expires);
+CREATE INDEX IF NOT EXISTS units_file ON units(file_id);
+CREATE TABLE IF NOT EXISTS workers (
+    id TEXT PRIMARY KEY,
+    host TEXT,
+    pid INTEGER,
+    started REAL,
+    last_seen REAL,
+    units_done INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+# Pages per work unit
+DEFAULT_UNIT_PAGES = 10
+
+# A lease not extended for this long is reclaimed by another worker
+LEASE_SECONDS = 300
+
+# Heartbeats per lease period
+HEARTBEATS_PER_LEASE = 3
+
+# A unit failing this many times is marked failed instead of retried
+MAX_ATTEMPTS = 3
+
+# Seconds an idle worker waits before looking for work again
+POLL_SECONDS = 5
+
+@dataclass
+class WorkUnit:
+    id: int
+    file_id: int
+    pdf_path: str
+    start_page: int  # 1-based, inclusive
+    end_page: int
+    attempts: int
+    options: Dict
+    part_path: str
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def part_path(output_path: str, start_page: int, end_page: int) -> str:
+    """Path of a unit's text, in a parts directory next to the file's output."""
+    directory, name = os.path.split(os.path.abspath(output_path))
+    return os.path.join(directory, ".parts", f"{name}.{start_page:05d}-{end_page:05d}")
+
+def _write_atomic(path: str, text: str):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+class _Immediate:
+    """BEGIN IMMEDIATE ... COMMIT, rolled back on errors: takes the write lock up front."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, *exc):
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+
+class WorkQueue:
+    """
+    SQLite queue of page-range work units shared by workers on several hosts.
+
+    Like PageHashIndex, the queue can be passed to worker processes; each
+    process (and each heartbeat thread) opens its own connection.
+    """
+
+    def __init__(self, db_path: str, lease_seconds: float = LEASE_SECONDS, max_attempts: int = MAX_ATTEMPTS):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._conn = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = self.connect()
+        return self._conn
+
+    def connect(self):
+        """A new connection; autocommit, so transactions are opened explicitly."""
+        conn = sqlite3.connect(self.db_path, timeout=60, isolation_level=None)
+        conn.executescript(SCHEMA)
+        return conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        return state
+
+    def _transaction(self, conn=None):
+        return _Immediate(conn or self.conn)
+
+    def submit(self, file_list: Sequence[str], output_dir: Optional[str] = None,
+               unit_pages: int = DEFAULT_UNIT_PAGES, page_range=None, **options) -> int:
+        """
+        Split PDFs into work units and add them to the queue.
+
+        Files already in the queue are skipped, so a submission can be
+        repeated safely.
+
+        Args:
+            file_list: PDF paths; they must be readable at the same path on
+                every worker host
+            output_dir: Directory of the assembled text files (default: next
+                to each PDF)
+            unit_pages: Pages per work unit
+            page_range: Optional (first, last) 1-based pages to process
+            options: extract_text_from_pdf settings applied by every worker,
+                e.g. dpi, auto_dpi and profile (an OcrProfile)
+
+        Returns:
+            int: Number of work units added
+        """
+        if output_dir:
+            ensure_dir(output_dir)
+        profile = options.get('profile')
+        if profile is not None:
+            options['profile'] = profile.to_dict()
+        added = 0
+        for pdf_path in file_list:
+            pdf_path = os.path.abspath(pdf_path)
+            with fitz.open(pdf_path) as doc:
+                pages = len(doc)
+            first, last = page_range or (1, pages)
+            first, last = max(first or 1, 1), min(last or pages, pages)
+            output_path = os.path.abspath(get_output_path(pdf_path, output_dir=output_dir))
+            with self._transaction() as conn:
+                if conn.execute('SELECT 1 FROM files WHERE pdf_path = ?', (pdf_path,)).fetchone():
+                    print(f"Already queued: {pdf_path}")
+                    continue
+                cursor = conn.execute(
+                    'INSERT INTO files (pdf_path, output_path, pages, options, submitted) VALUES (?, ?, ?, ?, ?)',
+                    (pdf_path, output_path, pages, json.dumps(options), time.time())
+                )
+                units = [(cursor.lastrowid, start, min(start + unit_pages - 1, last))
+                         for start in range(first, last + 1, unit_pages)]
+                conn.executemany('INSERT INTO units (file_id, start_page, end_page) VALUES (?, ?, ?)', units)
+                added += len(units)
+        return added
+
+    def register_worker(self, worker_id: str):
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                'INSERT INTO workers (id, host, pid, started, last_seen) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT(id) DO UPDATE SET last_seen = excluded.last_seen',
+                (worker_id, socket.gethostname(), os.getpid(), now, now)
+            )
+
+    def claim(self, worker_id: str) -> Optional[WorkUnit]:
+        """
+        Lease the next pending unit, or one whose lease has expired.
+
+        Units that already failed max_attempts times are marked failed
+        instead of being handed out again.
+        """
+        with self._transaction() as conn:
+            now = time.time()
+            while True:
+                row = conn.execute(
+                    "SELECT u.id, u.file_id, f.pdf_path, u.start_page, u.end_page, u.attempts, f.options, "
+                    "f.output_path, u.status FROM units u JOIN files f ON f.id = u.file_id "
+                    "WHERE u.status = 'pending' OR (u.status = 'leased' AND u.lease_expires < ?) "
+                    "ORDER BY u.id LIMIT 1", (now,)
+                ).fetchone()
+                if row is None:
+                    return None
+                unit_id, file_id, pdf_path, start, end, attempts, options, output_path, status = row
+                if attempts >= self.max_attempts:
+                    error = 'lease expired' if status == 'leased' else None
+                    conn.execute("UPDATE units SET status = 'failed', worker = NULL, "
+                                 "error = COALESCE(?, error) WHERE id = ?", (error, unit_id))
+                    continue
+                if status == 'leased':
+                    print(f"Reclaiming {os.path.basename(pdf_path)} pages {start}-{end} from an expired lease")
+                conn.execute("UPDATE units SET status = 'leased', worker = ?, lease_expires = ?, "
+                             "attempts = attempts + 1 WHERE id = ?",
+                             (worker_id, now + self.lease_seconds, unit_id))
+                conn.execute('UPDATE workers SET last_seen = ? WHERE id = ?', (now, worker_id))
+                return WorkUnit(unit_id, file_id, pdf_path, start, end, attempts + 1, json.loads(options),
+                                part_path(output_path, start, end))
+
+    def heartbeat(self, unit: WorkUnit, worker_id: str, conn=None) -> bool:
+        """Extend a unit's lease; False when the lease was lost to another worker."""
+        now = time.time()
+        with self._transaction(conn) as conn:
+            cursor = conn.execute("UPDATE units SET lease_expires = ? WHERE id = ? AND worker = ? "
+                                  "AND status = 'leased'", (now + self.lease_seconds, unit.id, worker_id))
+            conn.execute('UPDATE workers SET last_seen = ? WHERE id = ?', (now, worker_id))
+        return cursor.rowcount == 1
+
+    def complete(self, unit: WorkUnit, worker_id: str, seconds: float) -> bool:
+        """
+        Mark a leased unit done once its part file is written.
+
+        Returns:
+            bool: False if the lease was lost meanwhile; the unit then
+                belongs to the worker that reclaimed it
+        """
+        with self._transaction() as conn:
+            cursor = conn.execute("UPDATE units SET status = 'done', lease_expires = NULL, seconds = ?, "
+                                  "error = NULL WHERE id = ? AND worker = ? AND status = 'leased'",
+                                  (seconds, unit.id, worker_id))
+            if cursor.rowcount == 1:
+                conn.execute('UPDATE workers SET units_done = units_done + 1 WHERE id = ?', (worker_id,))
+        return cursor.rowcount == 1
+
+    def fail(self, unit: WorkUnit, worker_id: str, error: str):
+        """Give a unit back for a retry, or mark it failed after max_attempts."""
+        status = 'failed' if unit.attempts >= self.max_attempts else 'pending'
+        with self._transaction() as conn:
+            conn.execute("UPDATE units SET status = ?, worker = NULL, lease_expires = NULL, error = ? "
+                         "WHERE id = ? AND worker = ? AND status = 'leased'",
+                         (status, error, unit.id, worker_id))
+
+    def claim_assembly(self, worker_id: str) -> Optional[Dict]:
+        """
+        Lease a file whose units are all done, for assembling its output.
+
+        Files with a failed unit are marked failed instead.
+        """
+        with self._transaction() as conn:
+            now = time.time()
+            conn.execute(
+                "UPDATE files SET status = 'failed', finished = ? WHERE status IN ('pending', 'assembling') "
+                "AND EXISTS (SELECT 1 FROM units WHERE file_id = files.id AND status = 'failed')", (now,)
+            )
+            row = conn.execute(
+                "SELECT id, pdf_path, output_path FROM files "
+                "WHERE (status = 'pending' OR (status = 'assembling' AND lease_expires < ?)) "
+                "AND NOT EXISTS (SELECT 1 FROM units WHERE file_id = files.id AND status != 'done') "
+                "ORDER BY id LIMIT 1", (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE files SET status = 'assembling', worker = ?, lease_expires = ? WHERE id = ?",
+                         (worker_id, now + self.lease_seconds, row[0]))
+            units = conn.execute('SELECT start_page, end_page FROM units WHERE file_id = ? ORDER BY start_page',
+                                 (row[0],)).fetchall()
+        return {'id': row[0], 'pdf_path': row[1], 'output_path': row[2],
+                'parts': [part_path(row[2], start, end) for start, end in units]}
+
+    def requeue_parts(self, file_id: int, part_paths: Sequence[str]):
+        """Hand a file back after its assembly found part files missing, and redo those units."""
+        with self._transaction() as conn:
+            output_path, = conn.execute('SELECT output_path FROM files WHERE id = ?', (file_id,)).fetchone()
+            for unit_id, start, end in conn.execute('SELECT id, start_page, end_page FROM units WHERE file_id = ?',
+                                                     (file_id,)).fetchall():
+                if part_path(output_path, start, end) in part_paths:
+                    conn.execute("UPDATE units SET status = 'pending', worker = NULL, error = 'part file missing' "
+                                 "WHERE id = ?", (unit_id,))
+            conn.execute("UPDATE files SET status = 'pending', worker = NULL, lease_expires = NULL WHERE id = ?",
+                         (file_id,))
+
+    def finish_assembly(self, file_id: int, worker_id: str) -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute("UPDATE files SET status = 'done', lease_expires = NULL, finished = ? "
+                                  "WHERE id = ? AND worker = ? AND status = 'assembling'",
+                                  (time.time(), file_id, worker_id))
+        return cursor.rowcount == 1
+
+    def outstanding(self) -> int:
+        """Units and files still to be processed or assembled, by any worker."""
+        row = self.conn.execute(
+            "SELECT (SELECT COUNT(*) FROM units WHERE status IN ('pending', 'leased')) + "
+            "(SELECT COUNT(*) FROM files WHERE status IN ('pending', 'assembling'))"
+        ).fetchone()
+        return row[0]
+
+    def status(self) -> Dict[str, object]:
+        """Unit and file counts by status, and per-file progress."""
+        units = dict(self.conn.execute('SELECT status, COUNT(*) FROM units GROUP BY status').fetchall())
+        files = dict(self.conn.execute('SELECT status, COUNT(*) FROM files GROUP BY status').fetchall())
+        progress = [
+            {'pdf_path': pdf_path, 'status': status, 'units_done': done, 'units': total}
+            for pdf_path, status, done, total in self.conn.execute(
+                "SELECT f.pdf_path, f.status, SUM(u.status = 'done'), COUNT(u.id) FROM files f "
+                "JOIN units u ON u.file_id = f.id GROUP BY f.id ORDER BY f.id"
+            )
+        ]
+        workers = [
+            {'id': worker_id, 'last_seen': last_seen, 'units_done': done}
+            for worker_id, last_seen, done in self.conn.execute(
+                'SELECT id, last_seen, units_done FROM workers ORDER BY started')
+        ]
+        return {'units': units, 'files': files, 'progress': progress, 'workers': workers}
+
+class _Heartbeat(threading.Thread):
+    """Extends a unit's lease in the background while the worker OCRs it."""
+
+    def __init__(self, queue: WorkQueue, unit: WorkUnit, worker_id: str):
+        super().__init__(daemon=True)
+        self.queue = queue
+        self.unit = unit
+        self.worker_id = worker_id
+        self.stopped = threading.Event()
+        self.lost = False
+
+    def run(self):
+        conn = self.queue.connect()
+        try:
+            interval = self.queue.lease_seconds / HEARTBEATS_PER_LEASE
+            while not self.stopped.wait(interval):
+                try:
+                    if not self.queue.heartbeat(self.unit, self.worker_id, conn):
+                        self.lost = True
+                        return
+                except sqlite3.OperationalError as e:
+                    # A busy or briefly unreachable queue; the lease has slack for a missed beat
+                    print(f"Heartbeat failed: {e}")
+        finally:
+            conn.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+def extract_unit_text(unit: WorkUnit, dedup=None, cache=None) -> Optional[str]:
+    """OCR a unit's pages with the settings the queue was submitted with."""
+    from ..core.processor import extract_text_from_pdf
+    from ..core.profiles import OcrProfile
+    options = dict(unit.options)
+    if options.get('profile') is not None:
+        options['profile'] = OcrProfile.from_dict(options['profile'])
+    return extract_text_from_pdf(unit.pdf_path, unit.start_page, unit.end_page, cache=cache, dedup=dedup,
+                                 **options)
+
+def assemble_file(queue: WorkQueue, assembly: Dict, worker_id: str) -> bool:
+    """Concatenate a file's part files, in page order, into its output."""
+    missing = [path for path in assembly['parts'] if not os.path.exists(path)]
+    if missing:
+        print(f"{len(missing)} part files of {assembly['output_path']} are missing; requeueing their units")
+        queue.requeue_parts(assembly['id'], missing)
+        return False
+    texts = []
+    for path in assembly['parts']:
+        with open(path, 'r', encoding='utf-8') as f:
+            texts.append(f.read())
+    _write_atomic(assembly['output_path'], "".join(texts))
+    if not queue.finish_assembly(assembly['id'], worker_id):
+        return False
+    for path in assembly['parts']:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    print(f"Assembled {assembly['output_path']} from {len(texts)} units")
+    return True
+
+def run_worker(queue: WorkQueue, worker_id: Optional[str] = None, exit_when_done=True,
+               poll_seconds: float = POLL_SECONDS, extract: Optional[Callable] = None,
+               dedup=None, cache=None) -> Dict[str, int]:
+    """
+    Claim and process work units until the queue is drained.
+
+    Args:
+        queue: The shared WorkQueue
+        worker_id: Unique name of this worker (default: host:pid)
+        exit_when_done: Return once no unit or assembly is outstanding;
+            otherwise keep polling for new submissions
+        poll_seconds: Wait between polls while other workers hold the
+            remaining leases
+        extract: extract(unit) -> text or None; defaults to OCR with the
+            submitted settings
+        dedup: Optional PageHashIndex used by the default extract
+        cache: Optional PageRasterCache used by the default extract
+
+    Returns:
+        dict: Counts of units done, failed and lost, and files assembled
+    """
+    worker_id = worker_id or default_worker_id()
+    if extract is None:
+        def extract(unit):
+            return extract_unit_text(unit, dedup, cache)
+    queue.register_worker(worker_id)
+    counts = {'done': 0, 'failed': 0, 'lost': 0, 'assembled': 0}
+    print(f"Worker {worker_id} polling {queue.db_path}")
+
+    while True:
+        unit = queue.claim(worker_id)
+        if unit is not None:
+            name = os.path.basename(unit.pdf_path)
+            print(f"{worker_id}: {name} pages {unit.start_page}-{unit.end_page} (attempt {unit.attempts})")
+            heartbeat = _Heartbeat(queue, unit, worker_id)
+            heartbeat.start()
+            start = time.time()
+            try:
+                text = extract(unit)
+                error = None if text is not None else 'extraction failed'
+            except Exception as e:
+                text, error = None, str(e)
+            if text is not None and not heartbeat.lost:
+                ensure_dir(os.path.dirname(unit.part_path))
+                _write_atomic(unit.part_path, text)
+            heartbeat.stop()
+
+            if heartbeat.lost:
+                counts['lost'] += 1
+                print(f"{worker_id}: lease on {name} pages {unit.start_page}-{unit.end_page} was lost")
+            elif error is not None:
+                queue.fail(unit, worker_id, error)
+                counts['failed'] += 1
+                print(f"{worker_id}: {name} pages {unit.start_page}-{unit.end_page} failed: {error}")
+            elif queue.complete(unit, worker_id, time.time() - start):
+                counts['done'] += 1
+            else:
+                counts['lost'] += 1
+            continue
+
+        assembly = queue.claim_assembly(worker_id)
+        if assembly is not None:
+            if assemble_file(queue, assembly, worker_id):
+                counts['assembled'] += 1
+            continue
+
+        if exit_when_done and queue.outstanding() == 0:
+            break
+        # Units are leased by other workers; wait in case a lease expires
+        time.sleep(poll_seconds)
+
+    print(f"Worker {worker_id} finished: {counts['done']} units done, {counts['failed']} failed, "
+          f"{counts['lost']} lost, {counts['assembled']} files assembled")
+    return counts
@@ -0,0 +1,25 @@
+"""
+Reproducible performance benchmarks on synthetic plan-sheet PDFs.
+"""
+
+from .synthetic import PAGE_KINDS, generate_pdf, generate_suite
+from .runner import (
+    TARGETS, Regression, run_benchmarks, save_results, load_results, compare_results
+)
+from .accuracy import Fixture, Setting, run_harness, render_golden_fixture
+
+__all__ = [
+    'PAGE_KINDS',
+    'TARGETS',
+    'Regression',
+    'generate_pdf',
+    'generate_suite',
+    'run_benchmarks',
+    'save_results',
+    'load_results',
+    'compare_results',
+    'Fixture',
+    'Setting',
+    'run_harness',
+    'render_golden_fixture',
+]
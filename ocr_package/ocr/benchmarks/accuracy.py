@@ -0,0 +1,411 @@
+"""
+Accuracy-vs-speed harness scored against golden CSV outputs.
+
+Pipeline settings (text source, DPI, preprocessing, pages processed) are run
+over a set of fixtures. Sign schedule records and the general sign BOM are
+extracted from the text of each run and scored against the golden CSVs with
+precision and recall per item, and every setting becomes a point on a
+speed/accuracy frontier.
+
+The golden CSVs for SR-81 live in outputs/SR-81_Plans/data. The plans PDF
+itself is not part of the repository, so a fixture can also be rendered from
+the golden rows (text layer or scanned) to exercise the harness end to end.
+"""
+
+import io
+import os
+import re
+import csv
+import json
+import time
+import contextlib
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Any
+import numpy as np
+import fitz  # PyMuPDF
+from ..advanced.bom_matcher import PAGE_MARKER
+from .synthetic import TABLOID, draw_table, scan_page
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))), 'outputs', 'SR-81_Plans', 'data')
+GOLDEN_SCHEDULE = os.path.join(GOLDEN_DIR, 'SR-81_Detailed_Sign_Schedule.csv')
+GOLDEN_BOM = os.path.join(GOLDEN_DIR, 'SR-81_General_Sign_BOM.csv')
+
+SCHEDULE_COLUMNS = ['Sign ID', 'Route', 'Milepost', 'Side', 'Description', 'Action',
+                    'Size (sq ft)', 'Colors', 'Quantity']
+
+# Fields that must all agree for an extracted sign record to count as correct
+KEY_FIELDS = ('Milepost', 'Side', 'Code', 'Action', 'Size (sq ft)', 'Quantity')
+
+SIGN_ROW = re.compile(
+    r'(?P<id>\d+\.\d+)\s+(?P<route>[A-Z]{1,3}-\d+)\s+(?P<milepost>\d+\.\d+)\s+(?P<side>LEFT|RIGHT)\s+'
+    r'(?P<description>.+?)\s+(?P<action>NEW\s+SIGN|PANEL\s+REPLACEMENT|REMOVE|RELOCATE)\s+'
+    r'(?P<size>\d+(?:\.\d+)?)\s+(?P<colors>[A-Z&]+)\s+(?P<quantity>\d+)\b',
+    re.IGNORECASE
+)
+
+# General BOM entries are every "sign..." fragment of a line, as in the golden BOM
+SIGN_FRAGMENT = re.compile(r'sign[^\n]*', re.IGNORECASE)
+BOM_ITEM_WIDTH = 30
+
+@dataclass
+class Fixture:
+    name: str
+    pdf_path: str
+    schedule_csv: str = GOLDEN_SCHEDULE
+    bom_csv: str = GOLDEN_BOM
+    schedule_pages: Optional[List[int]] = None  # 1-based; all pages when None
+    bom_pages: Optional[List[int]] = None
+
+    @property
+    def pages(self) -> Optional[List[int]]:
+        """Pages the golden outputs come from, or None if not known."""
+        if self.schedule_pages is None or self.bom_pages is None:
+            return None
+        return sorted(set(self.schedule_pages) | set(self.bom_pages))
+
+@dataclass
+class Setting:
+    name: str
+    method: str = "ocr"  # ocr (extract_text_from_pdf) or text_layer
+    options: Dict[str, Any] = field(default_factory=dict)  # Keyword arguments of extract_text_from_pdf
+    fixture_pages_only: bool = False  # Skip the pages the golden outputs do not come from
+
+DEFAULT_SETTINGS = [
+    Setting("text_layer", method="text_layer"),
+    Setting("ocr_300dpi", options={"dpi": 300}),
+    Setting("ocr_200dpi", options={"dpi": 200}),
+    Setting("ocr_150dpi", options={"dpi": 150}),
+    Setting("ocr_200dpi_otsu", options={"dpi": 200, "preprocessing": {"threshold": "otsu"}}),
+    Setting("ocr_auto_dpi", options={"dpi": 200, "auto_dpi": True}),
+    Setting("ocr_200dpi_fixture_pages", options={"dpi": 200}, fixture_pages_only=True),
+]
+
+def load_settings(path) -> List[Setting]:
+    """Load settings from a JSON list of Setting fields."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [Setting(**entry) for entry in json.load(f)]
+
+def load_fixtures(path) -> List[Fixture]:
+    """Load fixtures from a JSON list of Fixture fields; relative paths are relative to the file."""
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    fixtures = []
+    for entry in entries:
+        for key in ('pdf_path', 'schedule_csv', 'bom_csv'):
+            if key in entry:
+                entry[key] = os.path.join(base, entry[key])
+        fixtures.append(Fixture(**entry))
+    return fixtures
+
+def read_csv(path) -> List[Dict[str, str]]:
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+def sign_code(description: str) -> str:
+    """The MUTCD-style code a sign description starts with, e.g. R2-1."""
+    return description.split()[0].upper() if description.strip() else ""
+
+def normalize_record(record: Dict[str, str]) -> Dict[str, str]:
+    """Canonical field values, so formatting differences are not counted as errors."""
+    def number(value, places):
+        try:
+            return f"{float(value):.{places}f}"
+        except (TypeError, ValueError):
+            return str(value).strip()
+    return {
+        'Sign ID': str(record.get('Sign ID', '')).strip(),
+        'Milepost': number(record.get('Milepost'), 3),
+        'Side': str(record.get('Side', '')).strip().lower(),
+        'Code': sign_code(str(record.get('Description', ''))),
+        'Action': ' '.join(str(record.get('Action', '')).lower().split()),
+        'Size (sq ft)': number(record.get('Size (sq ft)'), 2),
+        'Quantity': number(record.get('Quantity'), 0),
+    }
+
+def extract_sign_records(text: str) -> List[Dict[str, str]]:
+    """Parse sign schedule rows out of page text, one record per matching line."""
+    records = []
+    for line in text.splitlines():
+        match = SIGN_ROW.search(line)
+        if match:
+            records.append({
+                'Sign ID': match.group('id'), 'Route': match.group('route'),
+                'Milepost': match.group('milepost'), 'Side': match.group('side'),
+                'Description': match.group('description'), 'Action': match.group('action'),
+                'Size (sq ft)': match.group('size'), 'Colors': match.group('colors'),
+                'Quantity': match.group('quantity'),
+            })
+    return records
+
+def bom_item_name(fragment: str) -> str:
+    return f"Sign: {fragment}" if len(fragment) <= BOM_ITEM_WIDTH else f"Sign: {fragment[:BOM_ITEM_WIDTH]}..."
+
+def extract_general_bom(text: str) -> Counter:
+    """Count the general BOM items of a text the way the golden BOM was built."""
+    counts = Counter()
+    for match in SIGN_FRAGMENT.finditer(text):
+        fragment = match.group(0).strip()
+        if fragment:
+            counts[bom_item_name(fragment)] += 1
+    return counts
+
+def _prf(matched, extracted, golden) -> Dict[str, float]:
+    precision = matched / extracted if extracted else (1.0 if not golden else 0.0)
+    recall = matched / golden if golden else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {'precision': round(precision, 4), 'recall': round(recall, 4), 'f1': round(f1, 4)}
+
+def score_sign_records(extracted: List[Dict[str, str]], golden: List[Dict[str, str]]) -> Dict[str, Any]:
+    """
+    Score extracted sign records against the golden schedule.
+
+    A record is correct when its Sign ID and every KEY_FIELDS value match a
+    golden record. Per item (sign code), signs are weighted by quantity.
+    Field accuracy is measured over golden records whose Sign ID was found.
+    """
+    golden_by_id = {record['Sign ID']: record for record in map(normalize_record, golden)}
+    extracted = [normalize_record(record) for record in extracted]
+
+    matched_ids = set()
+    field_hits, found = Counter(), set()
+    for record in extracted:
+        expected = golden_by_id.get(record['Sign ID'])
+        if expected is None or record['Sign ID'] in found:
+            continue
+        found.add(record['Sign ID'])
+        for key in KEY_FIELDS:
+            field_hits[key] += record[key] == expected[key]
+        if all(record[key] == expected[key] for key in KEY_FIELDS):
+            matched_ids.add(record['Sign ID'])
+
+    items = defaultdict(Counter)
+    for record in golden_by_id.values():
+        items[record['Code']]['golden'] += int(float(record['Quantity'] or 0))
+        if record['Sign ID'] in matched_ids:
+            items[record['Code']]['matched'] += int(float(record['Quantity'] or 0))
+    for record in extracted:
+        try:
+            items[record['Code']]['extracted'] += int(float(record['Quantity']))
+        except ValueError:
+            items[record['Code']]['extracted'] += 1
+
+    result = _prf(len(matched_ids), len(extracted), len(golden_by_id))
+    result['records'] = {'golden': len(golden_by_id), 'extracted': len(extracted), 'matched': len(matched_ids)}
+    result['fields'] = {key: round(field_hits[key] / len(found), 4) if found else 0.0 for key in KEY_FIELDS}
+    result['items'] = {code: dict(_prf(c['matched'], c['extracted'], c['golden']),
+                                  golden=c['golden'], extracted=c['extracted'], matched=c['matched'])
+                       for code, c in sorted(items.items())}
+    return result
+
+def score_bom(extracted: Counter, golden: List[Dict[str, str]]) -> Dict[str, Any]:
+    """Score BOM quantities per item: an item's matches are the smaller of both quantities."""
+    expected = Counter()
+    for row in golden:
+        expected[row['Item']] += int(float(row['Quantity']))
+
+    items = {}
+    for item in sorted(expected.keys() | extracted.keys()):
+        matched = min(expected[item], extracted[item])
+        items[item] = dict(_prf(matched, extracted[item], expected[item]),
+                           golden=expected[item], extracted=extracted[item], matched=matched)
+
+    result = _prf(sum(i['matched'] for i in items.values()), sum(extracted.values()), sum(expected.values()))
+    result['items'] = items
+    return result
+
+def split_pages(text: str) -> Dict[int, str]:
+    """Split extract_text_from_pdf output on its page markers."""
+    pages, current = {}, None
+    for line in text.splitlines():
+        match = PAGE_MARKER.match(line)
+        if match:
+            current = int(match.group(1))
+            pages[current] = ""
+        elif current is not None:
+            pages[current] += line + "\n"
+    return pages
+
+def text_layer_pages(pdf_path, pages=None) -> Dict[int, str]:
+    """Page text from the PDF text layer, with words regrouped into visual lines."""
+    result = {}
+    with fitz.open(pdf_path) as doc:
+        for number in pages or range(1, len(doc) + 1):
+            rows = defaultdict(list)
+            for x0, y0, x1, y1, word, *_ in doc[number - 1].get_text('words'):
+                rows[round((y0 + y1) / 4)].append((x0, word))  # 2 pt bands
+            result[number] = "\n".join(' '.join(word for _, word in sorted(rows[y])) for y in sorted(rows))
+    return result
+
+def _runs(pages):
+    """Group sorted page numbers into (first, last) runs."""
+    runs = []
+    for number in pages:
+        if runs and number == runs[-1][1] + 1:
+            runs[-1][1] = number
+        else:
+            runs.append([number, number])
+    return runs
+
+def extract_pages(fixture: Fixture, setting: Setting) -> Dict[int, str]:
+    """Run one setting over a fixture and return its text per page."""
+    from ..core.processor import extract_text_from_pdf
+    from ..core.preprocessing import PreprocessConfig
+
+    pages = fixture.pages if setting.fixture_pages_only else None
+    if setting.method == "text_layer":
+        return text_layer_pages(fixture.pdf_path, pages)
+    if setting.method != "ocr":
+        raise ValueError(f"Unknown extraction method: {setting.method}")
+
+    options = dict(setting.options)
+    if isinstance(options.get('preprocessing'), dict):
+        options['preprocessing'] = PreprocessConfig(**options['preprocessing'])
+    if pages is None:
+        with fitz.open(fixture.pdf_path) as doc:
+            pages = list(range(1, len(doc) + 1))
+
+    result = {}
+    for first, last in _runs(pages):
+        text = extract_text_from_pdf(fixture.pdf_path, first, last, **options)
+        if text is None:
+            raise RuntimeError(f"extract_text_from_pdf failed on pages {first}-{last}")
+        result.update(split_pages(text))
+    return result
+
+def evaluate(fixture: Fixture, setting: Setting, quiet=True) -> Dict[str, Any]:
+    """Run and score one setting on one fixture."""
+    start = time.perf_counter()
+    try:
+        if quiet:
+            with contextlib.redirect_stdout(io.StringIO()):
+                pages = extract_pages(fixture, setting)
+        else:
+            pages = extract_pages(fixture, setting)
+    except Exception as e:
+        return {'status': 'failed', 'error': str(e)}
+    seconds = time.perf_counter() - start
+
+    def joined(selected):
+        return "\n".join(text for number, text in sorted(pages.items())
+                         if selected is None or number in selected)
+
+    signs = score_sign_records(extract_sign_records(joined(fixture.schedule_pages)), read_csv(fixture.schedule_csv))
+    bom = score_bom(extract_general_bom(joined(fixture.bom_pages)), read_csv(fixture.bom_csv))
+    return {
+        'status': 'ok',
+        'seconds': round(seconds, 3),
+        'pages': len(pages),
+        'seconds_per_page': round(seconds / len(pages), 4) if pages else None,
+        'signs': signs,
+        'bom': bom,
+        'score': round((signs['f1'] + bom['f1']) / 2, 4),
+    }
+
+def pareto_frontier(points: Dict[str, Dict[str, float]]) -> List[str]:
+    """
+    Names of the settings no other setting beats on both speed and accuracy.
+
+    Args:
+        points: name -> {'seconds': ..., 'score': ...}
+    """
+    frontier = []
+    for name, point in points.items():
+        dominated = any(
+            other['seconds'] <= point['seconds'] and other['score'] >= point['score'] and
+            (other['seconds'] < point['seconds'] or other['score'] > point['score'])
+            for other_name, other in points.items() if other_name != name
+        )
+        if not dominated:
+            frontier.append(name)
+    return sorted(frontier, key=lambda name: points[name]['seconds'])
+
+def run_harness(fixtures: List[Fixture], settings: List[Setting] = None, verbose=True) -> Dict[str, Any]:
+    """
+    Run every setting over every fixture and place the settings on a frontier.
+
+    A setting's point is its total time and mean score over the fixtures; a
+    setting that fails on any fixture is left off the frontier.
+    """
+    settings = settings or DEFAULT_SETTINGS
+    results = {'fixtures': [asdict(fixture) for fixture in fixtures], 'settings': {}}
+    points = {}
+    for setting in settings:
+        runs = {fixture.name: evaluate(fixture, setting) for fixture in fixtures}
+        entry = {'setting': asdict(setting), 'fixtures': runs}
+        ok = [run for run in runs.values() if run['status'] == 'ok']
+        if len(ok) == len(runs) and ok:
+            entry['seconds'] = round(sum(run['seconds'] for run in ok), 3)
+            entry['score'] = round(float(np.mean([run['score'] for run in ok])), 4)
+            points[setting.name] = entry
+        results['settings'][setting.name] = entry
+        if verbose:
+            if setting.name in points:
+                print(f"{setting.name:28s} {entry['seconds']:8.2f}s  score {entry['score']:.3f}")
+            else:
+                errors = '; '.join(run['error'] for run in runs.values() if run['status'] != 'ok')
+                print(f"{setting.name:28s} failed: {errors}")
+
+    results['frontier'] = pareto_frontier(points)
+    for name, entry in results['settings'].items():
+        entry['on_frontier'] = name in results['frontier']
+    return results
+
+def format_frontier(results) -> str:
+    """Table of the settings by time, frontier points marked with *."""
+    rows = [(entry['seconds'], name, entry) for name, entry in results['settings'].items() if 'seconds' in entry]
+    lines = [f"  {'setting':28s} {'seconds':>9s} {'score':>6s} {'signs F1':>9s} {'BOM F1':>7s}"]
+    for seconds, name, entry in sorted(rows):
+        runs = [run for run in entry['fixtures'].values()]
+        signs = np.mean([run['signs']['f1'] for run in runs])
+        bom = np.mean([run['bom']['f1'] for run in runs])
+        mark = '*' if entry['on_frontier'] else ' '
+        lines.append(f"{mark} {name:28s} {seconds:9.2f} {entry['score']:6.3f} {signs:9.3f} {bom:7.3f}")
+    return "\n".join(lines)
+
+def render_golden_fixture(output_path, schedule_csv=GOLDEN_SCHEDULE, bom_csv=GOLDEN_BOM,
+                          scanned=False, seed=0) -> Fixture:
+    """
+    Render the golden rows into a two-page PDF: the sign schedule, then the BOM notes.
+
+    With scanned=True the pages are rasterized with noise and carry no text
+    layer, so only OCR can read them.
+    """
+    schedule = read_csv(schedule_csv)
+    bom = read_csv(bom_csv)
+    rng = np.random.default_rng(seed)
+    doc = fitz.open()
+    doc.set_metadata({'title': 'Golden fixture', 'producer': 'ocr.benchmarks',
+                      'creationDate': '', 'modDate': ''})
+    scratch = fitz.open()
+
+    def new_page():
+        return (scratch if scanned else doc).new_page(width=TABLOID[0], height=TABLOID[1])
+
+    page = new_page()
+    page.insert_text((36, 46), "DETAILED SCHEDULE", fontsize=12)
+    rows = [[row[column] for column in SCHEDULE_COLUMNS] for row in schedule]
+    draw_table(page, SCHEDULE_COLUMNS, rows, [4, 4, 5, 4, 40, 11, 7, 5, 5], top=60, fontsize=7)
+
+    notes = new_page()
+    y = 48
+    for row in bom:
+        for _ in range(int(float(row['Quantity']))):
+            notes.insert_text((36, y), row['Description'], fontsize=9)
+            y += 16
+
+    if scanned:
+        for source in scratch:
+            target = doc.new_page(width=source.rect.width, height=source.rect.height)
+            target.insert_image(target.rect, stream=scan_page(source, rng))
+    scratch.close()
+
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    doc.save(output_path, garbage=3, deflate=True, no_new_id=True)
+    doc.close()
+    name = os.path.splitext(os.path.basename(output_path))[0]
+    return Fixture(name, output_path, schedule_csv, bom_csv, schedule_pages=[1], bom_pages=[2])
@@ -0,0 +1,218 @@
+"""
+Tesseract configuration autotuner.
+
+Searches DPI, page segmentation mode, engine mode, threshold and language on
+a sample of pages and returns the fastest configuration whose quality meets
+a floor, as a named OcrProfile. Successive halving keeps the search cheap:
+every candidate is tried on one page, the best third move on to three times
+as many pages, and so on until the sample is exhausted.
+
+Quality is the word-level F1 of the OCR text against the page's text layer
+or, for scanned pages, against OCR at a slow reference configuration.
+"""
+
+import re
+import math
+import time
+import itertools
+from collections import Counter
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pytesseract
+import fitz  # PyMuPDF
+from PIL import Image
+from ..core.preprocessing import PreprocessConfig, get_pipeline
+from ..core.profiles import OcrProfile
+
+SEARCH_SPACE = {
+    'dpi': (150, 200, 250, 300),
+    'psm': (3, 4, 6, 11),
+    'oem': (None, 1),
+    'threshold': ('global', 'otsu', 'sauvola'),
+    'lang': ('eng',),
+}
+
+# Slow, careful configuration whose text stands in for ground truth on scanned pages
+REFERENCE_PROFILE = OcrProfile("reference", dpi=300, psm=3, preprocessing=PreprocessConfig(threshold="otsu"))
+
+DEFAULT_FLOOR = 0.9
+DEFAULT_SAMPLE = 6
+
+# Fraction of candidates kept at each rung is 1/ETA
+ETA = 3
+
+WORD = re.compile(r'[A-Za-z0-9]+')
+
+@dataclass(frozen=True)
+class SamplePage:
+    pdf_path: str
+    page_number: int  # 1-based
+
+@dataclass
+class Trial:
+    profile: OcrProfile
+    pages: int
+    seconds: float  # Mean seconds per page: render, preprocess and OCR
+    quality: float  # Mean word F1 against the reference text
+
+def candidate_profiles(space: Optional[Dict[str, Sequence]] = None) -> List[OcrProfile]:
+    """Every combination of the search space, as unnamed profiles."""
+    space = dict(SEARCH_SPACE, **(space or {}))
+    candidates = []
+    for dpi, psm, oem, threshold, lang in itertools.product(
+            space['dpi'], space['psm'], space['oem'], space['threshold'], space['lang']):
+        name = f"d{dpi}_psm{psm}_oem{'-' if oem is None else oem}_{threshold}_{lang}"
+        candidates.append(OcrProfile(name, dpi=dpi, psm=psm, oem=oem, lang=lang,
+                                     preprocessing=PreprocessConfig(threshold=threshold)))
+    return candidates
+
+def sample_pages(pdf_paths: Sequence[str], count=DEFAULT_SAMPLE) -> List[SamplePage]:
+    """Evenly spaced pages across all the PDFs."""
+    pages = []
+    for pdf_path in pdf_paths:
+        with fitz.open(pdf_path) as doc:
+            pages.extend(SamplePage(pdf_path, number) for number in range(1, len(doc) + 1))
+    if len(pages) <= count:
+        return pages
+    step = len(pages) / count
+    return [pages[int(i * step)] for i in range(count)]
+
+def word_f1(reference: str, text: str) -> float:
+    """F1 of the words of text against the words of the reference, ignoring case and order."""
+    expected = Counter(word.upper() for word in WORD.findall(reference))
+    found = Counter(word.upper() for word in WORD.findall(text))
+    if not expected:
+        return 1.0 if not found else 0.0
+    matched = sum((expected & found).values())
+    if not matched:
+        return 0.0
+    precision = matched / sum(found.values())
+    recall = matched / sum(expected.values())
+    return 2 * precision * recall / (precision + recall)
+
+def render_gray(pdf_path, page_number, dpi):
+    with fitz.open(pdf_path) as doc:
+        pix = doc[page_number - 1].get_pixmap(matrix=fitz.Matrix(dpi/72, dpi/72), colorspace=fitz.csGRAY)
+        return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.h, pix.w)
+
+def ocr_sample(profile: OcrProfile, sample: SamplePage) -> Tuple[float, str]:
+    """Render, preprocess and OCR a sample page; returns (seconds, text)."""
+    start = time.perf_counter()
+    gray = render_gray(sample.pdf_path, sample.page_number, profile.dpi)
+    processed = get_pipeline(profile.preprocessing)(gray)
+    text = pytesseract.image_to_string(Image.fromarray(processed), **profile.tesseract_kwargs())
+    return time.perf_counter() - start, text
+
+class PageEvaluator:
+    """Scores profiles on sample pages, computing each reference text once."""
+
+    def __init__(self, reference_profile: OcrProfile = REFERENCE_PROFILE):
+        self.reference_profile = reference_profile
+        self._references: Dict[SamplePage, str] = {}
+
+    def reference(self, sample: SamplePage) -> str:
+        if sample not in self._references:
+            with fitz.open(sample.pdf_path) as doc:
+                text = doc[sample.page_number - 1].get_text()
+            if not WORD.search(text):
+                _, text = ocr_sample(self.reference_profile, sample)
+            self._references[sample] = text
+        return self._references[sample]
+
+    def __call__(self, profile: OcrProfile, sample: SamplePage) -> Tuple[float, float]:
+        """Returns (seconds, quality) of a profile on a sample page."""
+        reference = self.reference(sample)
+        seconds, text = ocr_sample(profile, sample)
+        return seconds, word_f1(reference, text)
+
+def _rank_key(trial: Trial, floor: float):
+    # Candidates meeting the floor first, fastest first; then the most accurate
+    return (0, trial.seconds) if trial.quality >= floor else (1, -trial.quality)
+
+def successive_halving(candidates: List[OcrProfile], samples: List[SamplePage],
+                       evaluate: Callable[[OcrProfile, SamplePage], Tuple[float, float]],
+                       floor=DEFAULT_FLOOR, eta=ETA, min_pages=1,
+                       verbose=True) -> Tuple[Trial, List[Trial]]:
+    """
+    Find the fastest candidate whose mean quality meets the floor.
+
+    Each rung evaluates the surviving candidates on a growing prefix of the
+    samples (min_pages, then eta times more) and keeps the best 1/eta of them.
+    Results of earlier rungs are reused, so a candidate is never evaluated on
+    the same page twice.
+
+    Returns:
+        tuple: (best trial, trials of the last rung, ranked); the best trial
+            falls short of the floor when no candidate meets it
+    """
+    if not candidates or not samples:
+        raise ValueError("Autotuning needs at least one candidate and one sample page")
+
+    results: Dict[Tuple[int, int], Tuple[float, float]] = {}
+
+    def trial(index, pages):
+        for page in range(pages):
+            if (index, page) not in results:
+                results[(index, page)] = evaluate(candidates[index], samples[page])
+        seconds, quality = zip(*(results[(index, page)] for page in range(pages)))
+        return Trial(candidates[index], pages, float(np.mean(seconds)), float(np.mean(quality)))
+
+    survivors = list(range(len(candidates)))
+    pages = min(min_pages, len(samples))
+    rung = 0
+    while True:
+        trials = sorted((trial(index, pages) for index in survivors), key=lambda t: _rank_key(t, floor))
+        if verbose:
+            passing = sum(t.quality >= floor for t in trials)
+            print(f"Rung {rung}: {len(trials)} candidates on {pages} pages, {passing} meet the floor, "
+                  f"best {trials[0].profile.name} ({trials[0].seconds:.2f}s/page, quality {trials[0].quality:.3f})")
+        if pages >= len(samples) or len(trials) == 1:
+            break
+        keep = max(1, math.ceil(len(trials) / eta))
+        by_name = {candidate.name: index for index, candidate in enumerate(candidates)}
+        survivors = [by_name[t.profile.name] for t in trials[:keep]]
+        pages = min(len(samples), pages * eta)
+        rung += 1
+
+    if pages < len(samples):
+        # A single survivor left early: confirm it on the whole sample
+        trials = [trial(survivors[0], len(samples))]
+    return trials[0], trials
+
+def autotune(pdf_paths: Sequence[str], name: str, floor=DEFAULT_FLOOR, sample=DEFAULT_SAMPLE,
+             space: Optional[Dict[str, Sequence]] = None, eta=ETA, verbose=True) -> OcrProfile:
+    """
+    Tune Tesseract settings on sample pages of the PDFs and return a named profile.
+
+    Args:
+        pdf_paths: PDFs representative of the documents the profile is for
+        name: Name of the profile
+        floor: Minimum mean word F1 against the reference text
+        sample: Number of sample pages
+        space: Overrides of SEARCH_SPACE entries, e.g. {'lang': ('eng', 'eng+equ')}
+        eta: Successive halving rate
+
+    Returns:
+        OcrProfile: The fastest candidate meeting the floor (or the most
+            accurate one if none does), with the tuning results in its notes
+    """
+    samples = sample_pages(pdf_paths, sample)
+    candidates = candidate_profiles(space)
+    if verbose:
+        print(f"Autotuning {len(candidates)} configurations on {len(samples)} sample pages, quality floor {floor}")
+
+    start = time.perf_counter()
+    best, _ = successive_halving(candidates, samples, PageEvaluator(), floor, eta, verbose=verbose)
+    notes = {
+        'quality': round(best.quality, 4),
+        'seconds_per_page': round(best.seconds, 3),
+        'floor': floor,
+        'floor_met': best.quality >= floor,
+        'sample_pages': [f"{s.pdf_path}#{s.page_number}" for s in samples],
+        'candidates': len(candidates),
+        'tuning_seconds': round(time.perf_counter() - start, 1),
+    }
+    if verbose and not notes['floor_met']:
+        print(f"Warning: no configuration meets the floor, using the most accurate ({best.quality:.3f})")
+    return replace(best.profile, name=name, notes=notes)
@@ -0,0 +1,432 @@
+"""
+Benchmark runner for the OCR entry points.
+
+Each entry point is timed on the synthetic PDFs of every page kind, in a
+fresh process per run so peak RSS belongs to that run alone. Per-stage
+latencies (render, preprocess, text layer, OCR, table detection) are measured
+page by page in the calling process, and the cost of shipping page rasters
+and results back from a worker is measured for the pickle and shared memory
+transports. Results are plain JSON so they can be stored as a baseline and
+compared with later runs.
+"""
+
+import io
+import os
+import sys
+import json
+import pickle
+import time
+import platform
+import tempfile
+import statistics
+import contextlib
+import multiprocessing
+import multiprocessing.resource_tracker
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+import cv2
+import numpy as np
+import pytesseract
+import fitz  # PyMuPDF
+from PIL import Image
+from .synthetic import PAGE_KINDS, generate_suite
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+TARGETS = ('extract_text_from_pdf', 'process_document', 'batch_process', 'find_tables')
+STAGES = ('render', 'preprocess', 'text_layer', 'ocr', 'find_tables', 'bom_exact', 'bom_fuzzy')
+
+# What measure_transport ships back from a worker, and how
+TRANSPORT_PAYLOADS = ('raster', 'results')
+TRANSPORT_MODES = ('pickle', 'shared')
+
+# Targets that cannot run without the tesseract binary
+OCR_TARGETS = ('extract_text_from_pdf', 'process_document', 'batch_process')
+
+# A metric is a regression when it is this much worse than the baseline
+DEFAULT_TOLERANCE = 0.15
+
+# Stage latencies below this many milliseconds are too noisy to compare
+MIN_COMPARED_MS = 1.0
+
+RESULTS_VERSION = 1
+
+def tesseract_version() -> Optional[str]:
+    try:
+        return str(pytesseract.get_tesseract_version())
+    except (pytesseract.TesseractNotFoundError, OSError):
+        return None
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process or its largest finished child, in MB."""
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Kilobytes on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(peak / scale, 1)
+
+def environment() -> Dict[str, object]:
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'pymupdf': fitz.VersionBind,
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+        'tesseract': tesseract_version(),
+    }
+
+def page_elements(page, dpi):
+    """TextElements of a page's text layer, in pixels at the given DPI."""
+    from ..advanced.table_extractor import TextElement
+    scale = dpi / 72
+    return [TextElement(word[4], (int(word[0] * scale), int(word[1] * scale)),
+                        (int((word[2] - word[0]) * scale), int((word[3] - word[1]) * scale)), 100.0)
+            for word in page.get_text('words')]
+
+def _run_target(target, pdf_path, dpi, workers, work_dir):
+    """Run one entry point on a PDF; returns (seconds, status, error)."""
+    from ..core.processor import extract_text_from_pdf
+    from ..core.utils import get_output_path
+    from ..batch.processors import batch_process
+    from ..advanced.document_processor import process_document
+    from ..advanced.table_extractor import TableDetector
+
+    if target == 'find_tables':
+        with fitz.open(pdf_path) as doc:
+            pages = [page_elements(page, dpi) for page in doc]
+        if not any(pages):
+            return 0.0, 'skipped', 'no text layer'
+        detector = TableDetector()
+        start = time.perf_counter()
+        for elements in pages:
+            detector.find_tables(elements)
+        return time.perf_counter() - start, 'ok', None
+
+    start = time.perf_counter()
+    if target == 'extract_text_from_pdf':
+        ok = extract_text_from_pdf(pdf_path, dpi=dpi) is not None
+    elif target == 'process_document':
+        ok = process_document(pdf_path, dpi=dpi, num_workers=workers) is not None
+    elif target == 'batch_process':
+        batch_process([pdf_path], output_dir=work_dir, dpi=dpi, max_workers=workers)
+        ok = os.path.exists(get_output_path(pdf_path, output_dir=work_dir))
+    else:
+        raise ValueError(f"Unknown benchmark target: {target}")
+    elapsed = time.perf_counter() - start
+    return elapsed, 'ok' if ok else 'failed', None if ok else 'entry point reported a failure'
+
+def _isolated_run(target, pdf_path, dpi, workers, work_dir):
+    """Child process body: run a target quietly and report its peak RSS."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            seconds, status, error = _run_target(target, pdf_path, dpi, workers, work_dir)
+        except Exception as e:
+            seconds, status, error = 0.0, 'failed', str(e)
+    return {'seconds': seconds, 'status': status, 'error': error, 'peak_rss_mb': peak_rss_mb()}
+
+def measure_target(target, pdf_path, page_count, dpi=200, repeat=3, workers=None) -> Dict[str, object]:
+    """
+    Time an entry point on a PDF, each repetition in a fresh process.
+
+    The fastest repetition gives the throughput; peak RSS is the largest seen.
+    """
+    if target in OCR_TARGETS and tesseract_version() is None:
+        return {'status': 'skipped', 'error': 'tesseract not available'}
+
+    context = multiprocessing.get_context('spawn')
+    runs = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for _ in range(repeat):
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                run = executor.submit(_isolated_run, target, pdf_path, dpi, workers, work_dir).result()
+            if run['status'] != 'ok':
+                return {'status': run['status'], 'error': run['error']}
+            runs.append(run)
+
+    seconds = min(run['seconds'] for run in runs)
+    rss = [run['peak_rss_mb'] for run in runs if run['peak_rss_mb'] is not None]
+    return {
+        'status': 'ok',
+        'seconds': round(seconds, 4),
+        'pages_per_sec': round(page_count / seconds, 3) if seconds else None,
+        'peak_rss_mb': max(rss) if rss else None,
+    }
+
+def measure_stages(pdf_path, dpi=200, repeat=3, preprocessing=None) -> Dict[str, Dict[str, float]]:
+    """
+    Median latency per page of each processing stage, in milliseconds.
+
+    OCR is left out when tesseract is not available, table detection and BOM
+    matching (exact and OCR-error tolerant, over the page text) when the PDF
+    has no text layer.
+    """
+    from ..core.preprocessing import get_pipeline
+    from ..advanced.table_extractor import TableDetector
+    from ..advanced.bom_matcher import BomMatcher
+    from ..advanced.fuzzy_matcher import FuzzyBomMatcher
+
+    pipeline = get_pipeline(preprocessing)
+    detector = TableDetector()
+    matchers = {'bom_exact': BomMatcher(), 'bom_fuzzy': FuzzyBomMatcher()}
+    with_ocr = tesseract_version() is not None
+    samples = {stage: [] for stage in STAGES}
+    clock = time.perf_counter
+
+    with fitz.open(pdf_path) as doc:
+        for _ in range(repeat):
+            for page in doc:
+                start = clock()
+                pix = page.get_pixmap(matrix=fitz.Matrix(dpi/72, dpi/72), colorspace=fitz.csGRAY)
+                gray = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.h, pix.w)
+                samples['render'].append(clock() - start)
+
+                start = clock()
+                processed = pipeline(gray)
+                samples['preprocess'].append(clock() - start)
+
+                start = clock()
+                elements = page_elements(page, dpi)
+                samples['text_layer'].append(clock() - start)
+
+                if with_ocr:
+                    start = clock()
+                    pytesseract.image_to_string(Image.fromarray(processed))
+                    samples['ocr'].append(clock() - start)
+
+                if elements:
+                    start = clock()
+                    detector.find_tables(elements)
+                    samples['find_tables'].append(clock() - start)
+
+                    text = page.get_text()
+                    for stage, matcher in matchers.items():
+                        start = clock()
+                        matcher.count(text)
+                        samples[stage].append(clock() - start)
+
+    return {stage: {'median_ms': round(statistics.median(times) * 1000, 3),
+                    'max_ms': round(max(times) * 1000, 3)}
+            for stage, times in samples.items() if times}
+
+def _render(pdf_path, page_number, dpi):
+    with fitz.open(pdf_path) as doc:
+        pix = doc[page_number].get_pixmap(matrix=fitz.Matrix(dpi/72, dpi/72), colorspace=fitz.csGRAY)
+        return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.h, pix.w).copy()
+
+def _page_result(pdf_path, page_number, dpi):
+    """A page element as process_page builds it, with the text layer standing in for OCR."""
+    from ..advanced.document_processor import DocumentElement
+    scale = dpi / 72
+    with fitz.open(pdf_path) as doc:
+        page = doc[page_number]
+        positions = [{'text': word[4], 'x': int(word[0] * scale), 'y': int(word[1] * scale),
+                      'width': int((word[2] - word[0]) * scale), 'height': int((word[3] - word[1]) * scale),
+                      'confidence': 96} for word in page.get_text('words')]
+        text = page.get_text()
+    return [DocumentElement("page", text, metadata={"page_number": page_number, "rotation": 0,
+                                                    "text_positions": positions})]
+
+def _transport_call(mode, payload, slot, pdf_path, page_number, dpi):
+    """Worker body: produce a page raster or result and return it the given way."""
+    from ..core.transport import write_raster
+    from ..advanced.document_processor import pack_page_elements
+    if payload == 'raster':
+        image = _render(pdf_path, page_number, dpi)
+        return write_raster(slot, image) if mode == 'shared' else image
+    elements = _page_result(pdf_path, page_number, dpi)
+    return pack_page_elements(elements) if mode == 'shared' else elements
+
+def measure_transport(pdf_path, dpi=200, repeat=3) -> Dict[str, Dict[str, float]]:
+    """
+    Round-trip latency per page of shipping page rasters and page results
+    back from a worker process, pickled through the pool's pipe against
+    shared memory (slab slots for rasters, columnar buffers for results).
+
+    Both modes do the same work in the worker; the consumer side maps the
+    raster or rebuilds the DocumentElements. Bytes are what crosses the pipe.
+    """
+    from ..core.transport import RasterSlab, open_raster
+    from ..core.resources import page_pixels
+    from ..advanced.document_processor import unpack_page_elements
+
+    with fitz.open(pdf_path) as doc:
+        count = len(doc)
+        slot_bytes = max(page_pixels(page.rect.width, page.rect.height, dpi) for page in doc)
+
+    samples = {(payload, mode): [] for payload in TRANSPORT_PAYLOADS for mode in TRANSPORT_MODES}
+    pipe_bytes = {}
+    clock = time.perf_counter
+    multiprocessing.resource_tracker.ensure_running()
+    with RasterSlab(1, slot_bytes) as slab, ProcessPoolExecutor(max_workers=1) as executor:
+        executor.submit(time.sleep, 0).result()  # Start the worker outside the timings
+        for _ in range(repeat):
+            for page_number in range(count):
+                for (payload, mode), times in samples.items():
+                    slot = slab.acquire() if payload == 'raster' and mode == 'shared' else None
+                    start = clock()
+                    returned = executor.submit(_transport_call, mode, payload, slot, pdf_path,
+                                               page_number, dpi).result()
+                    elapsed = clock() - start
+                    # Outside the timing: unpacking fills the returned skeletons in place
+                    pipe_bytes[(payload, mode)] = len(pickle.dumps(returned))
+                    start = clock()
+                    if payload == 'results':
+                        if mode == 'shared':
+                            unpack_page_elements(returned)
+                    elif mode == 'shared':
+                        with open_raster(returned) as image:
+                            int(image[::64, ::64].sum())
+                    else:
+                        int(returned[::64, ::64].sum())
+                    times.append(elapsed + clock() - start)
+                    if slot is not None:
+                        slab.release(slot)
+
+    return {payload: dict({f'{mode}_ms': round(statistics.median(samples[(payload, mode)]) * 1000, 3)
+                           for mode in TRANSPORT_MODES},
+                          **{f'{mode}_pipe_bytes': pipe_bytes[(payload, mode)] for mode in TRANSPORT_MODES})
+            for payload in TRANSPORT_PAYLOADS}
+
+def run_benchmarks(work_dir=None, kinds=PAGE_KINDS, targets=TARGETS, pages=4, dpi=200, seed=0,
+                   repeat=3, workers=None, verbose=True) -> Dict[str, object]:
+    """
+    Run the benchmark suite.
+
+    Args:
+        work_dir: Directory for the synthetic PDFs; they are generated once and
+            reused by later runs with the same pages and seed
+        kinds: Page kinds to benchmark
+        targets: Entry points to time
+        pages: Pages per synthetic PDF
+        dpi: Rendering resolution passed to every entry point
+        seed: Seed of the synthetic content
+        repeat: Repetitions per measurement
+        workers: Worker processes for process_document and batch_process
+
+    Returns:
+        dict: JSON-serializable results
+    """
+    work_dir = work_dir or os.path.join(tempfile.gettempdir(), "ocr_benchmarks")
+    pdfs = generate_suite(work_dir, kinds, pages, seed)
+    results = {
+        'version': RESULTS_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'environment': environment(),
+        'settings': {'kinds': list(kinds), 'targets': list(targets), 'pages': pages, 'dpi': dpi,
+                     'seed': seed, 'repeat': repeat, 'workers': workers},
+        'kinds': {},
+    }
+
+    for kind, pdf_path in pdfs.items():
+        with fitz.open(pdf_path) as doc:
+            megapixels = sum(page.rect.width * page.rect.height for page in doc) * (dpi / 72) ** 2 / 1e6
+        entry = {'pdf': os.path.basename(pdf_path), 'pages': pages, 'megapixels': round(megapixels, 1)}
+        if verbose:
+            print(f"{kind}: {pages} pages, {megapixels:.1f} MP at {dpi} DPI")
+
+        entry['stages'] = measure_stages(pdf_path, dpi, repeat)
+        if verbose:
+            for stage, timing in entry['stages'].items():
+                print(f"  stage {stage:12s} {timing['median_ms']:10.1f} ms/page")
+
+        entry['transport'] = measure_transport(pdf_path, dpi, repeat)
+        if verbose:
+            for payload, timing in entry['transport'].items():
+                print(f"  transport {payload:9s} pickle {timing['pickle_ms']:8.1f} ms/page "
+                      f"({timing['pickle_pipe_bytes']:,} B), shared {timing['shared_ms']:8.1f} ms/page "
+                      f"({timing['shared_pipe_bytes']:,} B)")
+
+        entry['targets'] = {}
+        for target in targets:
+            measured = measure_target(target, pdf_path, pages, dpi, repeat, workers)
+            entry['targets'][target] = measured
+            if verbose:
+                if measured['status'] == 'ok':
+                    print(f"  {target:24s} {measured['pages_per_sec']:8.2f} pages/s, "
+                          f"peak RSS {measured['peak_rss_mb']} MB")
+                else:
+                    print(f"  {target:24s} {measured['status']}: {measured['error']}")
+        results['kinds'][kind] = entry
+
+    return results
+
+def save_results(results, output_path):
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+def load_results(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+@dataclass
+class Regression:
+    metric: str
+    baseline: float
+    current: Optional[float]  # None when the target no longer runs
+    change: float  # Fraction worse than the baseline
+
+    def __str__(self):
+        if self.current is None:
+            return f"{self.metric}: ran in the baseline, now fails"
+        return f"{self.metric}: {self.baseline} -> {self.current} ({self.change:+.1%} worse)"
+
+def _metrics(results):
+    """Flatten results into metric name -> (value, higher is better)."""
+    metrics = {}
+    for kind, entry in results.get('kinds', {}).items():
+        for stage, timing in entry.get('stages', {}).items():
+            metrics[f"{kind}.stage.{stage}.median_ms"] = (timing['median_ms'], False)
+        for payload, timing in entry.get('transport', {}).items():
+            for mode in TRANSPORT_MODES:
+                metrics[f"{kind}.transport.{payload}.{mode}_ms"] = (timing[f'{mode}_ms'], False)
+        for target, measured in entry.get('targets', {}).items():
+            if measured.get('status') != 'ok':
+                metrics[f"{kind}.{target}.status"] = (None, True)
+                continue
+            metrics[f"{kind}.{target}.status"] = (1, True)
+            if measured.get('pages_per_sec') is not None:
+                metrics[f"{kind}.{target}.pages_per_sec"] = (measured['pages_per_sec'], True)
+            if measured.get('peak_rss_mb') is not None:
+                metrics[f"{kind}.{target}.peak_rss_mb"] = (measured['peak_rss_mb'], False)
+    return metrics
+
+def compare_results(baseline, current, tolerance=DEFAULT_TOLERANCE) -> List[Regression]:
+    """
+    Compare two benchmark results and list the metrics that got worse.
+
+    Only metrics present in both results are compared, so a run restricted to
+    some kinds or targets can be checked against a full baseline. A target
+    that ran in the baseline but is skipped or fails now counts as a
+    regression.
+    """
+    old, new = _metrics(baseline), _metrics(current)
+    regressions = []
+    for metric in sorted(old.keys() & new.keys()):
+        (before, higher_is_better), (after, _) = old[metric], new[metric]
+        if metric.endswith('.status'):
+            if before is not None and after is None:
+                regressions.append(Regression(metric, before, None, float('inf')))
+            continue
+        if metric.endswith('_ms') and max(before, after) < MIN_COMPARED_MS:
+            continue
+        if higher_is_better:
+            change = (before - after) / before if before else 0.0
+        else:
+            change = (after - before) / before if before else 0.0
+        if change > tolerance:
+            regressions.append(Regression(metric, before, after, change))
+    return regressions
+
+def settings_mismatch(baseline, current) -> List[str]:
+    """Settings that differ between two results, which makes them incomparable."""
+    keys = ('pages', 'dpi', 'seed')
+    old, new = baseline.get('settings', {}), current.get('settings', {})
+    return [f"{key}: {old.get(key)} != {new.get(key)}" for key in keys if old.get(key) != new.get(key)]
@@ -0,0 +1,183 @@
+"""
+Deterministic synthetic plan-sheet PDFs for benchmarking.
+
+Every generator draws its content from a seeded random generator, so the same
+kind, page count and seed always give the same pages. Four kinds cover the
+shapes of real plan sets:
+
+- text: tabloid sheets with a text layer (notes, sign callouts, title block)
+- scanned: the same sheets rasterized with noise and a slight skew, no text layer
+- schedule: dense ruled sign schedules, one row per sign
+- large_format: 36x24 inch sheets with scattered callouts and a title block
+"""
+
+import os
+import cv2
+import numpy as np
+import fitz  # PyMuPDF
+
+PAGE_KINDS = ('text', 'scanned', 'schedule', 'large_format')
+
+TABLOID = (1224, 792)  # 17x11 inches in points
+LARGE_FORMAT = (2592, 1728)  # 36x24 inches
+
+# Resolution and noise of the simulated scans
+SCAN_DPI = 150
+SCAN_NOISE = 12
+SCAN_SKEW = 0.6  # Largest skew in degrees
+
+SIGN_CODES = ['R1-1', 'R2-1', 'R3-5L', 'W3-1', 'W20-1', 'D1-2', 'D3-1', 'MS1-8u', 'MS1-8j', 'M1-6', 'OM-3']
+DESCRIPTIONS = ['STOP', 'SPEED LIMIT 45 MPH', 'ROAD WORK AHEAD', 'DESTINATION 2 LINES',
+                'STREET NAME', 'STATE ROUTE 2 DIGITS', 'TURN ONLY', 'OBJECT MARKER']
+ACTIONS = ['NEW SIGN', 'PANEL REPLACEMENT', 'REMOVE', 'RELOCATE']
+NOTES = ['ALL SIGNS SHALL BE FABRICATED PER STANDARD DRAWINGS.',
+         'CONTRACTOR SHALL VERIFY SIGN LOCATIONS IN THE FIELD.',
+         'ITS POLE FOUNDATIONS PER DETAIL 3 ON SHEET SD-2.',
+         'EXISTING SIGN POSTS TO BE REMOVED AND DISPOSED OF.',
+         'ATM GANTRY TYPE 1 SEE STRUCTURAL DETAILS.']
+SCHEDULE_COLUMNS = ['SIGN ID', 'ROUTE', 'MILEPOST', 'SIDE', 'CODE', 'DESCRIPTION', 'ACTION', 'SIZE', 'QTY']
+
+def _sign_row(rng, index):
+    return [
+        f"{index // 10 + 1}.{index % 10}",
+        'SR-81',
+        f"{rng.uniform(0, 25):.3f}",
+        ['LEFT', 'RIGHT'][int(rng.integers(2))],
+        SIGN_CODES[int(rng.integers(len(SIGN_CODES)))],
+        DESCRIPTIONS[int(rng.integers(len(DESCRIPTIONS)))],
+        ACTIONS[int(rng.integers(len(ACTIONS)))],
+        f"{int(rng.integers(2, 40)) * 1.5:.2f}",
+        str(int(rng.integers(1, 5))),
+    ]
+
+def _title_block(page, number, title):
+    """Draw a title block in the bottom-right corner, where SheetIndex looks for it."""
+    width, height = page.rect.width, page.rect.height
+    rect = fitz.Rect(width * 0.75, height * 0.85, width - 18, height - 18)
+    page.draw_rect(rect, width=1.5)
+    page.insert_text((rect.x0 + 10, rect.y0 + 22), title, fontsize=12)
+    page.insert_text((rect.x0 + 10, rect.y0 + 42), "STATE ROUTE 81 SIGNING PROJECT", fontsize=8)
+    page.insert_text((rect.x1 - 60, rect.y1 - 12), f"S-{number}", fontsize=14)
+
+def _draw_sheet(page, rng, number, fontsize=9):
+    """Notes, sign callouts with leader boxes and a title block."""
+    width, height = page.rect.width, page.rect.height
+    page.draw_rect(fitz.Rect(18, 18, width - 18, height - 18), width=2)
+
+    y = 48
+    page.insert_text((36, y), "GENERAL NOTES", fontsize=fontsize + 3)
+    for i in range(8):
+        y += fontsize * 1.8
+        page.insert_text((36, y), f"{i + 1}. {NOTES[int(rng.integers(len(NOTES)))]}", fontsize=fontsize)
+
+    callouts = int(width * height / 40000)
+    for i in range(callouts):
+        x = float(rng.uniform(width * 0.35, width * 0.9))
+        y = float(rng.uniform(60, height * 0.8))
+        row = _sign_row(rng, i)
+        page.draw_rect(fitz.Rect(x - 4, y - fontsize - 2, x + 130, y + fontsize + 6), width=0.5)
+        page.insert_text((x, y), f"SIGN {row[0]} {row[4]}", fontsize=fontsize)
+        page.insert_text((x, y + fontsize + 2), f"{row[5]} {row[2]}", fontsize=fontsize - 2)
+
+    _title_block(page, number, "SIGNING AND STRIPING PLAN")
+
+def draw_table(page, columns, rows, weights, top=60, fontsize=6, margin=36):
+    """
+    Draw a ruled table across the page, one text line per cell.
+
+    Returns:
+        float: The y coordinate of the bottom rule
+    """
+    left, right = margin, page.rect.width - margin
+    row_height = fontsize * 2
+    weights = np.asarray(weights, dtype=float)
+    edges = left + np.concatenate([[0], np.cumsum(weights / weights.sum() * (right - left))])
+
+    for r, cells in enumerate([columns] + list(rows)):
+        baseline = top + r * row_height + fontsize * 1.4
+        for c, text in enumerate(cells):
+            page.insert_text((float(edges[c]) + 2, baseline), str(text), fontsize=fontsize)
+    bottom = top + (len(rows) + 1) * row_height
+    for r in range(len(rows) + 2):
+        y = top + r * row_height
+        page.draw_line((left, y), (right, y), width=0.5)
+    for x in edges:
+        page.draw_line((float(x), top), (float(x), bottom), width=0.5)
+    return bottom
+
+def _draw_schedule(page, rng, number, fontsize=6):
+    """A ruled sign schedule filling the sheet."""
+    top = 60
+    count = int((page.rect.height * 0.82 - top) / (fontsize * 2))
+    rows = [_sign_row(rng, (number - 1) * count + r) for r in range(count)]
+    page.insert_text((36, top - 14), "SIGN SCHEDULE", fontsize=fontsize + 6)
+    draw_table(page, SCHEDULE_COLUMNS, rows, [5, 5, 6, 4, 6, 18, 10, 5, 3], top, fontsize)
+    _title_block(page, number, "SIGN SCHEDULE")
+
+def scan_page(page, rng):
+    """Rasterize a page the way a scanner would: gray, skewed and noisy."""
+    pix = page.get_pixmap(matrix=fitz.Matrix(SCAN_DPI/72, SCAN_DPI/72), colorspace=fitz.csGRAY)
+    gray = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.h, pix.w)
+    angle = float(rng.uniform(-SCAN_SKEW, SCAN_SKEW))
+    matrix = cv2.getRotationMatrix2D((pix.w / 2, pix.h / 2), angle, 1.0)
+    gray = cv2.warpAffine(gray, matrix, (pix.w, pix.h), borderValue=255)
+    noisy = gray.astype(np.float32) * 0.85 + 20 + rng.normal(0, SCAN_NOISE, gray.shape)
+    scan = np.clip(noisy, 0, 255).astype(np.uint8)
+    return cv2.imencode('.jpg', scan, [cv2.IMWRITE_JPEG_QUALITY, 80])[1].tobytes()
+
+def generate_pdf(kind, output_path, pages=4, seed=0):
+    """
+    Write a synthetic PDF of one page kind.
+
+    Args:
+        kind: One of PAGE_KINDS
+        output_path: Path of the PDF to write
+        pages: Number of pages
+        seed: Seed of the content; the same arguments give the same pages
+
+    Returns:
+        str: output_path
+    """
+    if kind not in PAGE_KINDS:
+        raise ValueError(f"Unknown page kind: {kind}")
+    rng = np.random.default_rng([seed, PAGE_KINDS.index(kind)])
+    doc = fitz.open()
+    doc.set_metadata({'title': f"Synthetic {kind} sheets", 'producer': 'ocr.benchmarks',
+                      'creationDate': '', 'modDate': ''})
+
+    for number in range(1, pages + 1):
+        size = LARGE_FORMAT if kind == 'large_format' else TABLOID
+        if kind == 'scanned':
+            scratch = fitz.open()
+            source = scratch.new_page(width=size[0], height=size[1])
+            _draw_sheet(source, rng, number)
+            image = scan_page(source, rng)
+            scratch.close()
+            page = doc.new_page(width=size[0], height=size[1])
+            page.insert_image(page.rect, stream=image)
+        elif kind == 'schedule':
+            _draw_schedule(doc.new_page(width=size[0], height=size[1]), rng, number)
+        else:
+            _draw_sheet(doc.new_page(width=size[0], height=size[1]), rng, number)
+
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    doc.save(output_path, garbage=3, deflate=True, no_new_id=True)
+    doc.close()
+    return output_path
+
+def generate_suite(output_dir, kinds=PAGE_KINDS, pages=4, seed=0):
+    """
+    Write one PDF per page kind, reusing PDFs already generated with the same settings.
+
+    Returns:
+        dict: Page kind -> PDF path
+    """
+    paths = {}
+    for kind in kinds:
+        path = os.path.join(output_dir, f"{kind}_p{pages}_s{seed}.pdf")
+        if not os.path.exists(path):
+            generate_pdf(kind, path, pages, seed)
+        paths[kind] = path
+    return paths
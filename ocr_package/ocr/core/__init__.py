@@ -4,6 +4,14 @@ Core OCR functionality for basic PDF text extraction.
 
 from .processor import preprocess_image, extract_text_from_pdf, save_text_to_file
 from .utils import ensure_dir, get_output_path
+from .raster_cache import PageRasterCache
+from .page_dedup import PageHashIndex
+from .preprocessing import PreprocessConfig, PreprocessPipeline
+from .profiles import OcrProfile, load_profile, save_profile
+from .pipeline import PagePipeline
+from .transport import RasterSlab
+from .progress import ProgressTracker
+from .metrics import MetricsExporter
 
 __all__ = [
     'preprocess_image',
@@ -11,4 +19,15 @@ __all__ = [
     'save_text_to_file',
     'ensure_dir',
     'get_output_path',
+    'PageRasterCache',
+    'PageHashIndex',
+    'PreprocessConfig',
+    'PreprocessPipeline',
+    'OcrProfile',
+    'load_profile',
+    'save_profile',
+    'PagePipeline',
+    'RasterSlab',
+    'ProgressTracker',
+    'MetricsExporter',
 ] 
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""
+Events from page processing code to listeners in the parent process.
+
+Progress reporting and metrics are fed by small event tuples emitted where
+pages are rendered and OCRed. In the process that subscribed a listener the
+events are delivered directly. Pool workers started with pool_kwargs() while
+anyone listens put them on a multiprocessing queue instead, which a thread
+of the subscribing process drains. With no listener, emit() does nothing.
+"""
+
+import os
+import threading
+import multiprocessing
+from typing import Callable, Dict, List
+
+_listeners: List[Callable] = []
+# Receives events in this process: _dispatch in the subscribing process,
+# the queue's put() in pool workers
+_sink = None
+# Queue forwarded to pool workers started while anyone listens
+_queue = None
+_thread = None
+_owner = None  # pid of the subscribing process
+_lock = threading.Lock()
+
+def emit(event):
+    """Send an event tuple to the listeners, if any."""
+    sink = _sink
+    if sink is not None:
+        try:
+            sink(event)
+        except Exception:
+            # Reporting must never fail a page
+            pass
+
+def listening() -> bool:
+    """Whether emitted events currently reach a listener."""
+    return _sink is not None
+
+def _dispatch(event):
+    # Forked children without the pool initializer inherit this sink; their
+    # copies of the listeners must not act on the events
+    if os.getpid() != _owner:
+        return
+    for listener in list(_listeners):
+        listener(event)
+
+def _drain(events):
+    while True:
+        event = events.get()
+        if event is None:
+            return
+        try:
+            _dispatch(event)
+        except Exception as e:
+            print(f"Event listener failed: {e}")
+
+def subscribe(listener: Callable):
+    """Deliver events to listener(event), including those of pool workers started from now on."""
+    global _sink, _queue, _thread, _owner
+    with _lock:
+        _listeners.append(listener)
+        if _queue is None or _owner != os.getpid():
+            _owner = os.getpid()
+            _queue = multiprocessing.Queue()
+            _thread = threading.Thread(target=_drain, args=(_queue,), daemon=True)
+            _thread.start()
+            _sink = _dispatch
+
+def unsubscribe(listener: Callable):
+    """
+    Stop delivering events to listener.
+
+    When the last listener leaves, the events workers have already queued
+    are delivered before the queue is closed.
+    """
+    global _sink, _queue, _thread
+    with _lock:
+        if _listeners == [listener] and _queue is not None:
+            queue, thread = _queue, _thread
+            _sink, _queue, _thread = None, None, None
+        else:
+            queue = thread = None
+            _listeners.remove(listener)
+    if queue is not None:
+        queue.put(None)
+        thread.join()
+        queue.close()
+        with _lock:
+            _listeners.remove(listener)
+
+def init_worker(queue):
+    """Pool initializer: send this worker's events to the subscribing process."""
+    global _sink, _queue
+    _sink, _queue = queue.put, queue
+
+def pool_kwargs() -> Dict:
+    """ProcessPoolExecutor arguments that forward worker events to the listeners."""
+    return {'initializer': init_worker, 'initargs': (_queue,)} if _queue is not None else {}
@@ -0,0 +1,244 @@
+"""
+Prometheus metrics for long-running OCR processes.
+
+Processing code records metrics with inc(), observe() and set_gauge(); like
+progress events they travel through ocr.core.events, so samples taken in
+pool workers are aggregated in the process running the MetricsExporter.
+Page counts and failures are derived from the same per-page events the
+progress display uses. The exporter serves the Prometheus text format over
+HTTP (/metrics) and/or writes it to a file for node_exporter's textfile
+collector, replaced atomically. Without a running exporter nothing is
+recorded.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from . import events
+
+# Buckets of the per-page time histograms, in seconds
+SECONDS_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+# Seconds between rewrites of the textfile collector file
+TEXTFILE_SECONDS = 15.0
+
+# name -> (type, help, histogram buckets)
+METRICS = {
+    "ocr_pages_processed_total": ("counter", "Pages OCRed, or reused from a known duplicate sheet", None),
+    "ocr_page_failures_total": ("counter", "Pages that failed to render or OCR", None),
+    "ocr_files_total": ("counter", "Files finished by batch runs, by status", None),
+    "ocr_pages_skipped_total": ("counter", "Pages not OCRed, by reason", None),
+    "ocr_render_seconds": ("histogram", "Time to render and preprocess a page", SECONDS_BUCKETS),
+    "ocr_ocr_seconds": ("histogram", "Time to OCR a rendered page", SECONDS_BUCKETS),
+    "ocr_raster_cache_hits_total": ("counter", "Page rasters served from the raster cache", None),
+    "ocr_raster_cache_misses_total": ("counter", "Page rasters rendered on a raster cache miss", None),
+    "ocr_queue_depth": ("gauge", "Pages submitted to worker pools and not finished", None),
+    "ocr_pages_in_progress": ("gauge", "Pages being rendered or OCRed", None),
+    "ocr_worker_peak_rss_bytes": ("gauge", "Highest peak RSS reported by a pool worker", None),
+    "ocr_last_page_timestamp_seconds": ("gauge", "Unix time the last page finished", None),
+}
+
+# Exported as 0 before the first page, so rate() works from the first scrape
+ALWAYS_EXPORTED = ("ocr_pages_processed_total", "ocr_page_failures_total")
+
+# Finished pages remembered so a page reported failed again (e.g. once by the
+# page and once for its whole file) counts once, until it starts again
+RECENT_PAGES = 100000
+
+Labels = Tuple[Tuple[str, str], ...]
+
+def inc(name: str, value: float = 1, **labels):
+    """Increase a counter."""
+    events.emit(("metric", "inc", name, value, labels))
+
+def observe(name: str, value: float, **labels):
+    """Add a sample to a histogram."""
+    events.emit(("metric", "observe", name, value, labels))
+
+def set_gauge(name: str, value: float, **labels):
+    """Set a gauge."""
+    events.emit(("metric", "set", name, value, labels))
+
+def set_max(name: str, value: float, **labels):
+    """Raise a gauge to value if it is higher."""
+    events.emit(("metric", "max", name, value, labels))
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in pairs) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class MetricsRegistry:
+    """Metric values of this process and its pool workers, in the Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.values: Dict[str, Dict[Labels, float]] = {name: {} for name in METRICS}
+        # name -> labels -> (bucket counts, sum, count)
+        self.histograms: Dict[str, Dict[Labels, list]] = {}
+        self.in_progress = set()
+        self.finished = OrderedDict()  # page key -> None, oldest first
+
+    def apply(self, event):
+        """Apply a metric event, or derive the page metrics from a progress event."""
+        if event[0] == "page":
+            self._page_event(*event[1:])
+            return
+        if event[0] != "metric":
+            return
+        _, op, name, value, labels = event
+        buckets = METRICS[name][2]
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            if op == "observe":
+                counts, total, count = self.histograms.setdefault(name, {}).get(key, ([0] * len(buckets), 0.0, 0))
+                counts = [c + (value <= bound) for c, bound in zip(counts, buckets)]
+                self.histograms[name][key] = (counts, total + value, count + 1)
+            elif op == "inc":
+                self.values[name][key] = self.values[name].get(key, 0) + value
+            elif op == "max":
+                self.values[name][key] = max(self.values[name].get(key, value), value)
+            else:
+                self.values[name][key] = value
+
+    def _page_event(self, kind, key, timestamp):
+        with self._lock:
+            if kind == "start":
+                self.in_progress.add(key)
+                self.finished.pop(key, None)
+            elif key not in self.finished:
+                self.in_progress.discard(key)
+                self.finished[key] = None
+                if len(self.finished) > RECENT_PAGES:
+                    self.finished.popitem(last=False)
+                name = "ocr_pages_processed_total" if kind == "done" else "ocr_page_failures_total"
+                self.values[name][()] = self.values[name].get((), 0) + 1
+                if kind == "done":
+                    self.values["ocr_last_page_timestamp_seconds"][()] = timestamp
+            self.values["ocr_pages_in_progress"][()] = len(self.in_progress)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, (kind, help_text, buckets) in METRICS.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                if kind == "histogram":
+                    for labels, (counts, total, count) in sorted(self.histograms.get(name, {}).items()):
+                        for bound, value in zip(buckets, counts):
+                            lines.append(f"{name}_bucket{_format_labels(labels, ('le', _format_value(bound)))} {value}")
+                        lines.append(f'{name}_bucket{_format_labels(labels, ("le", "+Inf"))} {count}')
+                        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+                        lines.append(f"{name}_count{_format_labels(labels)} {count}")
+                    continue
+                samples = self.values[name]
+                if not samples and name in ALWAYS_EXPORTED:
+                    samples = {(): 0}
+                for labels, value in sorted(samples.items()):
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+class MetricsExporter:
+    """
+    Exposes a MetricsRegistry over HTTP and/or as a textfile collector file.
+
+    Use as a context manager around the work, like ProgressTracker.
+    """
+
+    def __init__(self, port: Optional[int] = None, host: str = "127.0.0.1", textfile: Optional[str] = None,
+                 textfile_seconds: float = TEXTFILE_SECONDS):
+        """
+        Args:
+            port: Serve /metrics on this port (0 picks a free one)
+            host: Address to listen on; localhost by default
+            textfile: Write the metrics to this .prom file, e.g. in
+                node_exporter's --collector.textfile.directory
+            textfile_seconds: Seconds between rewrites of the file
+        """
+        self.port = port
+        self.host = host
+        self.textfile = textfile
+        self.textfile_seconds = textfile_seconds
+        self.registry = MetricsRegistry()
+        self.server = None
+        self._threads = []
+        self._stopped = threading.Event()
+
+    @property
+    def address(self) -> Optional[Tuple[str, int]]:
+        return self.server.server_address[:2] if self.server is not None else None
+
+    def write_textfile(self):
+        tmp_path = f"{self.textfile}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.registry.render())
+        os.replace(tmp_path, self.textfile)
+
+    def _write_periodically(self):
+        while not self._stopped.wait(self.textfile_seconds):
+            try:
+                self.write_textfile()
+            except OSError as e:
+                print(f"Cannot write metrics to {self.textfile}: {e}")
+
+    def start(self):
+        self._stopped.clear()
+        events.subscribe(self.registry.apply)
+        if self.port is not None:
+            registry = self.registry
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split('?')[0] != "/metrics":
+                        self.send_error(404)
+                        return
+                    body = registry.render().encode('utf-8')
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    pass
+
+            self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+            self.server.daemon_threads = True
+            self._threads.append(threading.Thread(target=self.server.serve_forever, daemon=True))
+            print(f"Serving metrics on http://{self.address[0]}:{self.address[1]}/metrics")
+        if self.textfile:
+            self._threads.append(threading.Thread(target=self._write_periodically, daemon=True))
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        # Delivers the samples workers have already queued
+        events.unsubscribe(self.registry.apply)
+        self._stopped.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self.textfile:
+            self.write_textfile()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,190 @@
+"""
+Page orientation detection on downsampled renders.
+
+Rotated sheets (landscape scans stored portrait) are detected before the real
+OCR pass so each page is OCRed once, upright. Tesseract's orientation and
+script detection (OSD) runs on a small image; when OSD is not available or
+finds too little text, only a clear majority of vertical text lines turns a
+page, since line-heavy drawings must not be rotated on a guess. Plan sets
+usually share one orientation, so a few sampled pages can decide for the
+whole document.
+"""
+
+import re
+import cv2
+import numpy as np
+import pytesseract
+import fitz  # PyMuPDF
+from PIL import Image
+from typing import Optional, Union
+
+# Resolution of the render used for detection, and the longest side given to OSD
+ORIENTATION_DPI = 72
+OSD_MAX_SIDE = 1600
+
+# Pages sampled to decide the orientation of a whole document
+DEFAULT_SAMPLE_PAGES = 3
+
+# Projection fallback: ink runs longer than 1/RULE_FRACTION of the page side
+# are rules, not text; glyphs closer than SMEAR_PIXELS join into a line
+RULE_FRACTION = 8
+SMEAR_PIXELS = 7
+
+# A text line blob is MIN..MAX_LINE_THICKNESS thick (thinner is a hairline)
+# and at least TEXT_LINE_ASPECT times as long
+MIN_LINE_THICKNESS = 3
+MAX_LINE_THICKNESS = 40
+TEXT_LINE_ASPECT = 3
+
+# Vertical text lines needed to report a rotation: at least MIN_TEXT_LINES,
+# and ROTATION_EVIDENCE times the horizontal ones
+MIN_TEXT_LINES = 10
+ROTATION_EVIDENCE = 3
+
+def detect_rotation(image) -> int:
+    """
+    Detect the clockwise rotation (0, 90, 180 or 270) that makes a page upright.
+
+    Args:
+        image: RGB or grayscale page image, numpy array or PIL image
+    """
+    gray = np.asarray(image)
+    if gray.ndim == 3:
+        gray = cv2.cvtColor(gray, cv2.COLOR_RGB2GRAY)
+
+    scale = OSD_MAX_SIDE / max(gray.shape)
+    if scale < 1:
+        gray = cv2.resize(gray, (int(gray.shape[1] * scale), int(gray.shape[0] * scale)),
+                          interpolation=cv2.INTER_AREA)
+
+    try:
+        osd = pytesseract.image_to_osd(Image.fromarray(gray), config='--psm 0 -c min_characters_to_try=10')
+        match = re.search(r'Rotate:\s*(\d+)', osd)
+        if match:
+            return int(match.group(1)) % 360
+    except pytesseract.TesseractError:
+        # No OSD data installed, or too few characters on the page
+        pass
+
+    return projection_rotation(gray)
+
+def _text_line_count(glyphs, kernel_shape) -> int:
+    """Blobs left by smearing glyphs along one direction that are shaped like text lines."""
+    smeared = cv2.dilate(glyphs, np.ones(kernel_shape, np.uint8))
+    count, _, stats, _ = cv2.connectedComponentsWithStats(smeared, connectivity=8)
+    along, across = (cv2.CC_STAT_WIDTH, cv2.CC_STAT_HEIGHT) if kernel_shape[0] == 1 else \
+        (cv2.CC_STAT_HEIGHT, cv2.CC_STAT_WIDTH)
+    lines = 0
+    for label in range(1, count):
+        length, thickness = stats[label, along], stats[label, across]
+        if MIN_LINE_THICKNESS <= thickness <= MAX_LINE_THICKNESS and length >= TEXT_LINE_ASPECT * thickness:
+            lines += 1
+    return lines
+
+def projection_rotation(gray) -> int:
+    """
+    Fallback orientation check when OSD gives no answer.
+
+    Plan drawings are full of long borders, dimension lines and table rules,
+    which say nothing about the text direction, so long straight runs and
+    hairlines are dropped first. The remaining glyphs are smeared along rows
+    and along columns; a page is only reported as rotated by 90 degrees when
+    clearly more text lines run vertically than horizontally, and 0 is
+    returned whenever the evidence is weak. 180 and 270 cannot be told apart
+    from 0 and 90 this way.
+    """
+    _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    height, width = ink.shape
+    rules = cv2.morphologyEx(ink, cv2.MORPH_OPEN, np.ones((1, max(width // RULE_FRACTION, 2)), np.uint8))
+    rules |= cv2.morphologyEx(ink, cv2.MORPH_OPEN, np.ones((max(height // RULE_FRACTION, 2), 1), np.uint8))
+    glyphs = cv2.bitwise_and(ink, cv2.bitwise_not(rules))
+
+    horizontal = _text_line_count(glyphs, (1, SMEAR_PIXELS))
+    vertical = _text_line_count(glyphs, (SMEAR_PIXELS, 1))
+    if vertical >= MIN_TEXT_LINES and vertical >= ROTATION_EVIDENCE * horizontal:
+        return 90
+    return 0
+
+def render_for_orientation(page, dpi=ORIENTATION_DPI):
+    """Render a PyMuPDF page to a small grayscale array for detection."""
+    pix = page.get_pixmap(matrix=fitz.Matrix(dpi/72, dpi/72), colorspace=fitz.csGRAY)
+    return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.h, pix.w)
+
+def detect_page_rotation(page, dpi=ORIENTATION_DPI) -> int:
+    """Detect the clockwise rotation that makes a PyMuPDF page upright."""
+    return detect_rotation(render_for_orientation(page, dpi))
+
+def detect_document_rotation(pdf_path, sample=DEFAULT_SAMPLE_PAGES, dpi=ORIENTATION_DPI) -> Optional[int]:
+    """
+    Detect the orientation shared by the sheets of a document.
+
+    Evenly spaced sample pages are checked; their common rotation is returned,
+    or None when they disagree and every page needs its own detection.
+    """
+    with fitz.open(pdf_path) as doc:
+        count = len(doc)
+        if count == 0:
+            return 0
+        step = max(1, count // sample)
+        rotations = {detect_page_rotation(doc[i], dpi) for i in range(0, count, step)[:sample]}
+    return rotations.pop() if len(rotations) == 1 else None
+
+def resolve_orientation(pdf_path, orientation) -> Union[None, str, int]:
+    """
+    Turn an orientation option into what each page worker applies.
+
+    Args:
+        orientation: None (off), "auto" (detect every page), "sample" (detect
+            on sample pages, per page if they disagree) or a fixed rotation
+
+    Returns:
+        None, "auto" or a clockwise rotation in degrees
+    """
+    if orientation == "sample":
+        rotation = detect_document_rotation(pdf_path)
+        if rotation is None:
+            print("Sampled pages disagree on orientation, detecting per page")
+            return "auto"
+        print(f"Document orientation: rotate {rotation} degrees")
+        return rotation
+    return orientation
+
+def apply_page_rotation(page, orientation) -> int:
+    """
+    Rotate a PyMuPDF page upright in memory before rendering.
+
+    Renders, page.rect and get_pixmap clips then use the upright (rotated)
+    coordinate space. Text extraction does not: get_text results and its
+    clip argument stay in the unrotated space of the page, so callers map
+    text-layer boxes with upright_words and text clips with unrotated_rect.
+
+    Returns:
+        int: The clockwise rotation applied
+    """
+    if orientation is None:
+        return 0
+    rotation = detect_page_rotation(page) if orientation == "auto" else int(orientation) % 360
+    if rotation:
+        page.set_rotation((page.rotation + rotation) % 360)
+    return rotation
+
+def upright_words(page):
+    """
+    Text-layer words of a page, with their boxes in its rotated space.
+
+    Returns:
+        list: (fitz.Rect, word, block, line) tuples, as in page.get_text('words')
+    """
+    to_rotated = page.rotation_matrix
+    return [(fitz.Rect(x0, y0, x1, y1) * to_rotated, word, block, line)
+            for x0, y0, x1, y1, word, block, line, _ in page.get_text('words')]
+
+def unrotated_rect(page, rect):
+    """Map a rect in the rotated space of page.rect to the space get_text clips use."""
+    return fitz.Rect(rect) * page.derotation_matrix
+
+def rotate_image(image, rotation):
+    """Rotate a PIL image clockwise by a multiple of 90 degrees."""
+    if not rotation:
+        return image
+    return image.rotate(-rotation, expand=True)
@@ -0,0 +1,310 @@
+"""
+Perceptual-hash deduplication of repeated sheets.
+
+Standard detail sheets are reused across many plan sets, scanned slightly
+differently each time. A difference hash (dHash) of the downsampled,
+binarized page stays within a few bits across such scans, so a page close to
+one that was already OCRed can reuse its text and word positions.
+
+Hashes are split into BANDS bands: two hashes within fewer than BANDS
+differing bits share at least one band exactly, so near duplicates are found
+with indexed equality lookups instead of a scan of every stored hash.
+
+The dHash only sees the layout: sheets sharing a border and title block hash
+alike whatever their body says. A candidate must therefore also match a finer
+ink-density grid of the page. Optionally, a few small regions holding the
+stored sheet's numbers are OCRed and must agree with its text before it is
+reused, which catches sheets that differ only in a few digits.
+"""
+
+import re
+import json
+import sqlite3
+import cv2
+import numpy as np
+import pytesseract
+from PIL import Image
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Tuple
+from .profiles import tesseract_kwargs
+
+# Hash grid size: a HASH_SIZE x HASH_SIZE difference hash (256 bits)
+HASH_SIZE = 16
+BANDS = 8
+BAND_BITS = HASH_SIZE * HASH_SIZE // BANDS
+
+# Gray-level difference a cell must exceed its neighbour by to set a bit
+HASH_MARGIN = 8
+
+# Largest Hamming distance accepted as the same sheet; must stay below BANDS
+DEFAULT_MAX_DISTANCE = 6
+
+# Ink-density grid compared before a candidate is accepted, and the largest
+# difference in ink fraction allowed in any cell (rescans stay well below it)
+DENSITY_GRID = 48
+DENSITY_TOLERANCE = 0.08
+
+# Verification OCRs at most VERIFY_WORDS stored words with digits, each
+# padded by VERIFY_PADDING pixels
+VERIFY_WORDS = 8
+VERIFY_PADDING = 6
+
+# Sheets stored without word positions are verified on the VERIFY_TILES
+# inkiest cells of a VERIFY_GRID x VERIFY_GRID split of VERIFY_REGION, the
+# sheet body inside the border and above a bottom title block (page fractions)
+VERIFY_REGION = (0.02, 0.02, 0.98, 0.85)
+VERIFY_GRID = 6
+VERIFY_TILES = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sheets (
+    id INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL,
+    source TEXT,
+    page INTEGER,
+    dpi INTEGER,
+    text TEXT NOT NULL,
+    positions TEXT,
+    density BLOB
+);
+CREATE TABLE IF NOT EXISTS bands (
+    band INTEGER NOT NULL,
+    value INTEGER NOT NULL,
+    sheet_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bands_lookup ON bands(band, value);
+"""
+
+def dhash(gray, hash_size=HASH_SIZE) -> int:
+    """
+    Difference hash of a grayscale or binarized page.
+
+    The page is shrunk to (hash_size + 1) x hash_size with area averaging and
+    each bit records whether a cell is brighter than its right neighbour by
+    more than HASH_MARGIN, so blank areas do not flip bits on scan noise.
+    """
+    small = cv2.resize(np.asarray(gray, dtype=np.float32), (hash_size + 1, hash_size),
+                       interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1] + HASH_MARGIN).flatten()
+    return int(''.join('1' if bit else '0' for bit in bits), 2)
+
+def ink_density(gray, grid=DENSITY_GRID) -> bytes:
+    """Fraction of dark pixels in each cell of a grid x grid split of the page, as bytes (0-255)."""
+    ink = (np.asarray(gray) < 128).astype(np.float32)
+    cells = cv2.resize(ink, (grid, grid), interpolation=cv2.INTER_AREA)
+    return np.round(cells * 255).astype(np.uint8).tobytes()
+
+def density_matches(a: Optional[bytes], b: Optional[bytes], tolerance=DENSITY_TOLERANCE) -> bool:
+    """Whether two ink-density grids differ by at most tolerance in every cell."""
+    if not a or not b or len(a) != len(b):
+        return False
+    difference = np.abs(np.frombuffer(a, np.uint8).astype(np.int16) - np.frombuffer(b, np.uint8))
+    return int(difference.max()) <= tolerance * 255
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+def _bands(page_hash: int) -> List[int]:
+    mask = (1 << BAND_BITS) - 1
+    return [(page_hash >> (band * BAND_BITS)) & mask for band in range(BANDS)]
+
+def _words(text: str) -> set:
+    """Words of three or more characters and every token with a digit (TYPE 2, 120+50, QTY 4)."""
+    tokens = re.findall(r'[A-Z0-9]+(?:[+.\-][A-Z0-9]+)*', text.upper())
+    return {token for token in tokens if len(token) >= 3 or any(c.isdigit() for c in token)}
+
+def verify_boxes(gray, positions: Optional[List[Dict[str, Any]]] = None) -> List[Tuple[int, int, int, int]]:
+    """
+    Pixel boxes (x0, y0, x1, y1) of the page OCRed to verify a match.
+
+    Args:
+        gray: Page image
+        positions: Word positions of the stored sheet at the page's DPI; the
+            words with digits (sign types, stations, quantities) are checked,
+            spread over the sheet
+    """
+    height, width = gray.shape[:2]
+    numbered = [pos for pos in positions or [] if any(c.isdigit() for c in pos['text'])]
+    if numbered:
+        step = max(1, len(numbered) // VERIFY_WORDS)
+        return [(max(0, pos['x'] - VERIFY_PADDING), max(0, pos['y'] - VERIFY_PADDING),
+                 min(width, pos['x'] + pos['width'] + VERIFY_PADDING),
+                 min(height, pos['y'] + pos['height'] + VERIFY_PADDING))
+                for pos in numbered[::step][:VERIFY_WORDS]]
+
+    x0, y0, x1, y1 = VERIFY_REGION
+    xs = np.linspace(width * x0, width * x1, VERIFY_GRID + 1).astype(int)
+    ys = np.linspace(height * y0, height * y1, VERIFY_GRID + 1).astype(int)
+    ink = np.asarray(gray) < 128
+    tiles = [(int(ink[ys[row]:ys[row + 1], xs[col]:xs[col + 1]].sum()),
+              (xs[col], ys[row], xs[col + 1], ys[row + 1]))
+             for row in range(VERIFY_GRID) for col in range(VERIFY_GRID)]
+    tiles.sort(key=lambda tile: -tile[0])
+    return [tuple(int(v) for v in box) for count, box in tiles[:VERIFY_TILES] if count]
+
+def verify_sample(gray, text: str, boxes: Optional[List[Tuple[int, int, int, int]]] = None,
+                  profile=None, min_overlap=0.8) -> bool:
+    """
+    OCR small regions of the page and check their words appear in the stored text.
+
+    Numbers carry the content of schedule and sign sheets (types, stations,
+    quantities), so every token with a digit must be found; of the other
+    words, min_overlap must be.
+
+    Args:
+        gray: Page image
+        text: Stored text of the candidate sheet
+        boxes: Pixel boxes to OCR (default: verify_boxes without positions)
+        profile: Optional OcrProfile the page is OCRed with
+
+    Returns True when the regions have no readable words to contradict the match.
+    """
+    if boxes is None:
+        boxes = verify_boxes(gray)
+    words = set()
+    for x0, y0, x1, y1 in boxes:
+        crop = np.ascontiguousarray(gray[y0:y1, x0:x1])
+        if crop.size:
+            words |= _words(pytesseract.image_to_string(Image.fromarray(crop), **tesseract_kwargs(profile)))
+    if not words:
+        return True
+    known = _words(text)
+    numbers = {word for word in words if any(c.isdigit() for c in word)}
+    if not numbers <= known:
+        return False
+    return len(words & known) / len(words) >= min_overlap
+
+@dataclass
+class PageSignature:
+    """What find() computes for a page and add() stores with its text."""
+    hash: int
+    density: bytes
+
+@dataclass
+class DedupEntry:
+    id: int
+    source: str
+    page: int
+    dpi: int
+    text: str
+    positions: List[Dict[str, Any]] = field(default_factory=list)
+    distance: int = 0
+
+    def scaled_positions(self, dpi: int) -> List[Dict[str, Any]]:
+        """Word positions rescaled from the stored DPI to the given one."""
+        if not self.dpi or self.dpi == dpi:
+            return [dict(pos) for pos in self.positions]
+        scale = dpi / self.dpi
+        return [
+            dict(pos, x=int(pos['x'] * scale), y=int(pos['y'] * scale),
+                 width=int(pos['width'] * scale), height=int(pos['height'] * scale))
+            for pos in self.positions
+        ]
+
+class PageHashIndex:
+    """
+    SQLite index of OCRed sheets by perceptual hash.
+
+    The index can be passed to worker processes; each process opens its own
+    connection on first use. Matches rest on the hash and ink-density grid,
+    which cannot tell sheets apart that differ only in a few digits;
+    verify=True also OCRs the stored sheet's numbers on the page before reuse.
+    """
+
+    def __init__(self, db_path: str, max_distance: int = DEFAULT_MAX_DISTANCE, verify: bool = False):
+        if max_distance >= BANDS:
+            raise ValueError(f"max_distance must be below {BANDS}")
+        self.db_path = db_path
+        self.max_distance = max_distance
+        self.verify = verify
+        self._conn = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, timeout=30)
+            self._conn.executescript(SCHEMA)
+            columns = [row[1] for row in self._conn.execute('PRAGMA table_info(sheets)')]
+            if 'density' not in columns:
+                # Indexes created before the density grid; their sheets are never reused
+                self._conn.execute('ALTER TABLE sheets ADD COLUMN density BLOB')
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        return state
+
+    def lookup(self, signature: PageSignature) -> Optional[DedupEntry]:
+        """Return the closest stored sheet within max_distance whose ink density matches, or None."""
+        candidates = set()
+        for band, value in enumerate(_bands(signature.hash)):
+            rows = self.conn.execute('SELECT sheet_id FROM bands WHERE band = ? AND value = ?', (band, value))
+            candidates.update(row[0] for row in rows)
+
+        best = None
+        for sheet_id in candidates:
+            row = self.conn.execute('SELECT hash, density FROM sheets WHERE id = ?', (sheet_id,)).fetchone()
+            distance = hamming_distance(signature.hash, int(row[0], 16))
+            if distance > self.max_distance or (best is not None and distance >= best[1]):
+                continue
+            if density_matches(signature.density, row[1]):
+                best = (sheet_id, distance)
+
+        if best is None:
+            return None
+        row = self.conn.execute(
+            'SELECT id, source, page, dpi, text, positions FROM sheets WHERE id = ?', (best[0],)
+        ).fetchone()
+        return DedupEntry(row[0], row[1], row[2], row[3], row[4], json.loads(row[5] or '[]'), best[1])
+
+    def find(self, gray, dpi: int = 0, profile=None) -> Tuple[int, Optional[DedupEntry]]:
+        """
+        Hash a page and look up a previously OCRed duplicate.
+
+        With verify enabled, a match is only returned if the regions holding
+        the stored sheet's numbers read the same on this page.
+
+        Args:
+            gray: Preprocessed page image
+            dpi: Resolution of the page, to place the stored word positions
+            profile: Optional OcrProfile used for the verification OCR
+
+        Returns:
+            tuple: (signature to pass to add(), entry or None)
+        """
+        signature = PageSignature(dhash(gray), ink_density(gray))
+        entry = self.lookup(signature)
+        if entry is not None and self.verify:
+            positions = entry.scaled_positions(dpi) if dpi else []
+            if not verify_sample(gray, entry.text, verify_boxes(gray, positions), profile):
+                entry = None
+        return signature, entry
+
+    def add(self, signature: PageSignature, text: str, positions: Optional[List[Dict[str, Any]]] = None,
+            dpi: int = 0, source: str = "", page: int = 0) -> int:
+        """Store the OCR result of a sheet under the signature find() returned for it."""
+        with self.conn:
+            cursor = self.conn.execute(
+                'INSERT INTO sheets (hash, source, page, dpi, text, positions, density) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (format(signature.hash, 'x'), source, page, dpi, text, json.dumps(positions or []), signature.density)
+            )
+            self.conn.executemany(
+                'INSERT INTO bands (band, value, sheet_id) VALUES (?, ?, ?)',
+                [(band, value, cursor.lastrowid) for band, value in enumerate(_bands(signature.hash))]
+            )
+        return cursor.lastrowid
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM sheets').fetchone()[0]
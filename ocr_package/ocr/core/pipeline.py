@@ -0,0 +1,162 @@
+"""
+Bounded producer/consumer pipeline between page rendering and OCR.
+
+Rendering and preprocessing run in one process pool and OCR in another,
+each sized separately, so the cheap stage does not hold OCR workers and the
+expensive one can use every spare core. A rendered page is written once into
+shared memory (a slot of a RasterSlab, see ocr.core.transport) and only a
+small handle crosses to the OCR worker, which reads the pixels in place
+instead of unpickling a copy. Backpressure keeps the number of rendered pages
+waiting for an OCR worker under queue_size: rendering pauses when the queue
+is full, so pages never pile up in memory however far ahead the renderers get.
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import partial
+from multiprocessing import resource_tracker
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+from .events import pool_kwargs
+from . import metrics
+from .transport import RasterHandle, RasterSlab, SlabSlot, write_raster, open_raster, release_raster
+
+# Share of the worker processes given to rendering and preprocessing;
+# OCR takes several times longer per page
+RENDER_SHARE = 0.25
+
+def _render_stage(render: Callable, slot: Optional[SlabSlot], task) -> Tuple[RasterHandle, Any]:
+    image, meta = render(task)
+    return write_raster(slot, image), meta
+
+def _ocr_stage(ocr: Callable, handle: RasterHandle, meta, task):
+    with open_raster(handle) as image:
+        return ocr(image, meta, task)
+
+def split_workers(workers: int, render_share=RENDER_SHARE) -> Tuple[int, int]:
+    """Split a worker count into (render workers, OCR workers), at least one each."""
+    workers = max(1, workers)
+    render_workers = max(1, round(workers * render_share))
+    return render_workers, max(1, workers - render_workers)
+
+class PagePipeline:
+    """
+    Two-stage process pipeline: render(task) -> (image, meta), then ocr(image, meta, task).
+
+    Both functions must be picklable (module-level, or partials of them).
+    The image returned by render is handed to ocr through shared memory;
+    meta and the OCR results are pickled as usual and should stay small
+    (see write_columns for results that are not).
+    """
+
+    def __init__(self, render: Callable, ocr: Callable, render_workers=1, ocr_workers=1,
+                 queue_size: Optional[int] = None, slot_bytes: Optional[int] = None,
+                 collect: Optional[Callable] = None):
+        """
+        Args:
+            render: Renders and preprocesses a page; returns (numpy image, meta)
+            ocr: OCRs a rendered page; returns the result for the task
+            render_workers: Processes rendering and preprocessing pages
+            ocr_workers: Processes running OCR
+            queue_size: Rendered pages allowed to wait for an OCR worker;
+                defaults to one per OCR worker
+            slot_bytes: Size of the largest raster; pages are then written to a
+                RasterSlab with one slot per buffered page, otherwise each
+                page gets a shared memory block of its own
+            collect: Called in this process on each OCR result as it arrives,
+                e.g. to read a columnar buffer; its return value becomes the
+                task's result
+        """
+        self.render = render
+        self.ocr = ocr
+        self.render_workers = max(1, render_workers)
+        self.ocr_workers = max(1, ocr_workers)
+        self.queue_size = max(1, queue_size if queue_size is not None else self.ocr_workers)
+        self.slot_bytes = slot_bytes
+        self.collect = collect
+        self.stats = {}
+
+    @property
+    def max_buffered(self) -> int:
+        """Most page rasters held in shared memory at once."""
+        return self.ocr_workers + self.queue_size
+
+    def run(self, tasks: Sequence) -> List:
+        """Run every task through both stages; results are returned in task order."""
+        tasks = list(tasks)
+        results = [None] * len(tasks)
+        rendering = {}  # render future -> (task index, slot)
+        reading = {}  # OCR future -> (task index, handle)
+        next_index = 0
+        peak_buffered = 0
+        stalled = 0.0  # Seconds rendering was held back by a full queue
+        render_call = partial(_render_stage, self.render)
+        ocr_call = partial(_ocr_stage, self.ocr)
+        start = time.perf_counter()
+
+        # Workers forked before the tracker starts would each run their own and
+        # report the blocks freed here as leaked; start it so they share ours
+        resource_tracker.ensure_running()
+        slab = RasterSlab(self.max_buffered, self.slot_bytes) if self.slot_bytes else None
+
+        try:
+            with ProcessPoolExecutor(max_workers=self.render_workers, **pool_kwargs()) as renderers, \
+                    ProcessPoolExecutor(max_workers=self.ocr_workers, **pool_kwargs()) as readers:
+                try:
+                    while next_index < len(tasks) or rendering or reading:
+                        # Pages being rendered count against the buffer: each holds a slot
+                        while (next_index < len(tasks) and len(rendering) < self.render_workers
+                               and len(rendering) + len(reading) < self.max_buffered):
+                            slot = slab.acquire() if slab is not None else None
+                            future = renderers.submit(render_call, slot, tasks[next_index])
+                            rendering[future] = (next_index, slot)
+                            next_index += 1
+                        full = next_index < len(tasks) and len(rendering) < self.render_workers
+                        metrics.set_gauge("ocr_queue_depth", len(rendering) + len(reading))
+                        waited = time.perf_counter()
+                        done, _ = wait(list(rendering) + list(reading), return_when=FIRST_COMPLETED)
+                        if full:
+                            stalled += time.perf_counter() - waited
+
+                        for future in done:
+                            if future in rendering:
+                                index, slot = rendering.pop(future)
+                                error = future.exception()
+                                if error is not None:
+                                    raise error
+                                handle, meta = future.result()
+                                if slot is not None and getattr(handle, 'slot', None) != slot:
+                                    # A raster too large for its slot went to a block of its own
+                                    slab.release(slot)
+                                reading[readers.submit(ocr_call, handle, meta, tasks[index])] = (index, handle)
+                            else:
+                                index, handle = reading.pop(future)
+                                release_raster(handle, slab)
+                                result = future.result()
+                                results[index] = self.collect(result) if self.collect else result
+                        peak_buffered = max(peak_buffered, len(reading))
+                except BaseException:
+                    for future in list(rendering) + list(reading):
+                        future.cancel()
+                    for _, handle in reading.values():
+                        release_raster(handle, slab)
+                    # Pages still rendering may allocate blocks of their own after this point
+                    for future in rendering:
+                        if not future.cancelled() and future.exception(timeout=None) is None:
+                            release_raster(future.result()[0])
+                    raise
+        finally:
+            metrics.set_gauge("ocr_queue_depth", 0)
+            if slab is not None:
+                slab.close()
+
+        self.stats = {
+            "pages": len(tasks),
+            "render_workers": self.render_workers,
+            "ocr_workers": self.ocr_workers,
+            "queue_size": self.queue_size,
+            "slot_bytes": slab.slot_bytes if slab is not None else None,
+            "peak_buffered": peak_buffered,
+            "render_stalled_seconds": round(stalled, 3),
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+        return results
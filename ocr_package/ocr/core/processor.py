@@ -1,32 +1,74 @@
 import os
 import sys
+import time
+from functools import partial
 import pytesseract
 from pdf2image import convert_from_path
 import cv2
 import numpy as np
 from PIL import Image
+import fitz  # PyMuPDF
+from .preprocessing import get_pipeline
+from .orientation import resolve_orientation, apply_page_rotation, detect_rotation, rotate_image
+from .raster_cache import render_page_gray
+from .auto_dpi import choose_page_dpi, report_dpi_choice, MAX_DPI
+from .profiles import tesseract_kwargs
+from .resources import plan_resources, page_pixels
+from .pipeline import PagePipeline, split_workers
+from .progress import report, report_unfinished, page_key
+from . import metrics
 
 # Path to Poppler binaries
 POPPLER_PATH = None  # Set this to your Poppler path if it's not in PATH
 
-def preprocess_image(image):
-    """Apply image preprocessing to improve OCR accuracy"""
-    # Convert to grayscale
-    gray = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2GRAY)
+def preprocess_image(image, config=None):
+    """
+    Apply image preprocessing to improve OCR accuracy.
     
-    # Apply threshold to get binary image
-    _, binary = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY)
+    Args:
+        config: Optional PreprocessConfig; defaults to a global threshold of
+            150 and a 3x3 median blur
+    """
+    return Image.fromarray(get_pipeline(config)(image))
+
+def extract_text_from_pdf(pdf_path, start_page=1, end_page=None, dpi=200, cache=None, dedup=None,
+                          preprocessing=None, orientation=None, auto_dpi=False, profile=None,
+                          staged=False, workers=None):
+    """
+    Extract text from PDF using OCR.
     
-    # Noise removal
-    denoised = cv2.medianBlur(binary, 3)
+    Args:
+        cache: Optional PageRasterCache; pages are then rendered once with
+            PyMuPDF and reused by every stage that asks for the same raster
+        dedup: Optional PageHashIndex; pages matching a previously OCRed
+            sheet reuse its text instead of being OCRed again
+        preprocessing: Optional PreprocessConfig for the page images
+        orientation: None, "auto", "sample" or a fixed clockwise rotation;
+            rotated pages are turned upright before OCR
+        auto_dpi: Choose each page's DPI from its dominant text height; dpi
+            is then the baseline the time saved is reported against
+        profile: Optional OcrProfile giving the Tesseract settings and, unless
+            preprocessing is passed, the preprocessing; its DPI is applied by
+            the caller
+        staged: Render and OCR pages in separate process pools with a bounded
+            queue between them, instead of rendering every page up front
+        workers: Processes of the staged pipeline, split between rendering and
+            OCR (default: sized from the CPU and memory limits)
+    """
+    orientation = resolve_orientation(pdf_path, orientation)
+    if profile is not None and preprocessing is None:
+        preprocessing = profile.preprocessing
+    if staged:
+        return _extract_text_staged(pdf_path, start_page, end_page, dpi, cache, dedup, preprocessing,
+                                    orientation, auto_dpi, profile, workers)
+    if cache is not None or auto_dpi:
+        return _extract_text_pymupdf(pdf_path, start_page, end_page, dpi, cache, dedup, preprocessing,
+                                     orientation, auto_dpi, profile)
     
-    return Image.fromarray(denoised)
-
-def extract_text_from_pdf(pdf_path, start_page=1, end_page=None):
-    """Extract text from PDF using OCR"""
     try:
         # Convert PDF to images
         print(f"Converting PDF to images: {pdf_path}")
+        render_start = time.time()
         
         # Check if Poppler path is provided
         if POPPLER_PATH and os.path.exists(POPPLER_PATH):
@@ -35,6 +77,7 @@ def extract_text_from_pdf(pdf_path, start_page=1, end_page=None):
                 pdf_path, 
                 first_page=start_page, 
                 last_page=end_page,
+                dpi=dpi,
                 poppler_path=POPPLER_PATH
             )
         else:
@@ -42,28 +85,156 @@ def extract_text_from_pdf(pdf_path, start_page=1, end_page=None):
             images = convert_from_path(
                 pdf_path, 
                 first_page=start_page, 
-                last_page=end_page
+                last_page=end_page,
+                dpi=dpi
             )
         
         print(f"Total pages: {len(images)}")
         all_text = ""
+        render_seconds = (time.time() - render_start) / max(len(images), 1)
         
         # Process each page
         for i, image in enumerate(images):
             print(f"Processing page {i + start_page}...")
+            key = page_key(pdf_path, i + max(start_page or 1, 1))
+            report("start", key)
+            metrics.observe("ocr_render_seconds", render_seconds)
+            ocr_start = time.time()
+            
+            # Turn rotated sheets upright, detecting on a downsampled copy
+            if orientation is not None:
+                rotation = detect_rotation(image) if orientation == "auto" else int(orientation)
+                image = rotate_image(image, rotation)
             
             # Preprocess the image
-            processed_image = preprocess_image(image)
+            processed_image = preprocess_image(image, preprocessing)
             
             # Extract text using OCR
-            text = pytesseract.image_to_string(processed_image)
+            text = ocr_page_image(np.asarray(processed_image), dedup, pdf_path, i + start_page, dpi, profile)
             all_text += f"\n\n--- PAGE {i + start_page} ---\n\n"
             all_text += text
+            metrics.observe("ocr_ocr_seconds", time.time() - ocr_start)
+            report("done", key)
             
         return all_text
     
     except Exception as e:
         print(f"Error processing PDF: {e}")
+        report_unfinished(pdf_path, start_page, end_page)
+        return None
+
+def ocr_page_image(processed, dedup=None, source="", page=0, dpi=0, profile=None):
+    """OCR a preprocessed page, reusing the text of a known duplicate sheet if possible."""
+    if dedup is None:
+        return pytesseract.image_to_string(Image.fromarray(processed), **tesseract_kwargs(profile))
+    
+    signature, entry = dedup.find(processed, dpi, profile)
+    if entry is not None:
+        print(f"Page {page} matches {entry.source} page {entry.page} (distance {entry.distance}), reusing its text")
+        metrics.inc("ocr_pages_skipped_total", reason="duplicate")
+        return entry.text
+    
+    text = pytesseract.image_to_string(Image.fromarray(processed), **tesseract_kwargs(profile))
+    dedup.add(signature, text, dpi=dpi, source=os.path.basename(source), page=page)
+    return text
+
+def render_text_page(task):
+    """
+    Render and preprocess one page for text OCR.
+    
+    Args:
+        task: (pdf_path, page_number, dpi, cache, preprocessing, orientation, auto_dpi),
+            with a 1-based page number
+    
+    Returns:
+        tuple: (preprocessed image, meta) where meta holds the page's DPI, the
+            DpiChoice under auto_dpi and the wall-clock start time
+    """
+    pdf_path, page_number, dpi, cache, preprocessing, orientation, auto_dpi = task
+    start = time.time()
+    report("start", page_key(pdf_path, page_number))
+    with fitz.open(pdf_path) as doc:
+        page = doc[page_number - 1]
+        rotation = apply_page_rotation(page, orientation)
+        
+        choice = None
+        if auto_dpi:
+            choice = choose_page_dpi(page, dpi)
+            dpi = choice.dpi
+        
+        pipeline = get_pipeline(preprocessing)
+        if cache is not None:
+            processed = cache.get_or_render(pdf_path, page_number - 1, dpi, pipeline,
+                                            page=page, rotation=rotation)
+        else:
+            processed = pipeline(render_page_gray(pdf_path, page_number - 1, dpi, page))
+    metrics.observe("ocr_render_seconds", time.time() - start)
+    return processed, {"page": page_number, "dpi": dpi, "dpi_choice": choice, "start": start}
+
+def ocr_text_page(dedup, profile, processed, meta, task):
+    """OCR a page rendered by render_text_page and return its text."""
+    ocr_start = time.time()
+    text = ocr_page_image(processed, dedup, task[0], meta["page"], meta["dpi"], profile)
+    metrics.observe("ocr_ocr_seconds", time.time() - ocr_start)
+    if meta["dpi_choice"] is not None:
+        report_dpi_choice(meta["page"], meta["dpi_choice"], time.time() - meta["start"])
+    report("done", page_key(task[0], meta["page"]))
+    return text
+
+def _page_tasks(pdf_path, start_page, end_page, dpi, cache, preprocessing, orientation, auto_dpi):
+    with fitz.open(pdf_path) as doc:
+        first = max(start_page or 1, 1)
+        last = min(end_page or len(doc), len(doc))
+        sizes = [(doc[n - 1].rect.width, doc[n - 1].rect.height) for n in range(first, last + 1)]
+    tasks = [(pdf_path, n, dpi, cache, preprocessing, orientation, auto_dpi) for n in range(first, last + 1)]
+    return tasks, sizes
+
+def _join_pages(tasks, texts):
+    return "".join(f"\n\n--- PAGE {task[1]} ---\n\n{text}" for task, text in zip(tasks, texts))
+
+def _extract_text_pymupdf(pdf_path, start_page, end_page, dpi, cache=None, dedup=None, preprocessing=None,
+                          orientation=None, auto_dpi=False, profile=None):
+    """
+    Extract text from pages rendered one at a time with PyMuPDF.
+    
+    Used when pages go through a PageRasterCache or get their own DPI.
+    """
+    try:
+        tasks, _ = _page_tasks(pdf_path, start_page, end_page, dpi, cache, preprocessing, orientation, auto_dpi)
+        print(f"Total pages: {len(tasks)}")
+        texts = []
+        for task in tasks:
+            print(f"Processing page {task[1]}...")
+            processed, meta = render_text_page(task)
+            texts.append(ocr_text_page(dedup, profile, processed, meta, task))
+        return _join_pages(tasks, texts)
+    
+    except Exception as e:
+        print(f"Error processing PDF: {e}")
+        report_unfinished(pdf_path, start_page, end_page)
+        return None
+
+def _extract_text_staged(pdf_path, start_page, end_page, dpi, cache=None, dedup=None, preprocessing=None,
+                         orientation=None, auto_dpi=False, profile=None, workers=None):
+    """
+    Extract text through a PagePipeline: pages are rendered and OCRed by
+    separate process pools, with only a bounded number rendered ahead.
+    """
+    try:
+        tasks, sizes = _page_tasks(pdf_path, start_page, end_page, dpi, cache, preprocessing, orientation, auto_dpi)
+        plan = plan_resources(sizes, max(dpi, MAX_DPI) if auto_dpi else dpi, workers, preprocessing)
+        render_workers, ocr_workers = split_workers(plan.workers)
+        slot_bytes = max((page_pixels(w, h, max(dpi, MAX_DPI) if auto_dpi else dpi) for w, h in sizes), default=1)
+        pipeline = PagePipeline(render_text_page, partial(ocr_text_page, dedup, profile),
+                                render_workers, ocr_workers, max(1, plan.in_flight - ocr_workers), slot_bytes)
+        print(f"Total pages: {len(tasks)}, {render_workers} render and {ocr_workers} OCR workers, "
+              f"at most {pipeline.max_buffered} pages buffered")
+        texts = pipeline.run(tasks)
+        return _join_pages(tasks, texts)
+    
+    except Exception as e:
+        print(f"Error processing PDF: {e}")
+        report_unfinished(pdf_path, start_page, end_page)
         return None
 
 def save_text_to_file(text, output_path):
@@ -0,0 +1,93 @@
+"""
+Named OCR profiles: rendering DPI, preprocessing and Tesseract settings.
+
+Profiles are produced by the autotuner (ocr-autotune) and stored by name in a
+JSON file, so every CLI can run with the configuration tuned for a kind of
+document instead of pytesseract defaults.
+"""
+
+import os
+import json
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Optional, Any
+from .preprocessing import PreprocessConfig, DEFAULT_CONFIG
+
+DEFAULT_PROFILES_FILE = os.path.join(os.path.expanduser("~"), ".ocr", "profiles.json")
+
+@dataclass(frozen=True)
+class OcrProfile:
+    name: str = "default"
+    dpi: int = 200
+    psm: Optional[int] = None  # Tesseract page segmentation mode, its default when None
+    oem: Optional[int] = None  # Tesseract engine mode, its default when None
+    lang: str = "eng"
+    preprocessing: PreprocessConfig = DEFAULT_CONFIG
+    # How the profile was chosen, e.g. the autotuner's quality and timing
+    notes: Dict[str, Any] = field(default_factory=dict, compare=False, hash=False)
+
+    @property
+    def tesseract_config(self) -> str:
+        """Command line options passed to Tesseract."""
+        options = []
+        if self.psm is not None:
+            options.append(f"--psm {self.psm}")
+        if self.oem is not None:
+            options.append(f"--oem {self.oem}")
+        return " ".join(options)
+
+    def tesseract_kwargs(self) -> Dict[str, str]:
+        """Keyword arguments for pytesseract's image_to_string and image_to_data."""
+        return {'lang': self.lang, 'config': self.tesseract_config}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'OcrProfile':
+        data = dict(data)
+        if isinstance(data.get('preprocessing'), dict):
+            data['preprocessing'] = PreprocessConfig(**data['preprocessing'])
+        return cls(**data)
+
+def tesseract_kwargs(profile: Optional[OcrProfile]) -> Dict[str, str]:
+    """pytesseract keyword arguments of a profile; empty (pytesseract defaults) for None."""
+    return profile.tesseract_kwargs() if profile is not None else {}
+
+def _read_profiles(path) -> Dict[str, Dict[str, Any]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_profile(profile: OcrProfile, path=None):
+    """Add or replace a profile, by name, in the profiles file."""
+    path = path or DEFAULT_PROFILES_FILE
+    profiles = _read_profiles(path)
+    profiles[profile.name] = profile.to_dict()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(profiles, f, indent=2)
+    os.replace(tmp_path, path)
+
+def load_profile(name, path=None) -> OcrProfile:
+    """
+    Load a profile by name from the profiles file.
+
+    A path to a JSON file holding a single profile is accepted as well.
+
+    Raises:
+        KeyError: If no profile has that name
+    """
+    if name.endswith('.json') and os.path.isfile(name):
+        with open(name, 'r', encoding='utf-8') as f:
+            return OcrProfile.from_dict(json.load(f))
+    profiles = _read_profiles(path or DEFAULT_PROFILES_FILE)
+    if name not in profiles:
+        raise KeyError(f"Unknown OCR profile: {name}")
+    return OcrProfile.from_dict(profiles[name])
+
+def list_profiles(path=None) -> Dict[str, OcrProfile]:
+    return {name: OcrProfile.from_dict(data) for name, data in _read_profiles(path or DEFAULT_PROFILES_FILE).items()}
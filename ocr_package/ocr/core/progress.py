@@ -0,0 +1,302 @@
+"""
+Live progress, throughput and ETA of long OCR runs.
+
+Page processing code reports per-page events with report(): a page starts,
+is done, or fails. They reach a running ProgressTracker through
+ocr.core.events, from this process or from pool workers started with
+events.pool_kwargs(). From those events the tracker keeps pages done/total,
+a rolling pages-per-second rate, an ETA and the slowest pages in progress,
+and renders them to the terminal and to a JSON status file that is replaced
+atomically, so a monitor never reads a half-written file.
+
+Pages are weighted by their pixel count at the render DPI: an E-size plan
+sheet costs many times a letter page, so the ETA divides the remaining
+weight by the rolling weight throughput rather than counting pages.
+"""
+
+import os
+import json
+import time
+import shutil
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, Optional
+import fitz  # PyMuPDF
+from . import events
+from .resources import page_pixels
+
+# Seconds between terminal and status file refreshes
+REFRESH_SECONDS = 1.0
+
+# Seconds between progress lines when the output is not a terminal
+LOG_SECONDS = 30.0
+
+# Span of the rolling throughput used for pages/sec and the ETA
+ROLLING_WINDOW = 120.0
+
+# Slowest active pages shown
+SLOWEST_PAGES = 3
+
+def page_key(pdf_path: str, page_number: int) -> str:
+    """Key of a page in progress events; page numbers are 1-based."""
+    return f"{os.path.abspath(pdf_path)}:{page_number}"
+
+def page_weight(width_pt, height_pt, dpi) -> float:
+    """Weight of a page in the ETA: its megapixels at the render DPI."""
+    return page_pixels(width_pt, height_pt, dpi) / 1e6
+
+def report(kind: str, key: str):
+    """Report a page event ("start", "done" or "failed") to the listeners, if any."""
+    events.emit(("page", kind, key, time.time()))
+
+def report_unfinished(pdf_path: str, first_page: int = 1, last_page: Optional[int] = None):
+    """
+    Report the pages of a range (1-based, inclusive) as failed after the whole file failed.
+
+    Pages that already finished are ignored by the listeners, so the whole
+    range can be reported without knowing where processing stopped.
+    """
+    if not events.listening():
+        return
+    try:
+        with fitz.open(pdf_path) as doc:
+            page_count = len(doc)
+    except Exception:
+        # Unreadable file: there are no pages to report
+        return
+    for page_number in range(max(first_page or 1, 1), min(last_page or page_count, page_count) + 1):
+        report("failed", page_key(pdf_path, page_number))
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "--"
+    seconds = int(round(seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+def _timestamp(seconds: float) -> str:
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat(timespec='seconds')
+
+def _write_atomic(path: str, data: Dict):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+class ProgressTracker:
+    """
+    Pages done/total, throughput, ETA and slowest active pages of a run.
+
+    Register the pages with add_document() (or add_pages()), then run the
+    work inside `with tracker:`; entering is re-entrant, so batch_process
+    and process_document can both enter a tracker the caller already runs.
+    """
+
+    def __init__(self, label: str = "", status_path: Optional[str] = None, stream=None,
+                 refresh_seconds: float = REFRESH_SECONDS, window: float = ROLLING_WINDOW,
+                 slowest: int = SLOWEST_PAGES):
+        """
+        Args:
+            label: Name shown in the display and the status file
+            status_path: JSON status file to keep up to date
+            stream: Where to draw the display (e.g. sys.stderr); nothing is
+                drawn when None. A terminal gets a line redrawn in place,
+                anything else a line every LOG_SECONDS
+            refresh_seconds: Seconds between refreshes
+            window: Seconds of completions the rolling rate is taken over
+            slowest: Number of slowest active pages to show
+        """
+        self.label = label
+        self.status_path = status_path
+        self.stream = stream
+        self.refresh_seconds = refresh_seconds
+        self.window = window
+        self.slowest = slowest
+        self.weights: Dict[str, float] = {}  # Registered pages and their weights
+        self.state: Dict[str, str] = {}  # key -> "done" or "failed"
+        self.active: Dict[str, float] = {}  # key -> start time
+        self.completions = deque()  # (time, weight) of the pages done within the window
+        self.weight_done = 0.0
+        self.weight_failed = 0.0
+        self.started = None
+        self.last_completion = None
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._thread = None
+        self._stopped = None
+        self._last_refresh = 0.0
+        self._last_log = 0.0
+        self._tty = bool(stream is not None and getattr(stream, 'isatty', lambda: False)())
+
+    def add_pages(self, weights: Dict[str, float]):
+        """Register pages by key with their weights; already registered pages are kept."""
+        with self._lock:
+            for key, weight in weights.items():
+                self.weights.setdefault(key, max(float(weight), 1e-6))
+
+    def add_document(self, pdf_path: str, dpi: int, first_page: int = 1, last_page: Optional[int] = None):
+        """Register a PDF's pages (1-based, inclusive range), weighted by their megapixels at dpi."""
+        with fitz.open(pdf_path) as doc:
+            last_page = min(last_page or len(doc), len(doc))
+            sizes = {n: (doc[n - 1].rect.width, doc[n - 1].rect.height)
+                     for n in range(max(first_page or 1, 1), last_page + 1)}
+        self.add_pages({page_key(pdf_path, n): page_weight(w, h, dpi) for n, (w, h) in sizes.items()})
+
+    def discard(self, pdf_path: str):
+        """Count the unfinished pages of a PDF as failed, e.g. after the whole file failed."""
+        prefix = f"{os.path.abspath(pdf_path)}:"
+        now = time.time()
+        with self._lock:
+            for key in [key for key in self.weights if key.startswith(prefix) and key not in self.state]:
+                self.handle(("failed", key, now))
+
+    def handle(self, event):
+        """Apply a (kind, key, timestamp) page event."""
+        kind, key, timestamp = event
+        with self._lock:
+            if key in self.state:
+                return
+            weight = self.weights.get(key)
+            if weight is None:
+                # A page nobody registered: assume an average one
+                weight = sum(self.weights.values()) / len(self.weights) if self.weights else 1.0
+                self.weights[key] = weight
+            if kind == "start":
+                self.active[key] = timestamp
+                return
+            self.active.pop(key, None)
+            self.state[key] = kind
+            if kind == "done":
+                self.weight_done += weight
+                self.completions.append((timestamp, weight))
+                self.last_completion = timestamp
+            else:
+                self.weight_failed += weight
+        self.refresh()
+
+    def snapshot(self, now: Optional[float] = None) -> Dict:
+        """Current progress as a JSON-serializable dict."""
+        now = time.time() if now is None else now
+        with self._lock:
+            started = self.started or now
+            while self.completions and self.completions[0][0] < now - self.window:
+                self.completions.popleft()
+            span = max(now - max(started, now - self.window), 1e-6)
+            pages_rate = len(self.completions) / span
+            weight_rate = sum(weight for _, weight in self.completions) / span
+            remaining = sum(self.weights.values()) - self.weight_done - self.weight_failed
+            done = sum(1 for kind in self.state.values() if kind == "done")
+            failed = len(self.state) - done
+            total = len(self.weights)
+            active = sorted(self.active.items(), key=lambda item: item[1])[:self.slowest]
+            files = {}
+            for key in self.weights:
+                path = key.rsplit(":", 1)[0]
+                entry = files.setdefault(path, {"path": path, "pages_total": 0, "pages_done": 0, "pages_failed": 0})
+                entry["pages_total"] += 1
+                kind = self.state.get(key)
+                if kind is not None:
+                    entry["pages_done" if kind == "done" else "pages_failed"] += 1
+            return {
+                "label": self.label,
+                "state": "running" if self._depth else "finished",
+                "started": _timestamp(started),
+                "updated": _timestamp(now),
+                "elapsed_seconds": round(now - started, 1),
+                "pages_total": total,
+                "pages_done": done,
+                "pages_failed": failed,
+                "percent": round((done + failed) / total * 100, 1) if total else 0.0,
+                "pages_per_second": round(pages_rate, 3),
+                "eta_seconds": round(remaining / weight_rate, 1) if weight_rate > 0 and remaining > 0 else
+                               (0.0 if remaining <= 0 else None),
+                "seconds_since_last_page": round(now - self.last_completion, 1)
+                                           if self.last_completion is not None else None,
+                "active": [{"page": key, "seconds": round(now - start, 1)} for key, start in active],
+                "files": list(files.values()),
+            }
+
+    def describe(self, snapshot: Dict) -> str:
+        """One-line summary of a snapshot."""
+        line = (f"{snapshot['label'] + ': ' if snapshot['label'] else ''}"
+                f"{snapshot['pages_done']}/{snapshot['pages_total']} pages ({snapshot['percent']:.1f}%)")
+        if snapshot['pages_failed']:
+            line += f", {snapshot['pages_failed']} failed"
+        line += f" | {snapshot['pages_per_second']:.2f} pages/s | ETA {format_duration(snapshot['eta_seconds'])}"
+        if snapshot['active']:
+            slowest = ", ".join(f"{os.path.basename(item['page'])} {format_duration(item['seconds'])}"
+                                for item in snapshot['active'])
+            line += f" | slowest: {slowest}"
+        return line
+
+    def refresh(self, force=False):
+        """Redraw the display and rewrite the status file, at most every refresh_seconds."""
+        now = time.time()
+        with self._lock:
+            if not force and now - self._last_refresh < self.refresh_seconds:
+                return
+            self._last_refresh = now
+            snapshot = self.snapshot(now)
+            if self.status_path:
+                try:
+                    _write_atomic(self.status_path, snapshot)
+                except OSError as e:
+                    print(f"Cannot write progress status to {self.status_path}: {e}")
+                    self.status_path = None
+            if self.stream is None:
+                return
+            line = self.describe(snapshot)
+            if self._tty:
+                width = shutil.get_terminal_size().columns
+                self.stream.write("\r" + line[:max(1, width - 1)] + "\x1b[K")
+                self.stream.flush()
+            elif force or now - self._last_log >= LOG_SECONDS:
+                self._last_log = now
+                self.stream.write(line + "\n")
+                self.stream.flush()
+
+    def _on_event(self, event):
+        if event[0] == "page":
+            self.handle(event[1:])
+
+    def _tick(self, stopped):
+        # Refresh without events too, so the elapsed times of stuck pages keep growing
+        while not stopped.wait(self.refresh_seconds):
+            self.refresh()
+
+    def start(self):
+        with self._lock:
+            self._depth += 1
+            if self._depth > 1:
+                return
+            self.started = self.started or time.time()
+            self._stopped = threading.Event()
+            self._thread = threading.Thread(target=self._tick, args=(self._stopped,), daemon=True)
+            self._thread.start()
+        events.subscribe(self._on_event)
+        self.refresh(force=True)
+
+    def stop(self):
+        with self._lock:
+            self._depth -= 1
+            if self._depth > 0:
+                return
+        # Delivers the events workers have already queued
+        events.unsubscribe(self._on_event)
+        self._stopped.set()
+        self._thread.join()
+        self.refresh(force=True)
+        if self._tty:
+            self.stream.write("\n")
+            self.stream.flush()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,159 @@
+"""
+Render-once cache of page rasters shared by every stage and worker process.
+
+Each rendered (and optionally preprocessed) grayscale page is stored as a .npy
+file keyed by (PDF content hash, page, DPI, preprocessing) and read back as a
+read-only memory map, so repeated stages and other processes reuse the pixels
+without rendering or copying them again. The cache is bounded in size and
+evicts the least recently used pages.
+"""
+
+import os
+import hashlib
+import tempfile
+import numpy as np
+import fitz  # PyMuPDF
+from typing import Optional, Callable
+from . import metrics
+
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "ocr_raster_cache")
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+def render_page_gray(pdf_path, page_num, dpi, page=None, rotation=0):
+    """
+    Render a page (0-based) to a grayscale numpy array at the given DPI.
+    
+    A page passed in is rendered as is; otherwise the page is opened and
+    rotated clockwise by rotation degrees first.
+    """
+    doc = None
+    if page is None:
+        doc = fitz.open(pdf_path)
+        page = doc[page_num]
+        if rotation:
+            page.set_rotation((page.rotation + rotation) % 360)
+    try:
+        pix = page.get_pixmap(matrix=fitz.Matrix(dpi/72, dpi/72), colorspace=fitz.csGRAY)
+        return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.h, pix.w).copy()
+    finally:
+        if doc is not None:
+            doc.close()
+
+class PageRasterCache:
+    """
+    Size-bounded directory of memory-mappable page rasters.
+
+    The object is cheap to pickle, so it can be passed to worker processes;
+    content hashes computed before pickling travel with it.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self._digests = {}
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def digest(self, pdf_path):
+        """Content hash of a PDF, memoized by path, size and modification time."""
+        stat = os.stat(pdf_path)
+        memo_key = (os.path.abspath(pdf_path), stat.st_size, stat.st_mtime)
+        if memo_key not in self._digests:
+            sha = hashlib.sha1()
+            with open(pdf_path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    sha.update(block)
+            self._digests[memo_key] = sha.hexdigest()[:16]
+        return self._digests[memo_key]
+
+    def path_for(self, pdf_path, page_num, dpi, preprocess="gray", rotation=0):
+        suffix = f"_r{rotation}" if rotation else ""
+        name = f"{self.digest(pdf_path)}_p{page_num}_d{dpi}_{preprocess}{suffix}.npy"
+        return os.path.join(self.cache_dir, name)
+
+    def get(self, pdf_path, page_num, dpi, preprocess="gray", rotation=0) -> Optional[np.ndarray]:
+        """Return the cached raster as a read-only memory map, or None."""
+        path = self.path_for(pdf_path, page_num, dpi, preprocess, rotation)
+        try:
+            image = np.load(path, mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        # Mark as recently used for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return image
+
+    def put(self, pdf_path, page_num, dpi, preprocess, image, rotation=0) -> np.ndarray:
+        """Store a raster and return it memory-mapped from the cache."""
+        path = self.path_for(pdf_path, page_num, dpi, preprocess, rotation)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.ascontiguousarray(image, dtype=np.uint8))
+        os.replace(tmp_path, path)
+        self.evict(keep=path)
+        return np.load(path, mmap_mode='r')
+
+    def get_or_render(self, pdf_path, page_num, dpi, preprocess: Optional[Callable] = None, page=None,
+                      rotation=0) -> np.ndarray:
+        """
+        Return the page raster, rendering and preprocessing it only on a miss.
+
+        Args:
+            pdf_path: Path to the PDF file
+            page_num: 0-based page number
+            dpi: Rendering resolution
+            preprocess: Optional function applied to the grayscale raster; its
+                name is part of the cache key
+            page: Optional open PyMuPDF page to render from, already rotated
+            rotation: Clockwise rotation applied to the page, part of the key
+        """
+        name = getattr(preprocess, '__name__', 'gray') if preprocess else 'gray'
+        image = self.get(pdf_path, page_num, dpi, name, rotation)
+        if image is not None:
+            metrics.inc("ocr_raster_cache_hits_total")
+            return image
+        metrics.inc("ocr_raster_cache_misses_total")
+
+        image = render_page_gray(pdf_path, page_num, dpi, page, rotation)
+        if preprocess is not None:
+            image = np.asarray(preprocess(image))
+        return self.put(pdf_path, page_num, dpi, name, image, rotation)
+
+    def size(self):
+        """Total size of the cached rasters in bytes."""
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, keep=None):
+        """Delete the least recently used rasters until the cache fits max_bytes."""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                # Processes that already mapped the file keep their mapping
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        for path, _, _ in self._entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _entries(self):
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.npy'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            yield path, stat.st_size, stat.st_mtime
@@ -0,0 +1,262 @@
+"""
+Memory- and core-aware sizing of the page worker pool.
+
+The memory a worker needs is dominated by the page raster: page area x DPI^2
+pixels, times the bytes each pixel costs across the render, the
+preprocessing buffers and Tesseract's own copies, on top of a fixed baseline
+for the interpreter and the loaded OCR engine. The planner reads the CPU and
+memory limits of the container (cgroup v2 or v1) and picks the number of
+workers and of pages in flight that fit. While pages are processed, workers
+report their peak RSS and the number of pages in flight is lowered (or
+raised back) when the measurement drifts from the estimate.
+"""
+
+import os
+import sys
+import math
+from functools import partial
+from concurrent.futures import FIRST_COMPLETED, wait
+from dataclasses import dataclass, asdict
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+from . import metrics
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+# Interpreter, numpy/OpenCV/PyMuPDF and a loaded Tesseract language model
+WORKER_BASELINE_BYTES = 300 * 1024 ** 2
+
+# Bytes per page pixel: RGB render (3), grayscale output buffer (1) and
+# Tesseract's internal images and layout data (about 8)
+BYTES_PER_PIXEL = 12
+# Extra float32 scratch buffers kept by Sauvola thresholding
+SAUVOLA_BYTES_PER_PIXEL = 12
+
+# Share of the available memory the workers may use
+MEMORY_FRACTION = 0.8
+
+# Re-plan when measured RSS differs from the estimate by more than this
+DRIFT_TOLERANCE = 0.25
+
+def _read(path) -> Optional[str]:
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def cgroup_cpu_limit(root=CGROUP_ROOT) -> Optional[float]:
+    """CPUs granted by the cgroup CPU quota, or None when unlimited."""
+    quota = _read(os.path.join(root, "cpu.max"))  # v2: "<quota> <period>" or "max <period>"
+    if quota is not None:
+        parts = quota.split()
+        if parts[0] == "max" or len(parts) < 2:
+            return None
+        return int(parts[0]) / int(parts[1])
+
+    quota = _read(os.path.join(root, "cpu", "cpu.cfs_quota_us"))  # v1
+    period = _read(os.path.join(root, "cpu", "cpu.cfs_period_us"))
+    if quota is None or period is None or int(quota) <= 0:
+        return None
+    return int(quota) / int(period)
+
+def cgroup_memory(root=CGROUP_ROOT) -> Tuple[Optional[int], Optional[int]]:
+    """(limit, usage) of the cgroup in bytes; limit is None when unlimited."""
+    limit = _read(os.path.join(root, "memory.max"))  # v2
+    usage = _read(os.path.join(root, "memory.current"))
+    if limit is None:
+        limit = _read(os.path.join(root, "memory", "memory.limit_in_bytes"))  # v1
+        usage = _read(os.path.join(root, "memory", "memory.usage_in_bytes"))
+    if limit is None or limit == "max":
+        return None, int(usage) if usage else None
+    limit = int(limit)
+    # v1 reports "unlimited" as a huge number close to the largest page-aligned int64
+    if limit >= 1 << 60:
+        return None, int(usage) if usage else None
+    return limit, int(usage) if usage else None
+
+def system_available_memory() -> Optional[int]:
+    """Memory available to new processes on the host, in bytes."""
+    meminfo = _read("/proc/meminfo")
+    if meminfo:
+        for line in meminfo.splitlines():
+            if line.startswith("MemAvailable:"):
+                return int(line.split()[1]) * 1024
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+def available_memory(root=CGROUP_ROOT) -> Optional[int]:
+    """Memory this process tree may still use: the tighter of the cgroup and host limits."""
+    candidates = []
+    limit, usage = cgroup_memory(root)
+    if limit is not None:
+        candidates.append(limit - (usage or 0))
+    host = system_available_memory()
+    if host is not None:
+        candidates.append(host)
+    return max(0, min(candidates)) if candidates else None
+
+def available_cpus(root=CGROUP_ROOT) -> int:
+    """CPUs this process may run on: affinity mask and cgroup quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = cgroup_cpu_limit(root)
+    if quota is not None:
+        cpus = min(cpus, max(1, math.floor(quota)))
+    return max(1, cpus)
+
+def page_pixels(width_pt, height_pt, dpi) -> int:
+    return int(width_pt * dpi / 72) * int(height_pt * dpi / 72)
+
+def estimate_worker_bytes(max_page_pixels, preprocessing=None) -> int:
+    """Estimated peak memory of one worker processing its largest page."""
+    per_pixel = BYTES_PER_PIXEL
+    if preprocessing is not None and getattr(preprocessing, 'threshold', None) == 'sauvola':
+        per_pixel += SAUVOLA_BYTES_PER_PIXEL
+    return WORKER_BASELINE_BYTES + max_page_pixels * per_pixel
+
+@dataclass
+class ResourcePlan:
+    workers: int  # Processes in the pool
+    in_flight: int  # Pages submitted to the pool at a time
+    worker_bytes: int  # Estimated peak memory of one worker
+    memory_budget: Optional[int]  # Bytes the workers may use, None if unknown
+    cpus: int
+    limited_by: str  # cpu, memory, pages or requested
+
+    def describe(self) -> str:
+        budget = f"{self.memory_budget / 1024 ** 3:.1f} GiB" if self.memory_budget is not None else "unknown"
+        return (f"{self.workers} workers, {self.in_flight} pages in flight "
+                f"(~{self.worker_bytes / 1024 ** 2:.0f} MiB per worker, memory budget {budget}, "
+                f"{self.cpus} CPUs, limited by {self.limited_by})")
+
+    def to_dict(self):
+        return asdict(self)
+
+def plan_resources(page_sizes: Iterable[Tuple[float, float]], dpi, workers=None, preprocessing=None,
+                   memory_fraction=MEMORY_FRACTION, root=CGROUP_ROOT) -> ResourcePlan:
+    """
+    Choose the worker count and pages in flight for a set of pages.
+
+    Args:
+        page_sizes: (width, height) of each page in points
+        dpi: Highest resolution any page is rendered at
+        workers: Requested worker count; kept as is, with a warning when it
+            does not fit in memory
+        preprocessing: PreprocessConfig of the pages, for its scratch buffers
+        memory_fraction: Share of the available memory the workers may use
+    """
+    page_sizes = list(page_sizes)
+    largest = max((page_pixels(w, h, dpi) for w, h in page_sizes), default=0)
+    worker_bytes = estimate_worker_bytes(largest, preprocessing)
+    cpus = available_cpus(root)
+    available = available_memory(root)
+    budget = int(available * memory_fraction) if available is not None else None
+
+    if workers is not None:
+        count, limited_by = max(1, workers), "requested"
+        if budget is not None and count * worker_bytes > budget:
+            print(f"Warning: {count} workers need ~{count * worker_bytes / 1024 ** 3:.1f} GiB, "
+                  f"more than the {budget / 1024 ** 3:.1f} GiB available")
+    else:
+        # One core is left for the parent process, as before
+        count, limited_by = max(1, cpus - 1), "cpu"
+        if budget is not None and budget // worker_bytes < count:
+            count, limited_by = max(1, budget // worker_bytes), "memory"
+        if page_sizes and len(page_sizes) < count:
+            count, limited_by = len(page_sizes), "pages"
+
+    in_flight = pages_in_flight(count, worker_bytes, budget)
+    return ResourcePlan(count, in_flight, worker_bytes, budget, cpus, limited_by)
+
+def pages_in_flight(workers, worker_bytes, budget) -> int:
+    """
+    Pages to submit to the pool at a time.
+
+    Any submitted page may start on an idle worker, so when fewer workers fit
+    in memory than the pool holds, this is what caps the pages processed at
+    once. Otherwise one extra page per worker is queued so no worker waits.
+    """
+    fit = budget // worker_bytes if budget is not None else workers
+    return workers * 2 if fit >= workers else max(1, fit)
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of the calling process, in bytes."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def measured_call(function, args):
+    """Worker wrapper: run function(args) and return (result, peak RSS of the worker)."""
+    return function(args), peak_rss_bytes()
+
+class ConcurrencyController:
+    """
+    Keeps the pages in flight within the memory budget as RSS is measured.
+
+    Starts from the plan's estimate. When the peak RSS reported by the
+    workers drifts from the estimate by more than DRIFT_TOLERANCE, the
+    per-worker footprint is replaced by the measurement and the pages in
+    flight are recomputed.
+    """
+
+    def __init__(self, plan: ResourcePlan, tolerance=DRIFT_TOLERANCE):
+        self.plan = plan
+        self.tolerance = tolerance
+        self.worker_bytes = plan.worker_bytes
+        self.limit = plan.in_flight
+        self.peak_rss = 0
+        self.adjustments = 0
+
+    def observe(self, rss: Optional[int]) -> int:
+        """Record a worker's peak RSS and return the new in-flight limit."""
+        if not rss:
+            return self.limit
+        self.peak_rss = max(self.peak_rss, rss)
+        drift = (self.peak_rss - self.worker_bytes) / self.worker_bytes
+        if abs(drift) > self.tolerance and self.plan.memory_budget is not None:
+            self.worker_bytes = self.peak_rss
+            limit = pages_in_flight(self.plan.workers, self.worker_bytes, self.plan.memory_budget)
+            if limit != self.limit:
+                print(f"Measured worker RSS {self.peak_rss / 1024 ** 2:.0f} MiB "
+                      f"({drift:+.0%} vs estimate), pages in flight {self.limit} -> {limit}")
+                self.limit = limit
+                self.adjustments += 1
+        return self.limit
+
+def run_planned(executor, function: Callable, task_args: Sequence, plan: ResourcePlan,
+                controller: Optional[ConcurrencyController] = None) -> List:
+    """
+    Map function over task_args on an executor, keeping at most the planned pages in flight.
+
+    Results are returned in task order, like executor.map.
+    """
+    controller = controller or ConcurrencyController(plan)
+    results = [None] * len(task_args)
+    pending = {}
+    next_index = 0
+    call = partial(measured_call, function)
+
+    while next_index < len(task_args) or pending:
+        while next_index < len(task_args) and len(pending) < controller.limit:
+            pending[executor.submit(call, task_args[next_index])] = next_index
+            next_index += 1
+        metrics.set_gauge("ocr_queue_depth", len(pending))
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            index = pending.pop(future)
+            results[index], rss = future.result()
+            controller.observe(rss)
+            if rss:
+                metrics.set_max("ocr_worker_peak_rss_bytes", rss)
+    metrics.set_gauge("ocr_queue_depth", 0)
+    return results
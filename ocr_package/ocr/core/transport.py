@@ -0,0 +1,278 @@
+"""
+Shared-memory transport for page rasters and results between processes.
+
+A process pool pickles every argument and return value through its pipe, so
+shipping a rendered page or the word boxes of an OCRed sheet copies and
+re-parses megabytes per page. This module moves the payload into shared
+memory and sends only a small handle:
+
+- RasterSlab is a slab allocator for page rasters: one shared block cut into
+  fixed-size slots, allocated by the parent and written by the workers, so no
+  block is created, mapped or unlinked per page. Workers map the slab once.
+- Columnar buffers hold a result as a few flat numpy columns (fixed-width
+  records plus UTF-8 blobs) in a block of their own, written by the worker and
+  read back and freed by the parent.
+"""
+
+import os
+from contextlib import contextmanager
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, Optional, Tuple, Union
+import numpy as np
+
+# Column offsets in a columnar buffer are aligned to this many bytes
+ALIGNMENT = 64
+
+def _aligned(size: int) -> int:
+    return -(-size // ALIGNMENT) * ALIGNMENT
+
+def _hand_over(block: shared_memory.SharedMemory):
+    """
+    Give up ownership of a block this process created for another to read.
+
+    The reader unlinks it; left registered, a worker's resource tracker would
+    report it as leaked (or unlink it) when the worker exits.
+    """
+    if os.name == 'posix':
+        resource_tracker.unregister(block._name, "shared_memory")
+
+@dataclass(frozen=True)
+class SharedPage:
+    """Handle to a page raster in a shared memory block."""
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+    @property
+    def nbytes(self) -> int:
+        return int(np.prod(self.shape)) * np.dtype(self.dtype).itemsize
+
+def share_page(image) -> SharedPage:
+    """Copy a raster into a new shared memory block and return its handle."""
+    image = np.ascontiguousarray(image)
+    block = shared_memory.SharedMemory(create=True, size=max(1, image.nbytes))
+    try:
+        np.ndarray(image.shape, dtype=image.dtype, buffer=block.buf)[...] = image
+    except BaseException:
+        block.close()
+        block.unlink()
+        raise
+    block.close()
+    _hand_over(block)
+    return SharedPage(block.name, tuple(image.shape), image.dtype.str)
+
+@contextmanager
+def open_shared_page(handle: SharedPage):
+    """Map a shared page raster in place; the array must not be used after the block closes."""
+    block = shared_memory.SharedMemory(name=handle.name)
+    image = np.ndarray(handle.shape, dtype=handle.dtype, buffer=block.buf)
+    try:
+        yield image
+    finally:
+        del image
+        try:
+            block.close()
+        except BufferError:
+            # The consumer kept a view of the pixels; the mapping goes with the process
+            pass
+
+def release_shared_page(handle: SharedPage):
+    """Free a shared page raster."""
+    try:
+        block = shared_memory.SharedMemory(name=handle.name)
+    except FileNotFoundError:
+        return
+    block.close()
+    block.unlink()
+
+# Blocks mapped by this process, by name; workers keep a slab mapped for the
+# life of the process instead of mapping it for every page
+_attached: Dict[str, shared_memory.SharedMemory] = {}
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # Forked workers inherit the parent's mappings, which stay valid in the child
+    block = _attached.get(name)
+    if block is None:
+        block = _attached[name] = shared_memory.SharedMemory(name=name)
+    return block
+
+@dataclass(frozen=True)
+class SlabSlot:
+    """A slot of a RasterSlab, handed to the worker that fills it."""
+    slab: str  # Shared memory block name
+    index: int
+    offset: int
+    capacity: int  # Bytes
+
+@dataclass(frozen=True)
+class SlabRaster:
+    """Handle to a raster written into a slab slot."""
+    slot: SlabSlot
+    shape: Tuple[int, ...]
+    dtype: str
+
+    @property
+    def nbytes(self) -> int:
+        return int(np.prod(self.shape)) * np.dtype(self.dtype).itemsize
+
+RasterHandle = Union[SlabRaster, SharedPage]
+
+class RasterSlab:
+    """
+    Fixed-size slots for page rasters in one shared memory block.
+
+    Created and owned by the parent process, which acquires a slot for every
+    page it submits and releases it once the page has been consumed. The
+    slot count therefore also bounds the pages in memory.
+    """
+
+    def __init__(self, slots: int, slot_bytes: int):
+        self.slots = max(1, slots)
+        self.slot_bytes = _aligned(max(1, slot_bytes))
+        self.block = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_bytes)
+        _attached[self.block.name] = self.block
+        self._free = list(range(self.slots - 1, -1, -1))
+
+    @property
+    def name(self) -> str:
+        return self.block.name
+
+    @property
+    def available(self) -> int:
+        return len(self._free)
+
+    def acquire(self) -> SlabSlot:
+        """Take a free slot; raises IndexError when every slot is in use."""
+        if not self._free:
+            raise IndexError("No free slab slot")
+        index = self._free.pop()
+        return SlabSlot(self.block.name, index, index * self.slot_bytes, self.slot_bytes)
+
+    def release(self, slot: SlabSlot):
+        if slot.slab != self.block.name or slot.index in self._free:
+            raise ValueError(f"Slot {slot.index} is not in use in slab {self.block.name}")
+        self._free.append(slot.index)
+
+    def close(self):
+        """Free the slab; handles into it must not be used afterwards."""
+        _attached.pop(self.block.name, None)
+        self.block.close()
+        try:
+            self.block.unlink()
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def write_raster(slot: Optional[SlabSlot], image) -> RasterHandle:
+    """
+    Write a raster into a slab slot and return its handle.
+
+    A raster larger than the slot (or any raster when slot is None) gets a
+    shared memory block of its own instead, so an underestimated page size
+    costs a block allocation rather than a failure.
+    """
+    image = np.ascontiguousarray(image)
+    if slot is None or image.nbytes > slot.capacity:
+        return share_page(image)
+    block = _attach(slot.slab)
+    view = np.ndarray(image.shape, dtype=image.dtype, buffer=block.buf, offset=slot.offset)
+    view[...] = image
+    del view
+    return SlabRaster(slot, tuple(image.shape), image.dtype.str)
+
+@contextmanager
+def open_raster(handle: RasterHandle):
+    """Map a raster in place from its handle."""
+    if isinstance(handle, SharedPage):
+        with open_shared_page(handle) as image:
+            yield image
+        return
+    block = _attach(handle.slot.slab)
+    image = np.ndarray(handle.shape, dtype=handle.dtype, buffer=block.buf, offset=handle.slot.offset)
+    try:
+        yield image
+    finally:
+        del image
+
+def release_raster(handle: RasterHandle, slab: Optional[RasterSlab] = None):
+    """Return a raster's slot to the slab, or free its own block."""
+    if isinstance(handle, SharedPage):
+        release_shared_page(handle)
+    elif slab is not None:
+        slab.release(handle.slot)
+
+@dataclass(frozen=True)
+class ColumnarHandle:
+    """Handle to named numpy columns in a shared memory block."""
+    name: str
+    # (column name, dtype descriptor, shape, byte offset) of each column
+    columns: Tuple[Tuple[str, object, Tuple[int, ...], int], ...]
+    size: int
+
+def write_columns(columns: Dict[str, np.ndarray]) -> ColumnarHandle:
+    """Copy columns into a new shared memory block; the reader frees it."""
+    layout = []
+    offset = 0
+    for key, column in columns.items():
+        column = np.ascontiguousarray(column)
+        layout.append((key, column, offset))
+        offset = _aligned(offset + column.nbytes)
+    block = shared_memory.SharedMemory(create=True, size=max(1, offset))
+    try:
+        for key, column, start in layout:
+            if column.nbytes:
+                np.ndarray(column.shape, dtype=column.dtype, buffer=block.buf, offset=start)[...] = column
+    except BaseException:
+        block.close()
+        block.unlink()
+        raise
+    block.close()
+    _hand_over(block)
+    return ColumnarHandle(block.name, tuple((key, column.dtype.descr if column.dtype.names else column.dtype.str,
+                                             tuple(column.shape), start)
+                                            for key, column, start in layout), max(1, offset))
+
+def read_columns(handle: ColumnarHandle, release=True) -> Dict[str, np.ndarray]:
+    """Copy the columns out of their block and, by default, free it."""
+    block = shared_memory.SharedMemory(name=handle.name)
+    try:
+        columns = {}
+        for key, descr, shape, offset in handle.columns:
+            dtype = np.dtype([tuple(field) for field in descr]) if isinstance(descr, list) else np.dtype(descr)
+            if not int(np.prod(shape)):
+                columns[key] = np.zeros(shape, dtype=dtype)
+                continue
+            columns[key] = np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=offset).copy()
+    finally:
+        block.close()
+        if release:
+            block.unlink()
+    return columns
+
+def free_columns(handle: ColumnarHandle):
+    """Free a columnar buffer without reading it."""
+    try:
+        block = shared_memory.SharedMemory(name=handle.name)
+    except FileNotFoundError:
+        return
+    block.close()
+    block.unlink()
+
+def encode_strings(strings: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """UTF-8 blob and (offset, length) spans of a list of strings."""
+    encoded = [s.encode('utf-8') for s in strings]
+    lengths = np.fromiter((len(e) for e in encoded), dtype=np.uint32, count=len(encoded))
+    offsets = np.zeros(len(encoded), dtype=np.uint32)
+    if len(encoded) > 1:
+        np.cumsum(lengths[:-1], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), np.stack([offsets, lengths], axis=-1)
+
+def decode_strings(blob: np.ndarray, spans: np.ndarray) -> List[str]:
+    data = blob.tobytes()
+    return [data[start:start + length].decode('utf-8') for start, length in spans.tolist()]
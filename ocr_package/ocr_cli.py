@@ -8,6 +8,7 @@ import sys
 import argparse
 from ocr.core.processor import extract_text_from_pdf, save_text_to_file
 from ocr.core.utils import get_output_path
+from ocr.core.profiles import load_profile
 
 def main():
     parser = argparse.ArgumentParser(description="Extract text from PDF using OCR")
@@ -15,6 +16,12 @@ def main():
     parser.add_argument("--output", "-o", help="Output text file path")
     parser.add_argument("--start-page", "-s", type=int, default=1, help="Starting page number")
     parser.add_argument("--end-page", "-e", type=int, help="Ending page number")
+    parser.add_argument("--orientation", choices=["auto", "sample"],
+                        help="Turn rotated sheets upright: detect on every page, or on a few sample pages")
+    parser.add_argument("--staged", action="store_true", help="Render and OCR pages in separate worker pools instead of rendering every page first")
+    parser.add_argument("--workers", "-w", type=int, help="Worker processes of the staged pipeline (default: sized from the CPU and memory limits)")
+    parser.add_argument("--profile", help="Named OCR profile from ocr-autotune (or a profile JSON file)")
+    parser.add_argument("--profiles-file", help="Profiles file to look the profile up in")
     
     args = parser.parse_args()
     
@@ -22,13 +29,24 @@ def main():
         print(f"Error: File not found - {args.pdf_path}")
         return
     
+    profile = None
+    if args.profile:
+        try:
+            profile = load_profile(args.profile, args.profiles_file)
+        except KeyError as e:
+            print(f"Error: {e.args[0]}")
+            return
+    
     # Set output path
     output_path = args.output or get_output_path(args.pdf_path)
     
     print(f"Starting OCR on {args.pdf_path}")
     print(f"Processing pages {args.start_page} to {args.end_page or 'end'}")
     
-    text = extract_text_from_pdf(args.pdf_path, args.start_page, args.end_page)
+    text = extract_text_from_pdf(args.pdf_path, args.start_page, args.end_page,
+                                 dpi=profile.dpi if profile else 200,
+                                 orientation=args.orientation, profile=profile,
+                                 staged=args.staged, workers=args.workers)
     
     if text:
         save_text_to_file(text, output_path)
@@ -9,92 +9,25 @@ sign specifications to generate a Bill of Materials.
 import os
 import sys
 import pandas as pd
-import re
 import glob
 from ocr.core.processor import extract_text_from_pdf, save_text_to_file
+from ocr.advanced.bom_matcher import count_bom_items, count_bom_items_in_files
 
 def extract_sign_specs_from_text(text):
     """Extract sign specifications from text."""
-    # Create a list to store BOM items
-    bom_items = []
+    # All catalog items are counted in a single pass over the text
+    bom_items = count_bom_items(text)
     
-    # Count ATM signs by type
-    atm_type1_count = len(re.findall(r'ATM\s+TYPE\s+1\s+SIGN', text))
-    atm_type2_count = len(re.findall(r'ATM\s+TYPE\s+2\s+SIGN', text))
-    atm_type3_count = len(re.findall(r'ATM\s+TYPE\s+3', text))
-    
-    if atm_type1_count > 0:
-        bom_items.append({
-            'Item': 'ATM Sign Type 1',
-            'Quantity': atm_type1_count,
-            'Description': 'Active Traffic Management Sign (Type 1)'
-        })
-    
-    if atm_type2_count > 0:
-        bom_items.append({
-            'Item': 'ATM Sign Type 2',
-            'Quantity': atm_type2_count,
-            'Description': 'Active Traffic Management Sign (Type 2)'
-        })
-    
-    if atm_type3_count > 0:
-        bom_items.append({
-            'Item': 'ATM Sign Type 3',
-            'Quantity': atm_type3_count,
-            'Description': 'Active Traffic Management Sign (Type 3)'
-        })
-    
-    # Count other ITS equipment
-    if 'ITS POLE (80 FEET)' in text:
-        bom_items.append({
-            'Item': 'ITS Pole',
-            'Quantity': text.count('ITS POLE (80 FEET)'),
-            'Description': 'ITS Pole (80 Feet)'
-        })
-    
-    if 'CCTV CAMERA (PTZ)' in text:
-        bom_items.append({
-            'Item': 'CCTV Camera (PTZ)',
-            'Quantity': text.count('CCTV CAMERA (PTZ)'),
-            'Description': 'CCTV Camera with Pan/Tilt/Zoom Capability'
-        })
-    
-    if 'CCTV CAMERA (FIXED)' in text:
-        bom_items.append({
-            'Item': 'CCTV Camera (Fixed)',
-            'Quantity': text.count('CCTV CAMERA (FIXED)'),
-            'Description': 'Fixed CCTV Camera'
-        })
-    
-    if 'RADAR DETECTOR SYSTEM' in text:
-        bom_items.append({
-            'Item': 'Radar Detector System',
-            'Quantity': text.count('RADAR DETECTOR SYSTEM'),
-            'Description': 'Radar Detector System'
-        })
-        
-    if 'COMMUNICATION CABINET' in text:
-        bom_items.append({
-            'Item': 'Communication Cabinet',
-            'Quantity': text.count('COMMUNICATION CABINET'),
-            'Description': 'Communication Cabinet for ITS Equipment'
-        })
-    
-    # Look for panel information
-    panel_match = re.search(r'PROJECT\s+ATCMTD\s+PANEL\s+SCHEDULE(.*?)PROJECT', text, re.DOTALL)
-    if panel_match:
-        panel_count = len(re.findall(r'PNL-\d+', panel_match.group(1)))
-        if panel_count > 0:
-            bom_items.append({
-                'Item': 'Panel Board',
-                'Quantity': panel_count,
-                'Description': 'Electrical Panel Board for ATM Signs'
-            })
+    return pd.DataFrame(bom_items)
+
+def extract_sign_specs_from_files(file_paths):
+    """Extract sign specifications by streaming text files page by page."""
+    bom_items = count_bom_items_in_files(file_paths)
     
     return pd.DataFrame(bom_items)
 
-def get_plans_text():
-    """Get text from either a provided PDF or existing extracted text files."""
+def get_plans_file():
+    """Get the plans text file, extracting it from a provided PDF if needed."""
     # Check if a PDF file is provided
     if len(sys.argv) > 1:
         pdf_path = sys.argv[1]
@@ -117,7 +50,7 @@ def get_plans_text():
         save_text_to_file(text, text_output)
         print(f"Extracted text saved to {text_output}")
         
-        return text
+        return text_output
     
     # No PDF provided, try to use existing extracted text
     print("No PDF file provided. Looking for existing extracted text files...")
@@ -130,8 +63,7 @@ def get_plans_text():
             # Use the first plans text file found
             plans_file = plans_files[0]
             print(f"Using existing text file: {plans_file}")
-            with open(plans_file, 'r', encoding='utf-8') as f:
-                return f.read()
+            return plans_file
     
     # Also check the current directory
     plans_files = glob.glob("plans_*.txt")
@@ -139,24 +71,23 @@ def get_plans_text():
         # Use the first plans text file found
         plans_file = plans_files[0]
         print(f"Using existing text file: {plans_file}")
-        with open(plans_file, 'r', encoding='utf-8') as f:
-            return f.read()
+        return plans_file
     
     print("Error: No PDF file provided and no existing plans text files found.")
     return None
 
 def main():
-    # Get text from PDF or existing files
-    text = get_plans_text()
+    # Get text file from PDF or existing files
+    plans_file = get_plans_file()
     
-    if not text:
+    if not plans_file:
         print("Usage: python process_plans_for_bom.py [pdf_file]")
         print("If pdf_file is not provided, the script will try to use existing extracted text files.")
         return 1
     
     # Extract sign specifications
     print("Extracting sign specifications...")
-    bom = extract_sign_specs_from_text(text)
+    bom = extract_sign_specs_from_files([plans_file])
     
     if bom.empty:
         print("No sign specifications found in the document.")
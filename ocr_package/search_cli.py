@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+"""
+Command line interface for the full-text search index over extracted plans.
+"""
+
+import os
+import sys
+import time
+import argparse
+from ocr.advanced.search_index import PlanSearchIndex
+
+def main():
+    parser = argparse.ArgumentParser(description="Index and search extracted plan text")
+    parser.add_argument("--db", default="plans_index.db", help="SQLite index file (default: plans_index.db)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    index_parser = subparsers.add_parser("index", help="Add OCR output (.txt or .json) to the index")
+    index_parser.add_argument("paths", nargs='+', help="Files or directories to index")
+    index_parser.add_argument("--project", "-p", help="Project name (default: directory name)")
+    index_parser.add_argument("--force", action="store_true", help="Re-index files even if unchanged")
+    
+    query_parser = subparsers.add_parser("query", help="Search the index")
+    query_parser.add_argument("query", help="Terms to search for, e.g. R2-1 or MS1-8*")
+    query_parser.add_argument("--project", "-p", help="Only search this project")
+    query_parser.add_argument("--limit", "-n", type=int, default=20, help="Maximum number of hits")
+    query_parser.add_argument("--raw", action="store_true", help="Use FTS5 query syntax as-is")
+    
+    args = parser.parse_args()
+    
+    with PlanSearchIndex(args.db) as index:
+        if args.command == "index":
+            indexed = skipped = 0
+            for path in args.paths:
+                if os.path.isdir(path):
+                    done, unchanged = index.index_directory(path, project=args.project, force=args.force)
+                    indexed += done
+                    skipped += unchanged
+                elif os.path.isfile(path):
+                    if index.index_file(path, project=args.project, force=args.force):
+                        indexed += 1
+                    else:
+                        skipped += 1
+                else:
+                    print(f"Skipping {path} - not found")
+            print(f"Indexed {indexed} files, {skipped} unchanged")
+            return 0
+        
+        start_time = time.time()
+        hits = index.search(args.query, project=args.project, limit=args.limit, raw=args.raw)
+        elapsed = (time.time() - start_time) * 1000
+        
+        for hit in hits:
+            position = f" @{hit.offset}" if hit.offset >= 0 else ""
+            if hit.bbox:
+                position += f" ({hit.bbox[0]}, {hit.bbox[1]})"
+            print(f"{hit.project}/{hit.file} page {hit.page}{position}: {hit.snippet}")
+        
+        print(f"\n{len(hits)} hits in {elapsed:.1f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
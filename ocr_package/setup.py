@@ -37,6 +37,10 @@ setup(
             "ocr=ocr_cli:main",
             "ocr-advanced=advanced_cli:main",
             "ocr-batch=batch_cli:main",
+            "ocr-search=search_cli:main",
+            "ocr-benchmark=benchmark_cli:main",
+            "ocr-accuracy=accuracy_cli:main",
+            "ocr-autotune=autotune_cli:main",
         ],
     },
 ) 
\ No newline at end of file
@@ -0,0 +1,91 @@
+import os
+import shutil
+import tempfile
+import unittest
+from collections import Counter
+from ocr.benchmarks.accuracy import (
+    GOLDEN_SCHEDULE, GOLDEN_BOM, Setting, extract_sign_records, extract_general_bom,
+    score_sign_records, score_bom, pareto_frontier, render_golden_fixture, evaluate, read_csv
+)
+
+GOLDEN = [
+    {'Sign ID': '1.7', 'Route': 'SR-81', 'Milepost': '0.068', 'Side': 'Right',
+     'Description': 'R2-1 Speed Limit (45 MPH)', 'Action': 'Panel Replacement',
+     'Size (sq ft)': '5.00', 'Colors': 'BK&W', 'Quantity': '1'},
+    {'Sign ID': '3.4', 'Route': 'SR-81', 'Milepost': '0.965', 'Side': 'Right',
+     'Description': 'W1-8L Chevron Alignment', 'Action': 'Panel Replacement',
+     'Size (sq ft)': '3.00', 'Colors': 'BK&Y', 'Quantity': '3'},
+]
+
+class TestScoring(unittest.TestCase):
+    
+    def test_extract_sign_records(self):
+        """Test schedule rows are parsed from OCR-like lines"""
+        text = ("SIGN ID ROUTE MILEPOST\n"
+                "1.7 SR-81 0.068 RIGHT R2-1 Speed Limit (45 MPH) PANEL  REPLACEMENT 5.00 BK&W 1\n"
+                "3.4 SR-81 0.965 Right W1-8L Chevron Alignment Panel Replacement 3 BK&Y 2\n")
+        records = extract_sign_records(text)
+        self.assertEqual([r['Sign ID'] for r in records], ['1.7', '3.4'])
+        self.assertEqual(records[0]['Description'], 'R2-1 Speed Limit (45 MPH)')
+        
+        score = score_sign_records(records, GOLDEN)
+        # 3.4 has the wrong quantity
+        self.assertEqual(score['records'], {'golden': 2, 'extracted': 2, 'matched': 1})
+        self.assertEqual((score['precision'], score['recall']), (0.5, 0.5))
+        self.assertEqual(score['fields']['Quantity'], 0.5)
+        self.assertEqual(score['fields']['Size (sq ft)'], 1.0)
+        self.assertEqual(score['items']['R2-1']['recall'], 1.0)
+        self.assertEqual(score['items']['W1-8L']['recall'], 0.0)
+    
+    def test_general_bom(self):
+        """Test BOM items are sign fragments, truncated like the golden BOM"""
+        text = "DESIGN ENGINEER\nSIGN MOUNTING AND HARDWARE REQUIREMENTS.\nSIGN POST P2\nSIGN POST P2\n"
+        counts = extract_general_bom(text)
+        self.assertEqual(counts, Counter({
+            'Sign: SIGN ENGINEER': 1,
+            'Sign: SIGN MOUNTING AND HARDWARE REQ...': 1,
+            'Sign: SIGN POST P2': 2,
+        }))
+        
+        golden = [{'Item': 'Sign: SIGN POST P2', 'Quantity': '1'}, {'Item': 'Sign: SIGN POST P3', 'Quantity': '1'}]
+        score = score_bom(counts, golden)
+        self.assertEqual(score['recall'], 0.5)
+        self.assertEqual(score['precision'], 0.25)
+        self.assertEqual(score['items']['Sign: SIGN POST P2']['precision'], 0.5)
+    
+    def test_pareto_frontier(self):
+        """Test only settings not beaten on both speed and score are on the frontier"""
+        points = {
+            'fast': {'seconds': 1.0, 'score': 0.6},
+            'slow_good': {'seconds': 5.0, 'score': 0.95},
+            'dominated': {'seconds': 6.0, 'score': 0.9},
+            'tie_slower': {'seconds': 2.0, 'score': 0.6},
+        }
+        self.assertEqual(pareto_frontier(points), ['fast', 'slow_good'])
+
+class TestGoldenFixture(unittest.TestCase):
+    
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+    
+    def test_text_layer_scores_perfectly(self):
+        """Test a fixture rendered from the golden CSVs scores 1.0 from its text layer"""
+        fixture = render_golden_fixture(os.path.join(self.test_dir, "golden.pdf"))
+        result = evaluate(fixture, Setting("text_layer", method="text_layer"))
+        
+        self.assertEqual(result['status'], 'ok')
+        self.assertEqual(result['signs']['records']['matched'], len(read_csv(GOLDEN_SCHEDULE)))
+        self.assertEqual((result['signs']['f1'], result['bom']['f1'], result['score']), (1.0, 1.0, 1.0))
+    
+    def test_scanned_fixture_has_no_text_layer(self):
+        """Test the scanned fixture can only be read by OCR"""
+        fixture = render_golden_fixture(os.path.join(self.test_dir, "scanned.pdf"), scanned=True)
+        result = evaluate(fixture, Setting("text_layer", method="text_layer"))
+        self.assertEqual(result['signs']['recall'], 0.0)
+        self.assertEqual(result['bom']['recall'], 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+import fitz
+from ocr.core.auto_dpi import DpiChoice, choose_dpi, choose_page_dpi, MIN_DPI, MAX_DPI
+
+def text_page(fontsize):
+    doc = fitz.open()
+    page = doc.new_page(width=792, height=612)
+    for i in range(20):
+        page.insert_text((40, 40 + i * fontsize * 2.2), "ITS POLE STA 123+45 ATM TYPE 1 SIGN", fontsize=fontsize)
+    return doc, page
+
+class TestAutoDpi(unittest.TestCase):
+    
+    def test_small_text_gets_more_dpi(self):
+        """Test the chosen DPI follows the dominant text height"""
+        chosen = {}
+        for fontsize in (6, 10, 24):
+            doc, page = text_page(fontsize)
+            chosen[fontsize] = choose_page_dpi(page, 200)
+            doc.close()
+        
+        self.assertGreater(chosen[6].dpi, 300)
+        self.assertEqual(chosen[24].dpi, MIN_DPI)
+        self.assertLess(chosen[24].dpi, chosen[10].dpi)
+        self.assertLess(chosen[10].dpi, chosen[6].dpi)
+        self.assertAlmostEqual(chosen[10].text_height_pt, 7.2, delta=1.0)
+    
+    def test_blank_page_keeps_baseline(self):
+        """Test pages without text fall back to the baseline DPI"""
+        doc = fitz.open()
+        choice = choose_page_dpi(doc.new_page(), 250)
+        self.assertEqual((choice.dpi, choice.text_height_pt), (250, None))
+        doc.close()
+    
+    def test_dpi_bounds_and_time_saved(self):
+        """Test the DPI is clamped and the saving is estimated from the pixel ratio"""
+        self.assertEqual(choose_dpi(1.0, 200), MAX_DPI)
+        self.assertEqual(choose_dpi(40.0, 200), MIN_DPI)
+        choice = DpiChoice(150, 20.0, 300)
+        self.assertAlmostEqual(choice.pixel_ratio, 0.25)
+        self.assertAlmostEqual(choice.estimated_time_saved(2.0), 6.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import shutil
+import tempfile
+import unittest
+from ocr.benchmarks.synthetic import generate_pdf
+from ocr.benchmarks.autotune import (
+    SamplePage, candidate_profiles, sample_pages, word_f1, successive_halving
+)
+
+class TestAutotune(unittest.TestCase):
+    
+    def test_word_f1(self):
+        """Test quality ignores case and word order, and penalizes missing and extra words"""
+        self.assertEqual(word_f1("SIGN POST P2", "p2 sign post"), 1.0)
+        self.assertAlmostEqual(word_f1("SIGN POST P2 REQ'D", "SIGN POST"), 2 * 1.0 * 0.4 / 1.4)
+        self.assertEqual(word_f1("", ""), 1.0)
+        self.assertEqual(word_f1("STOP", "ST0P"), 0.0)
+    
+    def test_candidates(self):
+        """Test the search space is expanded into uniquely named profiles"""
+        candidates = candidate_profiles({'dpi': (150, 300), 'psm': (6,), 'oem': (None, 1),
+                                         'threshold': ('otsu',), 'lang': ('eng',)})
+        self.assertEqual(len(candidates), 4)
+        self.assertEqual(len({c.name for c in candidates}), 4)
+        self.assertIn('d150_psm6_oem-_otsu_eng', [c.name for c in candidates])
+        self.assertEqual(candidates[0].tesseract_config, '--psm 6')
+    
+    def test_sample_pages(self):
+        """Test sample pages are spread evenly over all the PDFs"""
+        test_dir = tempfile.mkdtemp()
+        try:
+            first = generate_pdf('text', os.path.join(test_dir, "a.pdf"), pages=4)
+            second = generate_pdf('text', os.path.join(test_dir, "b.pdf"), pages=4)
+            samples = sample_pages([first, second], 4)
+            self.assertEqual([(os.path.basename(s.pdf_path), s.page_number) for s in samples],
+                             [("a.pdf", 1), ("a.pdf", 3), ("b.pdf", 1), ("b.pdf", 3)])
+            self.assertEqual(len(sample_pages([first], 10)), 4)
+        finally:
+            shutil.rmtree(test_dir)
+    
+    def test_successive_halving(self):
+        """Test the fastest candidate meeting the floor wins and bad candidates are dropped early"""
+        candidates = candidate_profiles({'dpi': (100, 150, 200, 250, 300), 'psm': (3, 6, 11),
+                                         'oem': (None,), 'threshold': ('otsu',), 'lang': ('eng',)})
+        samples = [SamplePage("plans.pdf", n) for n in range(1, 10)]
+        calls = []
+        
+        def evaluate(profile, sample):
+            calls.append((profile.name, sample.page_number))
+            # Time grows with DPI; quality needs DPI, and PSM 11 loses table structure
+            quality = min(1.0, profile.dpi / 220) - (0.2 if profile.psm == 11 else 0)
+            return profile.dpi / 100 + sample.page_number * 0.01, quality
+        
+        best, trials = successive_halving(candidates, samples, evaluate, floor=0.9, verbose=False)
+        self.assertEqual((best.profile.dpi, best.profile.psm), (200, 3))
+        self.assertEqual(best.pages, len(samples))
+        self.assertGreaterEqual(best.quality, 0.9)
+        # Never evaluated twice on the same page, and far fewer than every candidate on every page
+        self.assertEqual(len(calls), len(set(calls)))
+        self.assertLess(len(calls), len(candidates) * len(samples) / 2)
+        # 15 candidates -> 5 on 3 pages -> 2 on all 9
+        self.assertEqual([t.pages for t in trials], [9, 9])
+    
+    def test_floor_not_met(self):
+        """Test the most accurate candidate is returned when none meets the floor"""
+        candidates = candidate_profiles({'dpi': (150, 300), 'psm': (6,), 'oem': (None,),
+                                         'threshold': ('otsu',), 'lang': ('eng',)})
+        samples = [SamplePage("plans.pdf", 1), SamplePage("plans.pdf", 2)]
+        best, _ = successive_halving(candidates, samples, lambda p, s: (p.dpi / 100, p.dpi / 1000),
+                                     floor=0.9, verbose=False)
+        self.assertEqual(best.profile.dpi, 300)
+        self.assertLess(best.quality, 0.9)
+
+if __name__ == '__main__':
+    unittest.main()
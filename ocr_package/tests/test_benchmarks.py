@@ -0,0 +1,108 @@
+import os
+import copy
+import shutil
+import tempfile
+import unittest
+import fitz
+from ocr.benchmarks import PAGE_KINDS, generate_pdf, generate_suite, compare_results
+from ocr.benchmarks.runner import measure_stages, measure_target, measure_transport
+
+class TestSyntheticPdfs(unittest.TestCase):
+    
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+    
+    def test_generation_is_deterministic(self):
+        """Test the same kind, pages and seed give byte-identical PDFs"""
+        for kind in ('text', 'schedule'):
+            first = generate_pdf(kind, os.path.join(self.test_dir, f"{kind}_a.pdf"), pages=2, seed=3)
+            second = generate_pdf(kind, os.path.join(self.test_dir, f"{kind}_b.pdf"), pages=2, seed=3)
+            other = generate_pdf(kind, os.path.join(self.test_dir, f"{kind}_c.pdf"), pages=2, seed=4)
+            with open(first, 'rb') as a, open(second, 'rb') as b, open(other, 'rb') as c:
+                data = a.read()
+                self.assertEqual(data, b.read())
+                self.assertNotEqual(data, c.read())
+    
+    def test_page_kinds(self):
+        """Test each kind has its page size and text layer"""
+        paths = generate_suite(self.test_dir, PAGE_KINDS, pages=1)
+        words = {}
+        for kind, path in paths.items():
+            with fitz.open(path) as doc:
+                self.assertEqual(len(doc), 1)
+                words[kind] = doc[0].get_text('words')
+                if kind == 'large_format':
+                    self.assertEqual((doc[0].rect.width, doc[0].rect.height), (2592, 1728))
+        
+        self.assertEqual(words['scanned'], [])
+        self.assertGreater(len(words['schedule']), len(words['text']))
+        self.assertIn('S-1', [word[4] for word in words['text']])
+    
+    def test_stage_and_target_measurements(self):
+        """Test stage latencies and the table detection target on a text-layer PDF"""
+        path = generate_pdf('schedule', os.path.join(self.test_dir, "schedule.pdf"), pages=1)
+        stages = measure_stages(path, dpi=72, repeat=1)
+        for stage in ('render', 'preprocess', 'text_layer', 'find_tables', 'bom_exact', 'bom_fuzzy'):
+            self.assertGreater(stages[stage]['median_ms'], 0)
+        
+        measured = measure_target('find_tables', path, 1, dpi=72, repeat=1)
+        self.assertEqual(measured['status'], 'ok')
+        self.assertGreater(measured['pages_per_sec'], 0)
+    
+    def test_transport_measurement(self):
+        """Test both transports are timed and only handles cross the pipe with shared memory"""
+        path = generate_pdf('schedule', os.path.join(self.test_dir, "schedule.pdf"), pages=1)
+        transport = measure_transport(path, dpi=72, repeat=1)
+        self.assertEqual(set(transport), {'raster', 'results'})
+        raster = transport['raster']
+        self.assertGreater(raster['pickle_ms'], 0)
+        self.assertGreater(raster['shared_ms'], 0)
+        # The 72 DPI tabloid page is 1224 x 792 one-byte pixels
+        self.assertGreater(raster['pickle_pipe_bytes'], 1224 * 792)
+        self.assertLess(raster['shared_pipe_bytes'], 1000)
+        self.assertLess(transport['results']['shared_pipe_bytes'], transport['results']['pickle_pipe_bytes'])
+
+class TestCompareResults(unittest.TestCase):
+    
+    def setUp(self):
+        self.baseline = {'settings': {'pages': 4, 'dpi': 200, 'seed': 0}, 'kinds': {'text': {
+            'stages': {'render': {'median_ms': 20.0}, 'find_tables': {'median_ms': 0.4}},
+            'targets': {
+                'find_tables': {'status': 'ok', 'pages_per_sec': 100.0, 'peak_rss_mb': 200.0},
+                'process_document': {'status': 'ok', 'pages_per_sec': 2.0, 'peak_rss_mb': 500.0},
+            },
+        }}}
+    
+    def test_no_regressions_within_tolerance(self):
+        """Test small changes and noisy sub-millisecond stages are not flagged"""
+        current = copy.deepcopy(self.baseline)
+        text = current['kinds']['text']
+        text['stages']['render']['median_ms'] = 22.0
+        text['stages']['find_tables']['median_ms'] = 0.8
+        text['targets']['find_tables']['pages_per_sec'] = 90.0
+        self.assertEqual(compare_results(self.baseline, current, tolerance=0.15), [])
+    
+    def test_regressions_flagged(self):
+        """Test slower stages, lower throughput, more memory and failures are flagged"""
+        current = copy.deepcopy(self.baseline)
+        text = current['kinds']['text']
+        text['stages']['render']['median_ms'] = 30.0
+        text['targets']['find_tables']['pages_per_sec'] = 50.0
+        text['targets']['find_tables']['peak_rss_mb'] = 300.0
+        text['targets']['process_document'] = {'status': 'failed', 'error': 'boom'}
+        
+        regressions = {r.metric: r for r in compare_results(self.baseline, current)}
+        self.assertEqual(set(regressions), {
+            'text.stage.render.median_ms',
+            'text.find_tables.pages_per_sec',
+            'text.find_tables.peak_rss_mb',
+            'text.process_document.status',
+        })
+        self.assertAlmostEqual(regressions['text.find_tables.pages_per_sec'].change, 0.5)
+        self.assertIsNone(regressions['text.process_document.status'].current)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+import os
+import tempfile
+import unittest
+import re
+from ocr.advanced.bom_matcher import (
+    BomItem, BomMatcher, PageChunk, count_bom_items, count_bom_items_in_files,
+    DEFAULT_BOM_CATALOG, ATM_SIGN_CONTROLLER
+)
+from ocr.advanced.fuzzy_matcher import FuzzyBomMatcher, bounded_edit_distance
+
+SAMPLE_TEXT = """
+ATM TYPE 1 SIGN    ATM TYPE 2
+SIGN  ATM TYPE 3 SIGN
+CCTV CAMERA (PTZ) ON ITS POLE (80 FEET)
+CCTV CAMERA (PTZ)
+PROJECT ATCMTD PANEL SCHEDULE
+PNL-1 L STA 100+00
+PNL-2 L STA 120+50
+PROJECT ATCMTD METER SCHEDULE
+PNL-3
+"""
+
+# Two panel schedules (only the first was counted), one left open, and a
+# sign controller the BOM extraction scripts never listed
+PARITY_TEXTS = [
+    SAMPLE_TEXT,
+    SAMPLE_TEXT + "PROJECT ATCMTD PANEL SCHEDULE\nPNL-4\nPNL-5\nPROJECT\n",
+    "PROJECT ATCMTD PANEL SCHEDULE\nPNL-1 PNL-2\nPROJECT ATCMTD PANEL SCHEDULE\nPNL-3\nPROJECT",
+    "PROJECT ATCMTD PANEL SCHEDULE\nPNL-1\nPNL-2\n",
+    "ACTIVE TRAFFIC MANAGEMENT SIGN CONTROLLER\nRADAR DETECTOR SYSTEM COMMUNICATION CABINET\n"
+    "CCTV CAMERA (FIXED) ATM TYPE 3 ATM TYPE 1 SIGN",
+]
+
+def baseline_bom_items(text):
+    """BOM rows of the per-item scans the extraction scripts used before the shared matcher."""
+    items = [
+        ('ATM Sign Type 1', len(re.findall(r'ATM\s+TYPE\s+1\s+SIGN', text)), 'Active Traffic Management Sign (Type 1)'),
+        ('ATM Sign Type 2', len(re.findall(r'ATM\s+TYPE\s+2\s+SIGN', text)), 'Active Traffic Management Sign (Type 2)'),
+        ('ATM Sign Type 3', len(re.findall(r'ATM\s+TYPE\s+3', text)), 'Active Traffic Management Sign (Type 3)'),
+        ('ITS Pole', text.count('ITS POLE (80 FEET)'), 'ITS Pole (80 Feet)'),
+        ('CCTV Camera (PTZ)', text.count('CCTV CAMERA (PTZ)'), 'CCTV Camera with Pan/Tilt/Zoom Capability'),
+        ('CCTV Camera (Fixed)', text.count('CCTV CAMERA (FIXED)'), 'Fixed CCTV Camera'),
+        ('Radar Detector System', text.count('RADAR DETECTOR SYSTEM'), 'Radar Detector System'),
+        ('Communication Cabinet', text.count('COMMUNICATION CABINET'), 'Communication Cabinet for ITS Equipment'),
+    ]
+    panel_match = re.search(r'PROJECT\s+ATCMTD\s+PANEL\s+SCHEDULE(.*?)PROJECT', text, re.DOTALL)
+    if panel_match:
+        items.append(('Panel Board', len(re.findall(r'PNL-\d+', panel_match.group(1))),
+                      'Electrical Panel Board for ATM Signs'))
+    return [{'Item': item, 'Quantity': quantity, 'Description': description}
+            for item, quantity, description in items if quantity > 0]
+
+class TestBomMatcher(unittest.TestCase):
+
+    def test_default_catalog_counts(self):
+        """Test counting the default catalog in one pass"""
+        counts = BomMatcher().count(SAMPLE_TEXT)
+        self.assertEqual(counts['ATM Sign Type 1'], 1)
+        self.assertEqual(counts['ATM Sign Type 2'], 1)
+        self.assertEqual(counts['ATM Sign Type 3'], 1)
+        self.assertEqual(counts['CCTV Camera (PTZ)'], 2)
+        self.assertEqual(counts['ITS Pole'], 1)
+
+        # Panels are only counted inside the panel schedule section
+        self.assertEqual(counts['Panel Board'], 2)
+
+    def test_rows_follow_catalog_order(self):
+        """Test BOM rows skip missing items and keep catalog order"""
+        rows = count_bom_items(SAMPLE_TEXT)
+        items = [row['Item'] for row in rows]
+        self.assertEqual(items[:3], ['ATM Sign Type 1', 'ATM Sign Type 2', 'ATM Sign Type 3'])
+        self.assertNotIn('Radar Detector System', items)
+
+    def test_output_matches_baseline(self):
+        """Test the shared matcher gives the rows of the former per-item scans"""
+        for text in PARITY_TEXTS:
+            with self.subTest(text=text):
+                expected = baseline_bom_items(text)
+                self.assertEqual(count_bom_items(text), expected)
+                self.assertEqual(FuzzyBomMatcher().to_rows(FuzzyBomMatcher().count(text)), expected)
+                chunks = [PageChunk('plans.txt', 1, text[i:i + 5]) for i in range(0, len(text), 5)]
+                tally = BomMatcher().count_stream(chunks, overlap=64)
+                self.assertEqual(BomMatcher().to_rows(tally.counts), expected)
+
+    def test_controller_is_opt_in(self):
+        """Test sign controllers are only counted by catalogs that add them"""
+        text = PARITY_TEXTS[-1]
+        self.assertEqual(BomMatcher().count(text)['ATM Sign Controller'], 0)
+        self.assertEqual(BomMatcher(DEFAULT_BOM_CATALOG + [ATM_SIGN_CONTROLLER]).count(text)['ATM Sign Controller'], 1)
+
+    def test_custom_catalog(self):
+        """Test literal catalog items are escaped"""
+        matcher = BomMatcher([BomItem('Pole', 'POLE (80 FEET)')], sections=[])
+        self.assertEqual(matcher.count('POLE (80 FEET) POLE 80 FEET')['Pole'], 1)
+
+        with self.assertRaises(ValueError):
+            BomMatcher([BomItem('Panel', 'PNL', section='missing')], sections=[])
+
+class TestBomStreaming(unittest.TestCase):
+
+    def test_small_chunks_match_single_pass(self):
+        """Test matches straddling chunk boundaries are counted exactly once"""
+        matcher = BomMatcher()
+        chunks = [PageChunk('plans.txt', 1, SAMPLE_TEXT[i:i + 7])
+                  for i in range(0, len(SAMPLE_TEXT), 7)]
+        tally = matcher.count_stream(chunks, overlap=64)
+        self.assertEqual(tally.counts, matcher.count(SAMPLE_TEXT))
+
+    def test_sheet_attribution(self):
+        """Test BOM rows cite the pages their hits came from"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'plans.txt')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write("\n\n--- PAGE 1 ---\n\nCCTV CAMERA (PTZ)\n")
+                f.write("\n\n--- PAGE 3 ---\n\nCCTV CAMERA (PTZ)\nRADAR DETECTOR SYSTEM\n")
+
+            rows = {row['Item']: row for row in count_bom_items_in_files([path])}
+
+        self.assertEqual(rows['CCTV Camera (PTZ)']['Quantity'], 2)
+        self.assertEqual(rows['CCTV Camera (PTZ)']['Sheets'], 'plans.txt p1, p3')
+        self.assertEqual(rows['Radar Detector System']['Sheets'], 'plans.txt p3')
+
+class TestFuzzyBomMatcher(unittest.TestCase):
+
+    def test_ocr_errors_are_matched(self):
+        """Test garbled item names are counted with their edit distance"""
+        text = "ATM TYPE l SIGN\nCCTV CAMERA (P1Z)\nCCTV CAMERA (PTZ)"
+        hits = list(FuzzyBomMatcher().finditer(text))
+        self.assertEqual([(hit.item, hit.distance) for hit in hits], [
+            ('ATM Sign Type 1', 1),
+            ('CCTV Camera (PTZ)', 1),
+            ('CCTV Camera (PTZ)', 0),
+        ])
+        self.assertEqual(hits[1].text, 'CCTV CAMERA (P1Z)')
+
+    def test_digits_are_not_substituted(self):
+        """Test a different digit is never read as an OCR error"""
+        counts = FuzzyBomMatcher().count("ATM TYPE 2 SIGN ATM TYPE 4 SIGN")
+        self.assertEqual(counts['ATM Sign Type 2'], 1)
+        self.assertEqual(counts['ATM Sign Type 1'], 0)
+        self.assertIsNone(bounded_edit_distance('TYPE 1', 'TYPE 4', 1))
+        self.assertEqual(bounded_edit_distance('TYPE 1', 'TYPE L', 1), (6, 1))
+
+    def test_digits_only_replace_lookalikes(self):
+        """Test a digit is never replaced by an unrelated letter, a space or an extra digit"""
+        matcher = FuzzyBomMatcher()
+        for text in ("ATM TYPE SIGNS", "ATM TYPE 12 SIGN", "ATM TYPE A SIGN"):
+            self.assertEqual(list(matcher.finditer(text)), [], text)
+        self.assertIsNone(bounded_edit_distance('TYPE 1 SIGN', 'TYPE 12 SIGN', 2))
+        self.assertEqual(bounded_edit_distance('TYPE 5', 'TYPE S', 1), (6, 1))
+    
+    def test_letters_read_as_digits(self):
+        """Test letters misread as their lookalike digits are matched"""
+        hits = list(FuzzyBomMatcher().finditer("CCTV CAMERA (P1Z) ITS P0LE (80 FEET)"))
+        self.assertEqual([(hit.item, hit.distance) for hit in hits], [
+            ('CCTV Camera (PTZ)', 1),
+            ('ITS Pole', 1),
+        ])
+    
+    def test_only_identifying_digits_are_fixed(self):
+        """Test digits shared by no sibling item may be misread as other digits"""
+        counts = FuzzyBomMatcher().count("ITS POLE (60 FEET) ATM TYPE 3 SIGN")
+        self.assertEqual(counts['ITS Pole'], 1)
+        self.assertEqual(counts['ATM Sign Type 1'], 0)
+        self.assertEqual(counts['ATM Sign Type 2'], 0)
+
+    def test_exact_text_matches_exact_matcher(self):
+        """Test the fuzzy matcher agrees with the exact matcher on clean text"""
+        self.assertEqual(FuzzyBomMatcher().count(SAMPLE_TEXT), BomMatcher().count(SAMPLE_TEXT))
+
+if __name__ == "__main__":
+    unittest.main()
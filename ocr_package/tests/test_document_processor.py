@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import fitz
+from ocr.advanced import document_processor
+from ocr.advanced.document_processor import (
+    locate_candidate_regions, refine_low_confidence_words, process_page_two_pass, _swap_words,
+    DocumentElement, TABLE_EXTENT
+)
+from ocr.core.preprocessing import PreprocessConfig
+from ocr.core.profiles import OcrProfile
+
+class TestTwoPassRegions(unittest.TestCase):
+    
+    def setUp(self):
+        self.doc = fitz.open()
+        self.page = self.doc.new_page(width=792, height=612)
+    
+    def tearDown(self):
+        self.doc.close()
+    
+    def test_locates_keywords_and_tables(self):
+        """Test only BOM keyword lines and table headings become regions"""
+        self.page.insert_text((50, 100), "GENERAL NOTES")
+        self.page.insert_text((50, 300), "INSTALL ITS POLE (80 FEET) AT STA 10+00")
+        self.page.insert_text((400, 100), "SIGN SCHEDULE")
+        self.page.insert_text((400, 130), "ATM TYPE 1 SIGN")
+        
+        regions, coarse_pixels = locate_candidate_regions(self.page)
+        
+        # Text layer pages need no coarse OCR
+        self.assertEqual(coarse_pixels, 0)
+        self.assertEqual(len(regions), 2)
+        table, keyword = regions
+        # The sign type below the heading is merged into the table region
+        self.assertLess(table.x0, 400)
+        self.assertEqual(table.x1, 792)
+        self.assertGreater(table.height, TABLE_EXTENT[1])
+        self.assertTrue(keyword.contains(fitz.Point(60, 298)))
+        self.assertLess(keyword.height, 60)
+        self.assertFalse(any(region.contains(fitz.Point(60, 98)) for region in regions))
+    
+    def test_blank_page_has_no_regions(self):
+        """Test pages without keywords are skipped by the fine pass"""
+        self.page.insert_text((50, 100), "GENERAL NOTES")
+        regions, _ = locate_candidate_regions(self.page)
+        self.assertEqual(regions, [])
+
+    def test_regions_on_rotated_page(self):
+        """Test regions of a page turned upright are in the rotated space clips use"""
+        self.page.insert_text((50, 300), "INSTALL ITS POLE (80 FEET) AT STA 10+00")
+        self.page.set_rotation(90)
+        
+        regions, _ = locate_candidate_regions(self.page)
+        
+        self.assertEqual(len(regions), 1)
+        self.assertTrue(regions[0].contains(fitz.Point(60, 298) * self.page.rotation_matrix))
+        self.assertTrue(self.page.rect.contains(regions[0]))
+        pix = self.page.get_pixmap(clip=regions[0], colorspace=fitz.csGRAY)
+        self.assertLess(min(pix.samples), 128)
+        # Taller than wide: the line runs down the rotated page
+        self.assertGreater(regions[0].height, regions[0].width)
+
+    def test_two_pass_regions_use_profile_and_preprocessing(self):
+        """Test the fine pass OCRs regions with the caller's profile and preprocessing"""
+        self.page.insert_text((50, 300), "INSTALL ITS POLE (80 FEET) AT STA 10+00")
+        with tempfile.TemporaryDirectory() as tmp:
+            pdf_path = os.path.join(tmp, "plan.pdf")
+            self.doc.save(pdf_path)
+            profile = OcrProfile(name="sheets", psm=6)
+            preprocessing = PreprocessConfig(threshold="otsu")
+            with mock.patch.object(document_processor, "extract_text_with_positions",
+                                   return_value=("ITS POLE", [])) as ocr, \
+                 mock.patch.object(document_processor, "preprocess_image_for_ocr",
+                                   side_effect=lambda img, config=None: img) as preprocess:
+                elements = process_page_two_pass((pdf_path, 0, 72, 150, None, preprocessing, profile, None))
+        self.assertEqual(elements[0].text, "ITS POLE")
+        self.assertIs(ocr.call_args.args[1], profile)
+        self.assertIs(preprocess.call_args.args[1], preprocessing)
+
+class TestLowConfidenceRefinement(unittest.TestCase):
+    
+    def test_swap_words_in_reading_order(self):
+        """Test re-read words replace the right occurrence in the page text"""
+        text = "ATM TYPE l SIGN\nATM TYPE l SIGN"
+        swaps = [("l", "1"), ("l", "2")]
+        self.assertEqual(_swap_words(text, swaps), "ATM TYPE 1 SIGN\nATM TYPE 2 SIGN")
+    
+    def test_confident_words_are_not_reread(self):
+        """Test pages without low-confidence words need no rendering"""
+        element = DocumentElement(element_type="page", text="ITS POLE", metadata={
+            "page_number": 0,
+            "text_positions": [
+                {'text': 'ITS', 'x': 10, 'y': 10, 'width': 30, 'height': 10, 'confidence': 95},
+                {'text': 'POLE', 'x': 45, 'y': 10, 'width': 40, 'height': 10, 'confidence': -1},
+            ]
+        })
+        self.assertEqual(refine_low_confidence_words(None, element, 150), 0)
+        self.assertEqual(element.metadata["refined_words"], 0)
+        self.assertEqual(element.text, "ITS POLE")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import os
+import time
+import shutil
+import tempfile
+import unittest
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+import fitz
+from ocr.batch.processors import batch_process
+from ocr.core import metrics, processor
+from ocr.core.events import pool_kwargs
+from ocr.core.metrics import MetricsExporter, MetricsRegistry
+from ocr.core.progress import report
+from ocr.core.raster_cache import PageRasterCache
+
+def ocr_in_worker(page):
+    report("start", f"doc.pdf:{page}")
+    metrics.observe("ocr_ocr_seconds", 0.3)
+    metrics.set_max("ocr_worker_peak_rss_bytes", 1000 * page)
+    report("done" if page % 4 else "failed", f"doc.pdf:{page}")
+    return page
+
+def samples(text):
+    """Metric lines of an exposition as {name with labels: value}"""
+    return dict(line.rsplit(" ", 1) for line in text.splitlines() if line and not line.startswith("#"))
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def test_exposition_format(self):
+        """Test counters, gauges and histograms render in the Prometheus text format"""
+        registry = MetricsRegistry()
+        registry.apply(("metric", "inc", "ocr_pages_skipped_total", 2, {"reason": "duplicate"}))
+        registry.apply(("metric", "observe", "ocr_render_seconds", 0.2, {}))
+        registry.apply(("metric", "observe", "ocr_render_seconds", 7.0, {}))
+        registry.apply(("metric", "set", "ocr_queue_depth", 5, {}))
+        registry.apply(("page", "start", "a.pdf:1", 100.0))
+        registry.apply(("page", "start", "a.pdf:2", 100.0))
+        registry.apply(("page", "done", "a.pdf:1", 123.5))
+        text = registry.render()
+        self.assertIn("# TYPE ocr_render_seconds histogram", text)
+        values = samples(text)
+        self.assertEqual(values['ocr_pages_skipped_total{reason="duplicate"}'], "2")
+        self.assertEqual(values['ocr_render_seconds_bucket{le="0.25"}'], "1")
+        self.assertEqual(values['ocr_render_seconds_bucket{le="10"}'], "2")
+        self.assertEqual(values['ocr_render_seconds_bucket{le="+Inf"}'], "2")
+        self.assertEqual(values["ocr_render_seconds_sum"], "7.2")
+        self.assertEqual(values["ocr_queue_depth"], "5")
+        self.assertEqual(values["ocr_pages_processed_total"], "1")
+        self.assertEqual(values["ocr_page_failures_total"], "0")
+        self.assertEqual(values["ocr_pages_in_progress"], "1")
+        self.assertEqual(values["ocr_last_page_timestamp_seconds"], "123.5")
+
+class TestMetricsExporter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_worker_metrics_over_http_and_textfile(self):
+        """Test samples from pool workers are aggregated and exported both ways"""
+        textfile = os.path.join(self.tmp, "ocr.prom")
+        with MetricsExporter(port=0, textfile=textfile) as exporter:
+            with ProcessPoolExecutor(max_workers=2, **pool_kwargs()) as executor:
+                list(executor.map(ocr_in_worker, range(1, 9)))
+            host, port = exporter.address
+            # Worker samples arrive through the event queue shortly after the pool finishes
+            deadline = time.monotonic() + 5
+            while True:
+                with urllib.request.urlopen(f"http://{host}:{port}/metrics") as response:
+                    self.assertIn("text/plain", response.headers["Content-Type"])
+                    values = samples(response.read().decode("utf-8"))
+                if values["ocr_ocr_seconds_count"] == "8" or time.monotonic() > deadline:
+                    break
+                time.sleep(0.05)
+        self.assertEqual(values["ocr_pages_processed_total"], "6")
+        self.assertEqual(values["ocr_page_failures_total"], "2")
+        self.assertEqual(values["ocr_ocr_seconds_count"], "8")
+        self.assertEqual(values["ocr_worker_peak_rss_bytes"], "8000")
+
+        with open(textfile) as f:
+            self.assertEqual(samples(f.read())["ocr_pages_processed_total"], "6")
+        self.assertEqual(os.listdir(self.tmp), ["ocr.prom"])
+
+    def test_raster_cache_hits(self):
+        """Test the raster cache counts hits and misses while an exporter runs"""
+        pdf_path = os.path.join(self.tmp, "sheet.pdf")
+        doc = fitz.open()
+        doc.new_page(width=72, height=72)
+        doc.save(pdf_path)
+        doc.close()
+        cache = PageRasterCache(os.path.join(self.tmp, "cache"))
+        with MetricsExporter() as exporter:
+            for _ in range(3):
+                cache.get_or_render(pdf_path, 0, 72)
+        values = samples(exporter.registry.render())
+        self.assertEqual(values["ocr_raster_cache_misses_total"], "1")
+        self.assertEqual(values["ocr_raster_cache_hits_total"], "2")
+
+    def test_failed_file_counts_its_pages_once(self):
+        """Test a file failing on the default path counts each of its pages as one failure"""
+        pdf_path = os.path.join(self.tmp, "plans.pdf")
+        doc = fitz.open()
+        for _ in range(3):
+            doc.new_page(width=72, height=72)
+        doc.save(pdf_path)
+        doc.close()
+        with MetricsExporter() as exporter:
+            with mock.patch.object(processor, "convert_from_path", side_effect=RuntimeError("no poppler")):
+                batch_process([pdf_path], output_dir=os.path.join(self.tmp, "out"))
+        values = samples(exporter.registry.render())
+        self.assertEqual(values["ocr_page_failures_total"], "3")
+        self.assertEqual(values['ocr_files_total{status="failed"}'], "1")
+
+    def test_nothing_recorded_without_exporter(self):
+        """Test recording is a no-op when no exporter runs"""
+        self.assertEqual(pool_kwargs(), {})
+        metrics.inc("ocr_pages_skipped_total", reason="duplicate")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import fitz
+import numpy as np
+from ocr.core.orientation import (
+    projection_rotation, apply_page_rotation, resolve_orientation, render_for_orientation,
+    upright_words, unrotated_rect
+)
+
+def text_lines(shape=(400, 600)):
+    """Synthetic page with horizontal lines of text-like ink."""
+    page = np.full(shape, 255, np.uint8)
+    for y in range(30, shape[0] - 30, 24):
+        for x in range(40, shape[1] - 60, 70):
+            page[y:y + 9, x:x + 50] = 0
+    return page
+
+def line_drawing(shape=(400, 600)):
+    """Synthetic plan drawing: border, vertical rules and dimension ticks, little text."""
+    page = np.full(shape, 255, np.uint8)
+    page[10:12, 10:-10] = page[-12:-10, 10:-10] = 0
+    page[10:-10, 10:12] = page[10:-10, -12:-10] = 0
+    for x in range(40, shape[1] - 40, 16):
+        page[40:shape[0] - 80, x:x + 2] = 0
+        page[shape[0] - 70:shape[0] - 50, x + 6] = 0
+    page[shape[0] - 40:shape[0] - 31, 40:90] = 0
+    return page
+
+class TestOrientation(unittest.TestCase):
+    
+    def test_projection_fallback(self):
+        """Test rotated text lines are told apart from upright ones"""
+        page = text_lines()
+        self.assertEqual(projection_rotation(page), 0)
+        self.assertEqual(projection_rotation(np.ascontiguousarray(np.rot90(page))), 90)
+    
+    def test_line_drawings_are_not_rotated(self):
+        """Test borders, rules and dimension lines do not count as rotated text"""
+        self.assertEqual(projection_rotation(line_drawing()), 0)
+        self.assertEqual(projection_rotation(np.full((400, 600), 255, np.uint8)), 0)
+    
+    def test_fixed_rotation_turns_page_upright(self):
+        """Test a fixed rotation is applied to the page before rendering"""
+        doc = fitz.open()
+        page = doc.new_page(width=300, height=200)
+        self.assertEqual(apply_page_rotation(page, None), 0)
+        self.assertEqual(apply_page_rotation(page, 90), 90)
+        self.assertEqual(page.rotation, 90)
+        self.assertEqual(render_for_orientation(page).shape, (300, 200))
+        doc.close()
+    
+    def test_text_coordinates_after_rotation(self):
+        """Test text-layer boxes are mapped to the rotated space and back for text clips"""
+        doc = fitz.open()
+        page = doc.new_page(width=300, height=200)
+        page.insert_text((20, 50), "TYPE 3")
+        apply_page_rotation(page, 90)
+        (rect, word, _, _), _ = upright_words(page)
+        self.assertEqual(word, "TYPE")
+        self.assertTrue(page.rect.contains(rect))
+        self.assertGreater(rect.height, rect.width)
+        pix = page.get_pixmap(clip=rect, colorspace=fitz.csGRAY)
+        self.assertLess(min(pix.samples), 128)
+        self.assertIn("TYPE", page.get_text('text', clip=unrotated_rect(page, rect)))
+        doc.close()
+    
+    def test_resolve_orientation_passthrough(self):
+        """Test options other than sample reach the page workers unchanged"""
+        self.assertIsNone(resolve_orientation("plans.pdf", None))
+        self.assertEqual(resolve_orientation("plans.pdf", "auto"), "auto")
+        self.assertEqual(resolve_orientation("plans.pdf", 270), 270)
+
+if __name__ == '__main__':
+    unittest.main()
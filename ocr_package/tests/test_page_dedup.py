@@ -0,0 +1,128 @@
+import os
+import pickle
+import tempfile
+import unittest
+from unittest import mock
+import cv2
+import numpy as np
+from ocr.core import page_dedup
+from ocr.core.page_dedup import PageHashIndex, dhash, hamming_distance, verify_sample, verify_boxes
+from ocr.core.profiles import OcrProfile
+
+def make_sheet(seed, noise=0):
+    """Synthetic binarized sheet: ruled boxes at seeded positions plus scan noise."""
+    rng = np.random.default_rng(seed)
+    sheet = np.full((400, 600), 255, np.uint8)
+    for _ in range(12):
+        x, y = rng.integers(0, 500), rng.integers(0, 320)
+        sheet[y:y + 80, x:x + 100] = 0
+    if noise:
+        speckle = np.random.default_rng(seed + 1000).random(sheet.shape) < noise
+        sheet[speckle] = 255 - sheet[speckle]
+    return sheet
+
+def make_sign_sheet(rows):
+    """Synthetic SR-81 sign plan: the same border and title block around different schedule rows."""
+    sheet = np.full((1100, 1700), 255, np.uint8)
+    cv2.rectangle(sheet, (20, 20), (1680, 1080), 0, 4)
+    cv2.rectangle(sheet, (20, 940), (1680, 1080), 0, 3)
+    cv2.putText(sheet, "SR-81 ATCMTD SIGN PLAN", (60, 1020), cv2.FONT_HERSHEY_SIMPLEX, 1.2, 0, 3)
+    for i, row in enumerate(rows):
+        cv2.putText(sheet, row, (60, 90 + 40 * i), cv2.FONT_HERSHEY_SIMPLEX, 0.8, 0, 2)
+    return sheet
+
+class TestPageDedup(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        # Tesseract is not needed: body verification has its own test
+        self.index = PageHashIndex(os.path.join(self.tmp_dir.name, "sheets.db"), verify=False)
+    
+    def tearDown(self):
+        self.index.close()
+        self.tmp_dir.cleanup()
+    
+    def test_dhash_tolerates_scan_noise(self):
+        """Test noisy rescans hash close together and different sheets far apart"""
+        clean = dhash(make_sheet(1))
+        self.assertLessEqual(hamming_distance(clean, dhash(make_sheet(1, noise=0.01))), 6)
+        self.assertGreater(hamming_distance(clean, dhash(make_sheet(2))), 20)
+    
+    def test_reuses_near_duplicate(self):
+        """Test a rescanned sheet reuses the stored text and positions"""
+        positions = [{'text': 'BARRIER', 'x': 100, 'y': 40, 'width': 80, 'height': 20, 'confidence': 90}]
+        page_hash, entry = self.index.find(make_sheet(1))
+        self.assertIsNone(entry)
+        self.index.add(page_hash, "BARRIER DETAILS", positions, dpi=200, source="a.pdf", page=3)
+        
+        _, entry = self.index.find(make_sheet(1, noise=0.01))
+        self.assertEqual((entry.source, entry.page, entry.text), ("a.pdf", 3, "BARRIER DETAILS"))
+        self.assertEqual(entry.scaled_positions(100)[0]['x'], 50)
+        
+        _, entry = self.index.find(make_sheet(2))
+        self.assertIsNone(entry)
+    
+    def test_same_frame_different_body_is_not_reused(self):
+        """Test sheets sharing a border and title block but not their schedule are told apart"""
+        first = make_sign_sheet(["ATM TYPE 3 SIGN  STA 120+50  QTY 4", "ATM TYPE 1 SIGN  STA 130+00  QTY 2"])
+        second = make_sign_sheet(["ATM TYPE 2 SIGN  STA 135+00  QTY 12", "ATM TYPE 1 SIGN  STA 131+00  QTY 2"])
+        self.assertLessEqual(hamming_distance(dhash(first), dhash(second)), 6)
+        signature, _ = self.index.find(first)
+        self.index.add(signature, "ATM TYPE 3 SIGN STA 120+50 QTY 4")
+        _, entry = self.index.find(second)
+        self.assertIsNone(entry)
+
+    def test_verify_needs_every_number(self):
+        """Test verification rejects a sheet whose numbers differ from the stored text"""
+        stored = "SIGN SCHEDULE\nATM TYPE 3 SIGN STA 120+50 QTY 4\nSR-81 ATCMTD SIGN PLAN"
+        gray = np.full((100, 100), 255, np.uint8)
+        boxes = [(0, 0, 100, 100)]
+        with mock.patch.object(page_dedup.pytesseract, 'image_to_string') as ocr:
+            ocr.return_value = "SIGN SCHEDULE\nATM TYPE 2 SIGN STA 120+50 QTY 4"
+            self.assertFalse(verify_sample(gray, stored, boxes))
+            ocr.return_value = "SIGN SCHEDULE\nATM TYPE 3 SIGN STA 120+50 QTY 4"
+            self.assertTrue(verify_sample(gray, stored, boxes))
+        self.assertFalse(PageHashIndex(os.path.join(self.tmp_dir.name, "other.db")).verify)
+
+    def test_verify_reads_small_numbered_regions_with_profile(self):
+        """Test verification OCRs only the stored words with digits, with the page's profile"""
+        first = make_sign_sheet(["ATM TYPE 3 SIGN  STA 120+50  QTY 4"])
+        positions = [
+            {'text': 'ATM', 'x': 60, 'y': 72, 'width': 60, 'height': 20, 'confidence': 90},
+            {'text': '3', 'x': 200, 'y': 72, 'width': 16, 'height': 20, 'confidence': 90},
+            {'text': '120+50', 'x': 400, 'y': 72, 'width': 100, 'height': 20, 'confidence': 90},
+        ]
+        index = PageHashIndex(os.path.join(self.tmp_dir.name, "verified.db"), verify=True)
+        signature, _ = index.find(first, 200)
+        index.add(signature, "ATM TYPE 3 SIGN STA 120+50 QTY 4", positions, dpi=200)
+        profile = OcrProfile(name="sheets", psm=6)
+        
+        with mock.patch.object(page_dedup.pytesseract, 'image_to_string', return_value="3") as ocr:
+            _, entry = index.find(first, 200, profile)
+        self.assertIsNotNone(entry)
+        self.assertEqual(ocr.call_count, 2)
+        self.assertEqual(ocr.call_args.kwargs, profile.tesseract_kwargs())
+        pixels = sum(call.args[0].width * call.args[0].height for call in ocr.call_args_list)
+        self.assertLess(pixels, first.size / 100)
+        
+        with mock.patch.object(page_dedup.pytesseract, 'image_to_string', return_value="2"):
+            _, entry = index.find(first, 200, profile)
+        self.assertIsNone(entry)
+        index.close()
+
+    def test_verify_boxes_without_positions_are_tiles(self):
+        """Test sheets stored without word positions are verified on a few inked tiles"""
+        boxes = verify_boxes(make_sign_sheet(["ATM TYPE 3 SIGN  STA 120+50  QTY 4"]))
+        self.assertTrue(0 < len(boxes) <= page_dedup.VERIFY_TILES)
+        for x0, y0, x1, y1 in boxes:
+            self.assertLessEqual((x1 - x0) * (y1 - y0), 1700 * 1100 / page_dedup.VERIFY_GRID ** 2)
+
+    def test_index_is_picklable(self):
+        """Test the index can be handed to worker processes"""
+        self.assertEqual(len(self.index), 0)
+        copy = pickle.loads(pickle.dumps(self.index))
+        self.assertEqual(len(copy), 0)
+        copy.close()
+
+if __name__ == '__main__':
+    unittest.main()
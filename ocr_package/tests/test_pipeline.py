@@ -0,0 +1,89 @@
+import os
+import time
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import fitz
+from ocr.core.pipeline import PagePipeline, split_workers
+from ocr.core.processor import render_text_page
+
+SHM_DIR = "/dev/shm"
+
+def render_index(task):
+    return np.full((20, 30), task, dtype=np.uint8), {"page": task}
+
+def read_slowly(image, meta, task):
+    time.sleep(0.05)
+    return int(image[0, 0]), image.shape, meta["page"], task
+
+def render_or_fail(task):
+    if task == 3:
+        raise ValueError("bad page")
+    return render_index(task)
+
+def read_pixel(image, meta, task):
+    return int(image[0, 0])
+
+def shared_blocks():
+    return {name for name in os.listdir(SHM_DIR) if name.startswith("psm_")} if os.path.isdir(SHM_DIR) else set()
+
+class TestSplitWorkers(unittest.TestCase):
+
+    def test_split_workers(self):
+        """Test OCR gets most workers and each stage at least one"""
+        self.assertEqual(split_workers(1), (1, 1))
+        self.assertEqual(split_workers(4), (1, 3))
+        self.assertEqual(split_workers(8), (2, 6))
+
+class TestPagePipeline(unittest.TestCase):
+
+    def test_results_in_task_order(self):
+        """Test every page is rendered, handed over and OCRed, in task order"""
+        before = shared_blocks()
+        pipeline = PagePipeline(render_index, read_slowly, render_workers=2, ocr_workers=2)
+        results = pipeline.run(range(10))
+        self.assertEqual(results, [(i, (20, 30), i, i) for i in range(10)])
+        self.assertEqual(pipeline.stats["pages"], 10)
+        # Every block was freed
+        self.assertEqual(shared_blocks() - before, set())
+
+    def test_backpressure_bounds_buffered_pages(self):
+        """Test fast rendering waits for slow OCR instead of buffering every page"""
+        pipeline = PagePipeline(render_index, read_slowly, render_workers=2, ocr_workers=1, queue_size=1)
+        pipeline.run(range(12))
+        self.assertEqual(pipeline.max_buffered, 2)
+        self.assertLessEqual(pipeline.stats["peak_buffered"], 2)
+        self.assertGreater(pipeline.stats["render_stalled_seconds"], 0)
+
+    def test_render_error_propagates(self):
+        """Test a failed render stops the pipeline and frees the buffered pages"""
+        before = shared_blocks()
+        pipeline = PagePipeline(render_or_fail, read_pixel, render_workers=1, ocr_workers=1)
+        with self.assertRaises(ValueError):
+            pipeline.run(range(6))
+        self.assertEqual(shared_blocks() - before, set())
+
+class TestStagedRender(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.pdf_path = os.path.join(self.tmp, "sheet.pdf")
+        doc = fitz.open()
+        page = doc.new_page(width=144, height=72)
+        page.insert_text((10, 40), "SIGN SCHEDULE")
+        doc.save(self.pdf_path)
+        doc.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_render_text_page(self):
+        """Test the render stage returns the preprocessed raster and its DPI"""
+        image, meta = render_text_page((self.pdf_path, 1, 144, None, None, None, False))
+        self.assertEqual(image.shape, (144, 288))
+        self.assertEqual(image.dtype, np.uint8)
+        self.assertEqual((meta["page"], meta["dpi"], meta["dpi_choice"]), (1, 144, None))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+from ocr.advanced.positions_format import PositionsFile, write_positions_file, VERSION, HEADER, MAGIC
+from ocr.advanced.table_extractor import TableDetector
+
+POSITIONS = [
+    {'text': 'ATM', 'x': 10, 'y': 20, 'width': 30, 'height': 8, 'confidence': 91},
+    {'text': 'TYPE', 'x': 45, 'y': 20, 'width': 36, 'height': 8, 'confidence': 88},
+    {'text': 'Ø 3"', 'x': 90, 'y': 21, 'width': 20, 'height': 8, 'confidence': 47},
+]
+
+class TestPositionsFormat(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def test_round_trip(self):
+        """Test binary positions read back unchanged"""
+        path = os.path.join(self.tmp_dir.name, "page_1_text_positions.bin")
+        write_positions_file(path, POSITIONS)
+        
+        positions = PositionsFile(path)
+        self.assertEqual(len(positions), 3)
+        self.assertEqual(positions.text(2), 'Ø 3"')
+        self.assertEqual(positions.to_text_positions(), POSITIONS)
+        # Same type whichever reader is used
+        self.assertIsInstance(positions.to_text_positions()[0]['confidence'], int)
+        self.assertIsInstance(positions.columns()[5][0], int)
+        del positions
+    
+    def test_table_detector_reads_both_formats(self):
+        """Test TableDetector reads binary and legacy text positions alike"""
+        bin_path = os.path.join(self.tmp_dir.name, "page_1_text_positions.bin")
+        txt_path = os.path.join(self.tmp_dir.name, "page_1_text_positions.txt")
+        write_positions_file(bin_path, POSITIONS[:2])
+        with open(txt_path, "w", encoding="utf-8") as f:
+            for pos in POSITIONS[:2]:
+                f.write(f"Text: {pos['text']}, Position: ({pos['x']}, {pos['y']}), "
+                        f"Size: {pos['width']}x{pos['height']}, Confidence: {pos['confidence']}\n")
+        
+        detector = TableDetector()
+        from_binary = detector.parse_text_positions_file(bin_path)
+        from_text = detector.parse_text_positions_file(txt_path)
+        self.assertEqual([repr(e) for e in from_binary], [repr(e) for e in from_text])
+    
+    def test_unknown_version_rejected(self):
+        """Test files with a newer version are refused"""
+        path = os.path.join(self.tmp_dir.name, "future.bin")
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION + 1, 0, 0))
+        with self.assertRaises(ValueError):
+            PositionsFile(path)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import cv2
+import numpy as np
+from ocr.core.preprocessing import (
+    PreprocessConfig, PreprocessPipeline, preprocess, estimate_skew, remove_border, benchmark
+)
+
+def make_page(skew=0.0):
+    """Synthetic page: rows of dark text bars on a light background with a shaded half."""
+    page = np.full((600, 900), 235, np.uint8)
+    for y in range(60, 540, 30):
+        page[y:y + 8, 80:820] = 60
+    page[:, 450:] = (page[:, 450:] * 0.6).astype(np.uint8)  # Uneven illumination
+    if skew:
+        matrix = cv2.getRotationMatrix2D((450, 300), skew, 1.0)
+        page = cv2.warpAffine(page, matrix, (900, 600), borderValue=235)
+    return page
+
+class TestPreprocessing(unittest.TestCase):
+    
+    def test_default_matches_original_steps(self):
+        """Test the default pipeline is the global threshold at 150 plus a 3x3 median"""
+        rgb = np.dstack([make_page()] * 3)
+        expected = cv2.medianBlur(cv2.threshold(make_page(), 150, 255, cv2.THRESH_BINARY)[1], 3)
+        np.testing.assert_array_equal(preprocess(rgb), expected)
+    
+    def test_sauvola_handles_uneven_illumination(self):
+        """Test adaptive thresholding keeps the background white on the dark half"""
+        page = make_page()
+        global_result = preprocess(page)
+        sauvola_result = preprocess(page, PreprocessConfig(threshold="sauvola"))
+        # The shaded background (141) falls below the global threshold
+        self.assertEqual(global_result[20, 700], 0)
+        self.assertEqual(sauvola_result[20, 700], 255)
+        self.assertEqual(sauvola_result[64, 700], 0)
+    
+    def test_deskew(self):
+        """Test skew is estimated on the downsampled copy and corrected"""
+        self.assertAlmostEqual(estimate_skew(make_page(skew=2.0)), -2.0, delta=0.2)
+        self.assertEqual(estimate_skew(make_page()), 0.0)
+        
+        pipeline = PreprocessPipeline(PreprocessConfig(deskew=True, median_blur=0))
+        straightened = pipeline(make_page(skew=2.0))
+        self.assertAlmostEqual(estimate_skew(straightened), 0.0, delta=0.2)
+    
+    def test_remove_border(self):
+        """Test dark scan edges are whitened in place"""
+        binary = np.full((200, 300), 255, np.uint8)
+        binary[:, :6] = 0
+        binary[100, 50:60] = 0
+        self.assertIs(remove_border(binary), binary)
+        self.assertTrue((binary[:, :6] == 255).all())
+        self.assertEqual(binary[100, 55], 0)
+    
+    def test_benchmark_reports_each_stage(self):
+        """Test the benchmark reports milliseconds per megapixel per stage"""
+        results = benchmark(make_page(), PreprocessConfig(threshold="otsu", remove_border=True), repeat=1)
+        self.assertEqual(set(results), {'grayscale', 'threshold', 'border', 'denoise', 'total'})
+        self.assertGreaterEqual(results['total'], results['threshold'])
+
+if __name__ == '__main__':
+    unittest.main()
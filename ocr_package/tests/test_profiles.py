@@ -0,0 +1,54 @@
+import os
+import json
+import pickle
+import shutil
+import tempfile
+import unittest
+from ocr.core.preprocessing import PreprocessConfig
+from ocr.core.profiles import OcrProfile, save_profile, load_profile, list_profiles, tesseract_kwargs
+
+class TestProfiles(unittest.TestCase):
+    
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, "profiles.json")
+    
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+    
+    def test_tesseract_options(self):
+        """Test only the settings a profile fixes are passed to Tesseract"""
+        self.assertEqual(tesseract_kwargs(None), {})
+        self.assertEqual(OcrProfile().tesseract_kwargs(), {'lang': 'eng', 'config': ''})
+        profile = OcrProfile("plans", psm=6, oem=1, lang="eng+equ")
+        self.assertEqual(profile.tesseract_kwargs(), {'lang': 'eng+equ', 'config': '--psm 6 --oem 1'})
+    
+    def test_save_and_load(self):
+        """Test profiles are stored by name and round-trip with their preprocessing"""
+        fast = OcrProfile("fast", dpi=150, psm=6, preprocessing=PreprocessConfig(threshold="otsu"),
+                          notes={'quality': 0.93})
+        save_profile(fast, self.path)
+        save_profile(OcrProfile("careful", dpi=300), self.path)
+        save_profile(OcrProfile("fast", dpi=175), self.path)
+        
+        self.assertEqual(sorted(list_profiles(self.path)), ["careful", "fast"])
+        self.assertEqual(load_profile("fast", self.path).dpi, 175)
+        self.assertEqual(load_profile("careful", self.path).dpi, 300)
+        with self.assertRaises(KeyError):
+            load_profile("missing", self.path)
+        
+        single = os.path.join(self.test_dir, "fast.json")
+        with open(single, 'w') as f:
+            json.dump(fast.to_dict(), f)
+        loaded = load_profile(single)
+        self.assertEqual(loaded, fast)
+        self.assertEqual(loaded.preprocessing.threshold, "otsu")
+        self.assertEqual(loaded.notes, {'quality': 0.93})
+    
+    def test_picklable(self):
+        """Test profiles can be sent to worker processes"""
+        profile = OcrProfile("fast", psm=11)
+        self.assertEqual(pickle.loads(pickle.dumps(profile)), profile)
+
+if __name__ == '__main__':
+    unittest.main()
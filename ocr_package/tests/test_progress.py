@@ -0,0 +1,118 @@
+import io
+import os
+import json
+import time
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+import fitz
+from ocr.core.events import pool_kwargs
+from ocr.core.progress import ProgressTracker, report, page_key, format_duration
+from ocr.advanced.document_processor import process_document
+
+def process_in_worker(key):
+    report("start", key)
+    time.sleep(0.01)
+    report("done", key)
+    return key
+
+class TestProgressTracker(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_eta_is_weighted_by_page_size(self):
+        """Test the ETA divides the remaining weight, not pages, by the throughput"""
+        tracker = ProgressTracker()
+        tracker.add_pages({"a:1": 1.0, "a:2": 3.0, "a:3": 1.0})
+        now = time.time()
+        tracker.started = now - 10
+        tracker.handle(("done", "a:1", now - 5))
+        snapshot = tracker.snapshot(now)
+        self.assertEqual((snapshot["pages_done"], snapshot["pages_total"]), (1, 3))
+        self.assertAlmostEqual(snapshot["pages_per_second"], 0.1)
+        # One weight unit per 10 s, 4 units left
+        self.assertAlmostEqual(snapshot["eta_seconds"], 40.0)
+        self.assertEqual(snapshot["seconds_since_last_page"], 5.0)
+
+    def test_slowest_active_pages(self):
+        """Test the pages running longest are listed first"""
+        tracker = ProgressTracker(slowest=2)
+        now = time.time()
+        for key, started in (("a:1", now - 1), ("a:2", now - 30), ("a:3", now - 8)):
+            tracker.handle(("start", key, started))
+        tracker.handle(("done", "a:3", now))
+        snapshot = tracker.snapshot(now)
+        self.assertEqual([item["page"] for item in snapshot["active"]], ["a:2", "a:1"])
+        self.assertIn("slowest: a:2 30s", tracker.describe(snapshot))
+
+    def test_discard_counts_unfinished_pages_failed(self):
+        """Test a failed file's remaining pages stop counting towards the ETA"""
+        tracker = ProgressTracker()
+        pdf_path = os.path.join(self.tmp, "plans.pdf")
+        tracker.add_pages({page_key(pdf_path, 1): 1.0, page_key(pdf_path, 2): 1.0, "other.pdf:1": 1.0})
+        tracker.handle(("done", page_key(pdf_path, 1), time.time()))
+        tracker.discard(pdf_path)
+        snapshot = tracker.snapshot()
+        self.assertEqual((snapshot["pages_done"], snapshot["pages_failed"]), (1, 1))
+        files = {item["path"]: item for item in snapshot["files"]}
+        self.assertEqual(files[os.path.abspath(pdf_path)]["pages_failed"], 1)
+
+    def test_worker_events_and_status_file(self):
+        """Test pool workers report pages and the status file ends up finished"""
+        status_path = os.path.join(self.tmp, "status.json")
+        stream = io.StringIO()
+        tracker = ProgressTracker("test", status_path, stream, refresh_seconds=0.05)
+        keys = [f"doc.pdf:{n}" for n in range(1, 9)]
+        tracker.add_pages({key: 1.0 for key in keys})
+        with tracker:
+            with ProcessPoolExecutor(max_workers=2, **pool_kwargs()) as executor:
+                list(executor.map(process_in_worker, keys))
+        self.assertEqual(pool_kwargs(), {})
+
+        with open(status_path) as f:
+            status = json.load(f)
+        self.assertEqual(status["state"], "finished")
+        self.assertEqual((status["pages_done"], status["pages_total"], status["percent"]), (8, 8, 100.0))
+        self.assertEqual(status["eta_seconds"], 0.0)
+        self.assertEqual(os.listdir(self.tmp), ["status.json"])
+        # Not a terminal: one line when starting and one when finishing
+        self.assertIn("test: 8/8 pages (100.0%)", stream.getvalue().splitlines()[-1])
+
+    def test_format_duration(self):
+        self.assertEqual(format_duration(None), "--")
+        self.assertEqual(format_duration(42), "42s")
+        self.assertEqual(format_duration(185), "3m05s")
+        self.assertEqual(format_duration(7500), "2h05m")
+
+class TestDocumentProgress(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.pdf_path = os.path.join(self.tmp, "sheets.pdf")
+        doc = fitz.open()
+        doc.new_page(width=144, height=72)
+        doc.new_page(width=288, height=72)
+        doc.save(self.pdf_path)
+        doc.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_process_document_reports_every_page(self):
+        """Test every page of a document run reaches the tracker, weighted by its size"""
+        tracker = ProgressTracker()
+        process_document(self.pdf_path, dpi=72, num_workers=1, progress=tracker)
+        snapshot = tracker.snapshot()
+        self.assertEqual(snapshot["pages_total"], 2)
+        self.assertEqual(snapshot["pages_done"] + snapshot["pages_failed"], 2)
+        self.assertEqual(snapshot["active"], [])
+        weights = [tracker.weights[page_key(self.pdf_path, n)] for n in (1, 2)]
+        self.assertAlmostEqual(weights[1], weights[0] * 2)
+
+if __name__ == '__main__':
+    unittest.main()
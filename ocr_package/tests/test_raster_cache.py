@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+import fitz
+import numpy as np
+from ocr.core.raster_cache import PageRasterCache
+
+def invert(gray):
+    return 255 - gray
+
+class TestPageRasterCache(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.pdf_path = os.path.join(self.tmp_dir.name, "plans.pdf")
+        doc = fitz.open()
+        for i in range(3):
+            page = doc.new_page(width=200, height=100)
+            page.insert_text((20, 50), f"SHEET {i + 1}")
+        doc.save(self.pdf_path)
+        doc.close()
+        self.cache = PageRasterCache(os.path.join(self.tmp_dir.name, "cache"))
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def test_render_once(self):
+        """Test a page is rendered once and then memory-mapped"""
+        first = self.cache.get_or_render(self.pdf_path, 0, 72)
+        self.assertIsInstance(first, np.memmap)
+        self.assertEqual(first.shape, (100, 200))
+        self.assertFalse(first.flags.writeable)
+        
+        second = self.cache.get_or_render(self.pdf_path, 0, 72)
+        np.testing.assert_array_equal(first, second)
+        self.assertEqual(len(os.listdir(self.cache.cache_dir)), 1)
+        self.assertIsNone(self.cache.get(self.pdf_path, 0, 144))
+        del first, second
+    
+    def test_preprocessing_is_part_of_the_key(self):
+        """Test preprocessed rasters are cached separately"""
+        gray = self.cache.get_or_render(self.pdf_path, 1, 72)
+        inverted = self.cache.get_or_render(self.pdf_path, 1, 72, invert)
+        np.testing.assert_array_equal(inverted, 255 - gray)
+        self.assertTrue(self.cache.path_for(self.pdf_path, 1, 72, "invert").endswith("_invert.npy"))
+        del gray, inverted
+    
+    def test_size_limit_evicts_least_recently_used(self):
+        """Test the cache stays within its size limit"""
+        self.cache.get_or_render(self.pdf_path, 0, 72)
+        self.cache.max_bytes = 2 * self.cache.size()
+        for page_num in range(3):
+            self.cache.get_or_render(self.pdf_path, page_num, 72)
+            os.utime(self.cache.path_for(self.pdf_path, page_num, 72), (page_num, page_num))
+        
+        self.assertLessEqual(self.cache.size(), self.cache.max_bytes)
+        self.assertIsNone(self.cache.get(self.pdf_path, 0, 72))
+        self.assertIsNotNone(self.cache.get(self.pdf_path, 2, 72))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+from ocr.core import resources
+from ocr.core.preprocessing import PreprocessConfig
+from ocr.core.resources import (
+    ResourcePlan, ConcurrencyController, cgroup_cpu_limit, cgroup_memory, estimate_worker_bytes,
+    page_pixels, plan_resources, run_planned, WORKER_BASELINE_BYTES, BYTES_PER_PIXEL
+)
+
+GiB = 1024 ** 3
+ARCH_D = (2592, 1728)  # 36x24 inch sheet in points
+
+def write(root, name, content):
+    path = os.path.join(root, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(content)
+
+def square(x):
+    return x * x
+
+class TestCgroupLimits(unittest.TestCase):
+    
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        shutil.rmtree(self.root)
+    
+    def test_cgroup_v2(self):
+        """Test CPU quota and memory limit are read from cgroup v2 files"""
+        write(self.root, "cpu.max", "250000 100000\n")
+        write(self.root, "memory.max", str(4 * GiB))
+        write(self.root, "memory.current", str(GiB))
+        self.assertEqual(cgroup_cpu_limit(self.root), 2.5)
+        self.assertEqual(cgroup_memory(self.root), (4 * GiB, GiB))
+        
+        write(self.root, "cpu.max", "max 100000")
+        write(self.root, "memory.max", "max")
+        self.assertIsNone(cgroup_cpu_limit(self.root))
+        self.assertIsNone(cgroup_memory(self.root)[0])
+    
+    def test_cgroup_v1(self):
+        """Test cgroup v1 files, where unlimited memory is a huge number"""
+        write(self.root, "cpu/cpu.cfs_quota_us", "-1")
+        write(self.root, "cpu/cpu.cfs_period_us", "100000")
+        write(self.root, "memory/memory.limit_in_bytes", "9223372036854771712")
+        self.assertIsNone(cgroup_cpu_limit(self.root))
+        self.assertIsNone(cgroup_memory(self.root)[0])
+        
+        write(self.root, "cpu/cpu.cfs_quota_us", "400000")
+        write(self.root, "memory/memory.limit_in_bytes", str(2 * GiB))
+        self.assertEqual(cgroup_cpu_limit(self.root), 4.0)
+        self.assertEqual(cgroup_memory(self.root)[0], 2 * GiB)
+
+class TestPlanning(unittest.TestCase):
+    
+    def test_footprint_scales_with_dpi_squared(self):
+        """Test the per-worker estimate grows with page area x DPI^2"""
+        at_150 = estimate_worker_bytes(page_pixels(*ARCH_D, 150)) - WORKER_BASELINE_BYTES
+        at_300 = estimate_worker_bytes(page_pixels(*ARCH_D, 300)) - WORKER_BASELINE_BYTES
+        self.assertAlmostEqual(at_300 / at_150, 4.0, places=2)
+        self.assertEqual(at_300, 10800 * 7200 * BYTES_PER_PIXEL)
+        sauvola = estimate_worker_bytes(page_pixels(*ARCH_D, 300), PreprocessConfig(threshold="sauvola"))
+        self.assertGreater(sauvola, at_300 + WORKER_BASELINE_BYTES)
+    
+    def test_memory_limits_workers(self):
+        """Test large-format pages at 300 DPI get fewer workers than the cores allow"""
+        with mock.patch.object(resources, 'available_cpus', return_value=16), \
+             mock.patch.object(resources, 'available_memory', return_value=8 * GiB):
+            plan = plan_resources([ARCH_D] * 40, 300)
+            self.assertEqual(plan.limited_by, "memory")
+            self.assertLessEqual(plan.workers * plan.worker_bytes, 8 * GiB * 0.8)
+            self.assertGreaterEqual(plan.workers, 1)
+            self.assertEqual(plan.in_flight, plan.workers * 2)
+            
+            small = plan_resources([(612, 792)] * 40, 150)
+            self.assertEqual((small.workers, small.limited_by), (15, "cpu"))
+            self.assertEqual(small.in_flight, 30)
+            
+            few = plan_resources([(612, 792)] * 3, 150)
+            self.assertEqual((few.workers, few.limited_by), (3, "pages"))
+    
+    def test_requested_workers_capped_in_flight(self):
+        """Test an explicit worker count is kept but pages in flight fit the memory"""
+        with mock.patch.object(resources, 'available_cpus', return_value=16), \
+             mock.patch.object(resources, 'available_memory', return_value=8 * GiB):
+            plan = plan_resources([ARCH_D] * 40, 300, workers=12)
+        self.assertEqual((plan.workers, plan.limited_by), (12, "requested"))
+        self.assertLess(plan.in_flight, 12)
+
+class TestRuntimeAdjustment(unittest.TestCase):
+    
+    def test_controller_follows_measured_rss(self):
+        """Test pages in flight shrink when workers use more memory than estimated, and grow back"""
+        plan = ResourcePlan(workers=4, in_flight=4, worker_bytes=GiB, memory_budget=4 * GiB, cpus=4,
+                            limited_by="memory")
+        controller = ConcurrencyController(plan)
+        self.assertEqual(controller.observe(int(1.1 * GiB)), 4)  # Within tolerance
+        self.assertEqual(controller.observe(2 * GiB), 2)
+        self.assertEqual(controller.adjustments, 1)
+        self.assertEqual(controller.observe(None), 2)
+        
+        relaxed = ConcurrencyController(ResourcePlan(4, 2, 2 * GiB, 4 * GiB, 4, "memory"))
+        self.assertEqual(relaxed.observe(GiB // 2), 8)
+    
+    def test_run_planned_keeps_order(self):
+        """Test results come back in task order with bounded submission"""
+        plan = ResourcePlan(workers=2, in_flight=2, worker_bytes=GiB, memory_budget=None, cpus=2,
+                            limited_by="cpu")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            self.assertEqual(run_planned(executor, square, list(range(10)), plan),
+                             [x * x for x in range(10)])
+
+if __name__ == '__main__':
+    unittest.main()
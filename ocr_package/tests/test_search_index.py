@@ -0,0 +1,84 @@
+import os
+import json
+import tempfile
+import unittest
+from ocr.advanced.search_index import PlanSearchIndex, build_match_query
+
+class TestPlanSearchIndex(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        project_dir = os.path.join(self.tmp_dir.name, "SR-81")
+        os.makedirs(project_dir)
+        
+        self.text_path = os.path.join(project_dir, "plans.txt")
+        with open(self.text_path, "w", encoding="utf-8") as f:
+            f.write("\n\n--- PAGE 1 ---\n\nTITLE SHEET\n")
+            f.write("\n\n--- PAGE 2 ---\n\nSIGN SCHEDULE R2-1 SPEED LIMIT\n")
+        
+        self.json_path = os.path.join(project_dir, "plans.json")
+        with open(self.json_path, "w", encoding="utf-8") as f:
+            json.dump({"metadata": {}, "elements": [{
+                "type": "page",
+                "text": "R2-10 MS1-8u CONFIRMATION ASSEMBLY R2-1",
+                "metadata": {"page_number": 2, "text_positions": [
+                    {"text": "R2-10", "x": 0, "y": 0, "width": 30, "height": 8, "confidence": 90},
+                    {"text": "MS1-8u", "x": 10, "y": 20, "width": 30, "height": 8, "confidence": 90},
+                    {"text": "R2-1", "x": 50, "y": 20, "width": 25, "height": 8, "confidence": 90}
+                ]}
+            }]}, f)
+        
+        # Word positions dumped next to the text are not indexed
+        with open(os.path.join(project_dir, "page_2_text_positions.txt"), "w", encoding="utf-8") as f:
+            f.write("R2-1 10 20 30 8 90\n")
+        
+        self.index = PlanSearchIndex(os.path.join(self.tmp_dir.name, "index.db"))
+    
+    def tearDown(self):
+        self.index.close()
+        self.tmp_dir.cleanup()
+    
+    def test_search_sign_codes(self):
+        """Test sign codes are found with page, offset and bounding box"""
+        self.assertEqual(self.index.index_directory(self.tmp_dir.name), (2, 0))
+        
+        hits = sorted(self.index.search("R2-1"), key=lambda hit: hit.file, reverse=True)
+        self.assertEqual(len(hits), 2)
+        self.assertEqual((hits[0].project, hits[0].file, hits[0].page), ("SR-81", "plans.txt", 2))
+        self.assertEqual(hits[0].offset, len("SIGN SCHEDULE "))
+        # The exact word, not the R2-10 before it
+        self.assertEqual(hits[1].bbox, (50, 20, 25, 8))
+        self.assertEqual(hits[1].offset, len("R2-10 MS1-8u CONFIRMATION ASSEMBLY "))
+        
+        hits = self.index.search("ms1-8*")
+        self.assertEqual(hits[0].page, 3)
+        self.assertEqual(hits[0].bbox, (10, 20, 30, 8))
+        
+        # R2 alone is not a token of R2-1
+        self.assertEqual(self.index.search("R2"), [])
+    
+    def test_incremental_indexing(self):
+        """Test unchanged files are skipped and changed files are replaced"""
+        self.assertTrue(self.index.index_file(self.text_path))
+        self.assertFalse(self.index.index_file(self.text_path))
+        
+        with open(self.text_path, "w", encoding="utf-8") as f:
+            f.write("W1-8L CHEVRON ALIGNMENT, NEW REVISION")
+        os.utime(self.text_path, (1, 1))
+        
+        self.assertTrue(self.index.index_file(self.text_path))
+        self.assertEqual(self.index.search("R2-1"), [])
+        self.assertEqual(len(self.index.search("W1-8L")), 1)
+    
+    def test_force_reindexes_directory(self):
+        """Test force re-indexes unchanged files of a directory"""
+        self.assertEqual(self.index.index_directory(self.tmp_dir.name), (2, 0))
+        self.assertEqual(self.index.index_directory(self.tmp_dir.name), (0, 2))
+        self.assertEqual(self.index.index_directory(self.tmp_dir.name, force=True), (2, 0))
+    
+    def test_build_match_query(self):
+        """Test FTS5 operators in terms are quoted"""
+        self.assertEqual(build_match_query('R2-1 MS1-8*'), '"R2-1" "MS1-8"*')
+
+if __name__ == "__main__":
+    unittest.main()
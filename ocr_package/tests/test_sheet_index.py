@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+import fitz
+from ocr.advanced.sheet_index import SheetIndex, build_sheet_index, classify_title_block
+
+class TestSheetIndex(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def _make_pdf(self, title_blocks, rotated=False):
+        path = os.path.join(self.tmp_dir.name, "plans.pdf")
+        doc = fitz.open()
+        for title in title_blocks:
+            if rotated:
+                # Landscape sheet stored as a portrait page with /Rotate 90
+                page = doc.new_page(width=612, height=792)
+                page.set_rotation(90)
+            else:
+                page = doc.new_page(width=792, height=612)
+            # Body text outside the title block must not affect the classification
+            for point, text in [((50, 100), "GENERAL NOTES SIGN SCHEDULE SEE SHEET 9"), ((500, 560), title),
+                                ((500, 590), "SHEET NO. ITS-0" + str(doc.page_count))]:
+                page.insert_text(fitz.Point(point) * page.derotation_matrix, text, rotate=page.rotation)
+        doc.save(path)
+        doc.close()
+        return path
+    
+    def test_classify_title_block(self):
+        """Test sheet number, title and type come from the title-block text"""
+        number, title, kind = classify_title_block("I-4 ATM\nSign  Schedule\nSHEET 12 OF 40")
+        self.assertEqual((number, title, kind), ("12", "SIGN SCHEDULE", "sign_schedule"))
+        
+        number, title, kind = classify_title_block("ROADWAY PLAN\nRDWY-03")
+        self.assertEqual((number, title, kind), ("RDWY-03", "ROADWAY PLAN", "unknown"))
+        
+        # Route IDs are not sheet numbers
+        number, _, _ = classify_title_block("SIGN DETAILS\nSD-04\nSR-81 ATCMTD")
+        self.assertEqual(number, "SD-04")
+        number, _, _ = classify_title_block("SR-81 ATCMTD\nUS 27 CORRIDOR")
+        self.assertEqual(number, "")
+    
+    def test_build_from_text_layer(self):
+        """Test pages are classified from the clipped title block only"""
+        path = self._make_pdf(["TITLE SHEET", "ITS DETAILS", "ROADWAY PLAN", "PANEL SCHEDULE"])
+        index_path = os.path.join(self.tmp_dir.name, "sheet_index.json")
+        index = build_sheet_index(path, index_path)
+        
+        self.assertEqual([s.sheet_type for s in index.sheets],
+                         ["title_sheet", "its_details", "unknown", "panel_schedule"])
+        self.assertEqual(index.get(2).sheet_number, "ITS-02")
+        self.assertTrue(all(s.source == "text" for s in index.sheets))
+        self.assertEqual(index.pages_for(), [2, 4])
+        
+        loaded = SheetIndex.load(index_path)
+        self.assertEqual(loaded, index)
+
+    def test_build_from_rotated_sheets(self):
+        """Test the title block of a rotated sheet is read where it is displayed"""
+        path = self._make_pdf(["ITS DETAILS", "PANEL SCHEDULE"], rotated=True)
+        index = build_sheet_index(path)
+        
+        self.assertEqual([s.sheet_type for s in index.sheets], ["its_details", "panel_schedule"])
+        self.assertEqual(index.get(2).sheet_number, "ITS-02")
+        self.assertTrue(all(s.source == "text" for s in index.sheets))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+from ocr.advanced.document_processor import DocumentElement, StructuredDocument
+from ocr.advanced.stationing import LocationIndex, parse_station, parse_milepost, locate_record
+from ocr.advanced.table_extractor import PlanSpecificationsExtractor
+
+class TestStationParsing(unittest.TestCase):
+    
+    def test_parse_station(self):
+        """Test station strings are normalized to feet"""
+        self.assertEqual(parse_station("STA 123+45"), 12345.0)
+        self.assertEqual(parse_station("sta. 12+34.5"), 1234.5)
+        self.assertEqual(parse_station("1+00"), 100.0)
+        self.assertIsNone(parse_station("PNL-1"))
+    
+    def test_parse_milepost(self):
+        """Test milepost strings and numbers are normalized to miles"""
+        self.assertEqual(parse_milepost("MP 12.5"), 12.5)
+        self.assertEqual(parse_milepost(0.024), 0.024)
+        self.assertEqual(parse_milepost("1.033"), 1.033)
+        self.assertIsNone(parse_milepost("Right"))
+    
+    def test_locate_range(self):
+        """Test station ranges keep their start and end"""
+        self.assertEqual(locate_record({"Station": "STA 100+00 TO 150+00"}),
+                         ("station", 10000.0, 15000.0))
+
+class TestLocationIndex(unittest.TestCase):
+    
+    def setUp(self):
+        self.index = LocationIndex()
+        self.index.add_records([
+            {"Panel": "PNL-1", "Station": "95+00"},
+            {"Panel": "PNL-2", "Station": "120+50"},
+            {"Panel": "PNL-3", "Station": "151+00"},
+        ], project="I-15", source="panel_schedule")
+        self.index.add_records([
+            {"Site": "Site 1", "Location": "STA 90+00 TO 101+00"},
+            {"Site": "Site 2", "Location": "120+40"},
+        ], project="I-15", source="atm_specs")
+        self.index.add_records([
+            {"Sign ID": "1.1", "Milepost": 0.024},
+            {"Sign ID": "3.12", "Milepost": 1.033},
+        ], project="SR-81", source="sign_schedule")
+    
+    def test_range_query(self):
+        """Test range queries return overlapping records in order"""
+        records = self.index.query("STA 100+00", "STA 150+00")
+        self.assertEqual([r.data.get("Panel", r.data.get("Site")) for r in records],
+                         ["Site 1", "Site 2", "PNL-2"])
+        
+        records = self.index.query("MP 1.0", "MP 2.0")
+        self.assertEqual([r.data["Sign ID"] for r in records], ["3.12"])
+    
+    def test_bare_numbers_follow_kind(self):
+        """Test bare number bounds are read in the units of the queried kind"""
+        records = self.index.query("9000", "10000", kind="station")
+        self.assertEqual([r.data.get("Panel", r.data.get("Site")) for r in records], ["Site 1", "PNL-1"])
+        self.assertEqual(len(self.index.query("1", "2", kind="milepost")), 1)
+        self.assertEqual(len(self.index.query(9000, 10000)), 2)
+        with self.assertRaises(ValueError):
+            self.index.query("MP 1.0", "2", kind="station")
+    
+    def test_join(self):
+        """Test joining two sources within a tolerance"""
+        pairs = self.index.join("atm_specs", "panel_schedule", tolerance=20)
+        self.assertEqual([(l.data["Site"], r.data["Panel"]) for l, r in pairs],
+                         [("Site 1", "PNL-1"), ("Site 2", "PNL-2")])
+
+class TestBomJoin(unittest.TestCase):
+    
+    def test_join_generated_bom_rows(self):
+        """Test the per-site sign rows of generate_bom join the panel schedule by station"""
+        sites = ('ATM SITE 1\n"L" 95+10\nATM TYPE 1 SIGN 12\'-6"\n'
+                 'ATM SITE 2\n"L" 120+40\nATM TYPE 2 SIGN 10\'-0"\nCCTV CAMERA (PTZ)\n')
+        panels = ("PROJECT ATCMTD PANEL SCHEDULE\nPNL-1 L STA 95+00 12.5 RT ITS01\n"
+                  "PNL-2 L STA 120+50 8.0 LT ITS02\nPROJECT ATCMTD METER\n")
+        document = StructuredDocument(elements=[
+            DocumentElement(element_type="page", text=text, metadata={"page_number": i, "text_positions": []})
+            for i, text in enumerate([sites, panels])
+        ])
+        extractor = PlanSpecificationsExtractor(document=document)
+        
+        index = LocationIndex()
+        # Rows totalled over the plan set ("Various") have no station
+        self.assertEqual(index.add_dataframe(extractor.generate_bom(), "SR-81", "bom"), 2)
+        index.add_dataframe(extractor.extract_panel_schedule(), "SR-81", "panel_schedule")
+        
+        pairs = index.join("bom", "panel_schedule", tolerance=20)
+        self.assertEqual([(l.data["Item"], l.data["Location"], r.data["Panel"]) for l, r in pairs],
+                         [("ATM Sign Type 1", "Site 1", "PNL-1"), ("ATM Sign Type 2", "Site 2", "PNL-2")])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import tempfile
+import unittest
+from ocr.advanced.document_processor import DocumentElement, StructuredDocument
+from ocr.advanced.table_extractor import PlanDocument, PlanSpecificationsExtractor
+
+class TestPlanDocument(unittest.TestCase):
+    
+    def test_from_directory_loads_all_pages(self):
+        """Test every page positions file is loaded, not only pages 1-4"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            texts_dir = os.path.join(tmp_dir, "texts")
+            os.makedirs(texts_dir)
+            with open(os.path.join(texts_dir, "page_7_text_positions.txt"), "w", encoding="utf-8") as f:
+                f.write("Text: ATM, Position: (10, 20), Size: 30x8, Confidence: 91\n")
+            with open(os.path.join(texts_dir, "plans_text_optimized.txt"), "w", encoding="utf-8") as f:
+                f.write("CCTV CAMERA (PTZ)")
+            
+            document = PlanDocument.from_directory(tmp_dir)
+        
+        self.assertEqual([page.number for page in document.pages], [7])
+        self.assertEqual(document.pages[0].elements[0].text, "ATM")
+        self.assertEqual(document.full_text, "CCTV CAMERA (PTZ)")
+    
+    def test_extractor_accepts_structured_document(self):
+        """Test the extractor works from a StructuredDocument without text files"""
+        document = StructuredDocument(elements=[
+            DocumentElement(element_type="page", text="PROJECT ATCMTD PANEL SCHEDULE\n"
+                            "PNL-1 L STA 123+45 12.5 RT ITS01\nPROJECT ATCMTD METER\n"
+                            "RADAR DETECTOR SYSTEM",
+                            metadata={"page_number": 0, "text_positions": []})
+        ])
+        extractor = PlanSpecificationsExtractor(document=document)
+        
+        panels = extractor.extract_panel_schedule()
+        self.assertEqual(panels.iloc[0]["Station Value"], 12345.0)
+        
+        bom = extractor.generate_bom()
+        self.assertEqual(list(bom["Item"]), ["Panel Board", "Radar Detector System"])
+
+if __name__ == "__main__":
+    unittest.main()
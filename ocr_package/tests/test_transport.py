@@ -0,0 +1,151 @@
+import pickle
+import unittest
+import numpy as np
+from ocr.core.pipeline import PagePipeline
+from ocr.core.transport import (
+    RasterSlab, SlabRaster, SharedPage, write_raster, open_raster, release_raster, write_columns,
+    read_columns, free_columns, share_page, open_shared_page, release_shared_page,
+    encode_strings, decode_strings
+)
+from ocr.advanced.document_processor import DocumentElement, pack_page_elements, unpack_page_elements
+from ocr.advanced.positions_format import RECORD_DTYPE
+
+def render_sized(task):
+    # Every third page is too large for a 20 x 30 slot
+    shape = (40, 30) if task % 3 == 2 else (20, 30)
+    return np.full(shape, task, dtype=np.uint8), {"page": task}
+
+def read_shape(image, meta, task):
+    return int(image[0, 0]), image.shape
+
+def read_elements(image, meta, task):
+    positions = [{'text': f'W{task}', 'x': task, 'y': 1, 'width': 2, 'height': 3, 'confidence': 90}]
+    return pack_page_elements([DocumentElement("page", f"page {task}", metadata={"text_positions": positions})])
+
+class TestSharedPages(unittest.TestCase):
+
+    def test_round_trip(self):
+        """Test a raster is read back in place from its shared memory handle"""
+        image = np.arange(60, dtype=np.uint16).reshape(6, 10)
+        handle = share_page(image)
+        try:
+            self.assertEqual(handle.shape, (6, 10))
+            self.assertEqual(handle.nbytes, image.nbytes)
+            with open_shared_page(handle) as shared:
+                np.testing.assert_array_equal(shared, image)
+        finally:
+            release_shared_page(handle)
+        # Released blocks are gone, and releasing twice is harmless
+        release_shared_page(handle)
+        with self.assertRaises(FileNotFoundError):
+            with open_shared_page(handle):
+                pass
+
+    def test_handle_is_small(self):
+        """Test only the handle, not the pixels, is pickled"""
+        handle = share_page(np.zeros((1000, 1000), dtype=np.uint8))
+        try:
+            self.assertLess(len(pickle.dumps(handle)), 200)
+        finally:
+            release_shared_page(handle)
+
+class TestRasterSlab(unittest.TestCase):
+
+    def test_slots(self):
+        """Test slots are handed out once each and returned on release"""
+        with RasterSlab(2, 100) as slab:
+            first, second = slab.acquire(), slab.acquire()
+            self.assertEqual((first.index, second.index), (0, 1))
+            self.assertEqual(second.offset, slab.slot_bytes)
+            self.assertGreaterEqual(slab.slot_bytes, 100)
+            with self.assertRaises(IndexError):
+                slab.acquire()
+            slab.release(first)
+            with self.assertRaises(ValueError):
+                slab.release(first)
+            self.assertEqual(slab.acquire().index, 0)
+
+    def test_write_and_open(self):
+        """Test a raster written to a slot is read back in place"""
+        image = np.arange(200, dtype=np.uint8).reshape(10, 20)
+        with RasterSlab(2, image.nbytes) as slab:
+            slab.acquire()
+            handle = write_raster(slab.acquire(), image)
+            self.assertIsInstance(handle, SlabRaster)
+            self.assertEqual(handle.nbytes, image.nbytes)
+            with open_raster(handle) as shared:
+                np.testing.assert_array_equal(shared, image)
+            release_raster(handle, slab)
+            self.assertEqual(slab.available, 1)
+
+    def test_oversized_raster_gets_own_block(self):
+        """Test a raster larger than its slot falls back to a block of its own"""
+        image = np.ones((10, 20), dtype=np.uint8)
+        with RasterSlab(1, 64) as slab:
+            handle = write_raster(slab.acquire(), image)
+            self.assertIsInstance(handle, SharedPage)
+            with open_raster(handle) as shared:
+                np.testing.assert_array_equal(shared, image)
+            release_raster(handle, slab)
+
+class TestColumns(unittest.TestCase):
+
+    def test_round_trip(self):
+        """Test plain, structured and empty columns come back intact and the block is freed"""
+        records = np.zeros(3, dtype=RECORD_DTYPE)
+        records['x'] = [1, 2, 3]
+        records['confidence'] = [90.5, 80, 70]
+        blob, spans = encode_strings(["SIGN", "", "ÉCLAIRAGE"])
+        handle = write_columns({"records": records, "strings": blob, "spans": spans,
+                                "empty": np.zeros(0, dtype=np.int64)})
+        self.assertLess(len(pickle.dumps(handle)), 1000)
+
+        columns = read_columns(handle)
+        np.testing.assert_array_equal(columns["records"], records)
+        self.assertEqual(columns["records"].dtype, RECORD_DTYPE)
+        self.assertEqual(decode_strings(columns["strings"], columns["spans"]), ["SIGN", "", "ÉCLAIRAGE"])
+        self.assertEqual(columns["empty"].shape, (0,))
+        with self.assertRaises(FileNotFoundError):
+            read_columns(handle)
+        free_columns(handle)
+
+    def test_pack_page_elements(self):
+        """Test page elements survive the columnar transport unchanged"""
+        positions = [{'text': 'ATM', 'x': 10, 'y': 20, 'width': 30, 'height': 12, 'confidence': 91},
+                     {'text': 'SIGN', 'x': 45, 'y': 20, 'width': 40, 'height': 12, 'confidence': 0}]
+        elements = [
+            DocumentElement("page", "ATM SIGN", metadata={"page_number": 3, "text_positions": positions,
+                                                           "rotation": 90}),
+            DocumentElement("page", "", metadata={"page_number": 4, "text_positions": []}),
+            DocumentElement("table", "QTY", confidence=0.5, metadata={"cells": 4}),
+        ]
+        expected = pickle.loads(pickle.dumps(elements))
+
+        packed = pack_page_elements(elements)
+        # The per-element fields left to pickle carry no words
+        self.assertNotIn(b"ATM", pickle.dumps(packed))
+        unpacked = unpack_page_elements(pickle.loads(pickle.dumps(packed)))
+        self.assertEqual(unpacked, expected)
+        self.assertEqual(list(unpacked[0].metadata), ["page_number", "text_positions", "rotation"])
+        self.assertIsInstance(unpacked[0].metadata["text_positions"][0]["confidence"], int)
+
+class TestSlabPipeline(unittest.TestCase):
+
+    def test_slab_pipeline(self):
+        """Test pages go through slab slots, oversized ones through blocks of their own"""
+        pipeline = PagePipeline(render_sized, read_shape, render_workers=2, ocr_workers=2,
+                                slot_bytes=20 * 30)
+        results = pipeline.run(range(9))
+        self.assertEqual(results, [(i, (40, 30) if i % 3 == 2 else (20, 30)) for i in range(9)])
+        self.assertEqual(pipeline.stats["slot_bytes"] % 64, 0)
+
+    def test_collect_columnar_results(self):
+        """Test columnar results are read back in this process as they arrive"""
+        pipeline = PagePipeline(render_sized, read_elements, slot_bytes=20 * 30,
+                                collect=unpack_page_elements)
+        results = pipeline.run(range(3))
+        self.assertEqual([elements[0].text for elements in results], ["page 0", "page 1", "page 2"])
+        self.assertEqual(results[2][0].metadata["text_positions"][0]["x"], 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import os
+import time
+import shutil
+import tempfile
+import unittest
+import fitz
+from ocr.batch.processors import scan_pdfs
+from ocr.batch.watch import FolderWatcher, is_complete_pdf, watch_output_path, is_up_to_date
+
+def pdf_bytes(pages=1):
+    doc = fitz.open()
+    for _ in range(pages):
+        doc.new_page(width=72, height=72)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+def wait_ready(watcher, seconds=5.0):
+    """Poll the watcher until it reports something or the time runs out"""
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        ready = watcher.poll(timeout=0.1)
+        if ready:
+            return ready
+    return []
+
+class TestScanPdfs(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_scan_recurses_and_skips_hidden(self):
+        """Test PDFs in subdirectories are found and hidden entries are not"""
+        for path in ("a.pdf", "sub/b.PDF", "sub/deeper/c.pdf", "sub/notes.txt", ".parts/d.pdf"):
+            os.makedirs(os.path.dirname(os.path.join(self.tmp, path)), exist_ok=True)
+            with open(os.path.join(self.tmp, path), "wb") as f:
+                f.write(b"%PDF")
+        found = [os.path.relpath(p, self.tmp) for p in scan_pdfs(self.tmp)]
+        self.assertEqual(found, ["a.pdf", os.path.join("sub", "b.PDF"), os.path.join("sub", "deeper", "c.pdf")])
+        self.assertEqual([os.path.basename(p) for p in scan_pdfs(self.tmp, recursive=False)], ["a.pdf"])
+
+class FolderWatcherMixin:
+    use_inotify = None
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.watcher = FolderWatcher(self.tmp, settle_seconds=0.3, poll_seconds=0.1, use_inotify=self.use_inotify)
+
+    def tearDown(self):
+        self.watcher.close()
+        shutil.rmtree(self.tmp)
+
+    def test_partial_file_waits_until_complete(self):
+        """Test a PDF being written is reported only once it is whole and settled"""
+        path = os.path.join(self.tmp, "plans.pdf")
+        data = pdf_bytes(3)
+        with open(path, "wb") as f:
+            f.write(data[:len(data) // 2])
+        self.assertEqual(self.watcher.poll(timeout=0.1), [])
+        self.assertFalse(is_complete_pdf(path))
+        with open(path, "ab") as f:
+            f.write(data[len(data) // 2:])
+        self.assertEqual(wait_ready(self.watcher), [path])
+        # Reported once until it changes again
+        self.assertEqual(wait_ready(self.watcher, 0.8), [])
+        time.sleep(0.01)
+        with open(path, "wb") as f:
+            f.write(pdf_bytes(4))
+        self.assertEqual(wait_ready(self.watcher), [path])
+
+    def test_new_subdirectory_is_watched(self):
+        """Test files landing in a directory created after the watch started are found"""
+        subdirectory = os.path.join(self.tmp, "2024", "march")
+        os.makedirs(subdirectory)
+        path = os.path.join(subdirectory, "sheet.pdf")
+        with open(path, "wb") as f:
+            f.write(pdf_bytes())
+        self.assertEqual(wait_ready(self.watcher), [path])
+
+    def test_existing_files_are_reported(self):
+        """Test files present at startup are reported after settling"""
+        self.watcher.close()
+        path = os.path.join(self.tmp, "old.pdf")
+        with open(path, "wb") as f:
+            f.write(pdf_bytes())
+        self.watcher = FolderWatcher(self.tmp, settle_seconds=0.3, poll_seconds=0.1, use_inotify=self.use_inotify)
+        self.assertEqual(wait_ready(self.watcher), [path])
+
+class TestFolderWatcherInotify(FolderWatcherMixin, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        if self.watcher.mode != "inotify":
+            self.skipTest("inotify unavailable")
+
+class TestFolderWatcherPolling(FolderWatcherMixin, unittest.TestCase):
+    use_inotify = False
+
+class TestWatchOutputs(unittest.TestCase):
+
+    def test_output_path_mirrors_subdirectories(self):
+        """Test outputs keep the watched tree's layout under the output directory"""
+        self.assertEqual(watch_output_path("/in/a/b.pdf", "/in", "/out"), os.path.join("/out", "a", "b.txt"))
+        self.assertEqual(watch_output_path("/in/a/b.pdf", "/in"), "/in/a/b.txt")
+
+    def test_up_to_date(self):
+        """Test a PDF newer than its output is processed again"""
+        tmp = tempfile.mkdtemp()
+        try:
+            pdf_path, output_path = os.path.join(tmp, "a.pdf"), os.path.join(tmp, "a.txt")
+            self.assertFalse(is_up_to_date(pdf_path, output_path))
+            for path in (pdf_path, output_path):
+                with open(path, "w") as f:
+                    f.write("x")
+            os.utime(pdf_path, (1000, 1000))
+            self.assertTrue(is_up_to_date(pdf_path, output_path))
+            os.utime(pdf_path, None)
+            os.utime(output_path, (1000, 1000))
+            self.assertFalse(is_up_to_date(pdf_path, output_path))
+        finally:
+            shutil.rmtree(tmp)
+
+if __name__ == '__main__':
+    unittest.main()
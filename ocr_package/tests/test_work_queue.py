@@ -0,0 +1,144 @@
+import os
+import time
+import shutil
+import tempfile
+import unittest
+import multiprocessing
+import fitz
+from ocr.batch.work_queue import WorkQueue, run_worker, part_path
+
+def fake_extract(unit):
+    # Stands in for OCR: the page markers extract_text_from_pdf emits, and a line per page
+    time.sleep(0.02)
+    name = os.path.basename(unit.pdf_path)
+    return "".join(f"\n\n--- PAGE {page} ---\n\n{name} page {page}"
+                   for page in range(unit.start_page, unit.end_page + 1))
+
+def expected_text(pdf_path, pages):
+    name = os.path.basename(pdf_path)
+    return "".join(f"\n\n--- PAGE {page} ---\n\n{name} page {page}" for page in range(1, pages + 1))
+
+def work(db_path, worker_id, lease_seconds):
+    queue = WorkQueue(db_path, lease_seconds=lease_seconds)
+    run_worker(queue, worker_id=worker_id, poll_seconds=0.05, extract=fake_extract)
+    queue.close()
+
+class TestWorkQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp, "queue.db")
+        self.output_dir = os.path.join(self.tmp, "out")
+        self.pdfs = {}
+        for name, pages in (("a.pdf", 5), ("b.pdf", 3)):
+            path = os.path.join(self.tmp, name)
+            doc = fitz.open()
+            for _ in range(pages):
+                doc.new_page(width=72, height=72)
+            doc.save(path)
+            doc.close()
+            self.pdfs[path] = pages
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def submit(self, queue, unit_pages=2):
+        return queue.submit(list(self.pdfs), output_dir=self.output_dir, unit_pages=unit_pages, dpi=150)
+
+    def output(self, pdf_path):
+        with open(os.path.join(self.output_dir, os.path.basename(pdf_path)[:-4] + ".txt")) as f:
+            return f.read()
+
+    def test_submit_splits_files_into_units(self):
+        """Test each file is split into page ranges and resubmitting adds nothing"""
+        with WorkQueue(self.db_path) as queue:
+            self.assertEqual(self.submit(queue), 5)  # 1-2, 3-4, 5 and 1-2, 3
+            self.assertEqual(self.submit(queue), 0)
+            unit = queue.claim("w1")
+            self.assertEqual((unit.start_page, unit.end_page, unit.attempts), (1, 2, 1))
+            self.assertEqual(unit.options, {"dpi": 150})
+
+    def test_expired_lease_is_reclaimed(self):
+        """Test a unit whose lease is not renewed goes to the next worker"""
+        with WorkQueue(self.db_path, lease_seconds=0.2) as queue:
+            self.submit(queue, unit_pages=5)
+            first = queue.claim("w1")
+            second = queue.claim("w2")
+            self.assertNotEqual(first.id, second.id)
+            self.assertIsNone(queue.claim("w2"))
+
+            time.sleep(0.3)
+            self.assertTrue(queue.heartbeat(second, "w2"))
+            reclaimed = queue.claim("w2")
+            self.assertEqual((reclaimed.id, reclaimed.attempts), (first.id, 2))
+            # The first worker's late result is refused
+            self.assertFalse(queue.heartbeat(first, "w1"))
+            self.assertFalse(queue.complete(first, "w1", 1.0))
+            self.assertTrue(queue.complete(reclaimed, "w2", 1.0))
+
+    def test_unit_fails_after_max_attempts(self):
+        """Test a unit failing every attempt fails its file instead of looping"""
+        with WorkQueue(self.db_path, max_attempts=2) as queue:
+            queue.submit([next(iter(self.pdfs))], output_dir=self.output_dir, unit_pages=10)
+            for _ in range(2):
+                unit = queue.claim("w1")
+                queue.fail(unit, "w1", "OCR failed")
+            self.assertIsNone(queue.claim("w1"))
+            self.assertIsNone(queue.claim_assembly("w1"))
+            self.assertEqual(queue.status()["files"], {"failed": 1})
+            self.assertEqual(queue.outstanding(), 0)
+
+    def test_workers_assemble_outputs(self):
+        """Test several worker processes drain the queue and assemble each file once"""
+        with WorkQueue(self.db_path) as queue:
+            self.submit(queue)
+        workers = [multiprocessing.Process(target=work, args=(self.db_path, f"w{i}", 30)) for i in range(3)]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join(60)
+            self.assertEqual(process.exitcode, 0)
+
+        for pdf_path, pages in self.pdfs.items():
+            self.assertEqual(self.output(pdf_path), expected_text(pdf_path, pages))
+        with WorkQueue(self.db_path) as queue:
+            status = queue.status()
+            self.assertEqual(status["units"], {"done": 5})
+            self.assertEqual(status["files"], {"done": 2})
+            self.assertEqual(sum(w["units_done"] for w in status["workers"]), 5)
+            attempts = queue.conn.execute("SELECT MAX(attempts) FROM units").fetchone()[0]
+        self.assertEqual(attempts, 1)
+        self.assertEqual(os.listdir(os.path.join(self.output_dir, ".parts")), [])
+
+    def test_crashed_worker_unit_is_redone(self):
+        """Test a unit held by a dead worker is reclaimed once its lease expires"""
+        with WorkQueue(self.db_path, lease_seconds=0.3) as queue:
+            self.submit(queue)
+            abandoned = queue.claim("crashed")
+            counts = run_worker(queue, worker_id="w1", poll_seconds=0.05, extract=fake_extract)
+            self.assertEqual(counts["done"], 5)
+            self.assertEqual(counts["assembled"], 2)
+            attempts = queue.conn.execute("SELECT attempts FROM units WHERE id = ?", (abandoned.id,)).fetchone()[0]
+            self.assertEqual(attempts, 2)
+        for pdf_path, pages in self.pdfs.items():
+            self.assertEqual(self.output(pdf_path), expected_text(pdf_path, pages))
+
+    def test_missing_part_is_redone(self):
+        """Test assembly requeues a unit whose part file disappeared"""
+        with WorkQueue(self.db_path) as queue:
+            queue.submit([next(iter(self.pdfs))], output_dir=self.output_dir, unit_pages=2)
+            for _ in range(3):
+                unit = queue.claim("w1")
+                os.makedirs(os.path.dirname(unit.part_path), exist_ok=True)
+                with open(unit.part_path, "w") as f:
+                    f.write(fake_extract(unit))
+                queue.complete(unit, "w1", 0.1)
+            os.remove(part_path(os.path.join(self.output_dir, "a.txt"), 3, 4))
+
+            counts = run_worker(queue, worker_id="w2", poll_seconds=0.05, extract=fake_extract)
+            self.assertEqual((counts["done"], counts["assembled"]), (1, 1))
+        pdf_path = next(iter(self.pdfs))
+        self.assertEqual(self.output(pdf_path), expected_text(pdf_path, 5))
+
+if __name__ == '__main__':
+    unittest.main()